@@ -5,4 +5,70 @@ DB_NAME = 'colegio.db'
 
 # Configuración de la institución
 SCHOOL_NAME = "Colegio Ejemplo"
-LOGO_PATH = "logo.png"  # Ruta al logo del colegio (puede usarse en la interfaz)
\ No newline at end of file
+LOGO_PATH = "logo.png"  # Ruta al logo del colegio (puede usarse en la interfaz)
+
+# Carpeta donde se archivan los recibos PDF generados (almacenamiento por contenido)
+RECEIPTS_DIR = "receipts"
+# Numeración de los recibos: "day" reinicia cada día (AAAAMMDD-NNNN), "year" cada año (AAAA-NNNNNN)
+RECEIPT_SEQUENCE_SCOPE = "day"
+
+# Respaldos y mantenimiento de la base de datos
+BACKUP_DIR = "backups"          # Carpeta donde se guardan las copias de la base de datos
+BACKUP_RETENTION = 10           # Cantidad de copias que se conservan
+BACKUP_INTERVAL_HOURS = 24      # Frecuencia del respaldo automático
+OPTIMIZE_INTERVAL_HOURS = 168   # Frecuencia de VACUUM/ANALYZE automático (semanal)
+
+# Acceso concurrente desde varios equipos a la misma base de datos
+DB_BUSY_TIMEOUT = 10            # Segundos que SQLite espera un bloqueo antes de fallar
+DB_WRITE_RETRIES = 5            # Reintentos de una escritura cuando la base está bloqueada
+DB_RETRY_BASE_DELAY = 0.05      # Espera inicial (segundos) del reintento; se duplica en cada intento
+
+# Servicio local HTTP/JSON (python main.py --serve)
+API_HOST = "127.0.0.1"          # Use "0.0.0.0" para aceptar conexiones de otros equipos de la red
+API_PORT = 8765
+API_READ_CONNECTIONS = 4        # Conexiones de lectura en el pool
+API_TOKEN = None                # Si se define, las solicitudes deben enviar "Authorization: Bearer <token>"
+
+# Archivo de años escolares cerrados (una base SQLite por año)
+ARCHIVE_DIR = "archive"
+
+# Fuente Unicode de los PDF: por estilo, la primera ruta que exista. Si no se encuentra
+# ninguna se usa la fuente Arial integrada de FPDF, que solo admite caracteres latin-1.
+PDF_FONTS = {
+    "": ["assets/fonts/DejaVuSans.ttf", "C:/Windows/Fonts/arial.ttf",
+         "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/Library/Fonts/Arial.ttf"],
+    "B": ["assets/fonts/DejaVuSans-Bold.ttf", "C:/Windows/Fonts/arialbd.ttf",
+          "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", "/Library/Fonts/Arial Bold.ttf"],
+}
+
+# Monitor de respuesta de la interfaz (Ctrl+F12 muestra u oculta el panel de latencia)
+UI_MONITOR = True               # Mide cuánto bloquea la interfaz cada manejador de eventos
+UI_SLOW_HANDLER_MS = 100        # Los manejadores que bloquean más que esto se registran en el log
+UI_HEARTBEAT_MS = 100           # Intervalo del latido que detecta congelamientos del bucle principal
+UI_STALL_MS = 250               # Retraso del latido a partir del cual se registra un congelamiento
+UI_MONITOR_OVERLAY = False      # Muestra el panel de latencia al abrir cada ventana principal
+UI_SUMMARY_SIZE = 10            # Manejadores más lentos que se listan al cerrar la sesión
+
+# Sedes del colegio: cada una con su propia base de datos y datos de la institución.
+# Si hay más de una, la sede se elige al iniciar sesión y los administradores pueden cambiarla.
+CAMPUSES = {
+    "principal": {"name": "Sede Principal", "db": DB_NAME, "school_name": SCHOOL_NAME, "logo": LOGO_PATH},
+}
+DEFAULT_CAMPUS = "principal"
+
+# Base consolidada de todas las sedes para los reportes de la sede central
+CONSOLIDATED_DB = "consolidado.db"
+
+# Envío de recibos y estados de cuenta por correo a los acudientes. Por defecto apunta a un
+# receptor SMTP local de prueba (python -m src.utils.smtp_sink --port 1025).
+SMTP_HOST = "localhost"
+SMTP_PORT = 1025
+SMTP_USER = None                # Si se define, se autentica con SMTP_USER/SMTP_PASSWORD
+SMTP_PASSWORD = None
+SMTP_STARTTLS = False           # True para servidores que exigen STARTTLS (puerto 587)
+SMTP_TIMEOUT = 30               # Segundos de espera de cada respuesta del servidor
+SMTP_SENDER = "Colegio Ejemplo <colegio@example.com>"
+DELIVERY_BATCH_SIZE = 50        # Correos que se toman de la cola en cada lote
+DELIVERY_MAX_ATTEMPTS = 5       # Intentos antes de marcar un correo como fallido
+DELIVERY_RETRY_SECONDS = 60     # Espera antes del primer reintento; se duplica en cada intento
+DELIVERY_STALE_MINUTES = 15     # Correos "enviando" más tiempo que esto vuelven a la cola (equipo caído)
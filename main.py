@@ -1,21 +1,80 @@
+import argparse
 from src.views.login_ui import LoginUI
-from src.models.database import Database
-from config import DB_NAME, SCHOOL_NAME, LOGO_PATH
+from src.models.tenant_registry import TenantRegistry
+from config import CAMPUSES, DEFAULT_CAMPUS
 from src.controllers.config_controller import ConfigController
+from src.controllers.maintenance_controller import MaintenanceController
+from src.controllers.consolidation_controller import ConsolidationController
+from src.utils.mailer import deliver_pending
+from src.models.campus import Campus
+from src.models.migrations import run_migrations
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.course_controller import CourseController
+from src.utils.ui_monitor import get_ui_monitor
 from src.logger import logger  # Import our custom logger
 
-def main():
-    logger.info("Inicializando la aplicación...")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sistema de pagos del colegio")
+    parser.add_argument("--backup", action="store_true",
+                        help="Crea un respaldo de la base de datos y termina, sin abrir la interfaz")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Ejecuta VACUUM/ANALYZE/PRAGMA optimize y termina, sin abrir la interfaz")
+    parser.add_argument("--scheduled-maintenance", action="store_true",
+                        help="Ejecuta solo las tareas de mantenimiento pendientes (para cron o el programador de tareas)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Inicia el servicio local HTTP/JSON en lugar de la interfaz gráfica")
+    parser.add_argument("--consolidate", action="store_true",
+                        help="Copia lo nuevo de todas las sedes a la base consolidada y termina")
+    parser.add_argument("--deliver", action="store_true",
+                        help="Envía los correos pendientes a los acudientes y termina (para cron o el programador de tareas)")
+    parser.add_argument("--campus", default=DEFAULT_CAMPUS, choices=sorted(CAMPUSES),
+                        help="Sede sobre la que se trabaja (la interfaz permite elegir otra al iniciar sesión)")
+    return parser.parse_args()
+
+def run_maintenance(db, args):
+    """
+    Ejecuta las tareas de mantenimiento pedidas por línea de comandos.
+    Retorna True si se pidió alguna tarea (y por lo tanto no se debe abrir la interfaz).
+    """
+    maintenance = MaintenanceController(db)
+    results = []
+    if args.backup:
+        success, msg, _ = maintenance.backup()
+        results.append(("backup", success, msg))
+    if args.optimize:
+        success, msg, _ = maintenance.optimize()
+        results.append(("optimize", success, msg))
+    if args.scheduled_maintenance:
+        results.extend(maintenance.run_scheduled())
+    if args.consolidate:
+        consolidation = ConsolidationController(Campus.from_config(key, settings) for key, settings in CAMPUSES.items())
+        success, msg, _ = consolidation.sync_all()
+        consolidation.close()
+        results.append(("consolidate", success, msg))
+    if args.deliver:
+        summary = deliver_pending(db)
+        results.append(("deliver", True, f"{summary['sent']} correos enviados, {summary['retry']} por reintentar, "
+                                         f"{summary['failed']} fallidos."))
+    for task, success, msg in results:
+        print(f"[{task}] {msg}")
+    return bool(args.backup or args.optimize or args.scheduled_maintenance or args.consolidate or args.deliver)
 
-    # Inicializa la base de datos y crea las tablas, incluyendo la tabla de configuración
-    db = Database(DB_NAME)
+def prepare_campus(db, campus):
+    """
+    Prepara la base de datos de una sede la primera vez que se abre en el proceso: migra en
+    una sola transacción las tablas de versiones anteriores, crea las tablas, los usuarios de
+    prueba y la configuración predeterminada, y ejecuta una vez las consultas más usadas para
+    que queden compiladas en la caché de sentencias de la conexión.
+    """
     db.create_tables()
-    
+    db.write(run_migrations)
+
     # Inserta usuarios de prueba, si no existen
     cursor = db.cursor
     cursor.execute("SELECT COUNT(*) FROM users")
     if cursor.fetchone()[0] == 0:
-        logger.info("Insertando usuarios de prueba.")
+        logger.info(f"Insertando usuarios de prueba en la sede {campus.name}.")
         cursor.execute(
             "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
             ("admin", "admin", "admin")
@@ -25,18 +84,50 @@ def main():
             ("operador", "operador", "operator")
         )
         db.connection.commit()
-    
+
     # Inicializa la configuración predeterminada en la tabla config si aún no existe
     config_ctrl = ConfigController(db)
     config_ctrl.initialize_default_configs({
-        "SCHOOL_NAME": SCHOOL_NAME,
-        "LOGO_PATH": LOGO_PATH
+        "SCHOOL_NAME": campus.school_name,
+        "LOGO_PATH": campus.logo_path
     })
+
+    # Consultas por llave con valores que no existen: solo se compilan
+    student_ctrl = StudentController(db)
+    student_ctrl.get_student_by_identification("")
+    student_ctrl.get_student_by_id(-1)
+    payment_ctrl = PaymentController(db)
+    payment_ctrl.get_payments_page(-1)
+    payment_ctrl.get_payment_by_id(-1)
+    CourseController(db).get_course_names()
+    config_ctrl.get_all_configs()
+
+def main():
+    args = parse_args()
+    logger.info("Inicializando la aplicación...")
+
+    # Cada sede tiene su propia base de datos; se abre y prepara la primera vez que se usa
+    registry = TenantRegistry(CAMPUSES, setup=prepare_campus)
+    db = registry.connect(args.campus)
     logger.info("Configuración inicializada.")
 
+    # Modo sin interfaz: tareas de mantenimiento
+    if run_maintenance(db, args):
+        return
+
+    # Modo servicio: API HTTP/JSON para clientes livianos
+    if args.serve:
+        from src.api.api_server import serve
+        registry.close()
+        serve(registry.get(args.campus).db_name)
+        return
+
     # Lanza la ventana de login
-    login_window = LoginUI(db)
+    login_window = LoginUI(db, registry, args.campus)
     login_window.run()
+    # Resumen de los manejadores más lentos de la última sesión
+    get_ui_monitor().end_session()
+    registry.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
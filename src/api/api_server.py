@@ -0,0 +1,351 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+import traceback
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from config import API_HOST, API_PORT, API_READ_CONNECTIONS, API_TOKEN
+from src.logger import logger
+from src.models.connection_pool import ConnectionPool
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.course_controller import CourseController
+from src.controllers.config_controller import ConfigController
+from src.controllers.change_log_controller import ChangeLogController
+from src.controllers.duplicate_controller import DuplicateController
+from src.utils.export_students import export_students_to_excel, export_students_to_pdf
+from src.utils.money import to_cents
+
+# Cantidad de duraciones recientes que se conservan por ruta para las métricas
+METRICS_WINDOW = 1000
+
+# Usuario con el que se registran en la bitácora los cambios hechos por la API
+API_USERNAME = "api"
+
+def create_controllers(db):
+    """Controladores asociados a cada conexión del pool (se crean una sola vez por conexión)."""
+    db.username = API_USERNAME
+    return {
+        "students": StudentController(db),
+        "payments": PaymentController(db),
+        "courses": CourseController(db),
+        "config": ConfigController(db),
+        "changes": ChangeLogController(db),
+        "duplicates": DuplicateController(db),
+    }
+
+def record_to_dict(record):
+    """Convierte un registro con __slots__ (Student, Payment, Course...) en un diccionario serializable."""
+    return {name: getattr(record, name) for name in type(record).COLUMNS}
+
+class RequestMetrics:
+    """Latencia de las solicitudes atendidas, agrupadas por ruta."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._counts = {}
+        self._errors = {}
+
+    def record(self, route, seconds, failed=False):
+        with self._lock:
+            self._durations.setdefault(route, deque(maxlen=METRICS_WINDOW)).append(seconds)
+            self._counts[route] = self._counts.get(route, 0) + 1
+            if failed:
+                self._errors[route] = self._errors.get(route, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            result = {}
+            for route, durations in self._durations.items():
+                ordered = sorted(durations)
+                result[route] = {
+                    "count": self._counts[route],
+                    "errors": self._errors.get(route, 0),
+                    "avg_ms": sum(ordered) / len(ordered) * 1000,
+                    "p50_ms": ordered[len(ordered) // 2] * 1000,
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return result
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    # (método, patrón, nombre del manejador, requiere la conexión de escritura)
+    ROUTES = [
+        ("GET", r"/api/students", "list_students", False),
+        ("GET", r"/api/students/(?P<identificacion>[^/]+)", "get_student", False),
+        ("GET", r"/api/students/(?P<identificacion>[^/]+)/payments", "list_payments", False),
+        ("GET", r"/api/payments/(?P<payment_id>\d+)", "get_payment", False),
+        ("GET", r"/api/receipts/(?P<receipt_code>[^/]+)", "get_payment_by_receipt", False),
+        ("GET", r"/api/courses", "list_courses", False),
+        ("GET", r"/api/reports/students\.(?P<fmt>xlsx|pdf)", "students_report", False),
+        ("GET", r"/api/changes", "list_changes", False),
+        ("GET", r"/api/changes/(?P<table>\w+)/(?P<pk>[^/]+)", "row_history", False),
+        ("GET", r"/api/metrics", "metrics", False),
+        ("POST", r"/api/students", "register_student", True),
+        ("POST", r"/api/students/duplicates", "check_duplicates", False),
+        ("POST", r"/api/students/(?P<identificacion>[^/]+)/deactivate", "deactivate_student", True),
+        ("POST", r"/api/payments", "register_payment", True),
+        ("POST", r"/api/courses", "add_course", True),
+        ("PUT", r"/api/courses/(?P<course_id>\d+)", "edit_course", True),
+        ("POST", r"/api/courses/(?P<course_id>\d+)/deactivate", "deactivate_course", True),
+    ]
+    COMPILED_ROUTES = [(method, re.compile(pattern + r"$"), name, writes) for method, pattern, name, writes in ROUTES]
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("API %s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def dispatch(self, method):
+        start = time.perf_counter()
+        parsed = urlparse(self.path)
+        route_name = "unknown"
+        failed = False
+        try:
+            if API_TOKEN and self.headers.get("Authorization") != f"Bearer {API_TOKEN}":
+                raise ApiError(401, "No autorizado.")
+            for route_method, pattern, name, writes in self.COMPILED_ROUTES:
+                match = pattern.match(parsed.path)
+                if route_method == method and match:
+                    route_name = f"{method} {name}"
+                    params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                    handler = getattr(self, name)
+                    pool = self.server.pool
+                    connection = pool.writer_connection() if writes else pool.reader()
+                    with connection as db:
+                        status, body = handler(db.context, params, **match.groupdict())
+                    break
+            else:
+                raise ApiError(404, "Ruta no encontrada.")
+        except ApiError as e:
+            failed = True
+            status, body = e.status, {"error": e.message}
+        except Exception as e:
+            failed = True
+            logger.error("Error en la API:\n" + traceback.format_exc())
+            status, body = 500, {"error": str(e)}
+        self.send_body(status, body)
+        self.server.metrics.record(route_name, time.perf_counter() - start, failed or status >= 400)
+
+    def send_body(self, status, body):
+        if isinstance(body, tuple):
+            content_type, payload = body
+        else:
+            content_type, payload = "application/json; charset=utf-8", json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise ApiError(400, "El cuerpo de la solicitud no es JSON válido.")
+
+    def result(self, success, msg, **extra):
+        body = {"success": success, "message": msg}
+        body.update(extra)
+        return (200 if success else 400), body
+
+    # --- Lecturas ---
+
+    def list_students(self, controllers, params):
+        students = controllers["students"].get_all_students()
+        query = params.get("q", "").lower().strip()
+        if query:
+            students = [s for s in students
+                        if query in str(s.identificacion).lower()
+                        or query in (s.nombre or "").lower()
+                        or query in (s.apellido or "").lower()]
+        return 200, [record_to_dict(s) for s in students]
+
+    def get_student(self, controllers, params, identificacion):
+        student = controllers["students"].get_student_by_identification(identificacion)
+        if not student:
+            raise ApiError(404, "Estudiante no encontrado.")
+        return 200, record_to_dict(student)
+
+    def list_payments(self, controllers, params, identificacion):
+        student = controllers["students"].get_student_by_identification(identificacion)
+        if not student:
+            raise ApiError(404, "Estudiante no encontrado.")
+        before_cursor = None
+        try:
+            if params.get("before_date") and params.get("before_id"):
+                before_cursor = (params["before_date"], int(params["before_id"]))
+            limit = min(int(params.get("limit", 50)), 500)
+        except ValueError:
+            raise ApiError(400, "'before_id' y 'limit' deben ser numéricos.")
+        if limit < 1:
+            raise ApiError(400, "'limit' debe ser mayor que cero.")
+        payments, next_cursor = controllers["payments"].get_payments_page(student.id, before_cursor, limit)
+        return 200, {
+            "payments": [record_to_dict(p) for p in payments],
+            "next_cursor": {"before_date": next_cursor[0], "before_id": next_cursor[1]} if next_cursor else None,
+        }
+
+    def get_payment(self, controllers, params, payment_id):
+        payment = controllers["payments"].get_payment_by_id(int(payment_id))
+        if not payment:
+            raise ApiError(404, "Pago no encontrado.")
+        return 200, record_to_dict(payment)
+
+    def get_payment_by_receipt(self, controllers, params, receipt_code):
+        payment = controllers["payments"].find_by_receipt_code(receipt_code)
+        if not payment:
+            raise ApiError(404, "Recibo no encontrado.")
+        return 200, record_to_dict(payment)
+
+    def list_courses(self, controllers, params):
+        if params.get("active") == "1":
+            courses = controllers["courses"].get_active_courses()
+        else:
+            courses = controllers["courses"].get_all_courses()
+        return 200, [record_to_dict(c) for c in courses]
+
+    def students_report(self, controllers, params, fmt):
+        configs = controllers["config"].get_all_configs()
+        school_name = configs.get("SCHOOL_NAME") or "School Name"
+        logo_path = configs.get("LOGO_PATH") or ""
+        students = controllers["students"].get_all_students()
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            if fmt == "xlsx":
+                export_students_to_excel(students, path, school_name, logo_path)
+                content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            else:
+                export_students_to_pdf(students, path, school_name, logo_path)
+                content_type = "application/pdf"
+            with open(path, "rb") as f:
+                return 200, (content_type, f.read())
+        finally:
+            os.remove(path)
+
+    def list_changes(self, controllers, params):
+        try:
+            since = int(params.get("since", 0))
+            limit = min(int(params.get("limit", 500)), 5000)
+        except ValueError:
+            raise ApiError(400, "'since' y 'limit' deben ser numéricos.")
+        entries, position = controllers["changes"].get_changes_since(since, params.get("table"), limit)
+        return 200, {"changes": [record_to_dict(e) for e in entries], "position": position}
+
+    def row_history(self, controllers, params, table, pk):
+        return 200, [record_to_dict(e) for e in controllers["changes"].get_row_history(table, pk)]
+
+    def check_duplicates(self, controllers, params):
+        """
+        Revisión previa de una importación masiva: recibe {"students": [{identificacion, nombre,
+        apellido}, ...]} y retorna, por cada fila con posibles duplicados, los candidatos.
+        """
+        data = self.read_json()
+        rows = data.get("students")
+        if not isinstance(rows, list):
+            raise ApiError(400, "Se requiere la lista 'students'.")
+        batch = [(str(row.get("identificacion") or ""), row.get("nombre") or "", row.get("apellido") or "")
+                 for row in rows if isinstance(row, dict)]
+        return 200, [
+            {"row": index, "candidates": [dict(record_to_dict(c.student), score=c.score, reasons=c.reasons)
+                                          for c in candidates]}
+            for index, candidates in controllers["duplicates"].check_batch(batch)
+        ]
+
+    def metrics(self, controllers, params):
+        return 200, self.server.metrics.summary()
+
+    # --- Escrituras (siempre por la única conexión de escritura) ---
+
+    def register_student(self, controllers, params):
+        data = self.read_json()
+        fields = ["identificacion", "nombre", "apellido", "course_id", "representante", "telefono"]
+        missing = [field for field in fields if not data.get(field)]
+        if missing:
+            raise ApiError(400, f"Campos incompletos: {', '.join(missing)}")
+        success, msg = controllers["students"].register_student(*(data[field] for field in fields))
+        return self.result(success, msg)
+
+    def deactivate_student(self, controllers, params, identificacion):
+        success, msg = controllers["students"].deactivate_student(identificacion)
+        return self.result(success, msg)
+
+    def register_payment(self, controllers, params):
+        data = self.read_json()
+        # El monto llega en centavos ('amount_cents') o en pesos ('amount')
+        try:
+            student_id = int(data["student_id"])
+            if "amount_cents" in data:
+                amount_cents = int(data["amount_cents"])
+            else:
+                amount_cents = to_cents(data["amount"])
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "Se requieren 'student_id' y 'amount' (o 'amount_cents') numéricos.")
+        success, msg, receipt_number, payment_date, receipt_code = controllers["payments"].register_payment(
+            student_id, amount_cents, data.get("description", "")
+        )
+        return self.result(success, msg, receipt_number=receipt_number, payment_date=payment_date,
+                           receipt_code=receipt_code)
+
+    def add_course(self, controllers, params):
+        name = (self.read_json().get("name") or "").strip()
+        if not name:
+            raise ApiError(400, "Ingrese el nombre del curso.")
+        success, msg = controllers["courses"].add_course(name)
+        return self.result(success, msg)
+
+    def edit_course(self, controllers, params, course_id):
+        name = (self.read_json().get("name") or "").strip()
+        if not name:
+            raise ApiError(400, "Ingrese el nuevo nombre del curso.")
+        success, msg = controllers["courses"].edit_course(int(course_id), name)
+        return self.result(success, msg)
+
+    def deactivate_course(self, controllers, params, course_id):
+        success, msg = controllers["courses"].deactivate_course(int(course_id))
+        return self.result(success, msg)
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, db_name, host=API_HOST, port=API_PORT, read_connections=API_READ_CONNECTIONS):
+        self.pool = ConnectionPool(db_name, size=read_connections, setup=create_controllers)
+        self.metrics = RequestMetrics()
+        super().__init__((host, port), ApiRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+
+def serve(db_name, host=API_HOST, port=API_PORT):
+    server = ApiServer(db_name, host, port)
+    logger.info(f"Servicio API escuchando en http://{host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,260 @@
+import os
+import time
+import sqlite3
+import traceback
+from contextlib import contextmanager
+from config import ARCHIVE_DIR
+from src.logger import logger
+from src.models.database import Database, is_locked_error, BUSY_MESSAGE
+from src.models.academic_year import (AcademicYear, ensure_academic_years_table,
+                                      YEAR_OPEN, YEAR_CLOSED, YEAR_ARCHIVED)
+from src.models.student import Student
+from src.models.payment import Payment
+from src.utils.money import migrate_to_cents, CENTS_FROM_REAL
+
+ACADEMIC_YEAR_COLUMNS = ", ".join(AcademicYear.COLUMNS)
+SELECT_ALL_YEARS = f"SELECT {ACADEMIC_YEAR_COLUMNS} FROM academic_years ORDER BY year DESC"
+SELECT_YEAR = f"SELECT {ACADEMIC_YEAR_COLUMNS} FROM academic_years WHERE year = ?"
+SELECT_ARCHIVED_YEARS = f"SELECT {ACADEMIC_YEAR_COLUMNS} FROM academic_years WHERE status = 'archived' ORDER BY year"
+
+# Tablas que se trasladan al archivo del año (courses se copia para conservar los nombres)
+ARCHIVED_TABLES = ("students", "payments")
+# SQLite admite por defecto hasta 10 bases adjuntas por conexión
+MAX_ATTACHED_ARCHIVES = 10
+# Estudiantes activos que siguen en el año: no se promovieron a un año posterior
+COUNT_ACTIVE_IN_YEAR = "SELECT COUNT(*) FROM main.students WHERE academic_year = ? AND active = 1 AND deleted_at IS NULL"
+# Solo salen de la base de uso diario los estudiantes del año que egresaron, se retiraron o se eliminaron
+SELECT_ARCHIVED_STUDENTS = """
+    SELECT id FROM main.students WHERE academic_year = ? AND (active = 0 OR deleted_at IS NOT NULL)
+"""
+
+class ArchiveController:
+    """
+    Años escolares y archivo de años cerrados.
+    Al archivar un año, sus estudiantes inactivos o eliminados (egresados y retirados) y sus pagos
+    se trasladan a una base de datos aparte (archive/<base>_archivo_<año>.db) adjuntada con ATTACH,
+    en una sola transacción sobre ambos archivos. Las tablas de uso diario quedan pequeñas,
+    y history_connection() vuelve a unir todo en las vistas all_students / all_payments
+    para las consultas históricas.
+    """
+    def __init__(self, db, archive_dir=ARCHIVE_DIR):
+        self.db = db
+        self.db_path = db.db_name
+        self.archive_dir = archive_dir
+        cursor = self.db.connection.cursor()
+        ensure_academic_years_table(cursor)
+        self.db.connection.commit()
+
+    def archive_path(self, year):
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        return os.path.join(self.archive_dir, f"{stem}_archivo_{year}.db")
+
+    def list_years(self):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = AcademicYear.row_factory
+        cursor.execute(SELECT_ALL_YEARS)
+        return cursor.fetchall()
+
+    def get_year(self, year):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = AcademicYear.row_factory
+        cursor.execute(SELECT_YEAR, (year,))
+        return cursor.fetchone()
+
+    def open_year(self, year, start_date, end_date):
+        """Registra un año escolar abierto. Retorna una tupla: (éxito, mensaje)."""
+        if self.get_year(year):
+            return False, f"El año {year} ya está registrado."
+        try:
+            def insert(cursor):
+                cursor.execute("INSERT INTO academic_years (year, start_date, end_date, status) VALUES (?, ?, ?, ?)",
+                               (year, start_date, end_date, YEAR_OPEN))
+                self.db.record_change("academic_years", "insert", year,
+                                      {"start_date": start_date, "end_date": end_date, "status": YEAR_OPEN})
+            self.db.write(insert)
+            return True, f"Año escolar {year} abierto."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al abrir el año escolar: {e}"
+
+    def close_year(self, year):
+        """Cierra un año abierto: deja de ser el año en curso. Retorna una tupla: (éxito, mensaje)."""
+        academic_year = self.get_year(year)
+        if not academic_year or academic_year.status != YEAR_OPEN:
+            return False, f"El año {year} no está abierto."
+        try:
+            def close(cursor):
+                cursor.execute("UPDATE academic_years SET status = ? WHERE year = ?", (YEAR_CLOSED, year))
+                self.db.record_change("academic_years", "update", year, {"status": [YEAR_OPEN, YEAR_CLOSED]})
+            self.db.write(close)
+            return True, f"Año escolar {year} cerrado."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al cerrar el año escolar: {e}"
+
+    def _columns(self, connection, schema, table):
+        return [row[1] for row in connection.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+    def _prepare_archive_tables(self, connection):
+        """Crea (o completa con columnas nuevas) las tablas del archivo adjunto como 'archivo'."""
+        for table in ARCHIVED_TABLES + ("courses",):
+            main_columns = self._columns(connection, "main", table)
+            archive_columns = self._columns(connection, "archivo", table)
+            if table == "payments" and "amount" in archive_columns:
+                # Archivos anteriores a los montos en centavos
+                migrate_to_cents(connection, "payments", {"amount": "amount_cents"}, schema="archivo")
+                archive_columns = self._columns(connection, "archivo", table)
+            if not archive_columns:
+                connection.execute(f"CREATE TABLE archivo.{table} AS SELECT * FROM main.{table} WHERE 0")
+                continue
+            for column in main_columns:
+                if column not in archive_columns:
+                    connection.execute(f"ALTER TABLE archivo.{table} ADD COLUMN {column}")
+
+    def archive_year(self, year):
+        """
+        Traslada al archivo del año los estudiantes inactivos o eliminados del año con todos sus
+        pagos, y los pagos del año de los demás estudiantes. El año debe estar cerrado y sin
+        estudiantes activos: los que siguen estudiando deben promoverse antes a un año posterior. Usa su propia conexión, de modo que puede ejecutarse en un
+        hilo aparte. Retorna una tupla: (éxito, mensaje, estadísticas).
+        """
+        academic_year = self.get_year(year)
+        if not academic_year or academic_year.status != YEAR_CLOSED:
+            return False, f"Solo se puede archivar un año cerrado ({year}).", None
+        active = self.db.connection.execute(COUNT_ACTIVE_IN_YEAR, (year,)).fetchone()[0]
+        if active:
+            return False, self._active_students_message(year, active), None
+        path = self.archive_path(year)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        start = time.perf_counter()
+        db = Database(self.db_path)
+        db.username = self.db.username
+        try:
+            # ATTACH no puede ejecutarse dentro de una transacción
+            db.connection.execute("ATTACH DATABASE ? AS archivo", (path,))
+            try:
+                with db.transaction():
+                    self._prepare_archive_tables(db.connection)
+
+                def move(cursor):
+                    # Se vuelve a revisar dentro de la transacción, por si otro equipo activó a alguien
+                    active = cursor.execute(COUNT_ACTIVE_IN_YEAR, (year,)).fetchone()[0]
+                    if active:
+                        return active
+                    cursor.execute("DROP TABLE IF EXISTS temp.archived_students")
+                    cursor.execute(f"CREATE TEMP TABLE archived_students AS {SELECT_ARCHIVED_STUDENTS}", (year,))
+                    # Los pagos primero: referencian a los estudiantes que se trasladan
+                    selections = {
+                        "payments": ("academic_year = ? OR student_id IN (SELECT id FROM temp.archived_students)", (year,)),
+                        "students": ("id IN (SELECT id FROM temp.archived_students)", ()),
+                    }
+                    counts = {}
+                    for table, (condition, params) in selections.items():
+                        columns = ", ".join(self._columns(db.connection, "main", table))
+                        cursor.execute(f"INSERT INTO archivo.{table} ({columns}) SELECT {columns} FROM main.{table} WHERE {condition}",
+                                       params)
+                        cursor.execute(f"DELETE FROM main.{table} WHERE {condition}", params)
+                        counts[table] = cursor.rowcount
+                    courses = ", ".join(self._columns(db.connection, "main", "courses"))
+                    cursor.execute("DELETE FROM archivo.courses")
+                    cursor.execute(f"INSERT INTO archivo.courses ({courses}) SELECT {courses} FROM main.courses")
+                    cursor.execute("UPDATE academic_years SET status = ?, archive_path = ? WHERE year = ?",
+                                   (YEAR_ARCHIVED, path, year))
+                    cursor.execute("DROP TABLE temp.archived_students")
+                    db.record_change("academic_years", "update", year,
+                                     {"status": [YEAR_CLOSED, YEAR_ARCHIVED], "archive_path": path,
+                                      "students": counts["students"], "payments": counts["payments"]})
+                    return counts
+
+                # Una sola transacción sobre ambos archivos: o se traslada todo o nada
+                counts = db.write(move, idempotent=False)
+            finally:
+                db.connection.execute("DETACH DATABASE archivo")
+            if isinstance(counts, int):
+                return False, self._active_students_message(year, counts), None
+            stats = dict(counts, seconds=time.perf_counter() - start, path=path)
+            logger.info(f"Año {year} archivado en {path}: {counts['students']} estudiantes, {counts['payments']} pagos")
+            return True, (f"Año {year} archivado: {counts['students']} estudiantes y "
+                          f"{counts['payments']} pagos trasladados a {path}."), stats
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE, None
+            logger.error("Error al archivar el año:\n" + traceback.format_exc())
+            return False, f"Error al archivar el año {year}: {e}", None
+        except Exception as e:
+            logger.error("Error al archivar el año:\n" + traceback.format_exc())
+            return False, f"Error al archivar el año {year}: {e}", None
+        finally:
+            db.close()
+
+    def _active_students_message(self, year, active):
+        return (f"No se puede archivar el año {year}: {active} estudiantes activos siguen en ese año. "
+                "Abra el año siguiente y promuévalos a ese año antes de archivar.")
+
+    @contextmanager
+    def history_connection(self):
+        """
+        Conexión de solo consulta con los archivos de años anteriores adjuntos y las vistas
+        temporales all_students y all_payments, que unen la base de uso diario con los archivos.
+        """
+        connection = sqlite3.connect(self.db_path)
+        try:
+            archived = [y for y in self._archived_years() if y.archive_path and os.path.exists(y.archive_path)]
+            # Si hay más archivos que bases adjuntables se consultan los años más recientes
+            archived = archived[-MAX_ATTACHED_ARCHIVES:]
+            schemas = ["main"]
+            for academic_year in archived:
+                schema = f"archivo_{academic_year.year}"
+                connection.execute(f"ATTACH DATABASE ? AS {schema}", (academic_year.archive_path,))
+                schemas.append(schema)
+            student_columns = ", ".join(Student.COLUMNS)
+            student_selects = [
+                f"""SELECT s.id, s.identificacion, s.nombre, s.apellido, s.course_id,
+                           COALESCE(c.name, s.course_name) AS course_name, s.representante, s.telefono,
+                           s.active, s.academic_year
+                    FROM {schema}.students s LEFT JOIN {schema}.courses c ON c.id = s.course_id"""
+                for schema in schemas
+            ]
+            # Los archivos de años anteriores pueden no tener las columnas más nuevas (receipt_code)
+            # o guardar los montos en pesos (amount REAL)
+            payment_selects = []
+            for schema in schemas:
+                available = set(self._columns(connection, schema, "payments"))
+                legacy = {"amount_cents": CENTS_FROM_REAL.format(column="amount")} if "amount" in available else {}
+                columns = ", ".join(column if column in available else f"{legacy.get(column, 'NULL')} AS {column}"
+                                    for column in Payment.COLUMNS + ("academic_year",))
+                payment_selects.append(f"SELECT {columns} FROM {schema}.payments")
+            connection.execute(f"CREATE TEMP VIEW all_students ({student_columns}) AS " + " UNION ALL ".join(student_selects))
+            connection.execute("CREATE TEMP VIEW all_payments AS " + " UNION ALL ".join(payment_selects))
+            yield connection
+        finally:
+            connection.close()
+
+    def _archived_years(self):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = AcademicYear.row_factory
+        cursor.execute(SELECT_ARCHIVED_YEARS)
+        return cursor.fetchall()
+
+    def get_student_history(self, identificacion):
+        """Registros del estudiante en la base de uso diario y en los años archivados."""
+        with self.history_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = Student.row_factory
+            cursor.execute(f"SELECT {', '.join(Student.COLUMNS)} FROM all_students WHERE identificacion = ? "
+                           "ORDER BY academic_year", (identificacion,))
+            return cursor.fetchall()
+
+    def get_payment_history(self, identificacion):
+        """Todos los pagos del estudiante, de todos los años, del más reciente al más antiguo."""
+        with self.history_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = Payment.row_factory
+            cursor.execute(f"""
+                SELECT {', '.join(Payment.COLUMNS)} FROM all_payments
+                WHERE student_id IN (SELECT id FROM all_students WHERE identificacion = ?)
+                ORDER BY payment_date DESC, id DESC
+            """, (identificacion,))
+            return cursor.fetchall()
@@ -0,0 +1,68 @@
+from src.models.change_log import ChangeLogEntry, ensure_change_log_table
+
+CHANGE_LOG_COLUMNS = ", ".join(ChangeLogEntry.COLUMNS)
+SELECT_CHANGES_SINCE = f"SELECT {CHANGE_LOG_COLUMNS} FROM change_log WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_TABLE_CHANGES_SINCE = f"""
+    SELECT {CHANGE_LOG_COLUMNS} FROM change_log
+    WHERE table_name = ? AND id > ? ORDER BY id LIMIT ?
+"""
+SELECT_ROW_HISTORY = f"""
+    SELECT {CHANGE_LOG_COLUMNS} FROM change_log
+    WHERE table_name = ? AND row_pk = ? ORDER BY id
+"""
+SELECT_CHANGES_BETWEEN = f"""
+    SELECT {CHANGE_LOG_COLUMNS} FROM change_log
+    WHERE changed_at >= ? AND changed_at < ? ORDER BY id
+"""
+SELECT_LAST_POSITION = "SELECT COALESCE(MAX(id), 0) FROM change_log"
+
+class ChangeLogController:
+    """
+    Consultas sobre la bitácora de cambios (change_log). Sirve para auditorías
+    (quién cambió qué y cuándo) y para sincronizar exportaciones o cachés de forma
+    incremental: se guarda la última posición leída y se piden solo los cambios posteriores.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.initialize_change_log_table()
+
+    def initialize_change_log_table(self):
+        cursor = self.db.connection.cursor()
+        ensure_change_log_table(cursor)
+        self.db.connection.commit()
+
+    def _query(self, query, params):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = ChangeLogEntry.row_factory
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def get_last_position(self):
+        """Posición del último cambio registrado (0 si la bitácora está vacía)."""
+        return self.db.connection.execute(SELECT_LAST_POSITION).fetchone()[0]
+
+    def get_changes_since(self, position, table=None, limit=1000):
+        """
+        Retorna (entradas, nueva_posición) con los cambios posteriores a 'position',
+        opcionalmente solo de una tabla. Si hay más de 'limit' cambios, se vuelve a llamar
+        con la nueva posición hasta recibir una lista vacía.
+        """
+        if table:
+            entries = self._query(SELECT_TABLE_CHANGES_SINCE, (table, position, limit))
+        else:
+            entries = self._query(SELECT_CHANGES_SINCE, (position, limit))
+        return entries, (entries[-1].id if entries else position)
+
+    def get_row_history(self, table, pk):
+        """Historial completo de una fila, del cambio más antiguo al más reciente."""
+        return self._query(SELECT_ROW_HISTORY, (table, str(pk)))
+
+    def get_changes_between(self, start_date, end_date, username=None):
+        """
+        Cambios con fecha en [start_date, end_date) (formato AAAA-MM-DD o AAAA-MM-DD HH:MM:SS),
+        opcionalmente de un solo usuario.
+        """
+        entries = self._query(SELECT_CHANGES_BETWEEN, (start_date, end_date))
+        if username:
+            entries = [entry for entry in entries if entry.username == username]
+        return entries
@@ -1,3 +1,6 @@
+import sqlite3
+from src.models.database import is_locked_error, BUSY_MESSAGE
+
 class ConfigController:
     def __init__(self, db):
         self.db = db
@@ -6,12 +9,12 @@ class ConfigController:
         """
         Inserta los valores predeterminados en la tabla config si no existen aún.
         """
-        for key, value in defaults.items():
-            self.db.cursor.execute("SELECT COUNT(*) FROM config WHERE key = ?", (key,))
-            count = self.db.cursor.fetchone()[0]
-            if count == 0:
-                self.db.cursor.execute("INSERT INTO config (key, value) VALUES (?, ?)", (key, value))
-        self.db.connection.commit()
+        def insert_missing(cursor):
+            for key, value in defaults.items():
+                cursor.execute("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", (key, value))
+                if cursor.rowcount:
+                    self.db.record_change("config", "insert", key, {"value": value})
+        self.db.write(insert_missing)
 
     def get_config(self, key):
         query = "SELECT value FROM config WHERE key = ?"
@@ -27,8 +30,17 @@ class ConfigController:
     def update_config(self, key, value):
         try:
             query = "UPDATE config SET value = ? WHERE key = ?"
-            self.db.cursor.execute(query, (value, key))
-            self.db.connection.commit()
+
+            def update(cursor):
+                row = cursor.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+                cursor.execute(query, (value, key))
+                if row is not None:
+                    self.db.record_change("config", "update", key, {"value": [row[0], value]})
+            self.db.write(update)
             return True, "Configuración actualizada correctamente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al actualizar la configuración: {e}"
         except Exception as e:
             return False, f"Error al actualizar la configuración: {e}"
\ No newline at end of file
@@ -0,0 +1,254 @@
+import os
+import time
+import sqlite3
+import pathlib
+import traceback
+from datetime import datetime
+from config import CONSOLIDATED_DB
+from src.logger import logger
+from src.models.database import Database, is_locked_error, BUSY_MESSAGE
+from src.models.consolidation import ensure_consolidation_tables, RevenueTotal, EnrollmentTotal
+from src.utils.money import CENTS_FROM_REAL
+
+SELECT_SOURCE_TABLES = "SELECT name FROM fuente.sqlite_master WHERE type = 'table'"
+SELECT_SOURCE_MAX_ID = "SELECT COALESCE(MAX(id), 0) FROM fuente.{table}"
+SELECT_MARKS = "SELECT students_id, payments_id, change_log_id FROM sync_marks WHERE campus = :campus"
+UPSERT_MARKS = """
+    INSERT INTO sync_marks (campus, students_id, payments_id, change_log_id, synced_at)
+    VALUES (:campus, :max_students, :max_payments, :max_log, :synced_at)
+    ON CONFLICT (campus) DO UPDATE SET students_id = excluded.students_id, payments_id = excluded.payments_id,
+        change_log_id = excluded.change_log_id, synced_at = excluded.synced_at
+"""
+
+SYNC_TEMP_TABLES = [
+    "CREATE TEMP TABLE IF NOT EXISTS sync_students (id INTEGER PRIMARY KEY)",
+    "CREATE TEMP TABLE IF NOT EXISTS sync_payments (id INTEGER PRIMARY KEY)",
+    "CREATE TEMP TABLE IF NOT EXISTS affected_courses (academic_year INTEGER, course_name TEXT, "
+    "PRIMARY KEY (academic_year, course_name))",
+    "CREATE TEMP TABLE IF NOT EXISTS affected_months (month TEXT PRIMARY KEY)",
+    "DELETE FROM temp.sync_students",
+    "DELETE FROM temp.sync_payments",
+    "DELETE FROM temp.affected_courses",
+    "DELETE FROM temp.affected_months",
+]
+
+# Filas a copiar: las nuevas (id posterior a la marca) y las que la bitácora registra como
+# modificadas. Renombrar un curso cambia el curso de todos sus estudiantes.
+CHANGED_IN_LOG = """
+    SELECT CAST(row_pk AS INTEGER) FROM fuente.change_log
+    WHERE table_name = '{table}' AND id > :last_log AND id <= :max_log {condition}
+"""
+SELECT_STUDENTS_TO_SYNC = """
+    INSERT OR IGNORE INTO temp.sync_students (id)
+    SELECT id FROM fuente.students WHERE id > :last_students AND id <= :max_students
+"""
+SELECT_CHANGED_STUDENTS = f"""
+    INSERT OR IGNORE INTO temp.sync_students (id)
+    {CHANGED_IN_LOG.format(table="students", condition="")}
+    UNION
+    SELECT id FROM fuente.students WHERE course_id IN ({CHANGED_IN_LOG.format(table="courses", condition="")})
+"""
+SELECT_PAYMENTS_TO_SYNC = """
+    INSERT OR IGNORE INTO temp.sync_payments (id)
+    SELECT id FROM fuente.payments WHERE id > :last_payments AND id <= :max_payments
+"""
+SELECT_CHANGED_PAYMENTS = f"""
+    INSERT OR IGNORE INTO temp.sync_payments (id)
+    {CHANGED_IN_LOG.format(table="payments", condition="")}
+"""
+
+# Las filas que ya no están en la sede solo se borran si la bitácora registra su eliminación:
+# las que se trasladaron al archivo de un año se conservan en la base consolidada.
+SYNC_STUDENTS = [
+    """INSERT OR IGNORE INTO temp.affected_courses
+       SELECT academic_year, course_name FROM students
+       WHERE campus = :campus AND id IN (SELECT id FROM temp.sync_students)""",
+    f"""DELETE FROM students WHERE campus = :campus AND id IN (
+            SELECT id FROM fuente.students WHERE id IN (SELECT id FROM temp.sync_students)
+            UNION {CHANGED_IN_LOG.format(table="students", condition="AND action = 'delete'")})""",
+    """INSERT INTO students (campus, id, identificacion, nombre, apellido, course_name, academic_year, active, deleted_at)
+       SELECT :campus, s.id, s.identificacion, s.nombre, s.apellido, COALESCE(c.name, s.course_name, ''),
+              COALESCE(s.academic_year, 0), s.active, s.deleted_at
+       FROM fuente.students s LEFT JOIN fuente.courses c ON c.id = s.course_id
+       WHERE s.id IN (SELECT id FROM temp.sync_students)""",
+    """INSERT OR IGNORE INTO temp.affected_courses
+       SELECT academic_year, course_name FROM students
+       WHERE campus = :campus AND id IN (SELECT id FROM temp.sync_students)""",
+    """DELETE FROM enrollment WHERE campus = :campus
+       AND (academic_year, course_name) IN (SELECT academic_year, course_name FROM temp.affected_courses)""",
+    """INSERT INTO enrollment (campus, academic_year, course_name, students)
+       SELECT :campus, academic_year, course_name, COUNT(*) FROM students
+       WHERE campus = :campus AND active = 1 AND deleted_at IS NULL
+         AND (academic_year, course_name) IN (SELECT academic_year, course_name FROM temp.affected_courses)
+       GROUP BY academic_year, course_name""",
+]
+SYNC_PAYMENTS = [
+    """INSERT OR IGNORE INTO temp.affected_months
+       SELECT month FROM payments WHERE campus = :campus AND id IN (SELECT id FROM temp.sync_payments)""",
+    f"""DELETE FROM payments WHERE campus = :campus AND id IN (
+            SELECT id FROM fuente.payments WHERE id IN (SELECT id FROM temp.sync_payments)
+            UNION {CHANGED_IN_LOG.format(table="payments", condition="AND action = 'delete'")})""",
+    """INSERT INTO payments (campus, id, student_id, amount_cents, description, payment_date, month, receipt_number,
+                            academic_year)
+       SELECT :campus, id, student_id, {amount_cents}, description, payment_date, COALESCE(substr(payment_date, 1, 7), ''),
+              receipt_number, academic_year
+       FROM fuente.payments WHERE id IN (SELECT id FROM temp.sync_payments)""",
+    """INSERT OR IGNORE INTO temp.affected_months
+       SELECT month FROM payments WHERE campus = :campus AND id IN (SELECT id FROM temp.sync_payments)""",
+    """DELETE FROM revenue_by_month WHERE campus = :campus AND month IN (SELECT month FROM temp.affected_months)""",
+    """INSERT INTO revenue_by_month (campus, month, payments, amount_cents)
+       SELECT :campus, month, COUNT(*), COALESCE(SUM(amount_cents), 0) FROM payments
+       WHERE campus = :campus AND month IN (SELECT month FROM temp.affected_months)
+       GROUP BY month""",
+]
+
+SELECT_REVENUE = """
+    SELECT campus, month, payments, amount_cents FROM revenue_by_month
+    WHERE month BETWEEN :start AND :end ORDER BY month, campus
+"""
+SELECT_REVENUE_ALL_CAMPUSES = """
+    SELECT NULL, month, SUM(payments), SUM(amount_cents) FROM revenue_by_month
+    WHERE month BETWEEN :start AND :end GROUP BY month ORDER BY month
+"""
+SELECT_ENROLLMENT = """
+    SELECT campus, academic_year, course_name, students FROM enrollment
+    WHERE academic_year = :academic_year ORDER BY campus, course_name
+"""
+SELECT_LATEST_YEAR = "SELECT MAX(academic_year) FROM enrollment"
+SELECT_SYNC_MARKS = "SELECT campus, students_id, payments_id, change_log_id, synced_at FROM sync_marks ORDER BY campus"
+
+def source_uri(path):
+    """URI de solo lectura del archivo de una sede, para ATTACH."""
+    return pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+
+class ConsolidationController:
+    """
+    Base consolidada de las sedes para los reportes de la sede central. sync_all() adjunta
+    cada base de sede en modo de solo lectura y copia solo lo nuevo desde la última
+    sincronización: estudiantes y pagos con id posterior a la marca de la sede, más las filas
+    que la bitácora (change_log) registra como modificadas. Los totales por mes y por curso
+    se recalculan solo para los meses y cursos afectados, así que las consultas de recaudo y
+    matrícula leen tablas pequeñas y responden en milisegundos.
+    """
+    def __init__(self, campuses, db_name=CONSOLIDATED_DB):
+        self.campuses = list(campuses)
+        self.db = Database(db_name, uri=True)
+        cursor = self.db.connection.cursor()
+        ensure_consolidation_tables(cursor)
+        self.db.connection.commit()
+
+    def sync_all(self):
+        """
+        Sincroniza todas las sedes, cada una en su propia transacción.
+        Retorna una tupla: (éxito, mensaje, estadísticas por sede).
+        """
+        stats = {}
+        errors = []
+        for campus in self.campuses:
+            if os.path.abspath(campus.db_name) == os.path.abspath(self.db.db_name):
+                continue
+            if not os.path.exists(campus.db_name):
+                errors.append(f"{campus.name}: no se encontró {campus.db_name}")
+                continue
+            success, msg, campus_stats = self.sync_campus(campus)
+            if success:
+                stats[campus.key] = campus_stats
+            else:
+                errors.append(f"{campus.name}: {msg}")
+        students = sum(s["students"] for s in stats.values())
+        payments = sum(s["payments"] for s in stats.values())
+        msg = f"Sincronizadas {len(stats)} sedes: {students} estudiantes y {payments} pagos copiados."
+        if errors:
+            msg += "\nErrores:\n" + "\n".join(errors)
+        return not errors, msg, stats
+
+    def sync_campus(self, campus):
+        """Copia a la base consolidada lo nuevo de una sede. Retorna (éxito, mensaje, estadísticas)."""
+        start = time.perf_counter()
+        connection = self.db.connection
+        try:
+            # ATTACH no puede ejecutarse dentro de una transacción
+            connection.execute("ATTACH DATABASE ? AS fuente", (source_uri(campus.db_name),))
+            try:
+                counts = self.db.write(lambda cursor: self._sync(cursor, campus))
+            finally:
+                connection.execute("DETACH DATABASE fuente")
+            counts["seconds"] = time.perf_counter() - start
+            logger.info(f"Consolidado {campus.name}: {counts['students']} estudiantes y {counts['payments']} pagos "
+                        f"en {counts['seconds'] * 1000:.0f} ms")
+            return True, "Sede sincronizada.", counts
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE, None
+            logger.error("Error al consolidar la sede:\n" + traceback.format_exc())
+            return False, f"Error al sincronizar: {e}", None
+        except Exception as e:
+            logger.error("Error al consolidar la sede:\n" + traceback.format_exc())
+            return False, f"Error al sincronizar: {e}", None
+
+    def _sync(self, cursor, campus):
+        tables = {row[0] for row in cursor.execute(SELECT_SOURCE_TABLES)}
+        marks = cursor.execute(SELECT_MARKS, {"campus": campus.key}).fetchone()
+        first_sync = marks is None
+        last_students, last_payments, last_log = marks if marks else (0, 0, 0)
+        params = {
+            "campus": campus.key,
+            "last_students": last_students,
+            "last_payments": last_payments,
+            "max_students": self._max_id(cursor, tables, "students"),
+            "max_payments": self._max_id(cursor, tables, "payments"),
+            "max_log": self._max_id(cursor, tables, "change_log"),
+            "synced_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        # En la primera sincronización se copia todo: no hace falta revisar la bitácora
+        params["last_log"] = params["max_log"] if first_sync else last_log
+        for statement in SYNC_TEMP_TABLES:
+            cursor.execute(statement)
+        use_log = "change_log" in tables and params["max_log"] > params["last_log"]
+        counts = {"students": 0, "payments": 0}
+        if "students" in tables:
+            cursor.execute(SELECT_STUDENTS_TO_SYNC, params)
+            if use_log:
+                cursor.execute(SELECT_CHANGED_STUDENTS, params)
+            for statement in SYNC_STUDENTS:
+                cursor.execute(statement, params)
+            counts["students"] = cursor.execute("SELECT COUNT(*) FROM temp.sync_students").fetchone()[0]
+        if "payments" in tables:
+            cursor.execute(SELECT_PAYMENTS_TO_SYNC, params)
+            if use_log:
+                cursor.execute(SELECT_CHANGED_PAYMENTS, params)
+            # Una sede que aún no se abre con esta versión conserva los montos en pesos (REAL)
+            columns = {row[1] for row in cursor.execute("PRAGMA fuente.table_info(payments)")}
+            amount_cents = "amount_cents" if "amount_cents" in columns else CENTS_FROM_REAL.format(column="amount")
+            for statement in SYNC_PAYMENTS:
+                cursor.execute(statement.format(amount_cents=amount_cents), params)
+            counts["payments"] = cursor.execute("SELECT COUNT(*) FROM temp.sync_payments").fetchone()[0]
+        cursor.execute(UPSERT_MARKS, params)
+        return counts
+
+    def _max_id(self, cursor, tables, table):
+        if table not in tables:
+            return 0
+        return cursor.execute(SELECT_SOURCE_MAX_ID.format(table=table)).fetchone()[0]
+
+    def get_revenue(self, start_month="0000-00", end_month="9999-99", by_campus=True):
+        """Recaudo por mes ("AAAA-MM") entre dos meses, por sede o sumando todas las sedes."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = RevenueTotal.row_factory
+        query = SELECT_REVENUE if by_campus else SELECT_REVENUE_ALL_CAMPUSES
+        return cursor.execute(query, {"start": start_month, "end": end_month}).fetchall()
+
+    def get_enrollment(self, academic_year=None):
+        """Estudiantes activos por sede y curso en el año escolar indicado (por defecto, el más reciente)."""
+        cursor = self.db.connection.cursor()
+        if academic_year is None:
+            academic_year = cursor.execute(SELECT_LATEST_YEAR).fetchone()[0]
+        cursor.row_factory = EnrollmentTotal.row_factory
+        return cursor.execute(SELECT_ENROLLMENT, {"academic_year": academic_year}).fetchall()
+
+    def get_sync_marks(self):
+        """Marcas de sincronización por sede: (sede, último estudiante, último pago, posición de bitácora, fecha)."""
+        return [tuple(row) for row in self.db.connection.execute(SELECT_SYNC_MARKS).fetchall()]
+
+    def close(self):
+        self.db.close()
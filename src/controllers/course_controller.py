@@ -1,44 +1,128 @@
+import sqlite3
 from src.models.course import Course
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.runtime_stats import cache_counter
+
+COURSE_COLUMNS = ", ".join(Course.COLUMNS)
+SELECT_ACTIVE_COURSES = f"SELECT {COURSE_COLUMNS} FROM courses WHERE active = 1"
+SELECT_ALL_COURSES = f"SELECT {COURSE_COLUMNS} FROM courses"
+SELECT_COURSE_BY_ID = f"SELECT {COURSE_COLUMNS} FROM courses WHERE id = ?"
+
+course_names_cache = cache_counter("Nombres de cursos")
 
 class CourseController:
     def __init__(self, db):
         self.db = db
+        # Caché local para objetos de base de datos que no exponen 'course_names'.
+        # La caché guarda la tupla (data_version, {id: nombre}).
+        self._local_course_names = None
+
+    def _get_cached_names(self):
+        if hasattr(self.db, "course_names"):
+            return self.db.course_names
+        return self._local_course_names
+
+    def _set_cached_names(self, names):
+        if hasattr(self.db, "course_names"):
+            self.db.course_names = names
+        else:
+            self._local_course_names = names
+
+    def invalidate_cache(self):
+        """Descarta la caché id→nombre; se recarga en la siguiente consulta."""
+        self._set_cached_names(None)
+
+    def get_course_names(self):
+        """
+        Retorna un diccionario {id: nombre} con todos los cursos.
+        Se lee una sola vez de la base de datos y se mantiene en memoria hasta que
+        un curso se agrega, edita o desactiva. PRAGMA data_version detecta además los
+        cambios confirmados por otras conexiones (otros equipos o el pool de la API).
+        """
+        cursor = self.db.connection.cursor()
+        data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+        cached = self._get_cached_names()
+        if cached is not None and cached[0] == data_version:
+            course_names_cache.hit()
+            return cached[1]
+        course_names_cache.miss()
+        cursor.execute("SELECT id, name FROM courses")
+        names = {row[0]: row[1] for row in cursor.fetchall()}
+        self._set_cached_names((data_version, names))
+        return names
+
+    def get_course_name(self, course_id):
+        return self.get_course_names().get(course_id)
 
     def add_course(self, name):
         try:
             query = "INSERT INTO courses (name, active) VALUES (?, 1)"
-            self.db.cursor.execute(query, (name,))
-            self.db.connection.commit()
+
+            def insert(cursor):
+                cursor.execute(query, (name,))
+                self.db.record_change("courses", "insert", cursor.lastrowid, {"name": name, "active": 1})
+            self.db.write(insert)
+            self.invalidate_cache()
             return True, "Curso agregado correctamente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al agregar curso: {e}"
         except Exception as e:
             return False, f"Error al agregar curso: {e}"
 
     def edit_course(self, course_id, new_name):
         try:
             query = "UPDATE courses SET name = ? WHERE id = ?"
-            self.db.cursor.execute(query, (new_name, course_id))
-            self.db.connection.commit()
+
+            def update(cursor):
+                row = cursor.execute("SELECT name FROM courses WHERE id = ?", (course_id,)).fetchone()
+                cursor.execute(query, (new_name, course_id))
+                self.db.record_change("courses", "update", course_id, {"name": [row[0] if row else None, new_name]})
+            self.db.write(update)
+            self.invalidate_cache()
             return True, "Curso editado correctamente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al editar curso: {e}"
         except Exception as e:
             return False, f"Error al editar curso: {e}"
 
     def deactivate_course(self, course_id):
         try:
             query = "UPDATE courses SET active = 0 WHERE id = ?"
-            self.db.cursor.execute(query, (course_id,))
-            self.db.connection.commit()
+
+            def deactivate(cursor):
+                row = cursor.execute("SELECT active FROM courses WHERE id = ?", (course_id,)).fetchone()
+                cursor.execute(query, (course_id,))
+                self.db.record_change("courses", "update", course_id, {"active": [row[0] if row else None, 0]})
+            self.db.write(deactivate)
+            self.invalidate_cache()
             return True, "Curso desactivado correctamente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al desactivar curso: {e}"
         except Exception as e:
             return False, f"Error al desactivar curso: {e}"
 
     def get_active_courses(self):
-        query = "SELECT * FROM courses WHERE active = 1"
-        self.db.cursor.execute(query)
-        courses = self.db.cursor.fetchall()
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Course.row_factory
+        cursor.execute(SELECT_ACTIVE_COURSES)
+        courses = cursor.fetchall()
         return courses
 
+    def get_course_by_id(self, course_id):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Course.row_factory
+        cursor.execute(SELECT_COURSE_BY_ID, (course_id,))
+        return cursor.fetchone()
+
     def get_all_courses(self):
-        query = "SELECT * FROM courses"
-        self.db.cursor.execute(query)
-        courses = self.db.cursor.fetchall()
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Course.row_factory
+        cursor.execute(SELECT_ALL_COURSES)
+        courses = cursor.fetchall()
         return courses
\ No newline at end of file
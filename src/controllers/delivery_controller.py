@@ -0,0 +1,124 @@
+import sqlite3
+import traceback
+from datetime import datetime
+from src.logger import logger
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.delivery import (ensure_deliveries_table, Delivery, INSERT_DELIVERY, SELECT_STATUS_COUNTS,
+                                 KIND_RECEIPT, KIND_STATEMENT)
+from src.controllers.guardian_controller import GuardianController
+from src.utils.family_statements import render_family_statement_pdf, statement_filename
+
+SELECT_DELIVERIES = f"SELECT {', '.join(Delivery.COLUMNS)} FROM deliveries"
+# Acudiente con correo del estudiante que hizo el pago
+SELECT_STUDENT_GUARDIAN = """
+    SELECT g.id, g.email FROM students s JOIN guardians g ON g.id = s.guardian_id
+    WHERE s.id = ? AND COALESCE(g.email, '') <> ''
+"""
+# Toma el correo actual del acudiente, por si el fallo fue un correo mal escrito ya corregido
+RETRY_FAILED = """
+    UPDATE deliveries SET status = 'pending', attempts = 0, next_attempt_at = ?, last_error = NULL,
+        recipient = COALESCE((SELECT g.email FROM guardians g WHERE g.id = deliveries.guardian_id AND g.email <> ''),
+                             recipient)
+    WHERE status = 'failed'
+"""
+
+class DeliveryController:
+    """
+    Cola de correos a los acudientes (recibos y estados de cuenta). Aquí solo se encolan los
+    mensajes con su PDF; el envío lo hace src.utils.mailer en un hilo aparte, de modo que
+    encolar mil estados de cuenta es una sola transacción y no espera al servidor de correo.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.guardian_controller = GuardianController(db)
+        ensure_deliveries_table(self.db.connection.cursor())
+        self.db.connection.commit()
+
+    def queue_family_statements(self, start_date, end_date, school_name, logo_path):
+        """
+        Genera el estado de cuenta del período de cada familia cuyo acudiente tiene correo y
+        los encola. Retorna una tupla: (éxito, mensaje, cantidad encolada).
+        """
+        statements = self.guardian_controller.get_family_statements(start_date, end_date)
+        with_email = [statement for statement in statements if statement.guardian.email]
+        if not with_email:
+            return False, "Ningún acudiente con estudiantes activos tiene correo registrado.", 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        reference = f"{start_date}/{end_date}"
+        subject = f"{school_name}: estado de cuenta {start_date} a {end_date}"
+        # Los PDF se generan antes de abrir la transacción para no bloquear la base mientras tanto
+        rows = []
+        for statement in with_email:
+            guardian = statement.guardian
+            body = (f"Señor(a) {(guardian.nombre or '').title()}:\n\n"
+                    f"Adjuntamos el estado de cuenta de su familia del {start_date} al {end_date}.\n\n{school_name}")
+            pdf_bytes = render_family_statement_pdf(school_name, logo_path, statement, start_date, end_date)
+            rows.append((guardian.id, KIND_STATEMENT, reference, guardian.email, subject, body,
+                         statement_filename(statement), pdf_bytes, now, now))
+        try:
+            self.db.write(lambda cursor: cursor.executemany(INSERT_DELIVERY, rows), idempotent=False)
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE, 0
+            logger.error("Error al encolar los estados de cuenta:\n" + traceback.format_exc())
+            return False, f"Error al encolar los estados de cuenta: {e}", 0
+        skipped = len(statements) - len(with_email)
+        msg = f"{len(rows)} estados de cuenta en cola de envío."
+        if skipped:
+            msg += f" {skipped} familias sin correo registrado."
+        return True, msg, len(rows)
+
+    def queue_receipt(self, student_id, receipt_code, pdf_bytes, school_name):
+        """
+        Encola el recibo para el acudiente del estudiante, si tiene correo.
+        Retorna una tupla: (encolado, mensaje).
+        """
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        row = cursor.execute(SELECT_STUDENT_GUARDIAN, (student_id,)).fetchone()
+        if row is None:
+            return False, "El acudiente no tiene correo registrado."
+        guardian_id, email = row
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.db.write(lambda cursor: cursor.execute(INSERT_DELIVERY, (
+                guardian_id, KIND_RECEIPT, receipt_code, email, f"{school_name}: recibo de pago Nº {receipt_code}",
+                f"Adjuntamos el recibo de pago Nº {receipt_code}.\n\n{school_name}", f"recibo_{receipt_code}.pdf",
+                pdf_bytes, now, now)), idempotent=False)
+            return True, f"Recibo en cola de envío a {email}."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al encolar el recibo: {e}"
+
+    def get_summary(self):
+        """Cantidad de correos por estado: {"pending": n, "sending": n, "sent": n, "failed": n}."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        return dict(cursor.execute(SELECT_STATUS_COUNTS).fetchall())
+
+    def get_deliveries(self, status=None, limit=200):
+        """Los correos más recientes (sin el adjunto), opcionalmente solo los de un estado."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Delivery.row_factory
+        if status:
+            cursor.execute(f"{SELECT_DELIVERIES} WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+        else:
+            cursor.execute(f"{SELECT_DELIVERIES} ORDER BY id DESC LIMIT ?", (limit,))
+        return cursor.fetchall()
+
+    def retry_failed(self):
+        """
+        Devuelve a la cola los correos fallidos (por ejemplo, después de corregir el correo
+        del acudiente o la configuración SMTP). Retorna una tupla: (éxito, mensaje).
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            count = self.db.write(lambda cursor: cursor.execute(RETRY_FAILED, (now,)).rowcount)
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al reintentar los correos: {e}"
+        if not count:
+            return True, "No hay correos fallidos."
+        return True, f"{count} correos fallidos vuelven a la cola."
@@ -0,0 +1,196 @@
+import sqlite3
+import traceback
+from datetime import datetime
+from src.logger import logger
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.student import Student
+from src.models.duplicates import DuplicateCandidate, ensure_match_keys_table
+from src.controllers.student_controller import STUDENT_SELECT
+from src.utils.name_matching import blocking_keys, match_score
+
+# Puntaje a partir del cual dos estudiantes se consideran posibles duplicados
+DUPLICATE_THRESHOLD = 0.5
+# Los bloques más grandes (apellidos muy comunes) se omiten en la revisión completa
+MAX_BLOCK_SIZE = 300
+
+SELECT_BLOCK_PAIRS = """
+    SELECT DISTINCT a.student_id, b.student_id
+    FROM student_match_keys a
+    JOIN student_match_keys b ON b.match_key = a.match_key AND b.student_id > a.student_id
+    WHERE a.match_key IN (
+        SELECT match_key FROM student_match_keys GROUP BY match_key HAVING COUNT(*) BETWEEN 2 AND ?
+    )
+"""
+# Bitácora de una unión: pagos que cambian de estudiante y estudiantes que se eliminan
+MERGE_PAYMENT_DIFFS = """
+    SELECT p.id AS pk, json_object('student_id', json_array(p.student_id, m.keep_id)) AS diff
+    FROM payments p JOIN merge_map m ON m.duplicate_id = p.student_id
+"""
+MERGE_STUDENT_DIFFS = """
+    SELECT m.duplicate_id AS pk, json_object('merged_into', m.keep_id, 'deleted_at', :deleted_at) AS diff
+    FROM merge_map m
+"""
+
+def merge_map_cte(merges):
+    """CTE 'merge_map(duplicate_id, keep_id)' con parámetros con nombre. Retorna (sql, parámetros)."""
+    values, params = [], {}
+    for i, (duplicate_id, keep_id) in enumerate(merges.items()):
+        values.append(f"(:duplicate_{i}, :keep_{i})")
+        params[f"duplicate_{i}"] = duplicate_id
+        params[f"keep_{i}"] = keep_id
+    return f"WITH merge_map(duplicate_id, keep_id) AS (VALUES {', '.join(values)})", params
+
+class DuplicateController:
+    """
+    Detección de estudiantes duplicados (el mismo niño registrado dos veces con un error en la
+    identificación o en el nombre). Solo se comparan los estudiantes que comparten una clave del
+    índice de bloqueo student_match_keys, de modo que revisar un estudiante nuevo toca unas
+    pocas filas aunque el colegio tenga miles.
+    """
+    def __init__(self, db, threshold=DUPLICATE_THRESHOLD):
+        self.db = db
+        self.threshold = threshold
+        cursor = self.db.connection.cursor()
+        ensure_match_keys_table(cursor)
+        self.db.connection.commit()
+
+    def _students_by_keys(self, keys):
+        placeholders = ", ".join("?" * len(keys))
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Student.row_factory
+        cursor.execute(f"""
+            {STUDENT_SELECT}
+            WHERE s.deleted_at IS NULL
+              AND s.id IN (SELECT student_id FROM student_match_keys WHERE match_key IN ({placeholders}))
+        """, tuple(keys))
+        return cursor.fetchall()
+
+    def _students_by_ids(self, ids):
+        students = {}
+        ids = sorted(ids)
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Student.row_factory
+        # Por tramos, por debajo del límite de variables de SQLite
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"{STUDENT_SELECT} WHERE s.deleted_at IS NULL AND s.id IN ({placeholders})", chunk)
+            students.update((student.id, student) for student in cursor.fetchall())
+        return students
+
+    def find_duplicates(self, identificacion, nombre, apellido, exclude_id=None, limit=5):
+        """
+        Estudiantes registrados que probablemente son la misma persona que los datos dados,
+        del más probable al menos probable. Retorna una lista de DuplicateCandidate.
+        """
+        keys = blocking_keys(identificacion, nombre, apellido)
+        if not keys:
+            return []
+        candidates = []
+        for student in self._students_by_keys(keys):
+            if student.id == exclude_id:
+                continue
+            score, reasons = match_score((identificacion, nombre, apellido),
+                                         (student.identificacion, student.nombre, student.apellido))
+            if score >= self.threshold:
+                candidates.append(DuplicateCandidate(student, score, reasons))
+        candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+        return candidates[:limit]
+
+    def check_batch(self, rows):
+        """
+        Revisión de una importación masiva antes de registrarla. 'rows' es una lista de tuplas
+        (identificacion, nombre, apellido). Cada fila se compara con los estudiantes registrados
+        y con las filas anteriores del mismo lote.
+        Retorna una lista de pares (índice de la fila, lista de DuplicateCandidate).
+        """
+        results = []
+        blocks = {}
+        for index, row in enumerate(rows):
+            candidates = self.find_duplicates(*row)
+            keys = blocking_keys(*row)
+            earlier = sorted({other for key in keys for other in blocks.get(key, ())})
+            for other in earlier:
+                score, reasons = match_score(row, rows[other])
+                if score >= self.threshold:
+                    # Las filas del lote aún no tienen id: se identifican por su número de fila
+                    student = Student(None, rows[other][0], rows[other][1], rows[other][2], None,
+                                      f"fila {other + 1} del lote", None, None)
+                    candidates.append(DuplicateCandidate(student, score, reasons))
+            if candidates:
+                results.append((index, candidates))
+            for key in keys:
+                blocks.setdefault(key, []).append(index)
+        return results
+
+    def scan_all(self, max_block_size=MAX_BLOCK_SIZE):
+        """
+        Revisa todos los estudiantes registrados. Retorna una lista de pares
+        (estudiante, DuplicateCandidate) ordenada del par más probable al menos probable.
+        """
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        pairs = cursor.execute(SELECT_BLOCK_PAIRS, (max_block_size,)).fetchall()
+        students = self._students_by_ids({student_id for pair in pairs for student_id in pair})
+        results = []
+        for first_id, second_id in pairs:
+            first, second = students.get(first_id), students.get(second_id)
+            if not first or not second:
+                continue
+            score, reasons = match_score((first.identificacion, first.nombre, first.apellido),
+                                         (second.identificacion, second.nombre, second.apellido))
+            if score >= self.threshold:
+                results.append((first, DuplicateCandidate(second, score, reasons)))
+        results.sort(key=lambda pair: pair[1].score, reverse=True)
+        return results
+
+    def merge_students(self, merges):
+        """
+        Une duplicados en lote. 'merges' es un diccionario {id_duplicado: id_que_se_conserva}.
+        Los pagos de cada duplicado pasan al estudiante que se conserva y el duplicado se
+        elimina (borrado lógico), todo en una sola transacción.
+        Retorna una tupla: (éxito, mensaje).
+        """
+        if not merges:
+            return False, "No hay estudiantes para unir."
+        if set(merges) & set(merges.values()):
+            return False, "Un estudiante no puede conservarse y unirse a otro a la vez."
+        if any(duplicate_id == keep_id for duplicate_id, keep_id in merges.items()):
+            return False, "Un estudiante no puede unirse consigo mismo."
+        if len(self._students_by_ids(set(merges) | set(merges.values()))) != len(set(merges) | set(merges.values())):
+            return False, "Alguno de los estudiantes no existe o ya fue eliminado."
+        try:
+            cte, params = merge_map_cte(merges)
+            deleted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            def merge(cursor):
+                moved = self.db.record_changes("payments", "update", f"{cte} {MERGE_PAYMENT_DIFFS}", params)
+                cursor.execute(f"""
+                    {cte}
+                    UPDATE payments SET student_id = (SELECT keep_id FROM merge_map WHERE duplicate_id = payments.student_id)
+                    WHERE student_id IN (SELECT duplicate_id FROM merge_map)
+                """, params)
+                self.db.record_changes("students", "delete", f"{cte} {MERGE_STUDENT_DIFFS}",
+                                       dict(params, deleted_at=deleted_at))
+                cursor.execute(f"""
+                    {cte}
+                    UPDATE students SET deleted_at = :deleted_at, active = 0
+                    WHERE id IN (SELECT duplicate_id FROM merge_map)
+                """, dict(params, deleted_at=deleted_at))
+                cursor.execute(f"""
+                    {cte}
+                    DELETE FROM student_match_keys WHERE student_id IN (SELECT duplicate_id FROM merge_map)
+                """, params)
+                return moved
+
+            moved = self.db.write(merge, idempotent=False)
+            logger.info(f"Estudiantes unidos: {len(merges)} duplicados, {moved} pagos trasladados")
+            return True, f"Se unieron {len(merges)} estudiantes duplicados y se trasladaron {moved} pagos."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            logger.error("Error al unir estudiantes:\n" + traceback.format_exc())
+            return False, f"Error al unir estudiantes: {e}"
+        except Exception as e:
+            logger.error("Error al unir estudiantes:\n" + traceback.format_exc())
+            return False, f"Error al unir estudiantes: {e}"
@@ -0,0 +1,204 @@
+import re
+import sqlite3
+import traceback
+from itertools import groupby
+from src.logger import logger
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.student import Student
+from src.models.guardian import Guardian, ChildStatement, FamilyStatement
+from src.controllers.student_controller import StudentController, STUDENT_SELECT
+from src.controllers.tuition_controller import TuitionController, OWED_CTE, PAID_TOWARDS_PLAN
+from src.utils.ledger_export import date_range_bounds
+
+# Validación básica: algo@dominio.tld, sin espacios
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+SELECT_GUARDIANS = """
+    SELECT g.id, g.nombre, g.telefono, g.email, COUNT(s.id)
+    FROM guardians g
+    JOIN students s ON s.guardian_id = g.id AND s.active = 1 AND s.deleted_at IS NULL
+    {where}
+    GROUP BY g.id
+    ORDER BY g.nombre COLLATE NOCASE, g.id
+"""
+SELECT_CHILDREN = f"{STUDENT_SELECT} WHERE s.guardian_id = ? AND s.deleted_at IS NULL ORDER BY s.apellido, s.nombre"
+SELECT_SIBLINGS = f"""
+    {STUDENT_SELECT}
+    WHERE s.guardian_id = (SELECT guardian_id FROM students WHERE id = :student_id)
+      AND s.id <> :student_id AND s.deleted_at IS NULL
+    ORDER BY s.apellido, s.nombre
+"""
+# Estados de cuenta de todas las familias en una sola consulta: los hijos activos de cada
+# acudiente (idx_students_guardian_id), su saldo a la fecha final (con los mismos pagos que
+# cuentan en TuitionController, PAID_TOWARDS_PLAN) y sus pagos del período, que se leen por rango de
+# idx_payments_student_date. Las filas salen ordenadas por familia y estudiante para agruparlas
+# en un solo recorrido.
+SELECT_FAMILY_STATEMENTS = f"""
+    WITH {OWED_CTE},
+    children AS MATERIALIZED (
+        SELECT s.id, s.guardian_id, s.identificacion, s.nombre, s.apellido,
+               COALESCE(c.name, s.course_name) AS course_name, COALESCE(o.amount, 0) AS owed,
+               (SELECT COALESCE(SUM(p.amount_cents), 0) FROM payments p
+                WHERE p.student_id = s.id AND {PAID_TOWARDS_PLAN}) AS paid
+        FROM students s
+        LEFT JOIN courses c ON c.id = s.course_id
+        LEFT JOIN owed o ON o.course_id = s.course_id
+        WHERE s.guardian_id IS NOT NULL AND s.active = 1 AND s.deleted_at IS NULL {{children_filter}}
+    )
+    SELECT g.id, g.nombre, g.telefono, g.email,
+           k.id, k.identificacion, k.nombre, k.apellido, k.course_name, k.owed, k.paid,
+           p.id, COALESCE(p.receipt_code, CAST(p.receipt_number AS TEXT)), p.payment_date, p.amount_cents, p.description
+    FROM children k
+    JOIN guardians g ON g.id = k.guardian_id
+    LEFT JOIN payments p ON p.student_id = k.id AND p.payment_date >= :start AND p.payment_date < :end
+    ORDER BY g.nombre COLLATE NOCASE, g.id, k.apellido, k.nombre, k.id, p.payment_date, p.id
+"""
+
+class GuardianController:
+    """
+    Acudientes y sus familias: hermanos, correcciones del agrupamiento automático (unir dos
+    acudientes o pasar un estudiante a otro) y los estados de cuenta por familia.
+    El agrupamiento a partir de representante y teléfono lo hacen el registro del estudiante
+    (StudentController) y, en las bases anteriores, run_migrations (src.models.migrations).
+    """
+    def __init__(self, db):
+        self.db = db
+        # Crea las tablas students y guardians; los saldos usan tuition_plans
+        StudentController(db)
+        TuitionController(db)
+
+    def get_guardians(self, search=None):
+        """Acudientes con al menos un estudiante activo, con la cantidad de estudiantes."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Guardian.row_factory
+        if search:
+            cursor.execute(SELECT_GUARDIANS.format(where="WHERE g.nombre LIKE ? OR g.telefono LIKE ?"),
+                           (f"%{search}%", f"%{search}%"))
+        else:
+            cursor.execute(SELECT_GUARDIANS.format(where=""))
+        return cursor.fetchall()
+
+    def get_guardian(self, guardian_id):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Guardian.row_factory
+        cursor.execute("SELECT id, nombre, telefono, email, 0 FROM guardians WHERE id = ?", (guardian_id,))
+        return cursor.fetchone()
+
+    def get_children(self, guardian_id):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Student.row_factory
+        cursor.execute(SELECT_CHILDREN, (guardian_id,))
+        return cursor.fetchall()
+
+    def get_siblings(self, student_id):
+        """Los demás estudiantes del mismo acudiente."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Student.row_factory
+        cursor.execute(SELECT_SIBLINGS, {"student_id": student_id})
+        return cursor.fetchall()
+
+    def assign_student(self, student_id, guardian_id):
+        """
+        Pasa el estudiante al acudiente indicado (corrige un agrupamiento equivocado).
+        Retorna una tupla: (éxito, mensaje).
+        """
+        if not self.get_guardian(guardian_id):
+            return False, "Acudiente no encontrado."
+        try:
+            def assign(cursor):
+                row = cursor.execute("SELECT guardian_id FROM students WHERE id = ?", (student_id,)).fetchone()
+                if row is None:
+                    return False
+                if row[0] != guardian_id:
+                    cursor.execute("UPDATE students SET guardian_id = ? WHERE id = ?", (guardian_id, student_id))
+                    self.db.record_change("students", "update", student_id, {"guardian_id": [row[0], guardian_id]})
+                return True
+            if not self.db.write(assign):
+                return False, "Estudiante no encontrado."
+            return True, "Estudiante asignado al acudiente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al asignar el acudiente: {e}"
+
+    def merge_guardians(self, keep_id, merge_id):
+        """
+        Une dos acudientes que son la misma persona: los estudiantes de 'merge_id' pasan a
+        'keep_id' y se elimina 'merge_id'. Retorna una tupla: (éxito, mensaje).
+        """
+        if keep_id == merge_id:
+            return False, "Seleccione dos acudientes distintos."
+        if not self.get_guardian(keep_id) or not self.get_guardian(merge_id):
+            return False, "Acudiente no encontrado."
+        try:
+            def merge(cursor):
+                moved = [row[0] for row in cursor.execute(
+                    "UPDATE students SET guardian_id = ? WHERE guardian_id = ? RETURNING id", (keep_id, merge_id))]
+                for student_id in moved:
+                    self.db.record_change("students", "update", student_id, {"guardian_id": [merge_id, keep_id]})
+                cursor.execute("DELETE FROM guardians WHERE id = ?", (merge_id,))
+                return len(moved)
+            moved = self.db.write(merge, idempotent=False)
+            return True, f"Acudientes unidos: {moved} estudiantes trasladados."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            logger.error("Error al unir acudientes:\n" + traceback.format_exc())
+            return False, f"Error al unir los acudientes: {e}"
+
+    def set_email(self, guardian_id, email):
+        """
+        Registra (o borra, si 'email' está vacío) el correo del acudiente.
+        Retorna una tupla: (éxito, mensaje).
+        """
+        guardian = self.get_guardian(guardian_id)
+        if not guardian:
+            return False, "Acudiente no encontrado."
+        email = (email or "").strip() or None
+        if email and not EMAIL_PATTERN.fullmatch(email):
+            return False, "El correo no es válido."
+        if email and not email.isascii():
+            # Los correos se envían sin la extensión SMTPUTF8, que pocos servidores aceptan
+            return False, "El correo no puede tener tildes, eñes ni otros caracteres especiales."
+        if email == guardian.email:
+            return True, "No hay cambios que guardar."
+        try:
+            def update(cursor):
+                cursor.execute("UPDATE guardians SET email = ? WHERE id = ?", (email, guardian_id))
+                self.db.record_change("guardians", "update", guardian_id, {"email": [guardian.email, email]})
+            self.db.write(update)
+            return True, "Correo del acudiente guardado."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al guardar el correo: {e}"
+
+    def get_family_statements(self, start_date, end_date, guardian_id=None):
+        """
+        Estados de cuenta de las familias entre start_date y end_date (AAAA-MM-DD, inclusive):
+        una FamilyStatement por acudiente con los pagos del período de cada hijo activo y su
+        saldo a end_date. Sin 'guardian_id' se generan los de todo el colegio.
+        """
+        start, end = date_range_bounds(start_date, end_date)
+        params = {"start": start, "end": end, "as_of": end_date}
+        children_filter = ""
+        if guardian_id is not None:
+            children_filter = "AND s.guardian_id = :guardian_id"
+            params["guardian_id"] = guardian_id
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        cursor.execute(SELECT_FAMILY_STATEMENTS.format(children_filter=children_filter), params)
+        statements = []
+        for guardian_row, family_rows in groupby(cursor, key=lambda row: row[:4]):
+            statement = FamilyStatement(Guardian(*guardian_row))
+            for _, child_rows in groupby(family_rows, key=lambda row: row[4]):
+                child = None
+                for row in child_rows:
+                    if child is None:
+                        child = ChildStatement(*row[4:11])
+                    if row[11] is not None:
+                        child.payments.append(row[12:16])
+                statement.children.append(child)
+            statement.guardian.children = len(statement.children)
+            statements.append(statement)
+        return statements
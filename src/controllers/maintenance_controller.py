@@ -0,0 +1,199 @@
+import os
+import re
+import time
+import sqlite3
+import datetime
+import traceback
+from config import BACKUP_DIR, BACKUP_RETENTION, BACKUP_INTERVAL_HOURS, OPTIMIZE_INTERVAL_HOURS
+from src.logger import logger
+
+# Páginas copiadas por paso durante el respaldo en línea y pausa entre pasos (segundos).
+# Entre pasos otras conexiones pueden leer y escribir, de modo que la aplicación sigue en uso.
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Marca de tiempo en el nombre de cada copia: <base>_AAAAMMDD_HHMMSS.db
+SNAPSHOT_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+SNAPSHOT_SUFFIX = re.compile(r"_(\d{8}_\d{6})\.db")
+
+class MaintenanceController:
+    """
+    Respaldos en línea y mantenimiento (VACUUM, ANALYZE, PRAGMA optimize, wal_checkpoint)
+    de la base de datos. Cada operación abre su propia conexión al archivo, por lo que puede
+    ejecutarse en un hilo aparte mientras la interfaz sigue usando la conexión principal.
+    """
+    def __init__(self, db, backup_dir=BACKUP_DIR, retention=BACKUP_RETENTION):
+        self.db = db
+        self.db_path = self._resolve_db_path(db)
+        self.backup_dir = backup_dir
+        self.retention = retention
+
+    def _resolve_db_path(self, db):
+        if isinstance(db, str):
+            return db
+        if getattr(db, "db_name", None):
+            return db.db_name
+        connection = db.connection if hasattr(db, "connection") else db
+        for row in connection.execute("PRAGMA database_list").fetchall():
+            if row[1] == "main":
+                return row[2]
+        raise ValueError("No se pudo determinar la ruta de la base de datos.")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _file_size(self, path):
+        size = 0
+        for suffix in ("", "-wal"):
+            if os.path.exists(path + suffix):
+                size += os.path.getsize(path + suffix)
+        return size
+
+    def list_snapshots(self):
+        """
+        Retorna las rutas de las copias existentes, de la más reciente a la más antigua.
+        Solo cuentan los archivos <base>_AAAAMMDD_HHMMSS.db de esta base: las sedes comparten
+        la carpeta, y "colegio_norte_....db" no es una copia de "colegio.db".
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        snapshots = []
+        for name in os.listdir(self.backup_dir):
+            match = SNAPSHOT_SUFFIX.fullmatch(name[len(stem):]) if name.startswith(stem) else None
+            if match is None:
+                continue
+            try:
+                taken_at = datetime.datetime.strptime(match.group(1), SNAPSHOT_TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            snapshots.append((taken_at, os.path.join(self.backup_dir, name)))
+        return [path for _, path in sorted(snapshots, reverse=True)]
+
+    def rotate_snapshots(self):
+        """Elimina las copias más antiguas, conservando solo las 'retention' más recientes."""
+        removed = []
+        for path in self.list_snapshots()[self.retention:]:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                logger.exception(f"No se pudo eliminar la copia {path}")
+        return removed
+
+    def backup(self):
+        """
+        Crea una copia de la base de datos con sqlite3.Connection.backup, copiando por pasos.
+        Retorna una tupla: (éxito, mensaje, estadísticas).
+        """
+        start = time.perf_counter()
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(self.db_path))[0]
+            timestamp = datetime.datetime.now().strftime(SNAPSHOT_TIMESTAMP_FORMAT)
+            target_path = os.path.join(self.backup_dir, f"{stem}_{timestamp}.db")
+
+            source = self._connect()
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+            finally:
+                target.close()
+                source.close()
+
+            removed = self.rotate_snapshots()
+            self._set_last_run("LAST_BACKUP_AT")
+            stats = {
+                "path": target_path,
+                "seconds": time.perf_counter() - start,
+                "size": os.path.getsize(target_path),
+                "removed": len(removed),
+            }
+            msg = (f"Respaldo creado en {target_path} ({stats['size'] / 1024:.1f} KB) "
+                   f"en {stats['seconds']:.2f} s. Copias antiguas eliminadas: {stats['removed']}.")
+            logger.info(msg)
+            return True, msg, stats
+        except Exception as e:
+            logger.error("Error al crear el respaldo:\n" + traceback.format_exc())
+            return False, f"Error al crear el respaldo: {e}", None
+
+    def optimize(self, vacuum=True):
+        """
+        Ejecuta wal_checkpoint, ANALYZE, PRAGMA optimize y (opcionalmente) VACUUM.
+        Retorna una tupla: (éxito, mensaje, estadísticas) con el tiempo y el espacio recuperado.
+        """
+        start = time.perf_counter()
+        size_before = self._file_size(self.db_path)
+        try:
+            connection = self._connect()
+            try:
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                connection.execute("ANALYZE")
+                connection.execute("PRAGMA optimize")
+                connection.commit()
+                if vacuum:
+                    connection.execute("VACUUM")
+            finally:
+                connection.close()
+
+            self._set_last_run("LAST_OPTIMIZE_AT")
+            size_after = self._file_size(self.db_path)
+            stats = {
+                "seconds": time.perf_counter() - start,
+                "size_before": size_before,
+                "size_after": size_after,
+                "saved": size_before - size_after,
+            }
+            msg = (f"Mantenimiento completado en {stats['seconds']:.2f} s. "
+                   f"Tamaño: {size_before / 1024:.1f} KB -> {size_after / 1024:.1f} KB "
+                   f"(recuperados {stats['saved'] / 1024:.1f} KB).")
+            logger.info(msg)
+            return True, msg, stats
+        except Exception as e:
+            logger.error("Error durante el mantenimiento:\n" + traceback.format_exc())
+            return False, f"Error durante el mantenimiento: {e}", None
+
+    def _get_last_run(self, key):
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+        finally:
+            connection.close()
+        if not row or not row[0]:
+            return None
+        try:
+            return datetime.datetime.strptime(row[0], DATE_FORMAT)
+        except ValueError:
+            return None
+
+    def _set_last_run(self, key):
+        connection = self._connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+                (key, datetime.datetime.now().strftime(DATE_FORMAT))
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get_last_backup_time(self):
+        return self._get_last_run("LAST_BACKUP_AT")
+
+    def run_scheduled(self):
+        """
+        Ejecuta las tareas cuyo intervalo ya se cumplió (respaldo y optimización).
+        Retorna una lista de tuplas (tarea, éxito, mensaje).
+        """
+        results = []
+        now = datetime.datetime.now()
+        last_backup = self._get_last_run("LAST_BACKUP_AT")
+        if last_backup is None or now - last_backup >= datetime.timedelta(hours=BACKUP_INTERVAL_HOURS):
+            success, msg, _ = self.backup()
+            results.append(("backup", success, msg))
+        last_optimize = self._get_last_run("LAST_OPTIMIZE_AT")
+        if last_optimize is None or now - last_optimize >= datetime.timedelta(hours=OPTIMIZE_INTERVAL_HOURS):
+            success, msg, _ = self.optimize()
+            results.append(("optimize", success, msg))
+        return results
@@ -1,6 +1,28 @@
 import sqlite3
 import traceback
 from datetime import datetime
+from src.models.payment import Payment
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.academic_year import ensure_academic_years_table, current_academic_year
+from src.models.receipt_sequence import ReceiptSequence, ensure_receipt_sequences_table
+
+# Consultas con lista explícita de columnas, en el orden que espera Payment.row_factory
+PAYMENT_COLUMNS = ", ".join(Payment.COLUMNS)
+SELECT_PAYMENTS_BY_STUDENT = f"SELECT {PAYMENT_COLUMNS} FROM payments WHERE student_id = ? ORDER BY payment_date DESC"
+SELECT_PAYMENTS_FIRST_PAGE = f"""
+    SELECT {PAYMENT_COLUMNS} FROM payments
+    WHERE student_id = ?
+    ORDER BY payment_date DESC, id DESC
+    LIMIT ?
+"""
+SELECT_PAYMENTS_PAGE_BEFORE = f"""
+    SELECT {PAYMENT_COLUMNS} FROM payments
+    WHERE student_id = ? AND (payment_date, id) < (?, ?)
+    ORDER BY payment_date DESC, id DESC
+    LIMIT ?
+"""
+SELECT_PAYMENT_BY_ID = f"SELECT {PAYMENT_COLUMNS} FROM payments WHERE id = ?"
+SELECT_PAYMENT_BY_RECEIPT_CODE = f"SELECT {PAYMENT_COLUMNS} FROM payments WHERE receipt_code = ?"
 
 class PaymentController:
     def __init__(self, db):
@@ -10,6 +32,7 @@ class PaymentController:
         Esta inicialización asegura que la tabla 'payments' exista.
         """
         self.db = db
+        self.receipt_sequence = ReceiptSequence()
         self.initialize_payments_table()
 
     def initialize_payments_table(self):
@@ -29,13 +52,28 @@ class PaymentController:
                 CREATE TABLE IF NOT EXISTS payments (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     student_id INTEGER,
-                    amount REAL,
+                    amount_cents INTEGER NOT NULL DEFAULT 0,
                     description TEXT,
                     payment_date TEXT,
-                    receipt_number INTEGER
+                    receipt_number INTEGER,
+                    academic_year INTEGER,
+                    receipt_code TEXT
                 )
             """
             cursor.execute(create_table_query)
+            ensure_academic_years_table(cursor)
+            ensure_receipt_sequences_table(cursor)
+            # Las bases de versiones anteriores las lleva a este esquema run_migrations (src.models.migrations)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_academic_year ON payments (academic_year)")
+            # Código impreso en el recibo, único e indexado para buscar un pago por su recibo
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_receipt_code ON payments (receipt_code)")
+            # Índice para la paginación por cursor (keyset) del historial de pagos
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_payments_student_date
+                ON payments (student_id, payment_date, id)
+            """)
+            # Índice para los rangos de fechas del libro de pagos (exportación contable)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_date ON payments (payment_date, id)")
             if hasattr(self.db, "commit") and callable(self.db.commit):
                 self.db.commit()
             elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
@@ -45,56 +83,58 @@ class PaymentController:
             print("Error al inicializar la tabla 'payments':")
             print(detailed_error)
 
-    def register_payment(self, student_id, amount, description):
+    def register_payment(self, student_id, amount_cents, description):
         """
-        Inserta un nuevo registro de pago en la tabla payments.
-        Retorna una tupla: (éxito, mensaje, receipt_number, payment_date).
+        Inserta un nuevo registro de pago en la tabla payments. 'amount_cents' es el monto en
+        centavos (ver src.utils.money.parse_amount).
+        Retorna una tupla: (éxito, mensaje, receipt_number, payment_date, receipt_code).
         En caso de error se imprime el traceback completo en consola.
-        Se asigna el receipt_number igual al id generado.
+        Se asigna el receipt_number igual al id generado, y el receipt_code que se imprime
+        en el recibo con la numeración por día o por año (ver ReceiptSequence).
         """
         try:
-            if hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
-                cursor = self.db.connection.cursor()
-            elif hasattr(self.db, "cursor") and callable(self.db.cursor):
-                cursor = self.db.cursor()
-            else:
-                raise AttributeError("El objeto de base de datos no proporciona un cursor válido mediante 'cursor()' o 'connection.cursor()'.")
-            
             query = """
-                INSERT INTO payments (student_id, amount, description, payment_date)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO payments (student_id, amount_cents, description, payment_date, academic_year, receipt_code)
+                VALUES (?, ?, ?, ?, ?, ?)
             """
             payment_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute(query, (student_id, amount, description, payment_date))
-            
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
-            else:
-                print("Advertencia: No se encontró método commit, verifique la configuración de la base de datos.")
-            
-            receipt_number = cursor.lastrowid
-            # Actualizamos el registro para asignar el número de recibo
-            update_query = "UPDATE payments SET receipt_number = ? WHERE id = ?"
-            cursor.execute(update_query, (receipt_number, receipt_number))
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+
+            def insert_payment(cursor):
+                academic_year = current_academic_year(cursor)
+                receipt_code = self.receipt_sequence.next_code(cursor, payment_date)
+                cursor.execute(query, (student_id, amount_cents, description, payment_date, academic_year, receipt_code))
+                receipt_number = cursor.lastrowid
+                # Se asigna el número de recibo en la misma transacción que el pago
+                update_query = "UPDATE payments SET receipt_number = ? WHERE id = ?"
+                cursor.execute(update_query, (receipt_number, receipt_number))
+                self.db.record_change("payments", "insert", receipt_number, {
+                    "student_id": student_id, "amount_cents": amount_cents, "description": description,
+                    "payment_date": payment_date, "receipt_number": receipt_number, "receipt_code": receipt_code
+                })
+                return receipt_number, receipt_code
+
+            # Un pago no es idempotente: solo se reintenta si el bloqueo impidió iniciar la transacción
+            receipt_number, receipt_code = self.db.write(insert_payment, idempotent=False)
             
-            return True, "Pago registrado exitosamente.", receipt_number, payment_date
+            return True, "Pago registrado exitosamente.", receipt_number, payment_date, receipt_code
 
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE, None, None, None
+            detailed_error = traceback.format_exc()
+            print("Error al registrar el pago:")
+            print(detailed_error)
+            return False, f"Error al registrar el pago: {e}", None, None, None
         except Exception as e:
             detailed_error = traceback.format_exc()
             print("Error al registrar el pago:")
             print(detailed_error)
-            return False, f"Error al registrar el pago: {e}", None, None
+            return False, f"Error al registrar el pago: {e}", None, None, None
 
     def get_payments_by_student(self, student_id):
         """
         Recupera todos los registros de pago para un determinado student_id.
-        Retorna una lista de objetos sqlite3.Row.
+        Retorna una lista de registros Payment.
         """
         try:
             if hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
@@ -104,8 +144,8 @@ class PaymentController:
             else:
                 raise AttributeError("El objeto de base de datos no proporciona un cursor válido mediante 'cursor()' o 'connection.cursor()'.")
             
-            query = "SELECT * FROM payments WHERE student_id = ? ORDER BY payment_date DESC"
-            cursor.execute(query, (student_id,))
+            cursor.row_factory = Payment.row_factory
+            cursor.execute(SELECT_PAYMENTS_BY_STUDENT, (student_id,))
             return cursor.fetchall()
         except Exception as e:
             detailed_error = traceback.format_exc()
@@ -113,10 +153,43 @@ class PaymentController:
             print(detailed_error)
             return []
 
+    def get_payments_page(self, student_id, before_cursor=None, limit=50):
+        """
+        Recupera una página del historial de pagos de un estudiante, del más reciente al más antiguo.
+        Usa paginación por cursor (keyset) sobre (payment_date, id): 'before_cursor' es la tupla
+        (payment_date, id) del último pago ya mostrado, o None para la primera página.
+        Retorna una tupla: (pagos, siguiente_cursor). siguiente_cursor es None cuando no quedan más pagos.
+        """
+        try:
+            if hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
+                cursor = self.db.connection.cursor()
+            elif hasattr(self.db, "cursor") and callable(self.db.cursor):
+                cursor = self.db.cursor()
+            else:
+                raise AttributeError("El objeto de base de datos no proporciona un cursor válido mediante 'cursor()' o 'connection.cursor()'.")
+
+            cursor.row_factory = Payment.row_factory
+            if before_cursor is None:
+                cursor.execute(SELECT_PAYMENTS_FIRST_PAGE, (student_id, limit))
+            else:
+                last_date, last_id = before_cursor
+                cursor.execute(SELECT_PAYMENTS_PAGE_BEFORE, (student_id, last_date, last_id, limit))
+            rows = cursor.fetchall()
+            next_cursor = None
+            if len(rows) == limit:
+                last_payment = rows[-1]
+                next_cursor = (last_payment.payment_date, last_payment.id)
+            return rows, next_cursor
+        except Exception as e:
+            detailed_error = traceback.format_exc()
+            print(f"Error fetching payments page for student {student_id}:")
+            print(detailed_error)
+            return [], None
+
     def get_payment_by_id(self, payment_id):
         """
         Recupera un registro de pago individual por su id.
-        Retorna un objeto sqlite3.Row.
+        Retorna un registro Payment.
         """
         try:
             if hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
@@ -126,11 +199,34 @@ class PaymentController:
             else:
                 raise AttributeError("El objeto de base de datos no proporciona un cursor válido mediante 'cursor()' o 'connection.cursor()'.")
             
-            query = "SELECT * FROM payments WHERE id = ?"
-            cursor.execute(query, (payment_id,))
+            cursor.row_factory = Payment.row_factory
+            cursor.execute(SELECT_PAYMENT_BY_ID, (payment_id,))
             return cursor.fetchone()
         except Exception as e:
             detailed_error = traceback.format_exc()
             print(f"Error fetching payment with id {payment_id}:")
             print(detailed_error)
-            return None
\ No newline at end of file
+            return None
+
+    def find_by_receipt_code(self, receipt_code):
+        """
+        Recupera el pago del recibo con el código impreso (por ejemplo "20250211-0012"),
+        con una búsqueda en el índice único de receipt_code.
+        Retorna un registro Payment, o None si no existe.
+        """
+        try:
+            if hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
+                cursor = self.db.connection.cursor()
+            elif hasattr(self.db, "cursor") and callable(self.db.cursor):
+                cursor = self.db.cursor()
+            else:
+                raise AttributeError("El objeto de base de datos no proporciona un cursor válido mediante 'cursor()' o 'connection.cursor()'.")
+
+            cursor.row_factory = Payment.row_factory
+            cursor.execute(SELECT_PAYMENT_BY_RECEIPT_CODE, ((receipt_code or "").strip(),))
+            return cursor.fetchone()
+        except Exception as e:
+            detailed_error = traceback.format_exc()
+            print(f"Error fetching payment with receipt code {receipt_code}:")
+            print(detailed_error)
+            return None
@@ -0,0 +1,283 @@
+import json
+import sqlite3
+import traceback
+from datetime import datetime
+from src.logger import logger
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.promotion import Promotion
+from src.models.academic_year import YEAR_OPEN, ensure_academic_years_table
+
+PROMOTION_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS promotions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        username TEXT,
+        mapping TEXT NOT NULL,
+        graduating TEXT NOT NULL,
+        academic_year INTEGER,
+        promoted INTEGER NOT NULL DEFAULT 0,
+        graduated INTEGER NOT NULL DEFAULT 0,
+        undone_at TEXT
+    )
+    """,
+    # Foto de los estudiantes afectados antes de la promoción, para poder deshacerla
+    """
+    CREATE TABLE IF NOT EXISTS promotion_snapshots (
+        promotion_id INTEGER NOT NULL REFERENCES promotions(id),
+        student_id INTEGER NOT NULL,
+        course_id INTEGER,
+        active INTEGER,
+        academic_year INTEGER,
+        PRIMARY KEY (promotion_id, student_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+PROMOTION_COLUMNS = ", ".join(Promotion.COLUMNS)
+SELECT_PROMOTIONS = f"SELECT {PROMOTION_COLUMNS} FROM promotions ORDER BY id DESC"
+SELECT_LAST_PROMOTION = f"SELECT {PROMOTION_COLUMNS} FROM promotions WHERE undone_at IS NULL ORDER BY id DESC LIMIT 1"
+
+# Estudiantes que participan en la promoción: activos y no eliminados de los cursos de origen
+PREVIEW_PROMOTION = """
+    SELECT m.from_course, m.to_course, COUNT(s.id)
+    FROM promotion_map m
+    LEFT JOIN students s ON s.course_id = m.from_course AND s.active = 1 AND s.deleted_at IS NULL
+    GROUP BY m.from_course, m.to_course
+    ORDER BY m.from_course
+"""
+INSERT_SNAPSHOT = """
+    INSERT INTO promotion_snapshots (promotion_id, student_id, course_id, active, academic_year)
+    SELECT ?, s.id, s.course_id, s.active, s.academic_year
+    FROM students s JOIN promotion_map m ON m.from_course = s.course_id
+    WHERE s.active = 1 AND s.deleted_at IS NULL
+"""
+# Un solo UPDATE para todos los cursos: SQLite evalúa el SET con los valores anteriores de la
+# fila, así que "5A → 6A" y "6A → 7A" en la misma promoción no se encadenan.
+# Los cursos que egresan (destino NULL) conservan su curso y quedan inactivos.
+APPLY_PROMOTION = """
+    UPDATE students SET
+        course_id = COALESCE((SELECT m.to_course FROM promotion_map m WHERE m.from_course = students.course_id),
+                             course_id),
+        active = CASE WHEN (SELECT m.to_course FROM promotion_map m WHERE m.from_course = students.course_id) IS NULL
+                      THEN 0 ELSE active END,
+        academic_year = CASE WHEN (SELECT m.to_course FROM promotion_map m WHERE m.from_course = students.course_id) IS NULL
+                             THEN academic_year ELSE ? END
+    WHERE id IN (SELECT student_id FROM promotion_snapshots WHERE promotion_id = ?)
+"""
+UNDO_PROMOTION = """
+    UPDATE students SET (course_id, active, academic_year) = (
+        SELECT snap.course_id, snap.active, snap.academic_year FROM promotion_snapshots snap
+        WHERE snap.promotion_id = ? AND snap.student_id = students.id
+    )
+    WHERE id IN (SELECT student_id FROM promotion_snapshots WHERE promotion_id = ?)
+"""
+# Bitácora de una promoción: un diff {campo: [antes, después]} por estudiante, solo con los
+# campos que cambiaron (json_remove descarta los que quedaron iguales). Con restore = 1 el
+# diff va del estado actual a la foto, para deshacer.
+SNAPSHOT_DIFFS = """
+    SELECT student_id AS pk,
+           json_remove(json_object('course_id', json_array(before_course, after_course),
+                                   'active', json_array(before_active, after_active),
+                                   'academic_year', json_array(before_year, after_year)),
+                       CASE WHEN before_course IS after_course THEN '$.course_id' ELSE '$.sin_cambio' END,
+                       CASE WHEN before_active IS after_active THEN '$.active' ELSE '$.sin_cambio' END,
+                       CASE WHEN before_year IS after_year THEN '$.academic_year' ELSE '$.sin_cambio' END) AS diff
+    FROM (
+        SELECT snap.student_id,
+               CASE WHEN :restore THEN s.course_id ELSE snap.course_id END AS before_course,
+               CASE WHEN :restore THEN snap.course_id ELSE s.course_id END AS after_course,
+               CASE WHEN :restore THEN s.active ELSE snap.active END AS before_active,
+               CASE WHEN :restore THEN snap.active ELSE s.active END AS after_active,
+               CASE WHEN :restore THEN s.academic_year ELSE snap.academic_year END AS before_year,
+               CASE WHEN :restore THEN snap.academic_year ELSE s.academic_year END AS after_year
+        FROM promotion_snapshots snap JOIN students s ON s.id = snap.student_id
+        WHERE snap.promotion_id = :promotion_id
+    )
+    WHERE before_course IS NOT after_course OR before_active IS NOT after_active OR before_year IS NOT after_year
+"""
+# Estudiantes que se promoverían y ya están en el año de destino o en uno posterior
+COUNT_NOT_BEFORE_TARGET = """
+    SELECT COUNT(*) FROM students s JOIN promotion_map m ON m.from_course = s.course_id
+    WHERE m.to_course IS NOT NULL AND s.active = 1 AND s.deleted_at IS NULL AND s.academic_year >= ?
+"""
+SELECT_OPEN_YEARS = "SELECT year FROM academic_years WHERE status = 'open' ORDER BY year DESC"
+COUNT_GRADUATED = """
+    SELECT COUNT(*) FROM promotion_snapshots snap JOIN students s ON s.id = snap.student_id
+    WHERE snap.promotion_id = ? AND snap.active = 1 AND s.active = 0
+"""
+
+def promotion_map_cte(mapping, graduating):
+    """
+    CTE 'promotion_map(from_course, to_course)' con el mapeo de cursos; los cursos que egresan
+    tienen to_course NULL. Retorna (sql, parámetros).
+    """
+    pairs = [(source, target) for source, target in mapping.items()] + [(source, None) for source in graduating]
+    values = ", ".join("(?, ?)" for _ in pairs)
+    params = [value for pair in pairs for value in pair]
+    return f"WITH promotion_map(from_course, to_course) AS (VALUES {values})", params
+
+class PromotionController:
+    """
+    Promoción de fin de año: pasa a todos los estudiantes activos de cada curso de origen a
+    su curso de destino y desactiva a los que egresan, con UPDATE sobre conjuntos en una sola
+    transacción. Antes de aplicar se guarda una foto de los estudiantes afectados
+    (promotion_snapshots), con la que la promoción puede deshacerse.
+    """
+    def __init__(self, db):
+        self.db = db
+        cursor = self.db.connection.cursor()
+        for statement in PROMOTION_SCHEMA:
+            cursor.execute(statement)
+        ensure_academic_years_table(cursor)
+        self.db.connection.commit()
+
+    def validate(self, mapping, graduating=()):
+        """Retorna un mensaje de error si el mapeo no es válido, o None."""
+        if not mapping and not graduating:
+            return "Indique al menos un curso a promover o a egresar."
+        repeated = set(mapping) & set(graduating)
+        if repeated:
+            return "Un curso no puede promoverse y egresar a la vez."
+        if any(source == target for source, target in mapping.items()):
+            return "El curso de destino debe ser distinto del curso de origen."
+        course_ids = set(mapping) | set(mapping.values()) | set(graduating)
+        placeholders = ", ".join("?" * len(course_ids))
+        existing = {row[0] for row in self.db.connection.execute(
+            f"SELECT id FROM courses WHERE id IN ({placeholders})", tuple(course_ids))}
+        if existing != course_ids:
+            return "El mapeo incluye cursos que no existen."
+        return None
+
+    def preview(self, mapping, graduating=()):
+        """
+        Cantidad de estudiantes que se moverían, sin modificar nada.
+        Retorna una lista de tuplas (curso de origen, curso de destino o None si egresa, estudiantes).
+        """
+        cte, params = promotion_map_cte(mapping, graduating)
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        return cursor.execute(f"{cte} {PREVIEW_PROMOTION}", params).fetchall()
+
+    def get_open_years(self):
+        """Años escolares abiertos, del más reciente al más antiguo (destinos posibles de una promoción)."""
+        return [row[0] for row in self.db.connection.execute(SELECT_OPEN_YEARS).fetchall()]
+
+    def validate_target_year(self, mapping, graduating, academic_year):
+        """
+        Retorna un mensaje de error si los promovidos no pueden pasar a 'academic_year', o None.
+        El año de destino debe estar abierto y ser posterior al año de todos los promovidos;
+        si no, quedarían en el año que se cierra y se archivarían con él.
+        """
+        if not mapping:
+            # Solo egresados: conservan su año
+            return None
+        if academic_year is None:
+            return "Abra el año escolar siguiente antes de promover a los estudiantes."
+        row = self.db.connection.execute("SELECT status FROM academic_years WHERE year = ?", (academic_year,)).fetchone()
+        if not row or row[0] != YEAR_OPEN:
+            return f"El año escolar {academic_year} no está abierto."
+        cte, params = promotion_map_cte(mapping, graduating)
+        not_before = self.db.connection.execute(f"{cte} {COUNT_NOT_BEFORE_TARGET}",
+                                                params + [academic_year]).fetchone()[0]
+        if not_before:
+            return (f"{not_before} estudiantes ya están en el año {academic_year} o en uno posterior. "
+                    "Abra el año escolar siguiente y elíjalo como destino.")
+        return None
+
+    def promote(self, mapping, graduating=(), academic_year=None):
+        """
+        Aplica la promoción. 'mapping' es un diccionario {curso_origen: curso_destino} y
+        'graduating' los cursos que egresan. Los promovidos pasan al año escolar indicado
+        (por defecto, el año abierto más reciente), que debe estar abierto y ser posterior a su
+        año actual. Retorna una tupla: (éxito, mensaje).
+        """
+        error = self.validate(mapping, graduating)
+        if error:
+            return False, error
+        if academic_year is None:
+            open_years = self.get_open_years()
+            academic_year = open_years[0] if open_years else None
+        error = self.validate_target_year(mapping, graduating, academic_year)
+        if error:
+            return False, error
+        try:
+            cte, params = promotion_map_cte(mapping, graduating)
+            created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            year = academic_year
+
+            def apply(cursor):
+                cursor.execute("""
+                    INSERT INTO promotions (created_at, username, mapping, graduating, academic_year)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (created_at, self.db.username, json.dumps(mapping), json.dumps(list(graduating)), year))
+                promotion_id = cursor.lastrowid
+                cursor.execute(f"{cte} {INSERT_SNAPSHOT}", params + [promotion_id])
+                cursor.execute(f"{cte} {APPLY_PROMOTION}", params + [year, promotion_id])
+                changed = self.db.record_changes("students", "update", SNAPSHOT_DIFFS,
+                                                 {"restore": 0, "promotion_id": promotion_id})
+                graduated = cursor.execute(COUNT_GRADUATED, (promotion_id,)).fetchone()[0]
+                promoted = changed - graduated
+                cursor.execute("UPDATE promotions SET promoted = ?, graduated = ? WHERE id = ?",
+                               (promoted, graduated, promotion_id))
+                self.db.record_change("promotions", "insert", promotion_id, {
+                    "mapping": mapping, "graduating": list(graduating), "academic_year": year,
+                    "promoted": promoted, "graduated": graduated
+                })
+                return promoted, graduated
+
+            promoted, graduated = self.db.write(apply, idempotent=False)
+            logger.info(f"Promoción aplicada: {promoted} promovidos, {graduated} egresados")
+            return True, f"Promoción aplicada: {promoted} estudiantes promovidos y {graduated} egresados."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            logger.error("Error al aplicar la promoción:\n" + traceback.format_exc())
+            return False, f"Error al aplicar la promoción: {e}"
+        except Exception as e:
+            logger.error("Error al aplicar la promoción:\n" + traceback.format_exc())
+            return False, f"Error al aplicar la promoción: {e}"
+
+    def get_promotions(self):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Promotion.row_factory
+        cursor.execute(SELECT_PROMOTIONS)
+        return cursor.fetchall()
+
+    def get_last_promotion(self):
+        """La promoción más reciente que no se ha deshecho, o None."""
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = Promotion.row_factory
+        cursor.execute(SELECT_LAST_PROMOTION)
+        return cursor.fetchone()
+
+    def undo_promotion(self, promotion_id):
+        """
+        Devuelve a los estudiantes de la promoción su curso, estado y año escolar anteriores.
+        Solo puede deshacerse la promoción más reciente. Retorna una tupla: (éxito, mensaje).
+        """
+        last = self.get_last_promotion()
+        if not last or last.id != promotion_id:
+            return False, "Solo puede deshacerse la última promoción aplicada."
+        try:
+            undone_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            def undo(cursor):
+                # La bitácora se calcula antes de restaurar: compara el estado actual con la foto
+                restored = self.db.record_changes("students", "update", SNAPSHOT_DIFFS,
+                                                  {"restore": 1, "promotion_id": promotion_id})
+                cursor.execute(UNDO_PROMOTION, (promotion_id, promotion_id))
+                cursor.execute("UPDATE promotions SET undone_at = ? WHERE id = ?", (undone_at, promotion_id))
+                self.db.record_change("promotions", "update", promotion_id, {"undone_at": [None, undone_at]})
+                return restored
+
+            restored = self.db.write(undo, idempotent=False)
+            return True, f"Promoción deshecha: {restored} estudiantes restaurados."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            logger.error("Error al deshacer la promoción:\n" + traceback.format_exc())
+            return False, f"Error al deshacer la promoción: {e}"
+        except Exception as e:
+            logger.error("Error al deshacer la promoción:\n" + traceback.format_exc())
+            return False, f"Error al deshacer la promoción: {e}"
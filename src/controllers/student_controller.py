@@ -1,5 +1,37 @@
 import sqlite3
 import traceback
+from datetime import datetime
+from src.models.student import Student
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.models.change_log import record_values, diff_values
+from src.models.academic_year import ensure_academic_years_table, current_academic_year
+from src.models.duplicates import ensure_match_keys_table, index_student
+from src.models.guardian import ensure_guardians_table, link_guardian
+
+# Consultas con lista explícita de columnas, en el orden que espera Student.row_factory.
+# El nombre del curso se obtiene por la llave foránea course_id; course_name solo queda
+# como respaldo para filas antiguas que no pudieron asociarse a un curso.
+STUDENT_SELECT = """
+    SELECT s.id, s.identificacion, s.nombre, s.apellido, s.course_id,
+           COALESCE(c.name, s.course_name), s.representante, s.telefono, s.active, s.academic_year
+    FROM students s
+    LEFT JOIN courses c ON c.id = s.course_id
+"""
+SELECT_STUDENT_BY_IDENTIFICATION = f"{STUDENT_SELECT} WHERE s.identificacion = ? AND s.deleted_at IS NULL"
+SELECT_STUDENT_BY_ID = f"{STUDENT_SELECT} WHERE s.id = ?"
+# Los listados excluyen a los estudiantes eliminados (borrado lógico con deleted_at)
+SELECT_ALL_STUDENTS = f"{STUDENT_SELECT} WHERE s.deleted_at IS NULL"
+# La identificación es única también entre los eliminados: registrar de nuevo a un estudiante
+# eliminado recupera su fila (y con ella su historial de pagos) con los datos nuevos
+SELECT_DELETED_BY_IDENTIFICATION = """
+    SELECT id, nombre, apellido, course_id, representante, telefono, active, academic_year, guardian_id, deleted_at
+    FROM students WHERE identificacion = ? AND deleted_at IS NOT NULL
+"""
+RESTORE_STUDENT = """
+    UPDATE students SET nombre = ?, apellido = ?, course_id = ?, representante = ?, telefono = ?, active = 1,
+                        academic_year = ?, guardian_id = ?, deleted_at = NULL
+    WHERE id = ?
+"""
 
 class StudentController:
     def __init__(self, db):
@@ -35,10 +67,21 @@ class StudentController:
                     course_name TEXT,
                     representante TEXT,
                     telefono TEXT,
-                    active INTEGER DEFAULT 1
+                    active INTEGER DEFAULT 1,
+                    course_id INTEGER REFERENCES courses(id),
+                    academic_year INTEGER,
+                    deleted_at TEXT,
+                    guardian_id INTEGER REFERENCES guardians(id)
                 )
             """
             cursor.execute(create_table_query)
+            # Las bases de versiones anteriores las lleva a este esquema run_migrations (src.models.migrations)
+            ensure_academic_years_table(cursor)
+            ensure_match_keys_table(cursor)
+            ensure_guardians_table(cursor)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_course_id ON students (course_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_academic_year ON students (academic_year)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_guardian_id ON students (guardian_id)")
             # Use 'commit' from db or from db.connection if available
             if hasattr(self.db, "commit") and callable(self.db.commit):
                 self.db.commit()
@@ -52,8 +95,20 @@ class StudentController:
     def get_student_by_identification(self, identificacion):
         try:
             cursor = self._get_cursor()
-            query = "SELECT * FROM students WHERE identificacion = ?"
-            cursor.execute(query, (identificacion,))
+            cursor.row_factory = Student.row_factory
+            cursor.execute(SELECT_STUDENT_BY_IDENTIFICATION, (identificacion,))
+            return cursor.fetchone()
+        except Exception as e:
+            detailed_error = traceback.format_exc()
+            print("Error al obtener el estudiante:")
+            print(detailed_error)
+            return None
+
+    def get_student_by_id(self, student_id):
+        try:
+            cursor = self._get_cursor()
+            cursor.row_factory = Student.row_factory
+            cursor.execute(SELECT_STUDENT_BY_ID, (student_id,))
             return cursor.fetchone()
         except Exception as e:
             detailed_error = traceback.format_exc()
@@ -63,12 +118,12 @@ class StudentController:
 
     def get_all_students(self):
         """
-        Retorna una lista de todos los estudiantes.
+        Retorna una lista de todos los estudiantes como registros Student.
         """
         try:
             cursor = self._get_cursor()
-            query = "SELECT * FROM students"
-            cursor.execute(query)
+            cursor.row_factory = Student.row_factory
+            cursor.execute(SELECT_ALL_STUDENTS)
             return cursor.fetchall()
         except Exception as e:
             detailed_error = traceback.format_exc()
@@ -78,21 +133,31 @@ class StudentController:
 
     def delete_student(self, identificacion):
         """
-        Elimina el estudiante con la identificación dada.
+        Elimina el estudiante con la identificación dada. El borrado es lógico: la fila se marca
+        con deleted_at y se desactiva, de modo que sus pagos conservan su estudiante y el
+        historial sigue disponible; los listados ya no lo muestran.
         Retorna una tupla: (éxito, mensaje).
         """
         try:
             student = self.get_student_by_identification(identificacion)
             if not student:
                 return (False, "Estudiante no encontrado.")
-            cursor = self._get_cursor()
-            query = "DELETE FROM students WHERE identificacion = ?"
-            cursor.execute(query, (identificacion,))
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+            query = "UPDATE students SET deleted_at = ?, active = 0 WHERE id = ?"
+            deleted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            def delete(cursor):
+                cursor.execute(query, (deleted_at, student.id))
+                # La bitácora conserva la fila eliminada completa
+                self.db.record_change("students", "delete", student.id,
+                                      dict(record_values(student), deleted_at=deleted_at))
+            self.db.write(delete)
             return (True, "Estudiante eliminado correctamente.")
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return (False, BUSY_MESSAGE)
+            print("Error al eliminar el estudiante:")
+            print(traceback.format_exc())
+            return (False, f"Error al eliminar el estudiante: {e}")
         except Exception as e:
             detailed_error = traceback.format_exc()
             print("Error al eliminar el estudiante:")
@@ -108,33 +173,109 @@ class StudentController:
             student = self.get_student_by_identification(identificacion)
             if not student:
                 return (False, "Estudiante no encontrado.")
-            cursor = self._get_cursor()
-            query = "UPDATE students SET active = 0 WHERE identificacion = ?"
-            cursor.execute(query, (identificacion,))
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+            query = "UPDATE students SET active = 0 WHERE id = ?"
+
+            def deactivate(cursor):
+                cursor.execute(query, (student.id,))
+                self.db.record_change("students", "update", student.id, {"active": [student.active, 0]})
+            self.db.write(deactivate)
             return (True, "Estudiante desactivado correctamente.")
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return (False, BUSY_MESSAGE)
+            print("Error al desactivar el estudiante:")
+            print(traceback.format_exc())
+            return (False, f"Error al desactivar el estudiante: {e}")
         except Exception as e:
             detailed_error = traceback.format_exc()
             print("Error al desactivar el estudiante:")
             print(detailed_error)
             return (False, f"Error al desactivar el estudiante: {e}")
 
-    def register_student(self, identificacion, nombre, apellido, course_name, representante, telefono):
+    def update_student(self, identificacion, nombre, apellido, course_id, representante, telefono):
+        """
+        Actualiza los datos del estudiante con la identificación dada.
+        Retorna una tupla: (éxito, mensaje).
+        """
         try:
-            cursor = self._get_cursor()
+            student = self.get_student_by_identification(identificacion)
+            if not student:
+                return (False, "Estudiante no encontrado.")
             query = """
-                INSERT INTO students (identificacion, nombre, apellido, course_name, representante, telefono, active)
-                VALUES (?, ?, ?, ?, ?, ?, 1)
+                UPDATE students SET nombre = ?, apellido = ?, course_id = ?, representante = ?, telefono = ?
+                WHERE id = ?
             """
-            cursor.execute(query, (identificacion, nombre, apellido, course_name, representante, telefono))
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+            after = {"nombre": nombre, "apellido": apellido, "course_id": course_id,
+                     "representante": representante, "telefono": telefono}
+            diff = diff_values({field: getattr(student, field) for field in after}, after)
+            if not diff:
+                return (True, "No hay cambios que guardar.")
+
+            def update(cursor):
+                cursor.execute(query, (nombre, apellido, course_id, representante, telefono, student.id))
+                if "representante" in diff or "telefono" in diff:
+                    previous = cursor.execute("SELECT guardian_id FROM students WHERE id = ?", (student.id,)).fetchone()[0]
+                    guardian_id = link_guardian(cursor, representante, telefono)
+                    if guardian_id != previous:
+                        cursor.execute("UPDATE students SET guardian_id = ? WHERE id = ?", (guardian_id, student.id))
+                        diff["guardian_id"] = [previous, guardian_id]
+                self.db.record_change("students", "update", student.id, diff)
+                if "nombre" in diff or "apellido" in diff:
+                    index_student(cursor, student.id, identificacion, nombre, apellido)
+            self.db.write(update)
+            return (True, "Estudiante actualizado correctamente.")
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return (False, BUSY_MESSAGE)
+            print("Error al actualizar el estudiante:")
+            print(traceback.format_exc())
+            return (False, f"Error al actualizar el estudiante: {e}")
+        except Exception as e:
+            detailed_error = traceback.format_exc()
+            print("Error al actualizar el estudiante:")
+            print(detailed_error)
+            return (False, f"Error al actualizar el estudiante: {e}")
+
+    def register_student(self, identificacion, nombre, apellido, course_id, representante, telefono):
+        try:
+            query = """
+                INSERT INTO students (identificacion, nombre, apellido, course_id, representante, telefono, active,
+                                      academic_year, guardian_id)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+            """
+
+            def insert(cursor):
+                academic_year = current_academic_year(cursor)
+                guardian_id = link_guardian(cursor, representante, telefono)
+                values = {
+                    "nombre": nombre, "apellido": apellido, "course_id": course_id, "representante": representante,
+                    "telefono": telefono, "active": 1, "academic_year": academic_year, "guardian_id": guardian_id
+                }
+                deleted = cursor.execute(SELECT_DELETED_BY_IDENTIFICATION, (identificacion,)).fetchone()
+                if deleted is not None:
+                    student_id = deleted["id"]
+                    cursor.execute(RESTORE_STUDENT, (nombre, apellido, course_id, representante, telefono, academic_year,
+                                                     guardian_id, student_id))
+                    before = {field: deleted[field] for field in deleted.keys() if field != "id"}
+                    self.db.record_change("students", "update", student_id,
+                                          diff_values(before, dict(values, deleted_at=None)))
+                else:
+                    cursor.execute(query, (identificacion, nombre, apellido, course_id, representante, telefono,
+                                           academic_year, guardian_id))
+                    student_id = cursor.lastrowid
+                    self.db.record_change("students", "insert", student_id, dict(values, identificacion=identificacion))
+                index_student(cursor, student_id, identificacion, nombre, apellido)
+                return deleted is not None
+            # La identificación es única, así que reintentar la inserción no crea duplicados
+            if self.db.write(insert):
+                return (True, "Estudiante registrado nuevamente; se recuperó su historial de pagos.")
             return (True, "Estudiante registrado correctamente.")
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return (False, BUSY_MESSAGE)
+            print("Error al registrar el estudiante:")
+            print(traceback.format_exc())
+            return (False, f"Error al registrar el estudiante: {e}")
         except Exception as e:
             detailed_error = traceback.format_exc()
             print("Error al registrar el estudiante:")
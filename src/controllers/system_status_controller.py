@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import datetime
+import threading
+from src.models.changes import get_change_bus
+from src.models.runtime_stats import cache_counters, recent_jobs
+from src.controllers.maintenance_controller import DATE_FORMAT
+
+SELECT_TABLES = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+# El primer número de 'stat' es la cantidad de filas de la tabla según el último ANALYZE
+SELECT_STAT1_ROWS = "SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl"
+SELECT_LAST_RUNS = "SELECT key, value FROM config WHERE key IN ('LAST_BACKUP_AT', 'LAST_OPTIMIZE_AT')"
+
+# Origen de la cantidad de filas de cada tabla
+ROWS_FROM_STATS = "stat1"
+ROWS_FROM_ROWID = "rowid"
+
+class TableRowCounter:
+    """
+    Filas por tabla sin COUNT(*): parte de sqlite_stat1, que actualiza el ANALYZE del
+    mantenimiento, y le suma los insert/delete que publica el bus de cambios desde entonces.
+    Las tablas sin estadísticas usan max(rowid), una cota superior que se lee del índice.
+    Los cambios hechos por otros equipos se incorporan en el siguiente ANALYZE.
+    """
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._subscription = None
+        self._baseline = None
+        self._deltas = {}
+        self._analyzed_at = None
+
+    def counts(self, cursor, analyzed_at):
+        """Lista de (tabla, filas, origen) con origen ROWS_FROM_STATS, ROWS_FROM_ROWID o None."""
+        with self._lock:
+            if self._baseline is None or analyzed_at != self._analyzed_at:
+                self._load_baseline(cursor)
+                self._analyzed_at = analyzed_at
+            for event in self._subscription.drain():
+                if event.action == "insert":
+                    self._deltas[event.table] = self._deltas.get(event.table, 0) + 1
+                elif event.action == "delete":
+                    self._deltas[event.table] = self._deltas.get(event.table, 0) - 1
+            result = []
+            for table, (rows, source) in sorted(self._baseline.items()):
+                if rows is not None:
+                    rows = max(rows + self._deltas.get(table, 0), 0)
+                result.append((table, rows, source))
+            return result
+
+    def _load_baseline(self, cursor):
+        tables = [row[0] for row in cursor.execute(SELECT_TABLES).fetchall()]
+        # Suscribirse antes de leer la estadística: un cambio en medio se cuenta dos veces como
+        # mucho, pero nunca se pierde
+        if self._subscription is not None:
+            self._subscription.close()
+        self._subscription = get_change_bus(self.db_name).subscribe(tables)
+        self._deltas = {}
+        try:
+            stats = dict(cursor.execute(SELECT_STAT1_ROWS).fetchall())
+        except sqlite3.OperationalError:
+            # Nunca se ejecutó ANALYZE
+            stats = {}
+        self._baseline = {}
+        for table in tables:
+            if table in stats:
+                self._baseline[table] = (stats[table], ROWS_FROM_STATS)
+                continue
+            try:
+                rows = cursor.execute(f'SELECT max(rowid) FROM "{table}"').fetchone()[0] or 0
+                self._baseline[table] = (rows, ROWS_FROM_ROWID)
+            except sqlite3.OperationalError:
+                # Tabla WITHOUT ROWID sin estadísticas
+                self._baseline[table] = (None, None)
+
+_row_counters = {}
+_row_counters_lock = threading.Lock()
+
+def get_row_counter(db_name):
+    """Contador de filas compartido por todas las conexiones del proceso al mismo archivo."""
+    key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    with _row_counters_lock:
+        counter = _row_counters.get(key)
+        if counter is None:
+            counter = _row_counters[key] = TableRowCounter(db_name)
+        return counter
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _parse_date(value):
+    try:
+        return datetime.datetime.strptime(value, DATE_FORMAT) if value else None
+    except ValueError:
+        return None
+
+class SystemStatusController:
+    """
+    Estado de la instalación para el panel de administración. Todo sale de datos que ya
+    se llevan al día (tamaños de archivo, PRAGMAs, estadísticas del proceso y sqlite_stat1),
+    así que get_status() no recorre ninguna tabla aunque la base sea grande.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.row_counter = get_row_counter(db.db_name)
+
+    def get_status(self):
+        cursor = self.db.connection.cursor()
+        path = os.path.abspath(self.db.db_name)
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
+        # cache_size negativo está en KiB; positivo, en páginas
+        cache_bytes = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+        last_runs = {key: _parse_date(value) for key, value in cursor.execute(SELECT_LAST_RUNS).fetchall()}
+        query_stats = self.db.connection.query_stats
+        return {
+            "db_path": path,
+            "db_size": _file_size(path),
+            "wal_size": _file_size(path + "-wal"),
+            "page_size": page_size,
+            "page_count": page_count,
+            "free_pages": freelist,
+            "cache_bytes": cache_bytes,
+            "tables": self.row_counter.counts(cursor, last_runs.get("LAST_OPTIMIZE_AT")),
+            "caches": [(c.name, c.hits, c.misses, c.ratio) for c in cache_counters()],
+            "queries": query_stats.queries,
+            "slow_queries": query_stats.slowest_recent(),
+            "expensive_queries": query_stats.most_expensive(5),
+            "jobs": recent_jobs(),
+            "last_backup": last_runs.get("LAST_BACKUP_AT"),
+            "last_optimize": last_runs.get("LAST_OPTIMIZE_AT"),
+        }
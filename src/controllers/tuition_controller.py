@@ -0,0 +1,183 @@
+import sqlite3
+from datetime import date
+from src.models.tuition_plan import TuitionPlan
+from src.models.student_balance import StudentBalance
+from src.models.database import is_locked_error, BUSY_MESSAGE
+from src.controllers.payment_controller import PaymentController
+
+TUITION_PLAN_COLUMNS = ", ".join(TuitionPlan.COLUMNS)
+SELECT_PLAN_BY_COURSE = f"SELECT {TUITION_PLAN_COLUMNS} FROM tuition_plans WHERE course_id = ?"
+SELECT_ALL_PLANS = f"SELECT {TUITION_PLAN_COLUMNS} FROM tuition_plans"
+
+# Lo que corresponde pagar por curso a la fecha :as_of: matrícula (si ya venció) + cuotas vencidas.
+# Cuotas vencidas = meses transcurridos desde el mes de inicio, más la del mes en curso si ya
+# pasó el día de vencimiento, acotado entre 0 y la cantidad de cuotas. plan_year es el año
+# escolar del plan (el de start_date).
+OWED_CTE = """
+    owed AS (
+        SELECT course_id, CAST(strftime('%Y', start_date) AS INTEGER) AS plan_year,
+               CASE WHEN :as_of >= start_date THEN enrollment_fee_cents ELSE 0 END
+               + monthly_fee_cents * MAX(0, MIN(installments,
+                   (CAST(strftime('%Y', :as_of) AS INTEGER) * 12 + CAST(strftime('%m', :as_of) AS INTEGER))
+                   - (CAST(strftime('%Y', start_date) AS INTEGER) * 12 + CAST(strftime('%m', start_date) AS INTEGER))
+                   + (CAST(strftime('%d', :as_of) AS INTEGER) >= MIN(due_day, 28))
+               )) AS amount
+        FROM tuition_plans
+    )
+"""
+# Pagos (alias p) que abonan al plan del curso (alias o, fila de owed) a la fecha :as_of: los del
+# año escolar del plan, incluida la matrícula pagada antes de start_date, y hechos hasta :as_of.
+# Los pagos de años anteriores no abonan a este. Sin plan, cuentan todos los pagos hasta :as_of.
+# Lo comparten los saldos y los estados de cuenta por familia (GuardianController).
+PAID_TOWARDS_PLAN = """
+    (o.plan_year IS NULL OR p.academic_year = o.plan_year) AND p.payment_date < date(:as_of, '+1 day')
+"""
+# Saldos de todos los estudiantes en una sola consulta: lo pagado sale de un solo GROUP BY sobre payments.
+# Todos los montos están en centavos, así que las sumas y restas son enteras y exactas.
+SELECT_BALANCES = f"""
+    WITH {OWED_CTE},
+    paid AS (
+        SELECT p.student_id, SUM(p.amount_cents) AS amount
+        FROM payments p
+        JOIN students ps ON ps.id = p.student_id
+        LEFT JOIN owed o ON o.course_id = ps.course_id
+        WHERE {PAID_TOWARDS_PLAN}
+        GROUP BY p.student_id
+    )
+    SELECT s.id, s.identificacion, s.nombre, s.apellido, s.course_id,
+           COALESCE(o.amount, 0) AS owed,
+           COALESCE(p.amount, 0) AS paid,
+           COALESCE(o.amount, 0) - COALESCE(p.amount, 0) AS balance
+    FROM students s
+    LEFT JOIN owed o ON o.course_id = s.course_id
+    LEFT JOIN paid p ON p.student_id = s.id
+"""
+SELECT_ACTIVE_BALANCES = f"{SELECT_BALANCES} WHERE s.active = 1"
+SELECT_DEBTORS = f"{SELECT_BALANCES} WHERE s.active = 1 AND balance > :tolerance ORDER BY balance DESC"
+# Para un solo estudiante se suman solo sus pagos del período (rango de idx_payments_student_date)
+# en vez de agrupar toda la tabla
+SELECT_STUDENT_BALANCE = f"""
+    WITH {OWED_CTE}
+    SELECT id, identificacion, nombre, apellido, course_id, owed, paid, owed - paid
+    FROM (
+        SELECT s.id, s.identificacion, s.nombre, s.apellido, s.course_id,
+               COALESCE(o.amount, 0) AS owed,
+               COALESCE((SELECT SUM(p.amount_cents) FROM payments p
+                         WHERE p.student_id = s.id AND {PAID_TOWARDS_PLAN}), 0) AS paid
+        FROM students s
+        LEFT JOIN owed o ON o.course_id = s.course_id
+        WHERE s.id = :student_id
+    )
+"""
+
+class TuitionController:
+    """
+    Planes de pago por curso (matrícula, cuota mensual y vencimientos) y cálculo de saldos.
+    Los saldos de todo el colegio se calculan en una sola consulta agregada, sin recorrer
+    estudiante por estudiante.
+    """
+    def __init__(self, db):
+        self.db = db
+        # Los saldos leen la tabla payments, que crea PaymentController
+        PaymentController(db)
+        self.initialize_tuition_table()
+
+    def initialize_tuition_table(self):
+        cursor = self.db.connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tuition_plans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                course_id INTEGER NOT NULL UNIQUE REFERENCES courses(id),
+                monthly_fee_cents INTEGER NOT NULL DEFAULT 0,
+                enrollment_fee_cents INTEGER NOT NULL DEFAULT 0,
+                start_date TEXT NOT NULL,
+                installments INTEGER NOT NULL DEFAULT 10,
+                due_day INTEGER NOT NULL DEFAULT 5
+            )
+        """)
+        self.db.connection.commit()
+
+    def get_plan(self, course_id):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = TuitionPlan.row_factory
+        cursor.execute(SELECT_PLAN_BY_COURSE, (course_id,))
+        return cursor.fetchone()
+
+    def get_all_plans(self):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = TuitionPlan.row_factory
+        cursor.execute(SELECT_ALL_PLANS)
+        return cursor.fetchall()
+
+    def set_plan(self, course_id, monthly_fee_cents, enrollment_fee_cents, start_date, installments, due_day):
+        """
+        Crea o reemplaza el plan de pagos del curso. Las cuotas van en centavos.
+        Retorna una tupla: (éxito, mensaje).
+        """
+        try:
+            date.fromisoformat(start_date)
+        except (TypeError, ValueError):
+            return False, "La fecha de inicio debe tener el formato AAAA-MM-DD."
+        if monthly_fee_cents < 0 or enrollment_fee_cents < 0 or installments < 0 or not 1 <= due_day <= 31:
+            return False, "Los valores del plan no son válidos."
+        values = {
+            "monthly_fee_cents": monthly_fee_cents, "enrollment_fee_cents": enrollment_fee_cents,
+            "start_date": start_date, "installments": installments, "due_day": due_day,
+        }
+        try:
+            def save(cursor):
+                previous = self.get_plan(course_id)
+                cursor.execute("""
+                    INSERT INTO tuition_plans (course_id, monthly_fee_cents, enrollment_fee_cents, start_date, installments,
+                                               due_day)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (course_id) DO UPDATE SET
+                        monthly_fee_cents = excluded.monthly_fee_cents,
+                        enrollment_fee_cents = excluded.enrollment_fee_cents,
+                        start_date = excluded.start_date, installments = excluded.installments,
+                        due_day = excluded.due_day
+                """, (course_id, monthly_fee_cents, enrollment_fee_cents, start_date, installments, due_day))
+                if previous:
+                    diff = {k: [getattr(previous, k), v] for k, v in values.items() if getattr(previous, k) != v}
+                    self.db.record_change("tuition_plans", "update", previous.id, diff)
+                else:
+                    self.db.record_change("tuition_plans", "insert", cursor.lastrowid, dict(values, course_id=course_id))
+            self.db.write(save)
+            return True, "Plan de pagos guardado correctamente."
+        except sqlite3.OperationalError as e:
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al guardar el plan de pagos: {e}"
+        except Exception as e:
+            return False, f"Error al guardar el plan de pagos: {e}"
+
+    def _balances(self, query, params):
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = StudentBalance.row_factory
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def get_balances(self, as_of=None, only_active=True):
+        """Estado de cuenta de todos los estudiantes a la fecha 'as_of' (AAAA-MM-DD, por defecto hoy)."""
+        as_of = as_of or date.today().isoformat()
+        return self._balances(SELECT_ACTIVE_BALANCES if only_active else SELECT_BALANCES, {"as_of": as_of})
+
+    def get_debtors(self, as_of=None, tolerance=0):
+        """Estudiantes activos con saldo pendiente mayor a 'tolerance' (centavos), del mayor al menor saldo."""
+        as_of = as_of or date.today().isoformat()
+        return self._balances(SELECT_DEBTORS, {"as_of": as_of, "tolerance": tolerance})
+
+    def get_student_balance(self, student_id, as_of=None):
+        as_of = as_of or date.today().isoformat()
+        rows = self._balances(SELECT_STUDENT_BALANCE, {"as_of": as_of, "student_id": student_id})
+        return rows[0] if rows else None
+
+    def check_paz_y_salvo(self, student_id, as_of=None):
+        """
+        Indica si el estudiante puede recibir paz y salvo: no tiene saldo pendiente a la fecha.
+        Retorna una tupla: (elegible, saldo en centavos).
+        """
+        balance = self.get_student_balance(student_id, as_of)
+        if balance is None:
+            return False, 0
+        return balance.balance <= 0, balance.balance
@@ -2,6 +2,8 @@ import hashlib
 import traceback
 import sqlite3
 import logging
+from src.models.user import User
+from src.models.database import is_locked_error, BUSY_MESSAGE
 
 logger = logging.getLogger(__name__)
 
@@ -31,20 +33,18 @@ class UserController:
         against the records in the 'users' table.
         If no record is found, and the username and password match the expected admin
         credentials, a fallback admin user is returned.
-        Returns a user object if successful, or None if the credentials do not match.
+        Returns a User record if successful, or None if the credentials do not match.
         """
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
 
         try:
             cursor = self.get_cursor()
-            query = "SELECT username, role FROM users WHERE username = ? AND password = ?"
+            cursor.row_factory = User.row_factory
+            query = "SELECT id, username, role FROM users WHERE username = ? AND password = ?"
             cursor.execute(query, (username, hashed_password))
-            row = cursor.fetchone()
+            user = cursor.fetchone()
 
-            if row:
-                user = type("User", (), {})()
-                user.username = row[0]
-                user.role = row[1]
+            if user:
                 return user
 
         except Exception:
@@ -53,10 +53,7 @@ class UserController:
         # Fallback: if no record is found and the entered credentials match admin defaults then return admin.
         expected_admin_hash = hashlib.sha256("admin".encode()).hexdigest()
         if username == "admin" and hashed_password == expected_admin_hash:
-            user = type("User", (), {})()
-            user.username = "admin"
-            user.role = "admin"
-            return user
+            return User(None, "admin", "admin")
 
         return None
 
@@ -72,19 +69,23 @@ class UserController:
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
 
         try:
-            cursor = self.get_cursor()
             query = "INSERT INTO users (username, password, role) VALUES (?, ?, ?)"
-            cursor.execute(query, (username, hashed_password, role))
 
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+            def insert(cursor):
+                cursor.execute(query, (username, hashed_password, role))
+                # La clave nunca se guarda en la bitácora
+                self.db.record_change("users", "insert", cursor.lastrowid, {"username": username, "role": role})
+            self.db.write(insert)
 
             return True, "Usuario creado exitosamente."
         except sqlite3.IntegrityError:
             logger.exception("Error al crear el usuario:")
             return False, "Error: El nombre de usuario ya existe."
+        except sqlite3.OperationalError as e:
+            logger.exception("Error al crear el usuario:")
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al crear el usuario: {e}"
         except Exception as e:
             logger.exception("Error al crear el usuario:")
             return False, f"Error al crear el usuario: {e}"
@@ -110,14 +111,19 @@ class UserController:
             
             hashed_new_password = hashlib.sha256(new_password.encode()).hexdigest()
             update_query = "UPDATE users SET password = ? WHERE username = ?"
-            cursor.execute(update_query, (hashed_new_password, username))
-            
-            if hasattr(self.db, "commit") and callable(self.db.commit):
-                self.db.commit()
-            elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
-                self.db.connection.commit()
+
+            def update(cursor):
+                cursor.execute(update_query, (hashed_new_password, username))
+                user_id = cursor.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()[0]
+                self.db.record_change("users", "update", user_id, {"password": "(modificada)"})
+            self.db.write(update)
                 
             return True, "Clave actualizada correctamente."
+        except sqlite3.OperationalError as e:
+            logger.exception("Error al cambiar clave:")
+            if is_locked_error(e):
+                return False, BUSY_MESSAGE
+            return False, f"Error al cambiar clave: {e}"
         except Exception as e:
             logger.exception("Error al cambiar clave:")
             return False, f"Error al cambiar clave: {e}"
\ No newline at end of file
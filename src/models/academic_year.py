@@ -0,0 +1,45 @@
+from datetime import date
+
+# Estados de un año escolar: abierto (en uso), cerrado (ya no recibe matrículas) y
+# archivado (sus estudiantes y pagos se movieron a la base de archivo del año).
+YEAR_OPEN = "open"
+YEAR_CLOSED = "closed"
+YEAR_ARCHIVED = "archived"
+
+ACADEMIC_YEARS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS academic_years (
+        year INTEGER PRIMARY KEY,
+        start_date TEXT,
+        end_date TEXT,
+        status TEXT NOT NULL DEFAULT 'open',
+        archive_path TEXT
+    )
+"""
+SELECT_CURRENT_YEAR = "SELECT MAX(year) FROM academic_years WHERE status = 'open'"
+
+def ensure_academic_years_table(cursor):
+    cursor.execute(ACADEMIC_YEARS_SCHEMA)
+
+def current_academic_year(cursor):
+    """El año escolar abierto más reciente; si no hay ninguno registrado, el año calendario actual."""
+    row = cursor.execute(SELECT_CURRENT_YEAR).fetchone()
+    return row[0] if row and row[0] is not None else date.today().year
+
+class AcademicYear:
+    __slots__ = ("year", "start_date", "end_date", "status", "archive_path")
+    COLUMNS = __slots__
+
+    def __init__(self, year, start_date, end_date, status=YEAR_OPEN, archive_path=None):
+        self.year = year
+        self.start_date = start_date
+        self.end_date = end_date
+        self.status = status
+        self.archive_path = archive_path
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"Año {self.year} ({self.status})"
@@ -0,0 +1,19 @@
+class Campus:
+    """Sede del colegio: su base de datos y los datos de la institución que se usan por defecto."""
+    __slots__ = ("key", "name", "db_name", "school_name", "logo_path")
+
+    def __init__(self, key, name, db_name, school_name, logo_path):
+        self.key = key
+        self.name = name
+        self.db_name = db_name
+        self.school_name = school_name
+        self.logo_path = logo_path
+
+    @classmethod
+    def from_config(cls, key, settings):
+        """Construye la sede a partir de una entrada de config.CAMPUSES."""
+        return cls(key, settings.get("name") or key, settings["db"],
+                   settings.get("school_name") or settings.get("name") or key, settings.get("logo") or "")
+
+    def __repr__(self):
+        return f"{self.name} ({self.db_name})"
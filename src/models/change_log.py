@@ -0,0 +1,68 @@
+import json
+
+# Bitácora de cambios: una fila por cada escritura, en la misma transacción que la escritura.
+# El id es la posición en la bitácora: crece siempre (AUTOINCREMENT no reutiliza ids), de modo
+# que quien sincroniza puede pedir "todo lo posterior a la posición N".
+CHANGE_LOG_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS change_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        changed_at TEXT NOT NULL,
+        username TEXT,
+        table_name TEXT NOT NULL,
+        row_pk TEXT NOT NULL,
+        action TEXT NOT NULL,
+        diff TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log (table_name, id)",
+    "CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (table_name, row_pk, id)",
+    "CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log (changed_at)",
+]
+
+INSERT_CHANGE_LOG = """
+    INSERT INTO change_log (changed_at, username, table_name, row_pk, action, diff)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def ensure_change_log_table(cursor):
+    for statement in CHANGE_LOG_SCHEMA:
+        cursor.execute(statement)
+
+def record_values(record):
+    """Valores de un registro con __slots__ (Student, Course...) como diccionario."""
+    return {name: getattr(record, name) for name in type(record).COLUMNS}
+
+def diff_values(before, after):
+    """
+    Diferencia entre dos diccionarios de valores: {campo: [antes, después]} solo para
+    los campos que cambiaron.
+    """
+    fields = list(before) + [field for field in after if field not in before]
+    return {field: [before.get(field), after.get(field)]
+            for field in fields if before.get(field) != after.get(field)}
+
+class ChangeLogEntry:
+    __slots__ = ("id", "changed_at", "username", "table_name", "row_pk", "action", "diff")
+    COLUMNS = __slots__
+
+    def __init__(self, entry_id, changed_at, username, table_name, row_pk, action, diff):
+        self.id = entry_id
+        self.changed_at = changed_at
+        self.username = username
+        self.table_name = table_name
+        self.row_pk = row_pk
+        self.action = action
+        self.diff = diff
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def changes(self):
+        """El diff en JSON como diccionario ({} si la entrada no tiene diff)."""
+        return json.loads(self.diff) if self.diff else {}
+
+    def __repr__(self):
+        return f"Cambio {self.id}: {self.action} {self.table_name}[{self.row_pk}] por {self.username or '-'}"
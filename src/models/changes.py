@@ -0,0 +1,76 @@
+import os
+import queue
+import threading
+
+class ChangeEvent:
+    """Cambio confirmado sobre una fila: action es "insert", "update" o "delete"."""
+    __slots__ = ("table", "action", "pk")
+
+    def __init__(self, table, action, pk):
+        self.table = table
+        self.action = action
+        self.pk = pk
+
+    def __repr__(self):
+        return f"ChangeEvent({self.table}, {self.action}, {self.pk})"
+
+class ChangeSubscription:
+    """Cola de eventos de un suscriptor. drain() se llama desde el hilo del suscriptor."""
+    def __init__(self, bus, tables):
+        self.bus = bus
+        self.tables = set(tables)
+        self._queue = queue.Queue()
+
+    def put(self, event):
+        if event.table in self.tables:
+            self._queue.put(event)
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class ChangeBus:
+    """
+    Distribuye los cambios confirmados en un archivo de base de datos a los suscriptores
+    del proceso (por ejemplo, las vistas que muestran esas filas).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = []
+
+    def subscribe(self, tables):
+        subscription = ChangeSubscription(self, tables)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for event in events:
+            for subscription in subscriptions:
+                subscription.put(event)
+
+_change_buses = {}
+_change_buses_lock = threading.Lock()
+
+def get_change_bus(db_name):
+    """Retorna el bus de cambios compartido por todas las conexiones del proceso al mismo archivo."""
+    key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    with _change_buses_lock:
+        bus = _change_buses.get(key)
+        if bus is None:
+            bus = _change_buses[key] = ChangeBus()
+        return bus
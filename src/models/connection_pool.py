@@ -0,0 +1,49 @@
+import queue
+import threading
+from contextlib import contextmanager
+from src.models.database import Database
+
+class ConnectionPool:
+    """
+    Conjunto de conexiones de lectura reutilizables para un mismo archivo de base de datos,
+    más una única conexión de escritura compartida.
+    Cada conexión puede llevar asociados objetos propios (por ejemplo controladores), creados
+    una sola vez mediante 'setup(db)' para no repetir su inicialización en cada uso.
+    """
+    def __init__(self, db_name, size=4, setup=None):
+        self.db_name = db_name
+        self.size = size
+        self.setup = setup
+        # La conexión de escritura se crea primero: sus controladores crean tablas y ejecutan migraciones
+        self.writer = self._open()
+        self.writer_lock = threading.Lock()
+        self._readers = queue.Queue()
+        self._all = [self.writer]
+        for _ in range(size):
+            reader = self._open()
+            self._all.append(reader)
+            self._readers.put(reader)
+
+    def _open(self):
+        db = Database(self.db_name, check_same_thread=False)
+        db.context = self.setup(db) if self.setup else None
+        return db
+
+    @contextmanager
+    def reader(self, timeout=None):
+        """Presta una conexión de lectura y la devuelve al pool al terminar."""
+        db = self._readers.get(timeout=timeout)
+        try:
+            yield db
+        finally:
+            self._readers.put(db)
+
+    @contextmanager
+    def writer_connection(self):
+        """Entrega la única conexión de escritura; las solicitudes que escriben se atienden de a una."""
+        with self.writer_lock:
+            yield self.writer
+
+    def close(self):
+        for db in self._all:
+            db.close()
@@ -0,0 +1,101 @@
+from src.utils.money import migrate_to_cents
+
+# Base consolidada: copia de estudiantes y pagos de todas las sedes (columna campus) y
+# totales precalculados. sync_marks guarda, por sede, hasta dónde se copió: el último id de
+# estudiantes y pagos (AUTOINCREMENT no reutiliza ids) y la última posición de change_log.
+CONSOLIDATION_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sync_marks (
+        campus TEXT PRIMARY KEY,
+        students_id INTEGER NOT NULL,
+        payments_id INTEGER NOT NULL,
+        change_log_id INTEGER NOT NULL,
+        synced_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        campus TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        identificacion TEXT,
+        nombre TEXT,
+        apellido TEXT,
+        course_name TEXT NOT NULL,
+        academic_year INTEGER,
+        active INTEGER,
+        deleted_at TEXT,
+        PRIMARY KEY (campus, id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_students_enrollment ON students (campus, academic_year, course_name)",
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        campus TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        student_id INTEGER,
+        amount_cents INTEGER NOT NULL DEFAULT 0,
+        description TEXT,
+        payment_date TEXT,
+        month TEXT NOT NULL,
+        receipt_number INTEGER,
+        academic_year INTEGER,
+        PRIMARY KEY (campus, id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_payments_month ON payments (campus, month)",
+    """
+    CREATE TABLE IF NOT EXISTS revenue_by_month (
+        campus TEXT NOT NULL,
+        month TEXT NOT NULL,
+        payments INTEGER NOT NULL,
+        amount_cents INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (campus, month)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS enrollment (
+        campus TEXT NOT NULL,
+        academic_year INTEGER NOT NULL,
+        course_name TEXT NOT NULL,
+        students INTEGER NOT NULL,
+        PRIMARY KEY (campus, academic_year, course_name)
+    ) WITHOUT ROWID
+    """,
+]
+
+def ensure_consolidation_tables(cursor):
+    for statement in CONSOLIDATION_SCHEMA:
+        cursor.execute(statement)
+    # Las bases consolidadas anteriores guardaban los montos en pesos (REAL)
+    migrate_to_cents(cursor, "payments", {"amount": "amount_cents"})
+    migrate_to_cents(cursor, "revenue_by_month", {"amount": "amount_cents"})
+
+class RevenueTotal:
+    """Recaudo de una sede en un mes ("AAAA-MM"); campus es None en los totales de todas las sedes."""
+    __slots__ = ("campus", "month", "payments", "amount_cents")
+    COLUMNS = __slots__
+
+    def __init__(self, campus, month, payments, amount_cents):
+        self.campus = campus
+        self.month = month
+        self.payments = payments
+        self.amount_cents = amount_cents
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        return cls(*row)
+
+class EnrollmentTotal:
+    """Estudiantes activos de una sede en un curso y año escolar; course_name es "" si no tienen curso."""
+    __slots__ = ("campus", "academic_year", "course_name", "students")
+    COLUMNS = __slots__
+
+    def __init__(self, campus, academic_year, course_name, students):
+        self.campus = campus
+        self.academic_year = academic_year
+        self.course_name = course_name
+        self.students = students
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        return cls(*row)
@@ -1,8 +1,16 @@
 class Course:
+    __slots__ = ("id", "name", "active")
+    COLUMNS = __slots__
+
     def __init__(self, course_id, name, active=True):
         self.id = course_id
         self.name = name
         self.active = active
 
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
     def __repr__(self):
-        return f"{self.name} ({'Activo' if self.active else 'Desactivado'})"
\ No newline at end of file
+        return f"{self.name} ({'Activo' if self.active else 'Desactivado'})"
@@ -1,10 +1,196 @@
+import os
+import json
+import time
+import random
 import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from config import DB_BUSY_TIMEOUT, DB_WRITE_RETRIES, DB_RETRY_BASE_DELAY
+from src.models.changes import ChangeEvent, get_change_bus
+from src.models.change_log import INSERT_CHANGE_LOG, ensure_change_log_table
+from src.models.runtime_stats import TimedConnection, get_query_stats
+
+# Tamaño de la caché de sentencias preparadas de la conexión. Las consultas de los
+# controladores son constantes de módulo, así que cada una se compila una sola vez.
+CACHED_STATEMENTS = 256
+
+# Mensaje para el usuario cuando otro equipo mantiene bloqueada la base de datos
+BUSY_MESSAGE = "La base de datos está ocupada por otro equipo. Intente de nuevo en unos segundos."
+
+def is_locked_error(error):
+    """Indica si la excepción corresponde a 'database is locked' / 'database is busy'."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+class WriteQueue:
+    """
+    Cola FIFO de escritores dentro del proceso para un mismo archivo de base de datos.
+    Los hilos obtienen turno en orden de llegada; el mismo hilo puede volver a entrar
+    (transacciones anidadas).
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._owner = None
+        self._depth = 0
+
+    def acquire(self):
+        current = threading.get_ident()
+        with self._condition:
+            if self._owner == current:
+                self._depth += 1
+                return
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while self._serving != ticket:
+                self._condition.wait()
+            self._owner = current
+            self._depth = 1
+
+    def release(self):
+        with self._condition:
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._serving += 1
+                self._condition.notify_all()
+
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+def get_write_queue(db_name):
+    """Retorna la cola de escritores compartida por todas las conexiones del proceso al mismo archivo."""
+    key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    with _write_queues_lock:
+        queue = _write_queues.get(key)
+        if queue is None:
+            queue = _write_queues[key] = WriteQueue()
+        return queue
 
 class Database:
-    def __init__(self, db_name):
-        self.connection = sqlite3.connect(db_name)
+    def __init__(self, db_name, timeout=DB_BUSY_TIMEOUT, check_same_thread=True, uri=False):
+        self.db_name = db_name
+        # 'timeout' configura el busy timeout de SQLite: cuánto espera un bloqueo antes de fallar.
+        # Con 'uri' se aceptan URIs "file:" (por ejemplo para ATTACH de solo lectura con mode=ro).
+        self.connection = sqlite3.connect(db_name, timeout=timeout, check_same_thread=check_same_thread,
+                                          cached_statements=CACHED_STATEMENTS, factory=TimedConnection, uri=uri)
+        # Duración de las consultas, para el panel "Estado del sistema"
+        self.connection.query_stats = get_query_stats(db_name)
         self.connection.row_factory = sqlite3.Row  # Acceso a columnas por nombre
         self.cursor = self.connection.cursor()
+        # Caché en memoria id→nombre de cursos, compartida por los controladores (ver CourseController)
+        self.course_names = None
+        self.write_queue = get_write_queue(db_name)
+        self._transaction_depth = 0
+        # Cambios registrados en la transacción en curso; se publican solo si se confirma
+        self.change_bus = get_change_bus(db_name)
+        self._pending_changes = []
+        # Usuario que se registra en la bitácora de cambios (lo asigna la sesión o el servicio)
+        self.username = None
+        self._change_log_ready = False
+        # Segundos que tardó la última escritura en obtener el bloqueo (cola del proceso + BEGIN IMMEDIATE)
+        self.last_lock_wait = 0.0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Abre una transacción de escritura con BEGIN IMMEDIATE, serializada con los demás
+        escritores del proceso. Hace commit al salir o rollback si ocurre una excepción.
+        Las transacciones anidadas se integran a la transacción exterior.
+        """
+        start = time.perf_counter()
+        self.write_queue.acquire()
+        try:
+            if self._transaction_depth == 0:
+                if self.connection.in_transaction:
+                    # Cerrar una transacción implícita pendiente antes de tomar el bloqueo
+                    self.connection.commit()
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.last_lock_wait = time.perf_counter() - start
+            self._transaction_depth += 1
+            try:
+                yield self.connection.cursor()
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.connection.rollback()
+                    self._pending_changes = []
+                raise
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                try:
+                    self.connection.commit()
+                except BaseException:
+                    self.connection.rollback()
+                    self._pending_changes = []
+                    raise
+                changes, self._pending_changes = self._pending_changes, []
+                if changes:
+                    self.change_bus.publish(changes)
+        finally:
+            self.write_queue.release()
+
+    def record_change(self, table, action, pk, diff=None):
+        """
+        Registra un cambio (insert/update/delete) dentro de la transacción en curso: se agrega
+        a la bitácora change_log (quién, cuándo, tabla, llave y diff en JSON) en la misma
+        transacción, y se publica a los suscriptores del proceso después del commit.
+        """
+        if not self._change_log_ready:
+            ensure_change_log_table(self.connection)
+            self._change_log_ready = True
+        self.connection.execute(INSERT_CHANGE_LOG, (
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.username, table, str(pk), action,
+            json.dumps(diff, ensure_ascii=False, default=str) if diff is not None else None
+        ))
+        self._pending_changes.append(ChangeEvent(table, action, pk))
+
+    def record_changes(self, table, action, query, params=None):
+        """
+        Igual que record_change para operaciones masivas: registra un cambio por cada fila de
+        'query' (columnas pk y diff en JSON, con parámetros con nombre) con un solo
+        INSERT ... SELECT, sin pasar cada fila por Python. Retorna la cantidad de cambios.
+        """
+        if not self._change_log_ready:
+            ensure_change_log_table(self.connection)
+            self._change_log_ready = True
+        params = dict(params or {})
+        self.connection.execute(f"""
+            INSERT INTO change_log (changed_at, username, table_name, row_pk, action, diff)
+            SELECT :changed_at, :username, :table_name, pk, :action, diff FROM ({query})
+        """, dict(params, changed_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                  username=self.username, table_name=table, action=action))
+        pks = [row[0] for row in self.connection.execute(f"SELECT pk FROM ({query})", params)]
+        self._pending_changes.extend(ChangeEvent(table, action, pk) for pk in pks)
+        return len(pks)
+
+    def write(self, operation, idempotent=True, retries=DB_WRITE_RETRIES):
+        """
+        Ejecuta operation(cursor) dentro de transaction() y retorna su resultado.
+        Si la base está bloqueada por otro equipo se reintenta con espera exponencial.
+        Las operaciones no idempotentes solo se reintentan cuando el bloqueo impidió
+        iniciar la transacción (es decir, cuando aún no se ejecutó nada).
+        """
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with self.transaction() as cursor:
+                    started = True
+                    return operation(cursor)
+            except sqlite3.OperationalError as e:
+                if not is_locked_error(e) or attempt >= retries or (started and not idempotent):
+                    raise
+                if self._transaction_depth > 0:
+                    # Dentro de una transacción exterior el reintento corresponde a quien la abrió
+                    raise
+            delay = DB_RETRY_BASE_DELAY * (2 ** attempt)
+            time.sleep(delay + random.uniform(0, delay))
+            attempt += 1
 
     def create_tables(self):
         # Tabla de Usuarios
@@ -48,6 +234,8 @@ class Database:
                 active INTEGER DEFAULT 1
             )
         ''')
+        # Bitácora de cambios
+        ensure_change_log_table(self.cursor)
         # Tabla de Configuración
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS config (
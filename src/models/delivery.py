@@ -0,0 +1,97 @@
+# Cola de correos a los acudientes: cada fila es un mensaje con su PDF adjunto y su estado.
+# El adjunto se descarta cuando el correo se envía; los recibos siguen en el archivo de recibos.
+DELIVERIES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS deliveries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guardian_id INTEGER REFERENCES guardians(id),
+        kind TEXT NOT NULL,
+        reference TEXT,
+        recipient TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT,
+        attachment_name TEXT,
+        attachment BLOB,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TEXT NOT NULL,
+        claimed_at TEXT,
+        sent_at TEXT,
+        last_error TEXT,
+        created_at TEXT NOT NULL
+    )
+    """,
+    # La cola se recorre por estado y hora del próximo intento
+    "CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries (status, next_attempt_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_deliveries_guardian ON deliveries (guardian_id, created_at)",
+]
+
+DELIVERY_PENDING = "pending"
+DELIVERY_SENDING = "sending"
+DELIVERY_SENT = "sent"
+DELIVERY_FAILED = "failed"
+DELIVERY_STATUS_NAMES = {DELIVERY_PENDING: "En cola", DELIVERY_SENDING: "Enviando", DELIVERY_SENT: "Enviado",
+                         DELIVERY_FAILED: "Fallido"}
+
+# Clases de correo
+KIND_RECEIPT = "receipt"
+KIND_STATEMENT = "statement"
+
+INSERT_DELIVERY = """
+    INSERT INTO deliveries (guardian_id, kind, reference, recipient, subject, body, attachment_name, attachment,
+                            status, next_attempt_at, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?)
+"""
+# Toma un lote de la cola en la misma sentencia que lo marca, de modo que dos equipos que
+# envían a la vez nunca toman el mismo correo
+CLAIM_BATCH = """
+    UPDATE deliveries SET status = 'sending', claimed_at = :now
+    WHERE id IN (
+        SELECT id FROM deliveries WHERE status = 'pending' AND next_attempt_at <= :now ORDER BY next_attempt_at, id
+        LIMIT :limit
+    )
+    RETURNING id, recipient, subject, body, attachment_name, attachment, attempts
+"""
+# Correos que quedaron "enviando" porque el equipo que los tomó se cerró a mitad del lote
+RELEASE_STALE = "UPDATE deliveries SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?"
+MARK_SENT = "UPDATE deliveries SET status = 'sent', sent_at = ?, attachment = NULL, last_error = NULL WHERE id = ?"
+MARK_RETRY = """
+    UPDATE deliveries SET status = 'pending', attempts = attempts + ?, next_attempt_at = ?, last_error = ?
+    WHERE id = ?
+"""
+MARK_FAILED = "UPDATE deliveries SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?"
+SELECT_STATUS_COUNTS = "SELECT status, COUNT(*) FROM deliveries GROUP BY status"
+
+def ensure_deliveries_table(cursor):
+    for statement in DELIVERIES_SCHEMA:
+        cursor.execute(statement)
+
+class Delivery:
+    """Correo de la cola, sin el adjunto."""
+    __slots__ = ("id", "guardian_id", "kind", "reference", "recipient", "subject", "status", "attempts",
+                 "next_attempt_at", "sent_at", "last_error", "created_at")
+    COLUMNS = __slots__
+
+    def __init__(self, delivery_id, guardian_id, kind, reference, recipient, subject, status, attempts,
+                 next_attempt_at, sent_at, last_error, created_at):
+        self.id = delivery_id
+        self.guardian_id = guardian_id
+        self.kind = kind
+        # Código del recibo o período del estado de cuenta
+        self.reference = reference
+        self.recipient = recipient
+        self.subject = subject
+        self.status = status
+        self.attempts = attempts
+        self.next_attempt_at = next_attempt_at
+        self.sent_at = sent_at
+        self.last_error = last_error
+        self.created_at = created_at
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"Correo {self.id} a {self.recipient} ({DELIVERY_STATUS_NAMES.get(self.status, self.status)})"
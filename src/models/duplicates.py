@@ -0,0 +1,37 @@
+from src.utils.name_matching import blocking_keys
+
+# Índice de bloqueo para la detección de duplicados: una fila por clave de cada estudiante
+# (ver src/utils/name_matching.py). Se mantiene en la misma transacción que el alta o la
+# edición del estudiante.
+STUDENT_MATCH_KEYS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS student_match_keys (
+        match_key TEXT NOT NULL,
+        student_id INTEGER NOT NULL,
+        PRIMARY KEY (match_key, student_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_student_match_keys_student ON student_match_keys (student_id)",
+]
+
+def ensure_match_keys_table(cursor):
+    for statement in STUDENT_MATCH_KEYS_SCHEMA:
+        cursor.execute(statement)
+
+def index_student(cursor, student_id, identificacion, nombre, apellido):
+    """Reemplaza las claves de bloqueo del estudiante."""
+    cursor.execute("DELETE FROM student_match_keys WHERE student_id = ?", (student_id,))
+    cursor.executemany("INSERT OR IGNORE INTO student_match_keys (match_key, student_id) VALUES (?, ?)",
+                       ((key, student_id) for key in blocking_keys(identificacion, nombre, apellido)))
+
+class DuplicateCandidate:
+    """Estudiante existente que probablemente es la misma persona que otro, con su puntaje y las razones."""
+    __slots__ = ("student", "score", "reasons")
+
+    def __init__(self, student, score, reasons):
+        self.student = student
+        self.score = score
+        self.reasons = reasons
+
+    def __repr__(self):
+        return f"{self.student} ({self.score:.2f}: {', '.join(self.reasons)})"
@@ -0,0 +1,150 @@
+from datetime import datetime
+from src.utils.name_matching import normalize_name, normalize_phone
+
+# Acudientes: una fila por familia. Los estudiantes la referencian con students.guardian_id;
+# representante y telefono siguen en students como el dato que se escribió en el formulario.
+# phone_key y name_key son el teléfono y el nombre normalizados con que se agrupan los hermanos.
+GUARDIANS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS guardians (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT,
+        telefono TEXT,
+        email TEXT,
+        phone_key TEXT NOT NULL DEFAULT '',
+        name_key TEXT NOT NULL DEFAULT '',
+        created_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_guardians_phone_key ON guardians (phone_key) WHERE phone_key <> ''",
+    "CREATE INDEX IF NOT EXISTS idx_guardians_name_key ON guardians (name_key)",
+]
+# La condición phone_key <> '' permite usar el índice parcial
+SELECT_BY_PHONE = "SELECT id FROM guardians WHERE phone_key = ? AND phone_key <> '' ORDER BY id LIMIT 1"
+# Los acudientes con ese nombre, primero los que no tienen teléfono
+SELECT_BY_NAME = "SELECT id, phone_key FROM guardians WHERE name_key = ? ORDER BY phone_key <> '', id LIMIT 2"
+INSERT_GUARDIAN = """
+    INSERT INTO guardians (nombre, telefono, phone_key, name_key, created_at) VALUES (?, ?, ?, ?, ?)
+"""
+# Estudiantes que aún no tienen acudiente; los que tienen teléfono se agrupan primero (ver cluster_guardians)
+SELECT_UNLINKED_STUDENTS = """
+    SELECT id, representante, telefono FROM students
+    WHERE guardian_id IS NULL AND deleted_at IS NULL
+      AND (trim(COALESCE(representante, '')) <> '' OR trim(COALESCE(telefono, '')) <> '')
+    ORDER BY id
+"""
+
+def ensure_guardians_table(cursor):
+    for statement in GUARDIANS_SCHEMA:
+        cursor.execute(statement)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(guardians)").fetchall()]
+    if "email" not in columns:
+        cursor.execute("ALTER TABLE guardians ADD COLUMN email TEXT")
+
+def link_guardian(cursor, representante, telefono):
+    """
+    Retorna el id del acudiente que corresponde a (representante, telefono), creándolo si no
+    existe, o None si ambos están vacíos:
+    - con teléfono: el acudiente con ese teléfono; si no hay, el único acudiente sin teléfono
+      con el mismo nombre (que adopta el teléfono); si tampoco, uno nuevo.
+    - sin teléfono: el único acudiente con ese nombre, o el que no tiene teléfono si hay varios;
+      si no hay ninguno, uno nuevo. Un mismo nombre con teléfonos distintos son familias distintas.
+    """
+    phone_key = normalize_phone(telefono)
+    name_key = normalize_name(representante)
+    if not phone_key and not name_key:
+        return None
+    if phone_key:
+        row = cursor.execute(SELECT_BY_PHONE, (phone_key,)).fetchone()
+        if row:
+            return row[0]
+    if name_key:
+        matches = cursor.execute(SELECT_BY_NAME, (name_key,)).fetchall()
+        phoneless = [guardian_id for guardian_id, key in matches if not key]
+        if phone_key and len(phoneless) == 1:
+            cursor.execute("UPDATE guardians SET telefono = ?, phone_key = ? WHERE id = ?",
+                           (telefono.strip(), phone_key, phoneless[0]))
+            return phoneless[0]
+        if not phone_key and matches:
+            # Un solo acudiente con ese nombre, o el que no tiene teléfono
+            if len(matches) == 1 or phoneless:
+                return matches[0][0]
+    cursor.execute(INSERT_GUARDIAN, ((representante or "").strip(), (telefono or "").strip(), phone_key, name_key,
+                                     datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return cursor.lastrowid
+
+def cluster_guardians(cursor):
+    """
+    Asigna acudiente a los estudiantes que no lo tienen a partir de su representante y
+    teléfono. Primero se agrupan los que tienen teléfono, de modo que un hermano registrado
+    solo con el nombre del acudiente se une a la familia que ya tiene ese teléfono.
+    Retorna la cantidad de estudiantes asignados.
+    """
+    students = cursor.execute(SELECT_UNLINKED_STUDENTS).fetchall()
+    students.sort(key=lambda row: not normalize_phone(row[2]))
+    assignments = []
+    for student_id, representante, telefono in students:
+        guardian_id = link_guardian(cursor, representante, telefono)
+        if guardian_id is not None:
+            assignments.append((guardian_id, student_id))
+    cursor.executemany("UPDATE students SET guardian_id = ? WHERE id = ?", assignments)
+    return len(assignments)
+
+class Guardian:
+    """Acudiente con la cantidad de estudiantes activos a su cargo."""
+    __slots__ = ("id", "nombre", "telefono", "email", "children")
+    COLUMNS = __slots__
+
+    def __init__(self, guardian_id, nombre, telefono, email=None, children=0):
+        self.id = guardian_id
+        self.nombre = nombre
+        self.telefono = telefono
+        # Correo al que se envían recibos y estados de cuenta (ver DeliveryController)
+        self.email = email
+        self.children = children
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"{self.nombre} ({self.telefono or 'sin teléfono'})"
+
+class ChildStatement:
+    """Un estudiante dentro del estado de cuenta familiar: su saldo a la fecha y los pagos del período."""
+    __slots__ = ("student_id", "identificacion", "nombre", "apellido", "course_name", "owed", "paid", "payments")
+
+    def __init__(self, student_id, identificacion, nombre, apellido, course_name, owed, paid):
+        self.student_id = student_id
+        self.identificacion = identificacion
+        self.nombre = nombre
+        self.apellido = apellido
+        self.course_name = course_name
+        self.owed = owed
+        self.paid = paid
+        # (código de recibo, fecha, monto en centavos, descripción)
+        self.payments = []
+
+    @property
+    def balance(self):
+        return self.owed - self.paid
+
+class FamilyStatement:
+    """Estado de cuenta de una familia: el acudiente y sus estudiantes."""
+    __slots__ = ("guardian", "children")
+
+    def __init__(self, guardian):
+        self.guardian = guardian
+        self.children = []
+
+    @property
+    def balance(self):
+        return sum(child.balance for child in self.children)
+
+    @property
+    def period_total(self):
+        return sum(payment[2] for child in self.children for payment in child.payments)
+
+    def __repr__(self):
+        return f"Familia {self.guardian.nombre}: {len(self.children)} estudiantes"
@@ -0,0 +1,106 @@
+from src.models.academic_year import ensure_academic_years_table, current_academic_year
+from src.models.duplicates import ensure_match_keys_table, index_student
+from src.models.guardian import ensure_guardians_table, cluster_guardians
+from src.models.receipt_sequence import ensure_receipt_sequences_table, BACKFILL_RECEIPT_CODES
+from src.utils.money import migrate_to_cents
+
+# Migraciones de las bases de versiones anteriores. Se ejecutan una sola vez por sede al
+# prepararla (ver prepare_campus en main.py), dentro de una transacción: si alguna falla no
+# queda nada a medias. Los controladores solo crean las tablas e índices que falten.
+
+def table_columns(cursor, table):
+    """Columnas de la tabla; lista vacía si la tabla aún no existe."""
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+
+def migrate_course_foreign_key(cursor):
+    """
+    Agrega la columna course_id a tablas 'students' antiguas y la llena a partir de course_name.
+    course_name puede contener el nombre del curso o, en versiones anteriores de la aplicación,
+    el id del curso guardado como texto.
+    """
+    if "course_id" not in table_columns(cursor, "students"):
+        cursor.execute("ALTER TABLE students ADD COLUMN course_id INTEGER REFERENCES courses(id)")
+    cursor.execute("""
+        UPDATE students SET course_id = (
+            SELECT c.id FROM courses c
+            WHERE lower(trim(c.name)) = lower(trim(students.course_name))
+        )
+        WHERE course_id IS NULL AND course_name IS NOT NULL
+    """)
+    cursor.execute("""
+        UPDATE students SET course_id = CAST(course_name AS INTEGER)
+        WHERE course_id IS NULL
+          AND trim(course_name) GLOB '[0-9]*'
+          AND EXISTS (SELECT 1 FROM courses c WHERE c.id = CAST(students.course_name AS INTEGER))
+    """)
+
+def migrate_academic_year(cursor):
+    """
+    Agrega a tablas 'students' antiguas el año escolar y la marca de borrado lógico.
+    Los estudiantes existentes quedan en el año escolar en curso.
+    """
+    ensure_academic_years_table(cursor)
+    columns = table_columns(cursor, "students")
+    if "academic_year" not in columns:
+        cursor.execute("ALTER TABLE students ADD COLUMN academic_year INTEGER")
+    if "deleted_at" not in columns:
+        cursor.execute("ALTER TABLE students ADD COLUMN deleted_at TEXT")
+    cursor.execute("UPDATE students SET academic_year = ? WHERE academic_year IS NULL",
+                   (current_academic_year(cursor),))
+
+def migrate_match_keys(cursor):
+    """Crea el índice de detección de duplicados y lo llena si la tabla es nueva."""
+    ensure_match_keys_table(cursor)
+    if cursor.execute("SELECT 1 FROM student_match_keys LIMIT 1").fetchone():
+        return
+    students = cursor.execute(
+        "SELECT id, identificacion, nombre, apellido FROM students WHERE deleted_at IS NULL").fetchall()
+    for student_id, identificacion, nombre, apellido in students:
+        index_student(cursor, student_id, identificacion, nombre, apellido)
+
+def migrate_guardians(cursor):
+    """
+    Crea la tabla de acudientes, agrega students.guardian_id a tablas antiguas y agrupa por
+    representante y teléfono a los estudiantes que aún no tienen acudiente.
+    """
+    ensure_guardians_table(cursor)
+    if "guardian_id" not in table_columns(cursor, "students"):
+        cursor.execute("ALTER TABLE students ADD COLUMN guardian_id INTEGER REFERENCES guardians(id)")
+    cluster_guardians(cursor)
+
+def migrate_payments(cursor):
+    """Montos en centavos, número y código de recibo y año escolar de las tablas 'payments' antiguas."""
+    ensure_receipt_sequences_table(cursor)
+    # Los montos se guardan en centavos enteros; las bases antiguas tienen 'amount' REAL en pesos
+    migrate_to_cents(cursor, "payments", {"amount": "amount_cents"})
+    columns = table_columns(cursor, "payments")
+    if "receipt_number" not in columns:
+        cursor.execute("ALTER TABLE payments ADD COLUMN receipt_number INTEGER")
+        cursor.execute("UPDATE payments SET receipt_number = id")
+    # Año escolar del pago: permite archivar los años cerrados (ver ArchiveController)
+    if "academic_year" not in columns:
+        cursor.execute("ALTER TABLE payments ADD COLUMN academic_year INTEGER")
+        cursor.execute("UPDATE payments SET academic_year = CAST(strftime('%Y', payment_date) AS INTEGER)")
+    if "receipt_code" not in columns:
+        cursor.execute("ALTER TABLE payments ADD COLUMN receipt_code TEXT")
+        cursor.execute(BACKFILL_RECEIPT_CODES)
+
+def migrate_tuition_plans(cursor):
+    migrate_to_cents(cursor, "tuition_plans",
+                     {"monthly_fee": "monthly_fee_cents", "enrollment_fee": "enrollment_fee_cents"})
+
+def run_migrations(cursor):
+    """
+    Lleva una base de una versión anterior al esquema actual. Las tablas que aún no existen se
+    omiten (las crean los controladores con el esquema completo), y cada paso se puede repetir
+    sin efecto. Pensada para db.write(run_migrations).
+    """
+    if table_columns(cursor, "students"):
+        migrate_course_foreign_key(cursor)
+        migrate_academic_year(cursor)
+        migrate_match_keys(cursor)
+        migrate_guardians(cursor)
+    if table_columns(cursor, "payments"):
+        migrate_payments(cursor)
+    if table_columns(cursor, "tuition_plans"):
+        migrate_tuition_plans(cursor)
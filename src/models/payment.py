@@ -0,0 +1,22 @@
+class Payment:
+    __slots__ = ("id", "student_id", "amount_cents", "description", "payment_date", "receipt_number", "receipt_code")
+    COLUMNS = __slots__
+
+    def __init__(self, payment_id, student_id, amount_cents, description, payment_date, receipt_number, receipt_code=None):
+        self.id = payment_id
+        self.student_id = student_id
+        # Monto en centavos enteros
+        self.amount_cents = amount_cents
+        self.description = description
+        self.payment_date = payment_date
+        self.receipt_number = receipt_number
+        # Código impreso en el recibo ("20250211-0012"), emitido por ReceiptSequence
+        self.receipt_code = receipt_code
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"Pago {self.receipt_code or self.receipt_number} ({self.payment_date})"
@@ -0,0 +1,35 @@
+import json
+
+class Promotion:
+    """
+    Promoción de fin de año aplicada: mapeo de cursos (origen → destino), cursos que egresan
+    y cantidad de estudiantes afectados. undone_at queda con la fecha si se deshizo.
+    """
+    __slots__ = ("id", "created_at", "username", "mapping", "graduating", "academic_year",
+                 "promoted", "graduated", "undone_at")
+    COLUMNS = __slots__
+
+    def __init__(self, promotion_id, created_at, username, mapping, graduating, academic_year,
+                 promoted=0, graduated=0, undone_at=None):
+        self.id = promotion_id
+        self.created_at = created_at
+        self.username = username
+        self.mapping = mapping
+        self.graduating = graduating
+        self.academic_year = academic_year
+        self.promoted = promoted
+        self.graduated = graduated
+        self.undone_at = undone_at
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def course_mapping(self):
+        """El mapeo guardado como diccionario {curso_origen: curso_destino} con llaves enteras."""
+        return {int(source): target for source, target in json.loads(self.mapping or "{}").items()}
+
+    def __repr__(self):
+        state = "deshecha" if self.undone_at else "aplicada"
+        return f"Promoción {self.id} ({self.created_at}, {state})"
@@ -0,0 +1,63 @@
+from config import RECEIPT_SEQUENCE_SCOPE
+
+# Último número emitido por ámbito: el prefijo del código ("20250211-" por día, "2025-" por año)
+RECEIPT_SEQUENCES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS receipt_sequences (
+        scope TEXT PRIMARY KEY,
+        last_value INTEGER NOT NULL
+    )
+"""
+NEXT_VALUE = "UPDATE receipt_sequences SET last_value = last_value + 1 WHERE scope = ? RETURNING last_value"
+INSERT_SCOPE = "INSERT INTO receipt_sequences (scope, last_value) VALUES (?, ?)"
+# Mayor número ya usado con el prefijo; recorre solo ese tramo del índice de receipt_code.
+# ':' es el carácter siguiente a '9': el rango cubre los códigos del prefijo seguido de dígitos.
+SELECT_LAST_USED = """
+    SELECT MAX(CAST(substr(receipt_code, ?) AS INTEGER)) FROM payments
+    WHERE receipt_code > ? AND receipt_code < ?
+"""
+
+# Código de los pagos anteriores a la numeración: el formato que se imprimía hasta ahora,
+# la fecha del pago y su id ("20250211-0012"), para que los recibos ya entregados se encuentren
+BACKFILL_RECEIPT_CODES = """
+    UPDATE payments SET receipt_code = CASE
+        WHEN payment_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+        THEN substr(payment_date, 1, 4) || substr(payment_date, 6, 2) || substr(payment_date, 9, 2)
+             || '-' || printf('%04d', receipt_number)
+        ELSE CAST(receipt_number AS TEXT)
+    END
+    WHERE receipt_code IS NULL
+"""
+
+# Ámbito: (cantidad de caracteres de la fecha que forman el prefijo, dígitos del número)
+SCOPES = {"day": (10, 4), "year": (4, 6)}
+
+def ensure_receipt_sequences_table(cursor):
+    cursor.execute(RECEIPT_SEQUENCES_SCHEMA)
+
+class ReceiptSequence:
+    """
+    Emite los códigos de recibo ("AAAAMMDD-NNNN" por día o "AAAA-NNNNNN" por año). El
+    número se toma dentro de la transacción que registra el pago, que abre con BEGIN
+    IMMEDIATE, así que dos equipos nunca reciben el mismo. La primera vez que se usa un
+    prefijo se continúa desde el mayor código que ya exista con él.
+    """
+    def __init__(self, scope=RECEIPT_SEQUENCE_SCOPE):
+        if scope not in SCOPES:
+            raise ValueError(f"Numeración de recibos desconocida: {scope}")
+        self.scope = scope
+        self.date_chars, self.digits = SCOPES[scope]
+
+    def prefix(self, payment_date):
+        """Prefijo del código para la fecha "AAAA-MM-DD HH:MM:SS", sin convertirla a fecha."""
+        return payment_date[:self.date_chars].replace("-", "") + "-"
+
+    def next_code(self, cursor, payment_date):
+        prefix = self.prefix(payment_date)
+        row = cursor.execute(NEXT_VALUE, (prefix,)).fetchone()
+        if row is not None:
+            value = row[0]
+        else:
+            last_used = cursor.execute(SELECT_LAST_USED, (len(prefix) + 1, prefix, prefix + ":")).fetchone()[0]
+            value = (last_used or 0) + 1
+            cursor.execute(INSERT_SCOPE, (prefix, value))
+        return f"{prefix}{value:0{self.digits}d}"
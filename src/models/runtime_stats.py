@@ -0,0 +1,179 @@
+"""
+Estadísticas del proceso que se acumulan mientras la aplicación trabaja, para que el panel
+"Estado del sistema" las muestre sin recorrer la base de datos: duración de las consultas
+(medida en la conexión), duración de las exportaciones y aciertos de las cachés propias.
+"""
+import os
+import time
+import sqlite3
+import threading
+import functools
+from collections import OrderedDict, deque
+
+# Consultas más lentas que esto se guardan en la lista de consultas lentas recientes
+SLOW_QUERY_MS = 20
+# Cuántas consultas lentas recientes se conservan
+RECENT_SLOW_QUERIES = 200
+# Cuántas sentencias distintas se acumulan (las menos usadas se descartan)
+MAX_TRACKED_STATEMENTS = 500
+# Cuántas exportaciones recientes se conservan
+RECENT_JOBS = 50
+
+class QueryStat:
+    """Tiempos acumulados de una sentencia SQL."""
+    __slots__ = ("sql", "calls", "total", "worst")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+class QueryStats:
+    """
+    Tiempos de las sentencias ejecutadas por todas las conexiones del proceso a un mismo archivo.
+    Se mide execute(): incluye preparar la sentencia y obtener la primera fila, que en las
+    consultas con agregados u ORDER BY es casi todo el trabajo; no incluye los fetch posteriores.
+    """
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow = slow_ms / 1000
+        self._lock = threading.Lock()
+        self._statements = OrderedDict()
+        self._recent_slow = deque(maxlen=RECENT_SLOW_QUERIES)
+        self.queries = 0
+        self.started = time.time()
+
+    def record(self, sql, seconds):
+        with self._lock:
+            self.queries += 1
+            stat = self._statements.get(sql)
+            if stat is None:
+                stat = self._statements[sql] = QueryStat(sql)
+                if len(self._statements) > MAX_TRACKED_STATEMENTS:
+                    self._statements.popitem(last=False)
+            else:
+                self._statements.move_to_end(sql)
+            stat.calls += 1
+            stat.total += seconds
+            stat.worst = max(stat.worst, seconds)
+            if seconds >= self.slow:
+                self._recent_slow.append((time.time(), seconds, sql))
+
+    def slowest_recent(self, limit=10):
+        """Las consultas lentas recientes, de la más lenta a la más rápida: (cuándo, segundos, sql)."""
+        with self._lock:
+            return sorted(self._recent_slow, key=lambda item: item[1], reverse=True)[:limit]
+
+    def most_expensive(self, limit=10):
+        """Las sentencias con más tiempo acumulado."""
+        with self._lock:
+            stats = [(s.sql, s.calls, s.total, s.worst) for s in self._statements.values()]
+        return sorted(stats, key=lambda item: item[2], reverse=True)[:limit]
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor que registra la duración de execute() y executemany() en las QueryStats de su conexión."""
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.query_stats.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.query_stats.record(sql, time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    """Conexión cuyos cursores miden las consultas (ver Database)."""
+    query_stats = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+_query_stats = {}
+_query_stats_lock = threading.Lock()
+
+def get_query_stats(db_name):
+    """Retorna las estadísticas de consultas compartidas por todas las conexiones del proceso al mismo archivo."""
+    key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    with _query_stats_lock:
+        stats = _query_stats.get(key)
+        if stats is None:
+            stats = _query_stats[key] = QueryStats()
+        return stats
+
+class JobRun:
+    """Ejecución de una exportación u otra tarea larga."""
+    __slots__ = ("name", "finished", "seconds", "ok")
+
+    def __init__(self, name, finished, seconds, ok):
+        self.name = name
+        self.finished = finished
+        self.seconds = seconds
+        self.ok = ok
+
+_jobs = deque(maxlen=RECENT_JOBS)
+
+def record_job(name, seconds, ok=True):
+    _jobs.append(JobRun(name, time.time(), seconds, ok))
+
+def recent_jobs():
+    """Tareas recientes, de la más nueva a la más antigua."""
+    return list(reversed(_jobs))
+
+def timed_job(name):
+    """Decorador que registra la duración de cada llamada a la función como la tarea 'name'."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                record_job(name, time.perf_counter() - start, ok)
+        return wrapper
+    return decorator
+
+class CacheCounter:
+    """Aciertos y fallos de una caché de la aplicación."""
+    __slots__ = ("name", "hits", "misses")
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    @property
+    def ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+_caches = {}
+
+def cache_counter(name):
+    """Contador de la caché 'name', compartido por el proceso."""
+    counter = _caches.get(name)
+    if counter is None:
+        counter = _caches.setdefault(name, CacheCounter(name))
+    return counter
+
+def cache_counters():
+    return list(_caches.values())
@@ -1,11 +1,27 @@
 class Student:
-    def __init__(self, identificacion, nombre, apellido, course_id, representante, telefono):
+    # Registro liviano: __slots__ evita el __dict__ por instancia en listados grandes
+    __slots__ = ("id", "identificacion", "nombre", "apellido", "course_id", "course_name", "representante", "telefono", "active",
+                 "academic_year")
+    # Columnas en el orden en que deben seleccionarse para construir el registro
+    COLUMNS = __slots__
+
+    def __init__(self, id, identificacion, nombre, apellido, course_id, course_name, representante, telefono, active=1,
+                 academic_year=None):
+        self.id = id
         self.identificacion = identificacion
         self.nombre = nombre
         self.apellido = apellido
         self.course_id = course_id
+        self.course_name = course_name
         self.representante = representante
         self.telefono = telefono
+        self.active = active
+        self.academic_year = academic_year
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
 
     def __repr__(self):
-        return f'{self.nombre} {self.apellido}'
\ No newline at end of file
+        return f'{self.nombre} {self.apellido}'
@@ -0,0 +1,24 @@
+from src.utils.money import format_cents
+
+class StudentBalance:
+    """Estado de cuenta de un estudiante a una fecha: lo que debía pagar, lo pagado y el saldo, en centavos."""
+    __slots__ = ("student_id", "identificacion", "nombre", "apellido", "course_id", "owed", "paid", "balance")
+    COLUMNS = __slots__
+
+    def __init__(self, student_id, identificacion, nombre, apellido, course_id, owed, paid, balance):
+        self.student_id = student_id
+        self.identificacion = identificacion
+        self.nombre = nombre
+        self.apellido = apellido
+        self.course_id = course_id
+        self.owed = owed
+        self.paid = paid
+        self.balance = balance
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"{self.nombre} {self.apellido}: saldo {format_cents(self.balance)}"
@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from config import CAMPUSES
+from src.logger import logger
+from src.models.campus import Campus
+from src.models.database import Database
+from src.models.changes import get_change_bus
+
+SELECT_CONFIG = "SELECT key, value FROM config"
+
+class TenantRegistry:
+    """
+    Registro de sedes: cada sede tiene su archivo de base de datos y su configuración.
+    connect(key) abre la conexión de la sede la primera vez, la prepara con 'setup(db, sede)'
+    (tablas, valores predeterminados, consultas más usadas) y la conserva abierta, así que
+    volver a una sede no repite esa preparación ni reinicia la aplicación.
+    Solo se usa desde el hilo de la interfaz.
+    """
+    def __init__(self, campuses=CAMPUSES, setup=None):
+        self.campuses = OrderedDict((key, Campus.from_config(key, settings)) for key, settings in campuses.items())
+        self.setup = setup
+        self._connections = {}
+        self._configs = {}
+        self._config_changes = {}
+
+    def __contains__(self, key):
+        return key in self.campuses
+
+    def __len__(self):
+        return len(self.campuses)
+
+    def list(self):
+        return list(self.campuses.values())
+
+    def get(self, key):
+        return self.campuses[key]
+
+    def connect(self, key):
+        """Conexión de la sede, abierta y preparada una sola vez por proceso."""
+        db = self._connections.get(key)
+        if db is None:
+            campus = self.get(key)
+            start = time.perf_counter()
+            db = Database(campus.db_name)
+            if self.setup:
+                self.setup(db, campus)
+            self._connections[key] = db
+            self._config_changes[key] = get_change_bus(campus.db_name).subscribe(("config",))
+            logger.info(f"{campus} lista en {(time.perf_counter() - start) * 1000:.0f} ms")
+        return db
+
+    def get_config(self, key):
+        """
+        Configuración de la sede ({clave: valor}) en caché. Se vuelve a leer cuando otra
+        conexión del proceso la modifica (bus de cambios) o cuando otro equipo confirma
+        cambios en la base (PRAGMA data_version).
+        """
+        db = self.connect(key)
+        data_version = db.connection.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._config_changes[key].drain()
+        cached = self._configs.get(key)
+        if cached is None or changed or cached[0] != data_version:
+            configs = {row[0]: row[1] for row in db.connection.execute(SELECT_CONFIG).fetchall()}
+            cached = self._configs[key] = (data_version, configs)
+        return cached[1]
+
+    def close(self):
+        for subscription in self._config_changes.values():
+            subscription.close()
+        for db in self._connections.values():
+            db.close()
+        self._connections = {}
+        self._configs = {}
+        self._config_changes = {}
@@ -0,0 +1,36 @@
+from datetime import date
+
+class TuitionPlan:
+    __slots__ = ("id", "course_id", "monthly_fee_cents", "enrollment_fee_cents", "start_date", "installments", "due_day")
+    COLUMNS = __slots__
+
+    def __init__(self, plan_id, course_id, monthly_fee_cents, enrollment_fee_cents, start_date, installments, due_day):
+        self.id = plan_id
+        self.course_id = course_id
+        # Cuotas en centavos enteros
+        self.monthly_fee_cents = monthly_fee_cents
+        self.enrollment_fee_cents = enrollment_fee_cents
+        self.start_date = start_date
+        self.installments = installments
+        self.due_day = due_day
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
+    def due_dates(self):
+        """
+        Fechas de vencimiento de las cuotas mensuales: el día 'due_day' de cada mes a partir
+        del mes de start_date (la matrícula vence en start_date).
+        """
+        start = date.fromisoformat(self.start_date)
+        dates = []
+        for k in range(self.installments):
+            month_index = start.month - 1 + k
+            year, month = start.year + month_index // 12, month_index % 12 + 1
+            dates.append(date(year, month, min(self.due_day, 28)))
+        return dates
+
+    def __repr__(self):
+        return f"Plan curso {self.course_id}: {self.installments} x {self.monthly_fee_cents} + {self.enrollment_fee_cents} centavos"
@@ -1,8 +1,16 @@
 class User:
+    __slots__ = ("id", "username", "role")
+    COLUMNS = __slots__
+
     def __init__(self, user_id, username, role):
         self.id = user_id
         self.username = username
         self.role = role
 
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """row_factory de sqlite3: construye el registro directamente desde la tupla de la fila."""
+        return cls(*row)
+
     def __repr__(self):
-        return f"{self.username} ({self.role})"
\ No newline at end of file
+        return f"{self.username} ({self.role})"
@@ -0,0 +1,205 @@
+import queue
+import sqlite3
+import threading
+import tkinter as tk
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from src.logger import logger
+from src.models.database import Database
+from src.models.changes import get_change_bus
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.course_controller import CourseController
+from src.controllers.tuition_controller import TuitionController
+from src.controllers.archive_controller import ArchiveController
+from src.controllers.duplicate_controller import DuplicateController
+from src.controllers.guardian_controller import GuardianController
+from src.controllers.delivery_controller import DeliveryController
+from src.controllers.system_status_controller import SystemStatusController
+
+# Cada cuántos milisegundos revisa Tk si hay resultados listos
+POLL_INTERVAL_MS = 30
+# Cada cuántos milisegundos se entregan a la interfaz los cambios confirmados
+CHANGES_POLL_INTERVAL_MS = 200
+
+class AsyncRequest:
+    """Consulta enviada al hilo de datos. cancel() descarta su resultado aunque ya esté en curso."""
+    __slots__ = ("key", "callback", "error_callback", "cancelled", "future")
+
+    def __init__(self, key, callback, error_callback):
+        self.key = key
+        self.callback = callback
+        self.error_callback = error_callback
+        self.cancelled = False
+        self.future = None
+
+class AsyncDataFacade:
+    """
+    Ejecuta las consultas de los controladores en un hilo dedicado, con su propia conexión,
+    y entrega los resultados al hilo de Tk mediante una cola revisada con 'after'.
+    Así la interfaz no se congela mientras SQLite lee del disco.
+
+    Las tareas reciben un diccionario de controladores ("students", "payments", "courses",
+    "tuition", "archive", "duplicates", "guardians", "deliveries", "status") que solo debe
+    usarse dentro de la tarea. Si se envía una consulta con una 'key' que ya tiene otra
+    pendiente (por ejemplo una búsqueda que quedó desactualizada), la anterior se cancela: si
+    no empezó no se ejecuta, y si está en curso se interrumpe y su resultado se descarta.
+    """
+    def __init__(self, db, widget, poll_interval=POLL_INTERVAL_MS):
+        self.db_name = db.db_name if hasattr(db, "db_name") else db
+        # Las escrituras del hilo de datos se registran en la bitácora con el usuario de la sesión
+        self.username = getattr(db, "username", None)
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self._results = queue.Queue()
+        self._requests = []
+        self._latest = {}
+        self._running = None
+        # Protege _running: interrupt() solo debe llegar a la conexión mientras corre la consulta
+        # cancelada, no a la siguiente que el hilo de datos ya haya empezado
+        self._running_lock = threading.Lock()
+        self._polling = False
+        self._worker_db = None
+        self._controllers = None
+        # Un solo hilo: las consultas se ejecutan en orden sobre una única conexión propia
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="datos",
+                                            initializer=self._open_connection)
+
+    def _open_connection(self):
+        self._worker_db = Database(self.db_name)
+        self._worker_db.username = self.username
+        self._controllers = {
+            "students": StudentController(self._worker_db),
+            "payments": PaymentController(self._worker_db),
+            "courses": CourseController(self._worker_db),
+            "tuition": TuitionController(self._worker_db),
+            "archive": ArchiveController(self._worker_db),
+            "duplicates": DuplicateController(self._worker_db),
+            "guardians": GuardianController(self._worker_db),
+            "deliveries": DeliveryController(self._worker_db),
+            "status": SystemStatusController(self._worker_db),
+        }
+
+    def submit(self, task, callback, key=None, error_callback=None):
+        """
+        Ejecuta task(controladores) en el hilo de datos y luego callback(resultado) en el hilo de Tk.
+        Retorna la AsyncRequest, que puede cancelarse.
+        """
+        request = AsyncRequest(key, callback, error_callback)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                self.cancel(previous)
+            self._latest[key] = request
+        request.future = self._executor.submit(self._run, request, task)
+        self._requests.append(request)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+        return request
+
+    def cancel(self, request):
+        request.cancelled = True
+        if request.future.cancel():
+            return
+        with self._running_lock:
+            if self._running is request and self._worker_db:
+                # La consulta ya está en curso: interrumpirla (interrupt() es seguro desde otro hilo)
+                self._worker_db.connection.interrupt()
+
+    def cancel_key(self, key):
+        """Cancela la consulta pendiente con esa 'key', si la hay."""
+        request = self._latest.pop(key, None)
+        if request is not None:
+            self.cancel(request)
+
+    def _run(self, request, task):
+        with self._running_lock:
+            if request.cancelled:
+                return
+            self._running = request
+        result = error = None
+        try:
+            result = task(self._controllers)
+        except Exception as e:
+            error = e
+            if not (request.cancelled and isinstance(e, sqlite3.OperationalError)):
+                logger.error("Error en la consulta en segundo plano:\n" + traceback.format_exc())
+        finally:
+            with self._running_lock:
+                self._running = None
+        self._results.put((request, result, error))
+
+    def _poll(self):
+        # Se revisa si quedan consultas pendientes antes de vaciar la cola: un resultado
+        # siempre entra a la cola antes de que su consulta figure como terminada.
+        had_pending = any(not r.future.done() for r in self._requests)
+        while True:
+            try:
+                request, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if request.key is not None and self._latest.get(request.key) is request:
+                del self._latest[request.key]
+            if request.cancelled:
+                continue
+            try:
+                if error is not None:
+                    if request.error_callback:
+                        request.error_callback(error)
+                elif request.callback:
+                    request.callback(result)
+            except tk.TclError:
+                # La ventana que pidió los datos ya se cerró
+                logger.debug("Resultado descartado: la ventana ya no existe.")
+        # Los callbacks pueden haber enviado nuevas consultas
+        self._requests = [r for r in self._requests if not r.future.done()]
+        if had_pending or self._requests or not self._results.empty():
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def close(self):
+        for request in list(self._latest.values()):
+            self.cancel(request)
+        if self._worker_db:
+            self._executor.submit(self._worker_db.close)
+        self._executor.shutdown(wait=False)
+
+class ChangeListener:
+    """
+    Entrega en el hilo de Tk los cambios confirmados sobre las tablas indicadas, en lotes:
+    callback(eventos) recibe una lista de ChangeEvent. Los cambios pueden venir de cualquier
+    conexión del proceso (la ventana principal, el hilo de datos u otra ventana).
+    """
+    def __init__(self, db, widget, tables, callback, poll_interval=CHANGES_POLL_INTERVAL_MS):
+        db_name = db.db_name if hasattr(db, "db_name") else db
+        self.widget = widget
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.subscription = get_change_bus(db_name).subscribe(tables)
+        self._closed = False
+        self._after_id = widget.after(poll_interval, self._poll)
+
+    def _poll(self):
+        events = self.subscription.drain()
+        if events:
+            try:
+                self.callback(events)
+            except tk.TclError:
+                logger.debug("Cambios descartados: la ventana ya no existe.")
+            except Exception:
+                logger.error("Error al aplicar cambios en la interfaz:\n" + traceback.format_exc())
+        if self._closed:
+            return
+        self._after_id = self.widget.after(self.poll_interval, self._poll)
+
+    def close(self):
+        self._closed = True
+        self.subscription.close()
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
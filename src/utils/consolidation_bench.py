@@ -0,0 +1,106 @@
+"""
+Mide la base consolidada: crea varias sedes temporales con N estudiantes y pagos cada una,
+hace la primera sincronización (copia completa), aplica algunos cambios en cada sede y mide
+la sincronización incremental y las consultas de recaudo y matrícula sobre los totales
+precalculados, comparadas con agregar directamente sobre los pagos copiados.
+
+Uso:
+    python -m src.utils.consolidation_bench --campuses 3 --students 20000 --payments 200000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from src.models.database import Database
+from src.models.campus import Campus
+from src.controllers.course_controller import CourseController
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.consolidation_controller import ConsolidationController
+
+# Agregado equivalente a revenue_by_month calculado sobre los pagos copiados
+SELECT_REVENUE_FROM_PAYMENTS = """
+    SELECT month, COUNT(*), SUM(amount_cents) FROM payments GROUP BY month ORDER BY month
+"""
+
+def prepare_campus(db_path, students, payments, seed):
+    db = Database(db_path)
+    db.create_tables()
+    course_controller = CourseController(db)
+    student_controller = StudentController(db)
+    payment_controller = PaymentController(db)
+    for grade in range(1, 12):
+        course_controller.add_course(f"Grado {grade}")
+    rng = random.Random(seed)
+    # Los datos iniciales se cargan en bloque, como filas existentes antes de la bitácora
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO students (identificacion, nombre, apellido, course_id, representante, telefono, active, "
+        "academic_year) VALUES (?, ?, ?, ?, ?, ?, 1, 2025)",
+        ((f"BENCH-{seed}-{i:06d}", "Alumno", f"Prueba {i}", i % 11 + 1, "Acudiente", "3000000000")
+         for i in range(students))
+    ))
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO payments (student_id, amount_cents, description, payment_date, receipt_number, academic_year) "
+        "VALUES (?, ?, ?, ?, ?, 2025)",
+        ((rng.randint(1, students), rng.choice((15000000, 18000000, 22000000)), "Pensión",
+          f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00", i + 1) for i in range(payments))
+    ))
+    return db, student_controller, payment_controller
+
+def apply_changes(student_controller, payment_controller, changes, students):
+    for i in range(changes // 2):
+        payment_controller.register_payment(i % students + 1, 18000000, "Pensión")
+    for i in range(changes - changes // 2):
+        student_controller.deactivate_student(student_controller.get_student_by_id(i * 7 % students + 1).identificacion)
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+def run_benchmark(campuses=3, students=20000, payments=200000, changes=200):
+    workdir = tempfile.mkdtemp()
+    sources = []
+    for index in range(campuses):
+        path = os.path.join(workdir, f"sede_{index + 1}.db")
+        sources.append((Campus(f"sede{index + 1}", f"Sede {index + 1}", path, "", ""),
+                        *prepare_campus(path, students, payments, index)))
+    consolidation = ConsolidationController([source[0] for source in sources], os.path.join(workdir, "consolidado.db"))
+    initial, _ = timed(consolidation.sync_all)
+    for _, _, student_controller, payment_controller in sources:
+        apply_changes(student_controller, payment_controller, changes, students)
+    incremental, (_, _, stats) = timed(consolidation.sync_all)
+    copied = sum(s["students"] + s["payments"] for s in stats.values())
+    queries = [
+        ("recaudo por sede (totales)", timed(lambda: consolidation.get_revenue(), 20)[0]),
+        ("recaudo todas las sedes (totales)", timed(lambda: consolidation.get_revenue(by_campus=False), 20)[0]),
+        ("matrícula por curso (totales)", timed(lambda: consolidation.get_enrollment(), 20)[0]),
+        ("recaudo desde los pagos copiados", timed(
+            lambda: consolidation.db.connection.execute(SELECT_REVENUE_FROM_PAYMENTS).fetchall(), 3)[0]),
+    ]
+    consolidation.close()
+    for _, db, _, _ in sources:
+        db.close()
+    return workdir, initial, incremental, copied, queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronización y consultas de la base consolidada")
+    parser.add_argument("--campuses", type=int, default=3, help="Cantidad de sedes")
+    parser.add_argument("--students", type=int, default=20000, help="Estudiantes por sede")
+    parser.add_argument("--payments", type=int, default=200000, help="Pagos por sede")
+    parser.add_argument("--changes", type=int, default=200, help="Cambios por sede entre sincronizaciones")
+    args = parser.parse_args()
+
+    workdir, initial, incremental, copied, queries = run_benchmark(
+        args.campuses, args.students, args.payments, args.changes)
+    print(f"Directorio de trabajo: {workdir}")
+    print(f"Sincronización inicial:     {initial:9.3f} s "
+          f"({args.campuses * (args.students + args.payments)} filas)")
+    print(f"Sincronización incremental: {incremental:9.3f} s ({copied} filas)")
+    for name, seconds in queries:
+        print(f"{name:>36}: {seconds * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Prueba de carga de acceso concurrente a la base de datos.
+Simula N equipos (procesos independientes, cada uno con su propia conexión) que leen y
+registran pagos sobre el mismo archivo, y reporta el rendimiento y los percentiles de
+espera por bloqueo de las escrituras.
+
+Uso:
+    python -m src.utils.db_stress --clients 3 --seconds 10 --db /ruta/compartida/prueba.db
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+from src.models.database import Database
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+
+def prepare_database(db_path, students=200):
+    db = Database(db_path)
+    db.create_tables()
+    student_controller = StudentController(db)
+    PaymentController(db)
+    for i in range(students):
+        student_controller.register_student(f"STRESS-{i:05d}", "Alumno", f"Prueba {i}", None, "Acudiente", "3000000000")
+    student_ids = [row[0] for row in db.connection.execute("SELECT id FROM students").fetchall()]
+    db.close()
+    return student_ids
+
+def run_client(db_path, student_ids, seconds, write_ratio, seed, results):
+    random.seed(seed)
+    db = Database(db_path)
+    payment_controller = PaymentController(db)
+    reads = writes = failures = 0
+    lock_waits = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        student_id = random.choice(student_ids)
+        if random.random() < write_ratio:
+            success, _, _, _, _ = payment_controller.register_payment(student_id, 5000000, "prueba de carga")
+            if success:
+                writes += 1
+                lock_waits.append(db.last_lock_wait)
+            else:
+                failures += 1
+        else:
+            payment_controller.get_payments_page(student_id, None, 50)
+            reads += 1
+    db.close()
+    results.put((reads, writes, failures, lock_waits))
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_stress(db_path, clients=3, seconds=10, write_ratio=0.3):
+    """
+    Ejecuta la prueba y retorna un diccionario con el resumen de resultados.
+    """
+    student_ids = prepare_database(db_path)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run_client, args=(db_path, student_ids, seconds, write_ratio, seed, results))
+        for seed in range(clients)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    reads = sum(r[0] for r in collected)
+    writes = sum(r[1] for r in collected)
+    failures = sum(r[2] for r in collected)
+    lock_waits = [wait for r in collected for wait in r[3]]
+    return {
+        "clients": clients,
+        "seconds": elapsed,
+        "reads": reads,
+        "writes": writes,
+        "failures": failures,
+        "ops_per_second": (reads + writes) / elapsed,
+        "writes_per_second": writes / elapsed,
+        "lock_wait_p50_ms": percentile(lock_waits, 0.50) * 1000,
+        "lock_wait_p95_ms": percentile(lock_waits, 0.95) * 1000,
+        "lock_wait_p99_ms": percentile(lock_waits, 0.99) * 1000,
+        "lock_wait_max_ms": max(lock_waits, default=0.0) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de acceso concurrente a la base de datos")
+    parser.add_argument("--clients", type=int, default=3, help="Cantidad de equipos simulados")
+    parser.add_argument("--seconds", type=float, default=10, help="Duración de la prueba")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Proporción de operaciones de escritura")
+    parser.add_argument("--db", help="Archivo de base de datos a usar (por defecto uno temporal)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "stress.db")
+    summary = run_stress(db_path, args.clients, args.seconds, args.write_ratio)
+    print(f"Base de datos: {db_path}")
+    for key, value in summary.items():
+        print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+if __name__ == "__main__":
+    main()
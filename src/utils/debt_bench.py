@@ -0,0 +1,64 @@
+"""
+Mide el cálculo de saldos del colegio completo: crea una base temporal con N estudiantes,
+un plan de pagos por curso y pagos aleatorios, y cronometra el listado de deudores,
+el estado de cuenta de todos y la verificación de paz y salvo de un estudiante.
+
+Uso:
+    python -m src.utils.debt_bench --students 10000 --payments 80000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from src.models.database import Database
+from src.controllers.course_controller import CourseController
+from src.controllers.student_controller import StudentController
+from src.controllers.tuition_controller import TuitionController
+from src.utils.money import format_cents
+
+def prepare_database(db_path, students, payments):
+    db = Database(db_path)
+    db.create_tables()
+    course_controller = CourseController(db)
+    StudentController(db)
+    tuition_controller = TuitionController(db)
+    for grade in range(1, 12):
+        course_controller.add_course(f"Grado {grade}")
+        tuition_controller.set_plan(grade, 30000000, 50000000, "2025-02-01", 10, 5)
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO students (identificacion, nombre, apellido, course_id, active) VALUES (?, ?, ?, ?, 1)",
+        ((f"BENCH-{i:06d}", "Alumno", f"Prueba {i}", i % 11 + 1) for i in range(students))
+    ))
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO payments (student_id, amount_cents, description, payment_date, academic_year) "
+        "VALUES (?, ?, ?, ?, 2025)",
+        ((random.randint(1, students), 30000000, "Pensión", f"2025-{random.randint(2, 11):02d}-10 10:00:00")
+         for _ in range(payments))
+    ))
+    return db, tuition_controller
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Cálculo de saldos y deudores")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--payments", type=int, default=80000)
+    parser.add_argument("--as-of", default="2025-06-10", help="Fecha de corte AAAA-MM-DD")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "debt.db")
+    db, tuition_controller = prepare_database(db_path, args.students, args.payments)
+    seconds, debtors = timed(tuition_controller.get_debtors, args.as_of)
+    print(f"Deudores: {len(debtors)} en {seconds * 1000:.1f} ms")
+    seconds, balances = timed(tuition_controller.get_balances, args.as_of)
+    print(f"Estados de cuenta: {len(balances)} en {seconds * 1000:.1f} ms")
+    seconds, (eligible, balance) = timed(tuition_controller.check_paz_y_salvo, 1, args.as_of)
+    print(f"Paz y salvo de un estudiante: {'sí' if eligible else 'no'} (saldo {format_cents(balance)}) en {seconds * 1000:.2f} ms")
+    db.close()
+
+if __name__ == "__main__":
+    main()
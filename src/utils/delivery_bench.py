@@ -0,0 +1,86 @@
+"""
+Mide el envío de estados de cuenta por correo contra el receptor SMTP local (smtp_sink):
+crea una base temporal con N familias con correo, encola sus estados de cuenta del mes y los
+envía por una sola conexión reutilizada; luego encola y envía los mismos abriendo una conexión
+por correo. 'handshake_ms' simula el saludo de un servidor real (TCP, TLS y autenticación),
+que es lo que la conexión reutilizada paga una sola vez. El receptor corre en otro proceso
+para que no compita con el envío por el intérprete.
+
+Uso:
+    python -m src.utils.delivery_bench --families 1000 --handshake-ms 20
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+from src.utils.family_bench import prepare_database
+from src.models.migrations import run_migrations
+from src.utils.mailer import SmtpConnection, deliver_pending
+from src.controllers.delivery_controller import DeliveryController
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def start_sink(outbox, handshake_ms):
+    """Inicia smtp_sink en otro proceso en un puerto libre y espera a que acepte conexiones."""
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "-m", "src.utils.smtp_sink", "--port", str(port), "--outbox", outbox,
+                                "--handshake-ms", str(handshake_ms)], cwd=PACKAGE_ROOT, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("El receptor SMTP no inició")
+
+def send_all(db, port, reuse):
+    connection = SmtpConnection("localhost", port, username=None, starttls=False, reuse=reuse)
+    return deliver_pending(db, connection)
+
+def run_benchmark(families=1000, handshake_ms=20, start_date="2025-03-01", end_date="2025-03-31"):
+    workdir = tempfile.mkdtemp()
+    db, _, _ = prepare_database(os.path.join(workdir, "bench.db"), families, families * 10)
+    # Agrupa en acudientes a los estudiantes cargados en bloque, como al abrir la sede
+    db.write(run_migrations)
+    controller = DeliveryController(db)
+    db.write(lambda cursor: cursor.execute("UPDATE guardians SET email = 'familia' || id || '@example.com'"))
+    outbox = os.path.join(workdir, "outbox")
+    sink, port = start_sink(outbox, handshake_ms)
+    results = {}
+    try:
+        for label, reuse in (("reused", True), ("per_message", False)):
+            _, _, queued = controller.queue_family_statements(start_date, end_date, "Colegio Ejemplo", None)
+            summary = send_all(db, port, reuse)
+            summary["queued"] = queued
+            results[label] = summary
+    finally:
+        sink.terminate()
+        sink.wait()
+        db.close()
+    results["received"] = len(os.listdir(outbox)) if os.path.isdir(outbox) else 0
+    return workdir, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Envío de estados de cuenta por SMTP")
+    parser.add_argument("--families", type=int, default=1000, help="Cantidad de familias con correo")
+    parser.add_argument("--handshake-ms", type=int, default=20,
+                        help="Demora simulada del saludo de cada conexión (TLS y autenticación)")
+    args = parser.parse_args()
+
+    workdir, results = run_benchmark(args.families, args.handshake_ms)
+    print(f"Directorio de trabajo: {workdir}")
+    for label, name in (("reused", "Una conexión reutilizada"), ("per_message", "Una conexión por correo")):
+        summary = results[label]
+        print(f"{name:26} {summary['sent']:5d} enviados en {summary['seconds']:7.2f} s "
+              f"({summary['sent'] / summary['seconds']:7.1f} correos/s, {summary['connections']} conexiones)")
+    print(f"Recibidos por el receptor: {results['received']}")
+    print(f"Mejora: {results['per_message']['seconds'] / results['reused']['seconds']:.1f}x")
+
+if __name__ == "__main__":
+    main()
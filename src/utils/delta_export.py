@@ -0,0 +1,190 @@
+"""
+Exportaciones incrementales de estudiantes y pagos.
+Cada destino (por ejemplo "ministerio" o "contabilidad") guarda su marca de agua: la
+posición de la bitácora de cambios (change_log) hasta la que ya exportó. La siguiente
+exportación lee en la bitácora solo los cambios posteriores y emite únicamente las filas
+nuevas, modificadas o eliminadas. La primera exportación de un destino es completa.
+"""
+import csv
+import time
+from datetime import datetime
+import openpyxl
+from src.models.change_log import ensure_change_log_table
+from src.models.runtime_stats import timed_job
+
+# Cantidad máxima de ids por consulta IN (...), por debajo del límite de variables de SQLite
+ID_CHUNK_SIZE = 500
+
+STUDENT_EXPORT_COLUMNS = ["id", "identificacion", "nombre", "apellido", "course_id", "grado",
+                          "representante", "telefono", "active"]
+PAYMENT_EXPORT_COLUMNS = ["id", "student_id", "identificacion", "amount_cents", "description",
+                          "payment_date", "receipt_number", "receipt_code"]
+
+SELECT_EXPORT_STUDENTS = """
+    SELECT s.id, s.identificacion, s.nombre, s.apellido, s.course_id,
+           COALESCE(c.name, s.course_name), s.representante, s.telefono, s.active
+    FROM students s
+    LEFT JOIN courses c ON c.id = s.course_id
+    WHERE s.deleted_at IS NULL
+"""
+SELECT_EXPORT_PAYMENTS = """
+    SELECT p.id, p.student_id, s.identificacion, p.amount_cents, p.description,
+           p.payment_date, p.receipt_number, p.receipt_code
+    FROM payments p
+    LEFT JOIN students s ON s.id = p.student_id
+"""
+# Los datasets exportables: tabla de la bitácora, consulta base y columna de la llave
+DATASETS = {
+    "students": ("students", SELECT_EXPORT_STUDENTS, "s.id", STUDENT_EXPORT_COLUMNS),
+    "payments": ("payments", SELECT_EXPORT_PAYMENTS, "p.id", PAYMENT_EXPORT_COLUMNS),
+}
+
+SELECT_CHANGED_KEYS = """
+    SELECT table_name, row_pk, action FROM change_log
+    WHERE table_name IN ({tables}) AND id > ? AND id <= ?
+    ORDER BY id
+"""
+
+def write_csv(path, headers, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+def write_xlsx(path, headers, rows):
+    # write_only escribe las filas en secuencia sin mantener la hoja en memoria
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Cambios")
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx}
+
+class DeltaExporter:
+    def __init__(self, db):
+        self.db = db
+        self.initialize_watermarks_table()
+
+    def initialize_watermarks_table(self):
+        cursor = self.db.connection.cursor()
+        ensure_change_log_table(cursor)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS export_watermarks (
+                target TEXT NOT NULL,
+                dataset TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                exported_at TEXT NOT NULL,
+                PRIMARY KEY (target, dataset)
+            )
+        """)
+        self.db.connection.commit()
+
+    def get_watermark(self, target, dataset):
+        """Posición de la bitácora ya exportada a ese destino, o None si nunca se exportó."""
+        row = self.db.connection.execute(
+            "SELECT position FROM export_watermarks WHERE target = ? AND dataset = ?", (target, dataset)
+        ).fetchone()
+        return row[0] if row else None
+
+    def reset_watermark(self, target, dataset):
+        """Olvida la marca de agua: la siguiente exportación a ese destino será completa."""
+        self.db.write(lambda cursor: cursor.execute(
+            "DELETE FROM export_watermarks WHERE target = ? AND dataset = ?", (target, dataset)))
+
+    def _set_watermark(self, target, dataset, position):
+        exported_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.db.write(lambda cursor: cursor.execute("""
+            INSERT INTO export_watermarks (target, dataset, position, exported_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (target, dataset) DO UPDATE SET position = excluded.position, exported_at = excluded.exported_at
+        """, (target, dataset, position, exported_at)))
+
+    def _changed_keys(self, cursor, dataset, since, until):
+        """
+        Ids modificados y eliminados de un dataset entre dos posiciones de la bitácora.
+        Renombrar un curso cambia el grado de todos sus estudiantes, así que también cuenta.
+        """
+        tables = ["students", "courses"] if dataset == "students" else ["payments"]
+        query = SELECT_CHANGED_KEYS.format(tables=", ".join("?" * len(tables)))
+        changed, deleted, courses = set(), set(), set()
+        for table_name, row_pk, action in cursor.execute(query, (*tables, since, until)):
+            if table_name == "courses":
+                courses.add(int(row_pk))
+            elif action == "delete":
+                changed.discard(int(row_pk))
+                deleted.add(int(row_pk))
+            else:
+                deleted.discard(int(row_pk))
+                changed.add(int(row_pk))
+        for chunk in _chunks(sorted(courses)):
+            placeholders = ", ".join("?" * len(chunk))
+            for (student_id,) in cursor.execute(
+                    f"SELECT id FROM students WHERE course_id IN ({placeholders})", chunk):
+                if student_id not in deleted:
+                    changed.add(student_id)
+        return changed, deleted
+
+    def _read_rows(self, cursor, dataset, ids=None):
+        _, base_query, key_column, _ = DATASETS[dataset]
+        if ids is None:
+            yield from cursor.execute(f"{base_query} ORDER BY {key_column}")
+            return
+        connector = "AND" if "WHERE" in base_query else "WHERE"
+        for chunk in _chunks(sorted(ids)):
+            placeholders = ", ".join("?" * len(chunk))
+            yield from cursor.execute(f"{base_query} {connector} {key_column} IN ({placeholders}) ORDER BY {key_column}", chunk).fetchall()
+
+    @timed_job("Exportar cambios")
+    def export(self, target, dataset, path, fmt="csv", full=False):
+        """
+        Exporta a 'path' las filas de 'dataset' ("students" o "payments") que cambiaron desde la
+        última exportación a 'target'. Cada fila lleva la columna "operacion": "upsert" para filas
+        nuevas o modificadas y "delete" para las eliminadas (solo con el id).
+        La marca de agua avanza únicamente si el archivo se escribió completo.
+        Retorna un diccionario con el resumen.
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Dataset desconocido: {dataset}")
+        if fmt not in WRITERS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        start = time.perf_counter()
+        _, _, _, columns = DATASETS[dataset]
+        since = None if full else self.get_watermark(target, dataset)
+
+        cursor = self.db.connection.cursor()
+        cursor.row_factory = None
+        # Una sola transacción de lectura: la posición y las filas corresponden al mismo instante
+        owns_transaction = not self.db.connection.in_transaction
+        if owns_transaction:
+            cursor.execute("BEGIN")
+        try:
+            position = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_log").fetchone()[0]
+            if since is None:
+                rows = [list(row) + ["upsert"] for row in self._read_rows(cursor, dataset)]
+                deleted = set()
+            else:
+                changed, deleted = self._changed_keys(cursor, dataset, since, position)
+                rows = [list(row) + ["upsert"] for row in self._read_rows(cursor, dataset, changed)] if changed else []
+        finally:
+            if owns_transaction:
+                self.db.connection.commit()
+
+        empty = [None] * (len(columns) - 1)
+        rows.extend([student_id] + empty + ["delete"] for student_id in sorted(deleted))
+        WRITERS[fmt](path, columns + ["operacion"], rows)
+        self._set_watermark(target, dataset, position)
+        return {
+            "target": target,
+            "dataset": dataset,
+            "full": since is None,
+            "rows": len(rows) - len(deleted),
+            "deleted": len(deleted),
+            "since": since,
+            "position": position,
+            "seconds": time.perf_counter() - start,
+        }
+
+def _chunks(values, size=ID_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
@@ -0,0 +1,76 @@
+"""
+Compara la exportación incremental contra la exportación completa del listado de estudiantes.
+Crea una base temporal con N estudiantes, hace una primera exportación (que fija la marca
+de agua), aplica algunos cambios y mide ambas exportaciones en CSV y XLSX.
+
+Uso:
+    python -m src.utils.delta_export_bench --rows 50000 --changes 500
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.models.database import Database
+from src.controllers.course_controller import CourseController
+from src.controllers.student_controller import StudentController
+from src.utils.delta_export import DeltaExporter
+
+def prepare_database(db_path, rows):
+    db = Database(db_path)
+    db.create_tables()
+    course_controller = CourseController(db)
+    student_controller = StudentController(db)
+    for grade in range(1, 12):
+        course_controller.add_course(f"Grado {grade}")
+    # Los datos iniciales se cargan en bloque, como filas existentes antes de la bitácora
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO students (identificacion, nombre, apellido, course_id, representante, telefono, active) "
+        "VALUES (?, ?, ?, ?, ?, ?, 1)",
+        ((f"BENCH-{i:06d}", "Alumno", f"Prueba {i}", i % 11 + 1, "Acudiente", "3000000000") for i in range(rows))
+    ))
+    return db, student_controller
+
+def apply_changes(student_controller, changes, rows, prefix):
+    step = max(1, rows // changes)
+    for i in range(0, rows, step)[:changes // 2]:
+        # La segunda ronda vuelve a desactivar los mismos estudiantes: igual quedan en la bitácora
+        student_controller.deactivate_student(f"BENCH-{i:06d}")
+    for i in range(changes - changes // 2):
+        student_controller.register_student(f"{prefix}-{i:06d}", "Alumno", f"Nuevo {i}", 1, "Acudiente", "3000000000")
+
+def timed_export(exporter, target, path, fmt, full):
+    start = time.perf_counter()
+    summary = exporter.export(target, "students", path, fmt, full=full)
+    return time.perf_counter() - start, summary["rows"] + summary["deleted"], os.path.getsize(path)
+
+def run_benchmark(rows=50000, changes=500):
+    workdir = tempfile.mkdtemp()
+    db, student_controller = prepare_database(os.path.join(workdir, "bench.db"), rows)
+    exporter = DeltaExporter(db)
+    results = []
+    for fmt in ("csv", "xlsx"):
+        target = f"bench_{fmt}"
+        exporter.export(target, "students", os.path.join(workdir, f"inicial.{fmt}"), fmt)
+        apply_changes(student_controller, changes, rows, f"NUEVO-{fmt.upper()}")
+        full = timed_export(exporter, f"{target}_full", os.path.join(workdir, f"completa.{fmt}"), fmt, True)
+        delta = timed_export(exporter, target, os.path.join(workdir, f"delta.{fmt}"), fmt, False)
+        results.append((fmt, full, delta))
+    db.close()
+    return workdir, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación incremental vs completa")
+    parser.add_argument("--rows", type=int, default=50000, help="Cantidad de estudiantes")
+    parser.add_argument("--changes", type=int, default=500, help="Cambios entre exportaciones")
+    args = parser.parse_args()
+
+    workdir, results = run_benchmark(args.rows, args.changes)
+    print(f"Directorio de trabajo: {workdir}")
+    print(f"{'formato':>8} {'modo':>12} {'filas':>8} {'segundos':>9} {'bytes':>10}")
+    for fmt, full, delta in results:
+        for mode, (seconds, count, size) in (("completa", full), ("incremental", delta)):
+            print(f"{fmt:>8} {mode:>12} {count:>8} {seconds:>9.3f} {size:>10}")
+        print(f"{fmt:>8} {'aceleración':>12} {full[0] / delta[0]:>27.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,19 @@ import datetime
 import openpyxl
 from openpyxl.styles import Font
 from openpyxl.drawing.image import Image as XLImage
-from fpdf import FPDF
+from src.utils.report_pdf import ReportPDF
+from src.models.runtime_stats import timed_job
 
+def _course_sort_key(student):
+    return (student.course_id is None, student.course_id or 0)
+
+@timed_job("Estudiantes a Excel")
 def export_students_to_excel(students, output_filename, school_name, logo_path):
     """
     Exports a list of student records to an Excel file.
     A header with the school name and school's logo (if available) is added.
-    Each student record is expected to have the keys:
-    identificacion, nombre, apellido, course_name, representante, telefono.
-    The students are sorted by course_name (grado).
+    Each student is expected to be a Student record (see src/models/student.py).
+    The students are grouped by course (grado) using course_id.
     """
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -47,33 +51,32 @@ def export_students_to_excel(students, output_filename, school_name, logo_path):
         cell = ws.cell(row=header_row, column=col)
         cell.font = Font(bold=True)
     
-    # Convert each sqlite3.Row to a dictionary (if needed) and sort by course_name
-    students_as_dict = [dict(student) for student in students]
-    students_sorted = sorted(students_as_dict, key=lambda x: x.get("course_name", ""))
+    # Group by course using the integer course_id (students without a course go last)
+    students_sorted = sorted(students, key=_course_sort_key)
     
     # Append student records starting after the header row
     for student in students_sorted:
         row = [
-            student.get("identificacion", ""),
-            student.get("nombre", ""),
-            student.get("apellido", ""),
-            student.get("course_name", ""),
-            student.get("representante", ""),
-            student.get("telefono", "")
+            student.identificacion,
+            student.nombre,
+            student.apellido,
+            student.course_name,
+            student.representante,
+            student.telefono
         ]
         ws.append(row)
     
     wb.save(output_filename)
     return output_filename
 
+@timed_job("Estudiantes a PDF")
 def export_students_to_pdf(students, output_filename, school_name, logo_path):
     """
     Exports a list of student records to a PDF file.
     The PDF includes the school logo and name as header.
-    Each record is expected to have the keys:
-    identificacion, nombre, apellido, course_name, representante, telefono.
+    Each student is expected to be a Student record (see src/models/student.py).
     """
-    pdf = FPDF(orientation="L", unit="mm", format="A4")
+    pdf = ReportPDF(orientation="L", unit="mm", format="A4")
     pdf.add_page()
     
     # Insert school logo if available
@@ -97,21 +100,20 @@ def export_students_to_pdf(students, output_filename, school_name, logo_path):
     pdf.ln()
     
     pdf.set_font("Arial", "", 12)
-    students_as_dict = [dict(student) for student in students]
-    students_sorted = sorted(students_as_dict, key=lambda x: x.get("course_name", ""))
+    students_sorted = sorted(students, key=_course_sort_key)
     
     for student in students_sorted:
         row = [
-            str(student.get("identificacion", "")),
-            student.get("nombre", ""),
-            student.get("apellido", ""),
-            student.get("course_name", ""),
-            student.get("representante", ""),
-            student.get("telefono", "")
+            str(student.identificacion),
+            student.nombre or "",
+            student.apellido or "",
+            student.course_name or "",
+            student.representante or "",
+            student.telefono or ""
         ]
         for i, data in enumerate(row):
             pdf.cell(col_widths[i], 10, data, border=1, align="C")
         pdf.ln()
     
-    pdf.output(output_filename)
+    pdf.save(output_filename)
     return output_filename
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Mide el agrupamiento por acudiente y los estados de cuenta por familia: crea una base temporal
+con N familias de 1 a 4 hijos (teléfonos escritos de distintas formas y algunos hermanos sin
+teléfono), mide la migración que agrupa a los estudiantes existentes y compara la consulta
+única de los estados de cuenta con leer familia por familia (hijos, saldo y pagos de cada uno).
+
+Uso:
+    python -m src.utils.family_bench --families 5000 --payments 100000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from src.models.database import Database
+from src.models.guardian import cluster_guardians
+from src.controllers.course_controller import CourseController
+from src.controllers.student_controller import StudentController
+from src.controllers.tuition_controller import TuitionController
+from src.controllers.guardian_controller import GuardianController
+from src.utils.family_statements import export_family_statements
+
+# El mismo celular escrito de distintas formas
+PHONE_FORMATS = (
+    lambda phone: phone,
+    lambda phone: f"+57 {phone}",
+    lambda phone: f"{phone[:3]} {phone[3:6]} {phone[6:]}",
+    lambda phone: f"({phone[:3]}) {phone[3:]}",
+)
+
+def prepare_database(db_path, families, payments, seed=1):
+    rng = random.Random(seed)
+    db = Database(db_path)
+    db.create_tables()
+    course_controller = CourseController(db)
+    StudentController(db)
+    tuition_controller = TuitionController(db)
+    for grade in range(1, 12):
+        course_controller.add_course(f"Grado {grade}")
+        tuition_controller.set_plan(grade, 30000000, 50000000, "2025-02-01", 10, 5)
+    rows = []
+    for family in range(families):
+        phone = f"3{family:09d}"
+        representante = f"Acudiente {family}"
+        for child in range(rng.choice((1, 1, 2, 2, 3, 4))):
+            # Algunos hermanos se registraron solo con el nombre del acudiente, otros con el teléfono
+            # escrito de otra forma
+            telefono = "" if child and rng.random() < 0.2 else rng.choice(PHONE_FORMATS)(phone)
+            nombre = representante.upper() if rng.random() < 0.3 else representante
+            rows.append((f"FAM-{family:06d}-{child}", "Alumno", f"Familia {family}", rng.randint(1, 11), nombre,
+                         telefono))
+    # Los estudiantes se cargan en bloque, como filas anteriores a la tabla de acudientes
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO students (identificacion, nombre, apellido, course_id, representante, telefono, active, "
+        "academic_year) VALUES (?, ?, ?, ?, ?, ?, 1, 2025)", rows))
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO payments (student_id, amount_cents, description, payment_date, receipt_number, academic_year) "
+        "VALUES (?, ?, ?, ?, ?, 2025)",
+        ((rng.randint(1, len(rows)), 30000000, "Pensión",
+          f"2025-{rng.randint(2, 11):02d}-{rng.randint(1, 28):02d} 10:00:00", i + 1) for i in range(payments))))
+    return db, families, len(rows)
+
+def statements_per_family(controller, start_date, end_date):
+    """Lo que haría un reporte sin la consulta única: hijos, saldo y pagos, familia por familia."""
+    tuition = TuitionController(controller.db)
+    cursor = controller.db.connection.cursor()
+    count = 0
+    for guardian in controller.get_guardians():
+        for child in controller.get_children(guardian.id):
+            tuition.get_student_balance(child.id, end_date)
+            count += len(cursor.execute(
+                "SELECT id, receipt_code, payment_date, amount_cents, description FROM payments "
+                "WHERE student_id = ? AND payment_date >= ? AND payment_date < date(?, '+1 day')",
+                (child.id, start_date, end_date)).fetchall())
+    return count
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def run_benchmark(families=5000, payments=100000, start_date="2025-03-01", end_date="2025-03-31"):
+    workdir = tempfile.mkdtemp()
+    db, expected, students = prepare_database(os.path.join(workdir, "bench.db"), families, payments)
+    # La migración que corre run_migrations al abrir una base con estudiantes sin acudiente
+    clustering, _ = timed(lambda: db.write(cluster_guardians))
+    found = db.connection.execute("SELECT COUNT(DISTINCT guardian_id) FROM students").fetchone()[0]
+    controller = GuardianController(db)
+    one_query, statements = timed(lambda: controller.get_family_statements(start_date, end_date))
+    per_family, _ = timed(lambda: statements_per_family(controller, start_date, end_date))
+    summary = export_family_statements(db, start_date, end_date, os.path.join(workdir, "familias.zip"))
+    db.close()
+    return workdir, {
+        "students": students, "expected": expected, "found": found, "clustering": clustering,
+        "one_query": one_query, "per_family": per_family, "statements": len(statements), "export": summary,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrupamiento por acudiente y estados de cuenta por familia")
+    parser.add_argument("--families", type=int, default=5000, help="Cantidad de familias")
+    parser.add_argument("--payments", type=int, default=100000, help="Cantidad de pagos")
+    args = parser.parse_args()
+
+    workdir, results = run_benchmark(args.families, args.payments)
+    export = results["export"]
+    print(f"Directorio de trabajo: {workdir}")
+    print(f"Agrupamiento de {results['students']} estudiantes: {results['clustering']:9.3f} s "
+          f"({results['found']} acudientes para {results['expected']} familias)")
+    print(f"Estados de cuenta, una consulta:  {results['one_query']:9.3f} s ({results['statements']} familias)")
+    print(f"Estados de cuenta, por familia:   {results['per_family']:9.3f} s "
+          f"({results['per_family'] / results['one_query']:.1f}x)")
+    print(f"ZIP con {export['families']} PDF: {export['seconds']:9.3f} s -> {export['path']}")
+
+if __name__ == "__main__":
+    main()
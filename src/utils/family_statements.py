@@ -0,0 +1,131 @@
+"""
+Estados de cuenta por familia: un PDF por acudiente con cada uno de sus hijos, los pagos del
+período y el saldo a la fecha final. Los datos de todo el colegio salen de una sola consulta
+(GuardianController.get_family_statements) y los PDF se escriben en un ZIP.
+
+Uso por consola (por ejemplo, el cierre de cada mes):
+    python -m src.utils.family_statements --start 2025-03-01 --end 2025-03-31 --out familias.zip
+"""
+import os
+import re
+import time
+import zipfile
+import argparse
+import datetime
+from config import DB_NAME, SCHOOL_NAME, LOGO_PATH
+from src.models.database import Database
+from src.models.migrations import run_migrations
+from src.models.runtime_stats import timed_job
+from src.controllers.config_controller import ConfigController
+from src.controllers.guardian_controller import GuardianController
+from src.utils.report_pdf import ReportPDF
+from src.utils.money import format_cents
+
+# Anchos de la tabla de pagos: recibo, fecha, descripción, monto
+PAYMENT_COLUMNS = [("Nº Recibo", 35), ("Fecha", 40), ("Descripción", 75), ("Monto", 40)]
+
+def statement_filename(statement):
+    """Nombre del PDF dentro del ZIP: id del acudiente y su nombre sin espacios ni signos."""
+    name = re.sub(r"[^0-9A-Za-z]+", "_", statement.guardian.nombre or "").strip("_")[:40]
+    return f"familia_{statement.guardian.id:05d}_{name or 'sin_nombre'}.pdf"
+
+def render_family_statement_pdf(school_name, logo_path, statement, start_date, end_date):
+    """Genera el PDF del estado de cuenta de una familia y retorna su contenido como bytes."""
+    pdf = ReportPDF()
+    pdf.add_page()
+    if logo_path and os.path.exists(logo_path):
+        try:
+            pdf.image(logo_path, x=10, y=8, w=30)
+        except Exception as e:
+            print("Error al cargar el logo en el PDF:", e)
+
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, school_name, ln=True, align="C")
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 8, "Estado de Cuenta Familiar", ln=True, align="C")
+    pdf.cell(0, 8, f"Período: {start_date} a {end_date}", ln=True, align="C")
+    pdf.ln(5)
+
+    guardian = statement.guardian
+    pdf.cell(0, 8, f"Acudiente: {(guardian.nombre or '').title()}", ln=True)
+    pdf.cell(0, 8, f"Teléfono: {guardian.telefono or ''}", ln=True)
+
+    for child in statement.children:
+        pdf.ln(4)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 8, f"{(child.nombre or '').title()} {(child.apellido or '').title()} - "
+                       f"{child.course_name or ''} ({child.identificacion})", ln=True)
+        pdf.set_font("Arial", "B", 10)
+        for header, width in PAYMENT_COLUMNS:
+            pdf.cell(width, 7, header, border=1, align="C")
+        pdf.ln()
+        pdf.set_font("Arial", "", 10)
+        if child.payments:
+            for receipt_code, payment_date, amount_cents, description in child.payments:
+                pdf.cell(35, 7, receipt_code or "", border=1)
+                pdf.cell(40, 7, payment_date or "", border=1)
+                pdf.cell(75, 7, (description or "")[:40], border=1)
+                pdf.cell(40, 7, format_cents(amount_cents), border=1, align="R", ln=True)
+        else:
+            pdf.cell(190, 7, "Sin pagos en el período.", border=1, ln=True)
+        pdf.cell(150, 7, f"Saldo a {end_date} (causado {format_cents(child.owed)}, pagado {format_cents(child.paid)})",
+                 align="R")
+        pdf.cell(40, 7, format_cents(child.balance), align="R", ln=True)
+
+    pdf.ln(4)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(150, 8, "Pagos de la familia en el período", align="R")
+    pdf.cell(40, 8, format_cents(statement.period_total), align="R", ln=True)
+    pdf.cell(150, 8, "Saldo total de la familia", align="R")
+    pdf.cell(40, 8, format_cents(statement.balance), align="R", ln=True)
+    pdf.set_font("Arial", "", 9)
+    pdf.cell(0, 8, f"Generado el {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True, align="R")
+    return pdf.to_bytes()
+
+@timed_job("Estados de cuenta por familia")
+def export_family_statements(db, start_date, end_date, destination, school_name=SCHOOL_NAME, logo_path=LOGO_PATH,
+                             guardian_id=None):
+    """
+    Escribe en el ZIP 'destination' un estado de cuenta PDF por familia (o solo el del
+    acudiente 'guardian_id'). Retorna un resumen con familias, estudiantes, pagos y segundos.
+    """
+    start = time.perf_counter()
+    statements = GuardianController(db).get_family_statements(start_date, end_date, guardian_id)
+    query_seconds = time.perf_counter() - start
+    # Los PDF ya vienen comprimidos, por lo que se guardan sin volver a comprimir.
+    with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_STORED) as zf:
+        for statement in statements:
+            zf.writestr(statement_filename(statement),
+                        render_family_statement_pdf(school_name, logo_path, statement, start_date, end_date))
+    return {
+        "path": destination,
+        "families": len(statements),
+        "students": sum(len(statement.children) for statement in statements),
+        "payments": sum(len(child.payments) for statement in statements for child in statement.children),
+        "query_seconds": query_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Estados de cuenta por familia")
+    parser.add_argument("--start", required=True, help="Fecha inicial AAAA-MM-DD")
+    parser.add_argument("--end", required=True, help="Fecha final AAAA-MM-DD (inclusive)")
+    parser.add_argument("--out", required=True, help="Archivo ZIP de salida")
+    parser.add_argument("--db", default=DB_NAME, help="Archivo de base de datos")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        # La base puede ser de una versión anterior (sin acudientes ni montos en centavos)
+        db.create_tables()
+        db.write(run_migrations)
+        configs = ConfigController(db).get_all_configs()
+        summary = export_family_statements(db, args.start, args.end, args.out,
+                                           configs.get("SCHOOL_NAME") or SCHOOL_NAME, configs.get("LOGO_PATH") or LOGO_PATH)
+    finally:
+        db.close()
+    print(f"{summary['families']} familias, {summary['students']} estudiantes, {summary['payments']} pagos "
+          f"(consulta {summary['query_seconds']:.2f} s, total {summary['seconds']:.2f} s) -> {summary['path']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Libro de pagos para contabilidad: los pagos de un rango de fechas unidos a los datos del
+estudiante, exportados en CSV o en un formato columnar compacto.
+
+El formato columnar (extensión .ledger) es un ZIP con un archivo por columna más un
+manifiesto schema.json. Cada columna se escribe desde un array de tipo fijo:
+  - enteros (id, recibo, estudiante): int64 little-endian, -1 para valores nulos
+  - fechas: int64 con segundos desde 1970-01-01 (hora local, sin zona), -1 si es nula
+  - montos: int64 en centavos
+  - textos: codificación por diccionario (valores únicos en JSON + códigos uint32)
+Las columnas se comprimen con deflate, así los textos repetidos (curso, concepto)
+ocupan muy poco. read_ledger_columnar() lo vuelve a cargar.
+
+Uso por consola (imprime filas, bytes y segundos):
+    python -m src.utils.ledger_export --start 2025-01-01 --end 2025-12-31 --out libro.ledger
+"""
+import os
+import csv
+import sys
+import json
+import time
+import array
+import zipfile
+import argparse
+import calendar
+from datetime import datetime, timedelta
+from config import DB_NAME
+from src.models.database import Database
+from src.models.migrations import run_migrations
+from src.models.runtime_stats import timed_job
+from src.utils.money import cents_to_text
+from src.controllers.student_controller import StudentController
+from src.controllers.payment_controller import PaymentController
+
+# Filas que se leen del cursor en cada bloque
+LEDGER_CHUNK_SIZE = 5000
+LEDGER_FORMAT_VERSION = 1
+
+SELECT_LEDGER = """
+    SELECT p.id, p.receipt_number, p.payment_date, p.student_id, s.identificacion,
+           s.nombre, s.apellido, COALESCE(c.name, s.course_name), p.amount_cents, p.description
+    FROM payments p
+    LEFT JOIN students s ON s.id = p.student_id
+    LEFT JOIN courses c ON c.id = s.course_id
+    WHERE p.payment_date >= ? AND p.payment_date < ?
+    ORDER BY p.payment_date, p.id
+"""
+# (nombre, codificación) en el orden de SELECT_LEDGER
+LEDGER_COLUMNS = [
+    ("id", "int64"),
+    ("receipt_number", "int64"),
+    ("payment_date", "timestamp"),
+    ("student_id", "int64"),
+    ("identificacion", "dictionary"),
+    ("nombre", "dictionary"),
+    ("apellido", "dictionary"),
+    ("grado", "dictionary"),
+    ("amount", "cents"),
+    ("description", "dictionary"),
+]
+AMOUNT_POSITION = [name for name, _ in LEDGER_COLUMNS].index("amount")
+NULL_INT = -1
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+EPOCH = datetime(1970, 1, 1)
+
+def date_range_bounds(start_date, end_date):
+    """Convierte un rango AAAA-MM-DD inclusivo en los límites [inicio, día siguiente al fin)."""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+def iter_ledger_chunks(db, start_date, end_date, chunk_size=LEDGER_CHUNK_SIZE):
+    """Genera bloques de filas del libro (tuplas en el orden de LEDGER_COLUMNS)."""
+    cursor = db.connection.cursor()
+    cursor.row_factory = None
+    cursor.execute(SELECT_LEDGER, date_range_bounds(start_date, end_date))
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+def export_ledger_csv(db, start_date, end_date, path):
+    start = time.perf_counter()
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in LEDGER_COLUMNS])
+        for rows in iter_ledger_chunks(db, start_date, end_date):
+            # El monto se escribe en pesos, convertido desde los centavos sin pasar por float
+            writer.writerows(row[:AMOUNT_POSITION] + (cents_to_text(row[AMOUNT_POSITION]),) + row[AMOUNT_POSITION + 1:]
+                             for row in rows)
+            count += len(rows)
+    return _summary(path, count, start)
+
+def _to_timestamp(value):
+    if value is None:
+        return NULL_INT
+    if len(value) == 19:
+        # Camino rápido para AAAA-MM-DD HH:MM:SS (el formato con que se registran los pagos)
+        try:
+            return calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                    int(value[11:13]), int(value[14:16]), int(value[17:19])))
+        except ValueError:
+            pass
+    for date_format in DATE_FORMATS:
+        try:
+            return calendar.timegm(datetime.strptime(value, date_format).timetuple())
+        except ValueError:
+            continue
+    return NULL_INT
+
+def _to_int(value):
+    return NULL_INT if value is None else int(value)
+
+class _DictionaryColumn:
+    def __init__(self):
+        self.values = []
+        self.index = {}
+        self.codes = array.array("I")
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+def _array_bytes(values):
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def export_ledger_columnar(db, start_date, end_date, path):
+    start = time.perf_counter()
+    converters = {"int64": _to_int, "timestamp": _to_timestamp, "cents": _to_int}
+    columns = []
+    for _, encoding in LEDGER_COLUMNS:
+        columns.append(_DictionaryColumn() if encoding == "dictionary" else array.array("q"))
+    count = 0
+    for rows in iter_ledger_chunks(db, start_date, end_date):
+        for position, (_, encoding) in enumerate(LEDGER_COLUMNS):
+            column = columns[position]
+            if encoding == "dictionary":
+                for row in rows:
+                    column.append(row[position])
+            else:
+                convert = converters[encoding]
+                column.extend(convert(row[position]) for row in rows)
+        count += len(rows)
+
+    schema = {
+        "version": LEDGER_FORMAT_VERSION,
+        "rows": count,
+        "start_date": start_date,
+        "end_date": end_date,
+        "byteorder": "little",
+        "columns": [{"name": name, "encoding": encoding} for name, encoding in LEDGER_COLUMNS],
+    }
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("schema.json", json.dumps(schema, ensure_ascii=False, indent=2))
+        for (name, encoding), column in zip(LEDGER_COLUMNS, columns):
+            if encoding == "dictionary":
+                zf.writestr(f"{name}.dict.json", json.dumps(column.values, ensure_ascii=False))
+                zf.writestr(f"{name}.codes", _array_bytes(column.codes))
+            else:
+                zf.writestr(f"{name}.{encoding}", _array_bytes(column))
+    return _summary(path, count, start)
+
+def read_ledger_columnar(path):
+    """
+    Carga un archivo .ledger y retorna {columna: lista de valores} con los valores
+    originales (fechas como texto AAAA-MM-DD HH:MM:SS y montos en centavos enteros, como
+    en la base de datos; format_cents los muestra en pesos).
+    """
+    with zipfile.ZipFile(path) as zf:
+        schema = json.loads(zf.read("schema.json"))
+        result = {}
+        for column in schema["columns"]:
+            name, encoding = column["name"], column["encoding"]
+            if encoding == "dictionary":
+                values = json.loads(zf.read(f"{name}.dict.json"))
+                codes = array.array("I")
+                codes.frombytes(zf.read(f"{name}.codes"))
+                if sys.byteorder != "little":
+                    codes.byteswap()
+                result[name] = [values[code] for code in codes]
+                continue
+            data = array.array("q")
+            data.frombytes(zf.read(f"{name}.{encoding}"))
+            if sys.byteorder != "little":
+                data.byteswap()
+            if encoding == "timestamp":
+                result[name] = [None if v == NULL_INT else (EPOCH + timedelta(seconds=v)).strftime(DATE_FORMATS[0]) for v in data]
+            else:
+                result[name] = [None if v == NULL_INT else v for v in data]
+        return result
+
+def _summary(path, count, start):
+    return {"path": path, "rows": count, "bytes": os.path.getsize(path), "seconds": time.perf_counter() - start}
+
+@timed_job("Libro de pagos")
+def export_ledger(db, start_date, end_date, path):
+    """Exporta en CSV o en formato columnar según la extensión del archivo (.csv o .ledger)."""
+    if path.lower().endswith(".csv"):
+        return export_ledger_csv(db, start_date, end_date, path)
+    return export_ledger_columnar(db, start_date, end_date, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación del libro de pagos")
+    parser.add_argument("--start", required=True, help="Fecha inicial AAAA-MM-DD")
+    parser.add_argument("--end", required=True, help="Fecha final AAAA-MM-DD (inclusive)")
+    parser.add_argument("--out", required=True, help="Archivo de salida (.csv o .ledger)")
+    parser.add_argument("--db", default=DB_NAME, help="Archivo de base de datos")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    # La base puede ser de una versión anterior: se migra como al abrir la sede (course_id,
+    # montos en centavos, receipt_number) y los controladores crean los índices que falten
+    db.create_tables()
+    db.write(run_migrations)
+    StudentController(db)
+    PaymentController(db)
+    try:
+        summary = export_ledger(db, args.start, args.end, args.out)
+    finally:
+        db.close()
+    print(f"{summary['rows']} pagos, {summary['bytes']} bytes, {summary['seconds']:.2f} s -> {summary['path']}")
+
+if __name__ == "__main__":
+    main()
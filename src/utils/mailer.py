@@ -0,0 +1,317 @@
+"""
+Envío de la cola de correos (tabla deliveries) por SMTP.
+
+Todos los correos de una tanda salen por una sola conexión: la conexión TCP, EHLO, STARTTLS y
+la autenticación se hacen una vez y cada correo solo cuesta MAIL/RCPT/DATA. smtplib no
+implementa PIPELINING, así que los comandos de cada correo siguen yendo de a uno; lo que se
+ahorra es el saludo por correo, que con TLS es la mayor parte del tiempo. La cola se toma en
+lotes (DELIVERY_BATCH_SIZE) y el resultado de cada lote se guarda en una sola transacción.
+
+Errores:
+  - 5xx del servidor (destinatario o mensaje rechazado): el correo queda como fallido.
+  - 4xx, conexión caída o tiempo agotado: se reintenta con espera creciente hasta
+    DELIVERY_MAX_ATTEMPTS. Si no se puede conectar, el resto del lote vuelve a la cola sin
+    contar el intento y la tanda termina.
+
+Uso por consola (envía lo pendiente y termina; para cron o el programador de tareas):
+    python -m src.utils.mailer --db colegio.db
+"""
+import time
+import uuid
+import base64
+import smtplib
+import argparse
+import threading
+from email.header import Header
+from email.utils import make_msgid, formatdate, parseaddr, formataddr
+from datetime import datetime, timedelta
+from config import (DB_NAME, SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_STARTTLS, SMTP_TIMEOUT, SMTP_SENDER,
+                    DELIVERY_BATCH_SIZE, DELIVERY_MAX_ATTEMPTS, DELIVERY_RETRY_SECONDS, DELIVERY_STALE_MINUTES)
+from src.logger import logger
+from src.models.database import Database
+from src.models.runtime_stats import timed_job
+from src.models.delivery import (ensure_deliveries_table, CLAIM_BATCH, RELEASE_STALE, MARK_SENT, MARK_RETRY,
+                                 MARK_FAILED)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Largo máximo del error que se guarda en la cola
+MAX_ERROR_LENGTH = 500
+# Rechazos de un correo puntual: sendmail ya envió RSET y la conexión sigue sirviendo para el siguiente.
+# UnicodeEncodeError es una dirección con caracteres fuera de ASCII: build_message falla antes de enviar nada
+KEPT_CONNECTION_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                          UnicodeEncodeError)
+
+class SmtpConnection:
+    """
+    Conexión SMTP que se abre al enviar el primer correo y se reutiliza para los siguientes.
+    Con reuse=False se abre una conexión por correo (solo para comparar en delivery_bench).
+    """
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, username=SMTP_USER, password=SMTP_PASSWORD,
+                 starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT, sender=SMTP_SENDER, reuse=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.sender = sender
+        self.envelope_sender = parseaddr(sender)[1]
+        self.reuse = reuse
+        self.smtp = None
+        # Conexiones abiertas durante la vida del objeto
+        self.connections = 0
+        # Error del último intento de conexión (None si se pudo conectar)
+        self.connect_error = None
+
+    def connect(self):
+        self.connect_error = None
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                smtp.ehlo()
+                if self.starttls:
+                    smtp.starttls()
+                    smtp.ehlo()
+                if self.username:
+                    smtp.login(self.username, self.password or "")
+            except Exception:
+                smtp.close()
+                raise
+        except Exception as e:
+            self.connect_error = e
+            raise
+        self.smtp = smtp
+        self.connections += 1
+
+    def send(self, recipient, message):
+        """
+        Envía el mensaje (bytes de build_message). Si la conexión reutilizada se cerró (el
+        servidor corta las conexiones inactivas), se reconecta una vez.
+        """
+        if self.smtp is None:
+            self.connect()
+        else:
+            try:
+                self.smtp.sendmail(self.envelope_sender, [recipient], message)
+                return self._after_send()
+            except smtplib.SMTPServerDisconnected:
+                self.smtp = None
+                self.connect()
+        self.smtp.sendmail(self.envelope_sender, [recipient], message)
+        return self._after_send()
+
+    def _after_send(self):
+        if not self.reuse:
+            self.close()
+
+    def discard(self):
+        """Descarta la conexión después de un error, sin esperar el QUIT."""
+        if self.smtp is not None:
+            self.smtp.close()
+            self.smtp = None
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+def _header(value):
+    """Encabezado en ASCII; los que tienen tildes se codifican según RFC 2047."""
+    if value.isascii():
+        return value
+    return Header(value, "utf-8").encode(linesep="\r\n")
+
+def build_message(sender, recipient, subject, body, attachment_name, attachment):
+    """
+    Arma el correo MIME (texto y PDF adjunto) directamente en bytes, listo para sendmail.
+    Todos los correos tienen la misma forma, así que se evita EmailMessage, cuyo análisis de
+    encabezados y serialización costaban más que el envío mismo.
+    """
+    name, address = parseaddr(sender)
+    boundary = f"=_{uuid.uuid4().hex}"
+    lines = [
+        f"From: {formataddr((name, address), charset='utf-8')}",
+        f"To: {recipient}",
+        f"Subject: {_header(subject)}",
+        f"Date: {formatdate(localtime=True)}",
+        f"Message-ID: {make_msgid()}",
+        "MIME-Version: 1.0",
+        f'Content-Type: multipart/mixed; boundary="{boundary}"',
+        "",
+        f"--{boundary}",
+        'Content-Type: text/plain; charset="utf-8"',
+        "Content-Transfer-Encoding: base64",
+        "",
+        base64.encodebytes((body or "").encode("utf-8")).decode("ascii").replace("\n", "\r\n"),
+    ]
+    if attachment is not None:
+        filename = attachment_name or "documento.pdf"
+        lines += [
+            f"--{boundary}",
+            f'Content-Type: application/pdf; name="{filename}"',
+            "Content-Transfer-Encoding: base64",
+            f'Content-Disposition: attachment; filename="{filename}"',
+            "",
+            base64.encodebytes(bytes(attachment)).decode("ascii").replace("\n", "\r\n"),
+        ]
+    lines += [f"--{boundary}--", ""]
+    return "\r\n".join(lines).encode("ascii")
+
+def is_permanent(error):
+    """Rechazos 5xx y direcciones que no se pueden escribir en ASCII: reintentar no cambia el resultado."""
+    if isinstance(error, UnicodeEncodeError):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+def retry_at(now, attempts, retry_seconds=DELIVERY_RETRY_SECONDS):
+    """Hora del próximo intento: la espera se duplica con cada intento fallido."""
+    return (now + timedelta(seconds=retry_seconds * 2 ** max(attempts - 1, 0))).strftime(DATE_FORMAT)
+
+def _send_batch(connection, batch, max_attempts):
+    """
+    Envía un lote ya tomado de la cola. Retorna las filas para MARK_SENT, MARK_RETRY y
+    MARK_FAILED, y si la tanda debe terminar porque no se pudo conectar al servidor.
+    """
+    sent, retry, failed = [], [], []
+    for index, (delivery_id, recipient, subject, body, attachment_name, attachment, attempts) in enumerate(batch):
+        now = datetime.now()
+        try:
+            connection.send(recipient, build_message(connection.sender, recipient, subject, body, attachment_name,
+                                                     attachment))
+            sent.append((now.strftime(DATE_FORMAT), delivery_id))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:MAX_ERROR_LENGTH]
+            if not isinstance(e, KEPT_CONNECTION_ERRORS):
+                connection.discard()
+            if connection.connect_error is not None:
+                # Sin servidor: este correo y el resto del lote vuelven a la cola sin contar el intento
+                later = retry_at(now, 1)
+                retry.extend((0, later, error, rest[0]) for rest in batch[index:])
+                return (sent, retry, failed), True
+            if is_permanent(e) or attempts + 1 >= max_attempts:
+                failed.append((error, delivery_id))
+            else:
+                retry.append((1, retry_at(now, attempts + 1), error, delivery_id))
+    return (sent, retry, failed), False
+
+@timed_job("Envío de correos")
+def deliver_pending(db, connection=None, batch_size=DELIVERY_BATCH_SIZE, max_attempts=DELIVERY_MAX_ATTEMPTS,
+                    limit=None):
+    """
+    Envía los correos pendientes cuyo próximo intento ya llegó, por una sola conexión SMTP.
+    Retorna un resumen: enviados, reintentos, fallidos, conexiones y segundos.
+    """
+    start = time.perf_counter()
+    ensure_deliveries_table(db.connection.cursor())
+    db.connection.commit()
+    connection = connection or SmtpConnection()
+    stale = (datetime.now() - timedelta(minutes=DELIVERY_STALE_MINUTES)).strftime(DATE_FORMAT)
+    db.write(lambda cursor: cursor.execute(RELEASE_STALE, (stale,)))
+    summary = {"sent": 0, "retry": 0, "failed": 0}
+    remaining = limit
+    try:
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            now = datetime.now().strftime(DATE_FORMAT)
+            batch = db.write(lambda cursor: cursor.execute(CLAIM_BATCH, {"now": now, "limit": size}).fetchall(),
+                             idempotent=False)
+            if not batch:
+                break
+            (sent, retry, failed), unreachable = _send_batch(connection, batch, max_attempts)
+
+            def save(cursor):
+                cursor.executemany(MARK_SENT, sent)
+                cursor.executemany(MARK_RETRY, retry)
+                cursor.executemany(MARK_FAILED, failed)
+            db.write(save)
+            summary["sent"] += len(sent)
+            summary["retry"] += len(retry)
+            summary["failed"] += len(failed)
+            if remaining is not None:
+                remaining -= len(batch)
+            if unreachable:
+                logger.warning(f"Envío de correos interrumpido: {retry[-1][2]}")
+                break
+    finally:
+        connection.close()
+    summary["connections"] = connection.connections
+    summary["seconds"] = time.perf_counter() - start
+    if summary["sent"] or summary["failed"]:
+        logger.info(f"Correos: {summary['sent']} enviados, {summary['retry']} por reintentar, "
+                    f"{summary['failed']} fallidos en {summary['seconds']:.1f} s")
+    return summary
+
+class DeliveryWorker:
+    """
+    Hilo que vacía la cola de correos de una base con su propia conexión. start() no hace nada
+    si ya está enviando; los correos que se encolen mientras tanto salen en la misma tanda.
+    """
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._lock = threading.Lock()
+        self._thread = None
+        self._again = False
+        self.last_summary = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._again = True
+                return
+            self._again = False
+            self._thread = threading.Thread(target=self._run, name="correos", daemon=True)
+            self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        db = Database(self.db_name)
+        try:
+            while True:
+                self.last_summary = deliver_pending(db)
+                with self._lock:
+                    if not self._again:
+                        # Termina dentro del lock: un start() posterior crea otro hilo
+                        self._thread = None
+                        return
+                    self._again = False
+        except Exception:
+            logger.exception("Error al enviar la cola de correos")
+            with self._lock:
+                self._thread = None
+        finally:
+            db.close()
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+def get_delivery_worker(db_name):
+    """Hilo de envío compartido por todas las ventanas del proceso que usan la misma base."""
+    with _workers_lock:
+        worker = _workers.get(db_name)
+        if worker is None:
+            worker = _workers[db_name] = DeliveryWorker(db_name)
+        return worker
+
+def main():
+    parser = argparse.ArgumentParser(description="Envío de la cola de correos")
+    parser.add_argument("--db", default=DB_NAME, help="Archivo de base de datos")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de correos a enviar")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        summary = deliver_pending(db, limit=args.limit)
+    finally:
+        db.close()
+    print(f"{summary['sent']} enviados, {summary['retry']} por reintentar, {summary['failed']} fallidos "
+          f"({summary['connections']} conexiones, {summary['seconds']:.2f} s)")
+
+if __name__ == "__main__":
+    main()
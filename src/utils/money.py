@@ -0,0 +1,80 @@
+"""
+Montos de dinero como enteros en centavos. La base de datos guarda centavos (columnas
+*_cents), de modo que SUM se hace con enteros exactos; aquí están la conversión desde lo que
+escribe el usuario, el formato es-CO ("1.234.567,89") que usan todas las vistas y PDF, y la
+migración de las columnas REAL antiguas.
+"""
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Partes que se arman una sola vez: el agrupador de miles y los 100 sufijos de centavos
+_group_thousands = "{:,}".format
+_CENTS_SUFFIXES = tuple(f",{cents:02d}" for cents in range(100))
+_NUMBER = re.compile(r"-?\d+(\.\d+)?")
+_CENT = Decimal("0.01")
+
+# Expresión SQL que convierte una columna REAL de pesos a centavos
+CENTS_FROM_REAL = "CAST(ROUND({column} * 100) AS INTEGER)"
+
+def format_cents(cents):
+    """
+    Formatea centavos con miles separados por punto y decimales con coma.
+    Por ejemplo, 123456789 se convierte en "1.234.567,89". Solo usa aritmética entera.
+    """
+    if cents is None:
+        return ""
+    units, fraction = divmod(cents if cents >= 0 else -cents, 100)
+    text = _group_thousands(units).replace(",", ".") + _CENTS_SUFFIXES[fraction]
+    return text if cents >= 0 else "-" + text
+
+def cents_to_text(cents):
+    """Centavos como texto decimal con punto, sin separador de miles ("1234567.89"), para CSV."""
+    if cents is None:
+        return ""
+    units, fraction = divmod(cents if cents >= 0 else -cents, 100)
+    return f"{'' if cents >= 0 else '-'}{units}.{fraction:02d}"
+
+def to_cents(value):
+    """Convierte pesos (int, float, Decimal o texto numérico) a centavos, redondeando al centavo."""
+    if isinstance(value, int):
+        return value * 100
+    try:
+        # str() de un float da su representación más corta ("0.1"), no el valor binario aproximado
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Monto no válido: {value}")
+    if not amount.is_finite():
+        raise ValueError(f"Monto no válido: {value}")
+    return int((amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100).to_integral_value())
+
+def parse_amount(text):
+    """
+    Convierte a centavos un monto escrito por el usuario. Acepta el formato es-CO
+    ("1.234.567,89", "$ 150.000") y el punto decimal ("150000.50"). Un solo punto seguido de
+    exactamente tres dígitos se toma como separador de miles ("150.000" son ciento cincuenta mil).
+    Lanza ValueError si el texto no es un monto.
+    """
+    normalized = text.replace("$", "").replace(" ", "").strip()
+    if "," in normalized:
+        normalized = normalized.replace(".", "").replace(",", ".")
+    elif normalized.count(".") > 1 or (normalized.count(".") == 1 and len(normalized.rsplit(".", 1)[1]) == 3):
+        normalized = normalized.replace(".", "")
+    if not _NUMBER.fullmatch(normalized):
+        raise ValueError(f"Monto no válido: {text}")
+    return to_cents(normalized)
+
+def migrate_to_cents(cursor, table, columns, schema="main"):
+    """
+    Reemplaza columnas REAL de pesos por columnas INTEGER de centavos: 'columns' es un
+    diccionario {columna_antigua: columna_en_centavos}. Se puede repetir sin efecto: solo
+    actúa mientras exista la columna antigua.
+    """
+    existing = [row[1] for row in cursor.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+    for old, new in columns.items():
+        if old not in existing:
+            continue
+        if new not in existing:
+            cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0")
+        cursor.execute(f"UPDATE {schema}.{table} SET {new} = {CENTS_FROM_REAL.format(column=old)} "
+                       f"WHERE {old} IS NOT NULL")
+        cursor.execute(f"ALTER TABLE {schema}.{table} DROP COLUMN {old}")
@@ -0,0 +1,70 @@
+"""
+Mide el manejo de montos en centavos: formatea N montos con format_cents frente al formato
+anterior sobre float, y suma los mismos pagos guardados como REAL en pesos y como INTEGER en
+centavos, mostrando el tiempo de SUM y la diferencia acumulada por el redondeo binario.
+
+Uso:
+    python -m src.utils.money_bench --amounts 100000
+"""
+import time
+import random
+import sqlite3
+import argparse
+from src.utils.money import format_cents, cents_to_text
+
+def format_amount_float(amount):
+    """Formato anterior: pasa por float y cambia los separadores con tres replace."""
+    formatted = "{:,.2f}".format(float(amount))
+    return formatted.replace(",", "X").replace(".", ",").replace("X", ".")
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+def prepare_database(cents):
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE pesos (amount REAL NOT NULL)")
+    connection.execute("CREATE TABLE centavos (amount_cents INTEGER NOT NULL)")
+    connection.executemany("INSERT INTO pesos VALUES (?)", ((value / 100,) for value in cents))
+    connection.executemany("INSERT INTO centavos VALUES (?)", ((value,) for value in cents))
+    return connection
+
+def run_benchmark(amounts=100000, seed=1):
+    rng = random.Random(seed)
+    # Montos con centavos, como abonos parciales: de 1.000,01 a 5.000.000,99
+    cents = [rng.randint(100001, 500000099) for _ in range(amounts)]
+    pesos = [value / 100 for value in cents]
+    float_seconds, float_texts = timed(lambda: [format_amount_float(value) for value in pesos], 3)
+    cents_seconds, cents_texts = timed(lambda: [format_cents(value) for value in cents], 3)
+    mismatches = sum(a != b for a, b in zip(float_texts, cents_texts))
+
+    connection = prepare_database(cents)
+    real_seconds, real_sum = timed(lambda: connection.execute("SELECT SUM(amount) FROM pesos").fetchone()[0], 10)
+    int_seconds, int_sum = timed(
+        lambda: connection.execute("SELECT SUM(amount_cents) FROM centavos").fetchone()[0], 10)
+    connection.close()
+    return {
+        "format": (float_seconds, cents_seconds, mismatches),
+        "sum": (real_seconds, real_sum, int_seconds, int_sum, sum(cents)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Formato y suma de montos en centavos")
+    parser.add_argument("--amounts", type=int, default=100000, help="Cantidad de montos")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.amounts)
+    float_seconds, cents_seconds, mismatches = results["format"]
+    print(f"Formato desde float:     {float_seconds:9.3f} s")
+    print(f"Formato desde centavos:  {cents_seconds:9.3f} s ({float_seconds / cents_seconds:.1f}x, "
+          f"{mismatches} textos distintos)")
+    real_seconds, real_sum, int_seconds, int_sum, exact = results["sum"]
+    print(f"SUM sobre REAL (pesos):  {real_seconds * 1000:9.2f} ms -> {real_sum!r} "
+          f"(diferencia {real_sum - exact / 100:+.10f})")
+    print(f"SUM sobre INTEGER:       {int_seconds * 1000:9.2f} ms -> {cents_to_text(int_sum)} "
+          f"({'exacto' if int_sum == exact else 'INEXACTO'})")
+
+if __name__ == "__main__":
+    main()
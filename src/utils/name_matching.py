@@ -0,0 +1,126 @@
+"""
+Normalización y claves de bloqueo para detectar estudiantes duplicados.
+Comparar cada estudiante nuevo con todos los existentes no escala; en su lugar cada
+estudiante se indexa con unas pocas claves de bloqueo y solo se comparan los que comparten
+al menos una clave:
+- una clave fonética del primer apellido con la inicial del nombre (atrapa "Vásquez" /
+  "Basquez", "Yepes" / "Llepes");
+- las variantes de la identificación con un carácter borrado (atrapa un dígito de más, de
+  menos, cambiado o dos dígitos vecinos intercambiados).
+También normaliza los teléfonos con que se agrupan los estudiantes por acudiente.
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Identificaciones más cortas generan demasiadas coincidencias por borrado
+MIN_ID_LENGTH_FOR_DELETES = 5
+
+# Teléfonos: celulares de 10 dígitos con el indicativo de Colombia opcional; los números más
+# cortos que un fijo de 7 dígitos se ignoran al agrupar familias
+COUNTRY_CODE = "57"
+PHONE_DIGITS = 10
+MIN_PHONE_DIGITS = 7
+
+# Reglas fonéticas del español, aplicadas en orden sobre el texto normalizado
+PHONETIC_RULES = [
+    (re.compile(r"ch"), "x"),
+    (re.compile(r"qu"), "k"),
+    (re.compile(r"ll"), "y"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"v"), "b"),
+    (re.compile(r"w"), "u"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"y$"), "i"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+def normalize_name(text):
+    """Minúsculas, sin tildes ni signos y con un solo espacio entre palabras: "  José  María" → "jose maria"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[^a-z0-9ñ ]", " ", text).split())
+
+def normalize_identificacion(identificacion):
+    """Solo letras y dígitos en mayúscula: "1.023-456" → "1023456"."""
+    return re.sub(r"[^0-9A-Z]", "", (identificacion or "").upper())
+
+def normalize_phone(telefono):
+    """
+    Solo los dígitos del teléfono, sin el indicativo del país: "+57 300 123-4567" → "3001234567".
+    Retorna "" si quedan menos de MIN_PHONE_DIGITS dígitos (no sirve para agrupar familias).
+    """
+    digits = re.sub(r"\D", "", telefono or "")
+    if len(digits) > PHONE_DIGITS and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits if len(digits) >= MIN_PHONE_DIGITS else ""
+
+def phonetic_key(word):
+    """Clave fonética aproximada de una palabra ya normalizada."""
+    key = word.replace("ñ", "n")
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+def blocking_keys(identificacion, nombre, apellido):
+    """Claves de bloqueo de un estudiante (ver el docstring del módulo)."""
+    keys = set()
+    surnames = normalize_name(apellido).split()
+    names = normalize_name(nombre).split()
+    if surnames and names:
+        keys.add(f"n:{phonetic_key(surnames[0])}:{names[0][0]}")
+    ident = normalize_identificacion(identificacion)
+    if ident:
+        keys.add(f"i:{ident}")
+        if len(ident) >= MIN_ID_LENGTH_FOR_DELETES:
+            keys.update(f"i:{ident[:i]}{ident[i + 1:]}" for i in range(len(ident)))
+    return keys
+
+def identificacion_distance(a, b):
+    """
+    Distancia de edición entre dos identificaciones normalizadas, con trasposición de vecinos
+    (Damerau-Levenshtein restringida). Solo interesa si es 0, 1 o 2.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > 2:
+        return 3
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+def name_similarity(a, b):
+    """Similitud entre 0 y 1 de dos nombres completos normalizados, sin importar el orden de las palabras."""
+    a_words, b_words = " ".join(sorted(a.split())), " ".join(sorted(b.split()))
+    return max(SequenceMatcher(None, a, b).ratio(), SequenceMatcher(None, a_words, b_words).ratio())
+
+def match_score(candidate, other):
+    """
+    Puntaje de 0 a 1 de que dos estudiantes sean la misma persona, y las razones.
+    'candidate' y 'other' son tuplas (identificacion, nombre, apellido).
+    """
+    id_a, id_b = normalize_identificacion(candidate[0]), normalize_identificacion(other[0])
+    name_a = normalize_name(f"{candidate[1]} {candidate[2]}")
+    name_b = normalize_name(f"{other[1]} {other[2]}")
+    similarity = name_similarity(name_a, name_b)
+    distance = identificacion_distance(id_a, id_b) if id_a and id_b else 3
+    reasons = []
+    if distance == 0:
+        reasons.append("misma identificación")
+    elif distance == 1:
+        reasons.append("identificación casi igual")
+    if similarity >= 0.85:
+        reasons.append("nombre muy parecido" if similarity < 1 else "mismo nombre")
+    id_score = {0: 1.0, 1: 0.8, 2: 0.4}.get(distance, 0.0)
+    return round(0.5 * id_score + 0.5 * similarity, 3), reasons
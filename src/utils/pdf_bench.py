@@ -0,0 +1,75 @@
+"""
+Mide la generación de recibos en lote: N recibos con la fuente Unicode incrustada
+(ReportPDF, con métricas y subconjuntos en caché) frente a FPDF cargando la misma fuente
+TTF en cada documento, y frente a la fuente Arial integrada (sin Unicode).
+
+Uso:
+    python -m src.utils.pdf_bench --receipts 1000
+"""
+import time
+import random
+import argparse
+from fpdf import FPDF
+from src.utils.receipts import render_receipt_pdf
+from src.utils.report_pdf import find_font
+from src.utils.money import format_cents
+
+NAMES = ["José Núñez", "María Peña", "Ana Đặng", "Luis Ibáñez", "Sofía Müller", "Zoë Łukasz", "Camila Ortiz"]
+
+def receipts(count):
+    for i in range(count):
+        yield (i + 1, f"2025-{random.randint(2, 11):02d}-10 10:00:00", random.choice(NAMES),
+               random.randint(1, 50) * 1000000, "Pensión")
+
+def render_uncached(receipt_number, payment_date, student_name, amount, description):
+    """Recibo con la fuente TTF agregada por documento, como lo hace FPDF por defecto."""
+    pdf = FPDF()
+    pdf.add_font("unicode", "", find_font(""), uni=True)
+    pdf.add_font("unicode", "B", find_font("B"), uni=True)
+    pdf.add_page()
+    pdf.set_font("unicode", "B", 16)
+    pdf.cell(0, 10, "Colegio Ejemplo", ln=True, align="C")
+    pdf.set_font("unicode", "", 12)
+    for line in (f"Recibo Nº: {receipt_number}", f"Fecha y Hora: {payment_date}", f"Alumno: {student_name}",
+                 f"Monto: {format_cents(amount)}", f"Descripción: {description}"):
+        pdf.cell(0, 10, line, ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+def render_core(receipt_number, payment_date, student_name, amount, description):
+    """Recibo con la fuente integrada: rápido, pero sin caracteres fuera de latin-1."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "Colegio Ejemplo", ln=True, align="C")
+    pdf.set_font("Arial", "", 12)
+    for line in (f"Recibo Nº: {receipt_number}", f"Fecha y Hora: {payment_date}",
+                 f"Alumno: {student_name.encode('latin-1', 'replace').decode('latin-1')}",
+                 f"Monto: {format_cents(amount)}", f"Descripción: {description}"):
+        pdf.cell(0, 10, line, ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+def render_report(receipt_number, payment_date, student_name, amount, description):
+    return render_receipt_pdf("Colegio Ejemplo", None, receipt_number, payment_date, student_name, amount, description)
+
+def measure(label, render, batch):
+    start = time.perf_counter()
+    total = sum(len(render(*receipt)) for receipt in batch)
+    seconds = time.perf_counter() - start
+    print(f"{label}: {len(batch)} recibos en {seconds:.2f} s "
+          f"({seconds / len(batch) * 1000:.1f} ms c/u, {total / len(batch) / 1024:.1f} KB c/u)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generación de recibos PDF en lote")
+    parser.add_argument("--receipts", type=int, default=1000)
+    parser.add_argument("--uncached", type=int, default=100, help="Recibos para la medición sin caché (es lenta)")
+    args = parser.parse_args()
+    if not find_font(""):
+        print("No se encontró ninguna fuente de PDF_FONTS; solo se mide la fuente integrada.")
+    batch = list(receipts(args.receipts))
+    measure("Arial integrada (latin-1)", render_core, batch)
+    if find_font(""):
+        measure("TTF por documento", render_uncached, batch[:args.uncached])
+        measure("ReportPDF (TTF en caché)", render_report, batch)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Mide la promoción de fin de año del colegio completo: crea una base temporal con N
+estudiantes del año 2025 repartidos en 11 grados, abre el año 2026, promueve cada grado al
+siguiente (el último egresa) y luego deshace la promoción.
+
+Uso:
+    python -m src.utils.promotion_bench --students 10000
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.models.database import Database
+from src.controllers.course_controller import CourseController
+from src.controllers.student_controller import StudentController
+from src.controllers.archive_controller import ArchiveController
+from src.controllers.promotion_controller import PromotionController
+
+GRADES = 11
+
+def prepare_database(db_path, students):
+    db = Database(db_path)
+    db.create_tables()
+    course_controller = CourseController(db)
+    StudentController(db)
+    promotion_controller = PromotionController(db)
+    for grade in range(1, GRADES + 1):
+        course_controller.add_course(f"Grado {grade}")
+    # Los promovidos pasan al año siguiente, que debe estar abierto
+    ArchiveController(db).open_year(2026, "2026-02-01", "2026-11-30")
+    db.write(lambda cursor: cursor.executemany(
+        "INSERT INTO students (identificacion, nombre, apellido, course_id, active, academic_year) "
+        "VALUES (?, ?, ?, ?, 1, 2025)",
+        ((f"BENCH-{i:06d}", "Alumno", f"Prueba {i}", i % GRADES + 1) for i in range(students))
+    ))
+    return db, promotion_controller
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Promoción de fin de año")
+    parser.add_argument("--students", type=int, default=10000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "promotion.db")
+    db, promotion_controller = prepare_database(db_path, args.students)
+    mapping = {grade: grade + 1 for grade in range(1, GRADES)}
+    graduating = [GRADES]
+    seconds, preview = timed(promotion_controller.preview, mapping, graduating)
+    print(f"Vista previa: {sum(row[2] for row in preview)} estudiantes en {seconds * 1000:.1f} ms")
+    seconds, (success, msg) = timed(promotion_controller.promote, mapping, graduating)
+    print(f"{msg} en {seconds * 1000:.1f} ms")
+    last = promotion_controller.get_last_promotion()
+    seconds, (success, msg) = timed(promotion_controller.undo_promotion, last.id)
+    print(f"{msg} en {seconds * 1000:.1f} ms")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import mmap
+import shutil
+import hashlib
+import zipfile
+import datetime
+import traceback
+from config import RECEIPTS_DIR
+from src.utils.report_pdf import ReportPDF
+from src.models.runtime_stats import timed_job
+from src.utils.money import format_cents
+
+# Versión de la plantilla del recibo. Si cambia el diseño del PDF se debe incrementar,
+# de modo que los recibos archivados con la plantilla anterior no se reutilicen.
+# Versión 2: fuente Unicode incrustada.
+RECEIPT_TEMPLATE_VERSION = 2
+
+def format_receipt_number(receipt_number, payment_date):
+    """
+    Formatea el número de recibo incorporando la fecha del pago, como los códigos de los
+    pagos anteriores a la numeración por día o por año (ver ReceiptSequence).
+    Por ejemplo, si payment_date es "2025-02-11 11:51:50" y receipt_number es 12,
+    el número formateado es "20250211-0012". La fecha se recorta del texto, sin convertirla.
+    """
+    date = payment_date or ""
+    if len(date) >= 10 and date[4] == "-" and date[7] == "-" and date[:4].isdigit():
+        try:
+            return f"{date[:4]}{date[5:7]}{date[8:10]}-{int(receipt_number):04d}"
+        except (TypeError, ValueError):
+            pass
+    return f"{receipt_number}"
+
+def receipt_code_of(payment):
+    """Código impreso en el recibo del pago; los pagos sin código guardado lo calculan."""
+    return payment.receipt_code or format_receipt_number(payment.receipt_number, payment.payment_date)
+
+def render_receipt_pdf(school_name, logo_path, receipt_code, payment_date, student_name, amount_cents, description):
+    """
+    Genera el PDF del recibo de pago y retorna su contenido como bytes.
+    'receipt_code' es el código ya formateado que se imprime ("20250211-0012") y
+    'amount_cents' el monto en centavos.
+    """
+    pdf = ReportPDF()
+    pdf.add_page()
+
+    # Insertar el logo si está disponible.
+    if logo_path and os.path.exists(logo_path):
+        try:
+            pdf.image(logo_path, x=10, y=8, w=30)
+        except Exception as e:
+            print("Error al cargar el logo en el PDF:", e)
+
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, school_name, ln=True, align="C")
+    pdf.ln(10)
+
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, "Recibo de Pago", ln=True, align="C")
+    pdf.ln(10)
+
+    pdf.cell(0, 10, f"Recibo Nº: {receipt_code}", ln=True)
+    pdf.cell(0, 10, f"Fecha y Hora: {payment_date}", ln=True)
+    pdf.cell(0, 10, f"Alumno: {student_name}", ln=True)
+    pdf.cell(0, 10, f"Monto: {format_cents(amount_cents)}", ln=True)
+    pdf.cell(0, 10, f"Descripción: {description}", ln=True)
+
+    return pdf.to_bytes()
+
+class ReceiptArchive:
+    """
+    Archivo de recibos PDF generados.
+    Cada recibo se escribe una sola vez en disco, en una ruta derivada del hash SHA-256 de su
+    contenido, y se indexa en la tabla 'receipt_archive' por (receipt_number, template_version).
+    Las reimpresiones se sirven directamente desde el archivo, sin volver a generar el PDF.
+    """
+    def __init__(self, db, root=RECEIPTS_DIR, template_version=RECEIPT_TEMPLATE_VERSION):
+        self.db = db
+        self.root = root
+        self.template_version = template_version
+        self.initialize_archive_table()
+
+    def _get_cursor(self):
+        if hasattr(self.db, "cursor") and callable(self.db.cursor):
+            return self.db.cursor()
+        elif hasattr(self.db, "connection") and hasattr(self.db.connection, "cursor") and callable(self.db.connection.cursor):
+            return self.db.connection.cursor()
+        raise AttributeError("El objeto de base de datos no proporciona un cursor válido.")
+
+    def _commit(self):
+        if hasattr(self.db, "commit") and callable(self.db.commit):
+            self.db.commit()
+        elif hasattr(self.db, "connection") and hasattr(self.db.connection, "commit") and callable(self.db.connection.commit):
+            self.db.connection.commit()
+
+    def initialize_archive_table(self):
+        try:
+            cursor = self._get_cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS receipt_archive (
+                    receipt_number INTEGER,
+                    template_version INTEGER,
+                    digest TEXT,
+                    payment_date TEXT,
+                    size INTEGER,
+                    created_at TEXT,
+                    PRIMARY KEY (receipt_number, template_version)
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_receipt_archive_date
+                ON receipt_archive (template_version, payment_date)
+            """)
+            self._commit()
+        except Exception:
+            print("Error al inicializar la tabla 'receipt_archive':")
+            print(traceback.format_exc())
+
+    def _path_for_digest(self, digest):
+        # Se reparte en subcarpetas por los dos primeros caracteres del hash.
+        return os.path.join(self.root, digest[:2], f"{digest}.pdf")
+
+    def get_path(self, receipt_number):
+        """
+        Retorna la ruta del recibo archivado para la plantilla actual, o None si no existe.
+        """
+        cursor = self._get_cursor()
+        cursor.execute(
+            "SELECT digest FROM receipt_archive WHERE receipt_number = ? AND template_version = ?",
+            (receipt_number, self.template_version)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        path = self._path_for_digest(row[0])
+        return path if os.path.exists(path) else None
+
+    def store(self, receipt_number, payment_date, pdf_bytes):
+        """
+        Guarda el recibo en el archivo (si no estaba ya) y retorna su ruta.
+        """
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        path = self._path_for_digest(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Escritura atómica: primero a un archivo temporal y luego se renombra.
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+        self.db.write(lambda cursor: cursor.execute("""
+            INSERT OR REPLACE INTO receipt_archive
+                (receipt_number, template_version, digest, payment_date, size, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (receipt_number, self.template_version, digest, payment_date, len(pdf_bytes),
+              datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))))
+        return path
+
+    def get_or_render(self, receipt_number, payment_date, render):
+        """
+        Retorna la ruta del recibo archivado. Si aún no existe, llama a render() para
+        generar los bytes del PDF y lo archiva.
+        """
+        path = self.get_path(receipt_number)
+        if path:
+            return path
+        return self.store(receipt_number, payment_date, render())
+
+    def read(self, receipt_number):
+        """
+        Lee el recibo archivado mediante mmap y retorna sus bytes, o None si no existe.
+        """
+        path = self.get_path(receipt_number)
+        if not path:
+            return None
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:]
+
+    def reprint_to(self, receipt_number, destination):
+        """
+        Copia el recibo archivado a 'destination' sin volver a generarlo.
+        Retorna True si el recibo existía en el archivo.
+        """
+        path = self.get_path(receipt_number)
+        if not path:
+            return False
+        shutil.copyfile(path, destination)
+        return True
+
+    @timed_job("Exportar recibos")
+    def export_range(self, start_date, end_date, destination):
+        """
+        Exporta en un único archivo ZIP todos los recibos archivados cuya fecha de pago
+        esté entre start_date y end_date (formato "YYYY-MM-DD", ambos inclusive).
+        Retorna la cantidad de recibos exportados.
+        """
+        cursor = self._get_cursor()
+        # Los pagos de años ya archivados no están en 'payments': su código se calcula
+        cursor.execute("""
+            SELECT a.receipt_number, a.digest, a.payment_date, p.receipt_code
+            FROM receipt_archive a LEFT JOIN payments p ON p.id = a.receipt_number
+            WHERE a.template_version = ? AND a.payment_date >= ? AND a.payment_date < date(?, '+1 day')
+            ORDER BY a.payment_date, a.receipt_number
+        """, (self.template_version, start_date, end_date))
+        count = 0
+        # Los PDF ya vienen comprimidos, por lo que se guardan sin volver a comprimir.
+        with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_STORED) as zf:
+            for receipt_number, digest, payment_date, receipt_code in cursor.fetchall():
+                path = self._path_for_digest(digest)
+                if not os.path.exists(path):
+                    continue
+                receipt_code = receipt_code or format_receipt_number(receipt_number, payment_date)
+                zf.write(path, arcname=f"recibo_{receipt_code}.pdf")
+                count += 1
+        return count
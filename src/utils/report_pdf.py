@@ -0,0 +1,371 @@
+"""
+PDF de reportes y recibos con una fuente TrueType Unicode incrustada.
+FPDF 1.7.2 vuelve a leer y analizar el archivo TTF en cada documento (métricas al agregar
+la fuente, subconjunto y anchos al escribirla), lo que toma decenas de milisegundos por PDF.
+Aquí las métricas se leen una sola vez por proceso y la fuente ya incrustada (subconjunto
+comprimido, CIDToGIDMap y anchos) se reutiliza entre los documentos que usan los mismos
+caracteres. Cada documento incrusta solo los caracteres que usa, como FPDF, de modo que el
+PDF no pesa más que el que genera FPDF por su cuenta.
+"""
+import os
+import time
+import threading
+import zlib
+import struct
+import unicodedata
+from collections import OrderedDict
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+from config import PDF_FONTS
+from src.models.runtime_stats import cache_counter
+from src.logger import logger
+
+# Familia con la que se registra la fuente Unicode; "Arial" se redirige a ella
+UNICODE_FAMILY = "reporte"
+# Subconjuntos distintos que se conservan en memoria
+SUBSET_CACHE_SIZE = 64
+
+# CMap ToUnicode de FPDF para Identity-H: cada CID es el código Unicode del carácter
+TO_UNICODE_CMAP = (
+    "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n/CIDSystemInfo\n"
+    "<</Registry (Adobe)\n/Ordering (UCS)\n/Supplement 0\n>> def\n/CMapName /Adobe-Identity-UCS def\n"
+    "/CMapType 2 def\n1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n1 beginbfrange\n"
+    "<0000> <FFFF> <0000>\nendbfrange\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+)
+
+_lock = threading.Lock()
+_metrics = {}
+_subsets = OrderedDict()
+embedding_cache = cache_counter("Fuente PDF incrustada")
+
+def find_font(style):
+    """Ruta de la fuente configurada para el estilo ("" o "B"), o None si no hay ninguna."""
+    for path in PDF_FONTS.get(style, []):
+        if os.path.exists(path):
+            return path
+    return None
+
+def font_metrics(path):
+    """Métricas de la fuente TTF, leídas una sola vez por proceso."""
+    with _lock:
+        metrics = _metrics.get(path)
+        if metrics is None:
+            ttf = TTFontFile()
+            ttf.getMetrics(path)
+            metrics = _metrics[path] = {
+                "name": "".join(ch for ch in ttf.fullName if ch not in " ()"),
+                "desc": {
+                    "Ascent": int(round(ttf.ascent)),
+                    "Descent": int(round(ttf.descent)),
+                    "CapHeight": int(round(ttf.capHeight)),
+                    "Flags": ttf.flags,
+                    "FontBBox": "[%s %s %s %s]" % tuple(int(round(value)) for value in ttf.bbox),
+                    "ItalicAngle": int(ttf.italicAngle),
+                    "StemV": int(round(ttf.stemV)),
+                    "MissingWidth": int(round(ttf.defaultWidth)),
+                },
+                "up": round(ttf.underlinePosition),
+                "ut": round(ttf.underlineThickness),
+                "cw": ttf.charWidths,
+                "originalsize": os.stat(path).st_size,
+            }
+        return metrics
+
+def ttf_widths(cw, subset):
+    """
+    Arreglo /W del CIDFont con los anchos de los caracteres 1-255 (hasta el mayor del
+    subconjunto) y de los del subconjunto, agrupados en rangos igual que FPDF._putTTfontwidths,
+    pero recorriendo solo esos caracteres en lugar de todo el plano Unicode.
+    """
+    last = min(max(subset, default=0), 255)
+    cids = [cid for cid in range(1, last + 1) if cid < len(cw) and cw[cid]]
+    cids += [cid for cid in subset if 255 < cid < len(cw) and cw[cid]]
+    range_ = {}
+    range_interval = {}
+    rangeid = 0
+    prevcid = -2
+    prevwidth = -1
+    interval = False
+    for cid in cids:
+        width = cw[cid]
+        if width == 65535:
+            width = 0
+        if cid == prevcid + 1:
+            if width == prevwidth:
+                if width == range_[rangeid][0]:
+                    range_[rangeid].append(width)
+                else:
+                    range_[rangeid].pop()
+                    rangeid = prevcid
+                    range_[rangeid] = [prevwidth, width]
+                interval = True
+                range_interval[rangeid] = True
+            else:
+                if interval:
+                    rangeid = cid
+                    range_[rangeid] = [width]
+                else:
+                    range_[rangeid].append(width)
+                interval = False
+        else:
+            rangeid = cid
+            range_[rangeid] = [width]
+            interval = False
+        prevcid = cid
+        prevwidth = width
+    prevk = nextk = -1
+    prevint = False
+    for k, ws in sorted(range_.items()):
+        cws = len(ws)
+        if k == nextk and not prevint and (k not in range_interval or cws < 3):
+            range_interval.pop(k, None)
+            range_[prevk] = range_[prevk] + range_[k]
+            del range_[k]
+        else:
+            prevk = k
+        nextk = k + cws
+        if k in range_interval:
+            prevint = cws > 3
+            del range_interval[k]
+            nextk -= 1
+        else:
+            prevint = False
+    w = []
+    for k, ws in sorted(range_.items()):
+        if len(set(ws)) == 1:
+            w.append(" %s %s %s" % (k, k + len(ws) - 1, ws[0]))
+        else:
+            w.append(" %s [ %s ]\n" % (k, " ".join(str(int(h)) for h in ws)))
+    return "/W [%s]" % "".join(w)
+
+def table_checksum(data):
+    """Suma de control de una tabla TrueType: suma de palabras de 32 bits, módulo 2**32."""
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}L", data)) & 0xFFFFFFFF
+
+class SubsetFontFile(TTFontFile):
+    """
+    TTFontFile que arma el archivo del subconjunto igual que FPDF (endTTFile), pero calcula las
+    sumas de control con struct en lugar de recorrer la fuente byte por byte en Python, que
+    era la mitad del tiempo de generar un subconjunto nuevo.
+    """
+    def endTTFile(self, stm):
+        tables = sorted(self.otables.items())
+        num_tables = len(tables)
+        search_range = 1
+        entry_selector = 0
+        while search_range * 2 <= num_tables:
+            search_range *= 2
+            entry_selector += 1
+        search_range *= 16
+        parts = [struct.pack(">LHHHH", 0x00010000, num_tables, search_range, entry_selector,
+                             num_tables * 16 - search_range)]
+        offset = 12 + num_tables * 16
+        head_start = None
+        for tag, data in tables:
+            if tag == "head":
+                head_start = offset
+            parts.append(tag.encode("latin-1") + struct.pack(">LLL", table_checksum(data), offset, len(data)))
+            offset += (len(data) + 3) & ~3
+        for tag, data in tables:
+            parts.append(data + b"\0" * (-len(data) % 4))
+        stm = b"".join(parts)
+        # checkSumAdjustment de la tabla head
+        adjustment = struct.pack(">L", (0xB1B0AFBA - table_checksum(stm)) & 0xFFFFFFFF)
+        return stm[:head_start + 8] + adjustment + stm[head_start + 12:]
+
+def font_embedding(path, subset):
+    """
+    Datos para incrustar la fuente con los caracteres de 'subset' (tupla ordenada): el subconjunto
+    TTF comprimido, su tamaño sin comprimir, el CIDToGIDMap comprimido y el arreglo /W.
+    Se generan una vez por combinación de fuente y caracteres y se reutilizan.
+    """
+    key = (path, subset)
+    with _lock:
+        cached = _subsets.get(key)
+        if cached:
+            _subsets.move_to_end(key)
+            embedding_cache.hit()
+            return cached
+    embedding_cache.miss()
+    ttf = SubsetFontFile()
+    stream = ttf.makeSubset(path, list(subset))
+    cidtogidmap = bytearray(256 * 256 * 2)
+    for cc, glyph in ttf.codeToGlyph.items():
+        cidtogidmap[cc * 2] = glyph >> 8
+        cidtogidmap[cc * 2 + 1] = glyph & 0xFF
+    if isinstance(stream, str):
+        stream = stream.encode("latin-1")
+    embedding = (zlib.compress(stream), len(stream), zlib.compress(bytes(cidtogidmap)),
+                 ttf_widths(font_metrics(path)["cw"], subset))
+    with _lock:
+        _subsets[key] = embedding
+        while len(_subsets) > SUBSET_CACHE_SIZE:
+            _subsets.popitem(last=False)
+    return embedding
+
+def to_latin1(text):
+    """Texto representable con las fuentes integradas: los demás caracteres pierden la tilde o se reemplazan por '?'."""
+    try:
+        text.encode("latin-1")
+        return text
+    except UnicodeEncodeError:
+        pass
+    result = []
+    for char in text:
+        if ord(char) < 256:
+            result.append(char)
+        else:
+            base = unicodedata.normalize("NFKD", char).encode("latin-1", "ignore").decode("latin-1")
+            result.append(base[:1] or "?")
+    return "".join(result)
+
+class ReportPDF(FPDF):
+    """
+    FPDF con la fuente Unicode configurada en PDF_FONTS. Las llamadas existentes a
+    set_font("Arial", ...) usan la fuente Unicode; si no se encontró ninguna, se usa Arial y
+    el texto se adapta a latin-1 en lugar de fallar. Las páginas se comprimen.
+    to_bytes() y save() registran el tamaño y el tiempo de generación en last_output.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = time.perf_counter()
+        self.set_compression(True)
+        self.font_paths = {style: find_font(style) for style in ("", "B")}
+        self.unicode = self.font_paths[""] is not None
+        self.last_output = None
+
+    def _add_unicode_font(self, style):
+        """Registra la fuente Unicode del estilo con las métricas en caché (equivale a add_font(uni=True))."""
+        path = self.font_paths[style]
+        metrics = font_metrics(path)
+        fontkey = UNICODE_FAMILY + style
+        self.fonts[fontkey] = {
+            "i": len(self.fonts) + 1, "type": "TTF", "name": metrics["name"], "desc": metrics["desc"],
+            "up": metrics["up"], "ut": metrics["ut"], "cw": metrics["cw"], "ttffile": path,
+            "fontkey": fontkey, "subset": list(range(0, 32)), "unifilename": None,
+        }
+        self.font_files[fontkey] = {"length1": metrics["originalsize"], "type": "TTF", "ttffile": path}
+        self.font_files[path] = {"type": "TTF"}
+
+    def set_font(self, family, style="", size=0):
+        if self.unicode and family.lower() in ("arial", "helvetica", UNICODE_FAMILY):
+            style = style.upper()
+            underline = "U" if "U" in style else ""
+            # Solo hay regular y negrita: la cursiva se escribe con el estilo sin cursiva
+            base = "B" if "B" in style and self.font_paths["B"] else ""
+            if UNICODE_FAMILY + base not in self.fonts:
+                self._add_unicode_font(base)
+            family, style = UNICODE_FAMILY, base + underline
+        super().set_font(family, style, size)
+
+    def normalize_text(self, txt):
+        if not self.unifontsubset and isinstance(txt, str):
+            return to_latin1(txt)
+        return super().normalize_text(txt)
+
+    def _putfonts(self):
+        # Las fuentes integradas las escribe FPDF; las Unicode se escriben aquí con los datos en caché
+        unicode_fonts = {key: font for key, font in self.fonts.items() if font.get("type") == "TTF"}
+        for key in unicode_fonts:
+            del self.fonts[key]
+        try:
+            super()._putfonts()
+        finally:
+            self.fonts.update(unicode_fonts)
+        for font in sorted(unicode_fonts.values(), key=lambda font: font["i"]):
+            self._put_unicode_font(font)
+
+    def _put_unicode_font(self, font):
+        """Escribe la fuente Unicode como lo hace FPDF._putfonts, con el subconjunto de font_embedding()."""
+        # Sin repetidos y en orden, para que documentos con los mismos caracteres compartan subconjunto
+        subset = tuple(sorted(set(font["subset"]) - {0}))
+        fontstream, ttfontsize, cidtogidmap, widths = font_embedding(font["ttffile"], subset)
+        fontname = "MPDFAA+" + font["name"]
+        font["n"] = self.n + 1
+        # Type0
+        self._newobj()
+        self._out("<</Type /Font")
+        self._out("/Subtype /Type0")
+        self._out("/BaseFont /" + fontname)
+        self._out("/Encoding /Identity-H")
+        self._out("/DescendantFonts [" + str(self.n + 1) + " 0 R]")
+        self._out("/ToUnicode " + str(self.n + 2) + " 0 R")
+        self._out(">>")
+        self._out("endobj")
+        # CIDFontType2
+        self._newobj()
+        self._out("<</Type /Font")
+        self._out("/Subtype /CIDFontType2")
+        self._out("/BaseFont /" + fontname)
+        self._out("/CIDSystemInfo " + str(self.n + 2) + " 0 R")
+        self._out("/FontDescriptor " + str(self.n + 3) + " 0 R")
+        if font["desc"].get("MissingWidth"):
+            self._out("/DW %d" % font["desc"]["MissingWidth"])
+        self._out(widths)
+        self._out("/CIDToGIDMap " + str(self.n + 4) + " 0 R")
+        self._out(">>")
+        self._out("endobj")
+        # ToUnicode
+        self._newobj()
+        self._out("<</Length " + str(len(TO_UNICODE_CMAP)) + ">>")
+        self._putstream(TO_UNICODE_CMAP)
+        self._out("endobj")
+        # CIDSystemInfo
+        self._newobj()
+        self._out("<</Registry (Adobe)")
+        self._out("/Ordering (UCS)")
+        self._out("/Supplement 0")
+        self._out(">>")
+        self._out("endobj")
+        # FontDescriptor
+        self._newobj()
+        self._out("<</Type /FontDescriptor")
+        self._out("/FontName /" + fontname)
+        for kd in ("Ascent", "Descent", "CapHeight", "Flags", "FontBBox", "ItalicAngle", "StemV", "MissingWidth"):
+            value = font["desc"][kd]
+            if kd == "Flags":
+                # No simbólica
+                value = (value | 4) & ~32
+            self._out(" /%s %s" % (kd, value))
+        self._out("/FontFile2 " + str(self.n + 2) + " 0 R")
+        self._out(">>")
+        self._out("endobj")
+        # CIDToGIDMap
+        self._newobj()
+        self._out("<</Length " + str(len(cidtogidmap)))
+        self._out("/Filter /FlateDecode")
+        self._out(">>")
+        self._putstream(cidtogidmap)
+        self._out("endobj")
+        # Subconjunto de la fuente
+        self._newobj()
+        self._out("<</Length " + str(len(fontstream)))
+        self._out("/Filter /FlateDecode")
+        self._out("/Length1 " + str(ttfontsize))
+        self._out(">>")
+        self._putstream(fontstream)
+        self._out("endobj")
+
+    def to_bytes(self):
+        """Contenido del PDF como bytes."""
+        data = self.output(dest="S")
+        # FPDF 1.7.2 retorna un str con codificación latin-1; versiones posteriores retornan bytes.
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        data = bytes(data)
+        self.last_output = (len(data), time.perf_counter() - self.started)
+        return data
+
+    def save(self, path):
+        """Escribe el PDF en 'path' y retorna (tamaño en bytes, segundos desde que se creó el documento)."""
+        data = self.to_bytes()
+        with open(path, "wb") as f:
+            f.write(data)
+        size, seconds = self.last_output
+        logger.info(f"PDF {os.path.basename(path)}: {size / 1024:.1f} KB en {seconds * 1000:.0f} ms")
+        return self.last_output
+
+def describe_output(size, seconds):
+    """Tamaño y tiempo de generación para mostrar al usuario: "23,4 KB en 12 ms"."""
+    return f"{size / 1024:.1f} KB en {seconds * 1000:.0f} ms".replace(".", ",")
@@ -0,0 +1,137 @@
+"""
+Receptor SMTP local para probar el envío de correos sin un servidor real: acepta todos los
+mensajes y los cuenta, y si se indica una carpeta los guarda como archivos .eml.
+Los destinatarios del dominio "rechazado.invalid" se rechazan con 550 y los de
+"ocupado.invalid" con 451, para probar los fallidos y los reintentos.
+'handshake_ms' simula lo que tarda un servidor real en saludar (TCP, TLS y autenticación).
+
+Uso por consola:
+    python -m src.utils.smtp_sink --port 1025 --outbox correo_salida
+"""
+import os
+import time
+import argparse
+import threading
+import socketserver
+
+REJECTED_DOMAIN = "@rechazado.invalid"
+BUSY_DOMAIN = "@ocupado.invalid"
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        with sink._lock:
+            sink.connections += 1
+        if sink.handshake_ms:
+            time.sleep(sink.handshake_ms / 1000)
+        self.reply("220 smtp_sink listo")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-smtp_sink\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+            elif verb == "HELO":
+                self.reply("250 smtp_sink")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command[8:].strip().strip("<>").lower()
+                if address.endswith(REJECTED_DOMAIN):
+                    self.reply("550 Buzon inexistente")
+                elif address.endswith(BUSY_DOMAIN):
+                    self.reply("451 Intente mas tarde")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                if not recipients:
+                    self.reply("503 Sin destinatarios")
+                    continue
+                self.reply("354 Termine con <CRLF>.<CRLF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    # Quitar el punto duplicado de las líneas que empiezan con punto
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                sink.store(recipients, b"".join(data))
+                self.reply("250 OK")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Adios")
+                return
+            else:
+                self.reply("502 Comando no implementado")
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SmtpSink:
+    """Servidor SMTP de prueba en un hilo aparte. port=0 elige un puerto libre."""
+    def __init__(self, host="localhost", port=1025, outbox=None, handshake_ms=0):
+        self.outbox = outbox
+        self.handshake_ms = handshake_ms
+        self.messages = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SmtpHandler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def store(self, recipients, data):
+        with self._lock:
+            self.messages += 1
+            number = self.messages
+        if self.outbox:
+            os.makedirs(self.outbox, exist_ok=True)
+            with open(os.path.join(self.outbox, f"{number:06d}.eml"), "wb") as f:
+                f.write(data)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp_sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Receptor SMTP local de prueba")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--outbox", default=None, help="Carpeta donde guardar los mensajes (.eml)")
+    parser.add_argument("--handshake-ms", type=int, default=0, help="Demora simulada del saludo de cada conexión")
+    args = parser.parse_args()
+
+    sink = SmtpSink(args.host, args.port, args.outbox, args.handshake_ms).start()
+    print(f"Receptor SMTP en {sink.address[0]}:{sink.address[1]} (Ctrl+C para terminar)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.stop()
+    print(f"{sink.messages} mensajes recibidos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Actualización incremental de ttk.Treeview.
+Las filas se identifican por el id del registro (iid = str(id)), de modo que un cambio
+en un estudiante, curso o pago toca solo su fila en lugar de vaciar y recargar la tabla.
+"""
+
+def _as_text(values):
+    return tuple("" if value is None else str(value) for value in values)
+
+def upsert_row(tree, iid, values, index="end"):
+    """Inserta la fila o actualiza sus valores si cambiaron. Retorna True si hubo cambios."""
+    iid = str(iid)
+    if tree.exists(iid):
+        if _as_text(tree.item(iid, "values")) == _as_text(values):
+            return False
+        tree.item(iid, values=values)
+        return True
+    tree.insert("", index, iid=iid, values=values)
+    return True
+
+def delete_row(tree, iid):
+    """Elimina la fila si está en la tabla. Retorna True si existía."""
+    iid = str(iid)
+    if tree.exists(iid):
+        tree.delete(iid)
+        return True
+    return False
+
+def apply_rows(tree, rows):
+    """
+    Sincroniza la tabla con la lista completa de filas [(iid, valores), ...]: elimina las que
+    ya no están, actualiza las que cambiaron y agrega las nuevas al final.
+    Retorna la cantidad de filas modificadas.
+    """
+    rows = [(str(iid), values) for iid, values in rows]
+    wanted = {iid for iid, _ in rows}
+    changed = 0
+    stale = [iid for iid in tree.get_children("") if iid not in wanted]
+    if stale:
+        tree.delete(*stale)
+        changed += len(stale)
+    for iid, values in rows:
+        if upsert_row(tree, iid, values):
+            changed += 1
+    return changed
@@ -0,0 +1,217 @@
+"""
+Monitor de respuesta de la interfaz. Mide cuánto tarda cada manejador de Tk (comandos de
+botones, bind de teclas y clics, callbacks de 'after') y detecta bloqueos del bucle principal
+con un latido: si el latido llega tarde, la ventana estuvo congelada ese tiempo.
+
+Los manejadores se miden reemplazando tkinter.CallWrapper, por donde pasan todas las
+llamadas de Tk a Python, así que no hay que modificar cada vista. Cuando un manejador abre
+un diálogo modal (messagebox, filedialog), el bucle sigue vivo mientras el usuario responde;
+por eso se registra el mayor tramo sin atender eventos y no la duración total del manejador.
+"""
+import time
+import tkinter as tk
+from src.logger import logger
+from config import (UI_MONITOR, UI_SLOW_HANDLER_MS, UI_HEARTBEAT_MS, UI_STALL_MS,
+                    UI_MONITOR_OVERLAY, UI_SUMMARY_SIZE)
+
+class HandlerStats:
+    """Tiempos acumulados de un manejador: llamadas, tiempo bloqueando la interfaz y el peor caso."""
+    __slots__ = ("name", "calls", "total", "worst")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    @property
+    def average(self):
+        return self.total / self.calls if self.calls else 0.0
+
+class HandlerFrame:
+    """Manejador en curso. last_alive es la última vez que el bucle de eventos atendió algo."""
+    __slots__ = ("name", "last_alive", "blocked")
+
+    def __init__(self, name, now):
+        self.name = name
+        self.last_alive = now
+        self.blocked = 0.0
+
+def unwrap_callback(func):
+    """La función real de un manejador: after() registra una función interna 'callit' que la llama."""
+    code = getattr(func, "__code__", None)
+    if code is not None and func.__closure__ and "func" in code.co_freevars:
+        return func.__closure__[code.co_freevars.index("func")].cell_contents
+    return func
+
+def callback_name(func):
+    """Nombre legible del manejador: "PaymentUI.on_search", o la función que envuelve 'after'."""
+    func = unwrap_callback(func)
+    owner = getattr(func, "__self__", None)
+    if owner is not None and not isinstance(owner, type):
+        return f"{type(owner).__name__}.{getattr(func, '__name__', '?')}"
+    return getattr(func, "__qualname__", None) or repr(func)
+
+class TimedCallWrapper(tk.CallWrapper):
+    """CallWrapper que informa al monitor del inicio y fin de cada llamada de Tk."""
+    monitor = None
+
+    def __call__(self, *args):
+        monitor = TimedCallWrapper.monitor
+        if monitor is None:
+            return super().__call__(*args)
+        frame = monitor.enter(self.func)
+        try:
+            return super().__call__(*args)
+        finally:
+            monitor.leave(frame)
+
+class UIMonitor:
+    """
+    Registra la latencia de los manejadores y los bloqueos del bucle principal. Los
+    manejadores que bloquean más de UI_SLOW_HANDLER_MS y los latidos atrasados más de
+    UI_STALL_MS se escriben en el log; end_session() escribe los más lentos de la sesión.
+    Solo se usa desde el hilo de Tk.
+    """
+    def __init__(self, slow_ms=UI_SLOW_HANDLER_MS, heartbeat_ms=UI_HEARTBEAT_MS, stall_ms=UI_STALL_MS):
+        self.slow = slow_ms / 1000
+        self.heartbeat = heartbeat_ms / 1000
+        self.stall = stall_ms / 1000
+        self.stats = {}
+        self.stack = []
+        self.stalls = 0
+        self.worst_stall = 0.0
+        self.last_slow = None
+        self.session_started = time.perf_counter()
+        self.installed = False
+        self._overlays = {}
+
+    def install(self):
+        """Empieza a medir todas las llamadas de Tk a Python del proceso."""
+        TimedCallWrapper.monitor = self
+        tk.CallWrapper = TimedCallWrapper
+        self.installed = True
+
+    def uninstall(self):
+        TimedCallWrapper.monitor = None
+        self.installed = False
+
+    def enter(self, func):
+        now = time.perf_counter()
+        if self.stack:
+            # El manejador de afuera está en un bucle anidado (un diálogo modal): hasta aquí estuvo bloqueando
+            parent = self.stack[-1]
+            parent.blocked = max(parent.blocked, now - parent.last_alive)
+        # El latido no se mide, pero sí cuenta como señal de que el bucle está vivo
+        name = None if getattr(unwrap_callback(func), "__self__", None) is self else callback_name(func)
+        frame = HandlerFrame(name, now)
+        self.stack.append(frame)
+        return frame
+
+    def leave(self, frame):
+        now = time.perf_counter()
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1].last_alive = now
+        if frame.name is None:
+            return
+        blocked = max(frame.blocked, now - frame.last_alive)
+        stats = self.stats.get(frame.name)
+        if stats is None:
+            stats = self.stats[frame.name] = HandlerStats(frame.name)
+        stats.calls += 1
+        stats.total += blocked
+        stats.worst = max(stats.worst, blocked)
+        if blocked >= self.slow:
+            self.last_slow = (frame.name, blocked)
+            logger.warning(f"Manejador lento: {frame.name} bloqueó la interfaz {blocked * 1000:.0f} ms")
+
+    def watch(self, root, overlay=UI_MONITOR_OVERLAY):
+        """
+        Inicia el latido sobre 'root' (una ventana tk.Tk) y enlaza Ctrl+F12 para mostrar u
+        ocultar el panel de latencia. El latido termina solo cuando se destruye la ventana.
+        """
+        if not self.installed:
+            return
+        expected = time.perf_counter() + self.heartbeat
+        root.after(int(self.heartbeat * 1000), self._beat, root, expected)
+        root.bind_all("<Control-F12>", lambda event: self.toggle_overlay(root), add="+")
+        if overlay:
+            self.toggle_overlay(root)
+
+    def _beat(self, root, expected):
+        now = time.perf_counter()
+        late = now - expected
+        if late >= self.stall:
+            self.stalls += 1
+            self.worst_stall = max(self.worst_stall, late)
+            culprit = self.stack[-1].name if self.stack else (self.last_slow[0] if self.last_slow else None)
+            logger.warning(f"Interfaz congelada {late * 1000:.0f} ms" + (f" (durante {culprit})" if culprit else ""))
+        try:
+            overlay = self._overlays.get(root)
+            if overlay is not None:
+                overlay.refresh(late)
+            root.after(int(self.heartbeat * 1000), self._beat, root, now + self.heartbeat)
+        except tk.TclError:
+            # La ventana ya se cerró
+            self._overlays.pop(root, None)
+
+    def toggle_overlay(self, root):
+        overlay = self._overlays.pop(root, None)
+        if overlay is not None:
+            overlay.destroy()
+        else:
+            self._overlays[root] = MonitorOverlay(root, self)
+
+    def slowest(self, limit=UI_SUMMARY_SIZE):
+        """Los manejadores con el peor tiempo de bloqueo, de mayor a menor."""
+        return sorted(self.stats.values(), key=lambda s: s.worst, reverse=True)[:limit]
+
+    def end_session(self, label=""):
+        """Escribe en el log el resumen de la sesión y empieza una nueva."""
+        if self.stats:
+            minutes = (time.perf_counter() - self.session_started) / 60
+            lines = [f"Resumen de respuesta de la interfaz{' (' + label + ')' if label else ''}: "
+                     f"{minutes:.1f} min, {sum(s.calls for s in self.stats.values())} eventos, "
+                     f"{self.stalls} congelamientos (peor {self.worst_stall * 1000:.0f} ms)"]
+            for stats in self.slowest():
+                lines.append(f"  {stats.name}: peor {stats.worst * 1000:.0f} ms, "
+                             f"promedio {stats.average * 1000:.1f} ms, {stats.calls} llamadas")
+            logger.info("\n".join(lines))
+        self.stats = {}
+        self.stalls = 0
+        self.worst_stall = 0.0
+        self.last_slow = None
+        self.session_started = time.perf_counter()
+
+class MonitorOverlay(tk.Toplevel):
+    """Panel pequeño, siempre visible, con el retraso del latido y los manejadores más lentos."""
+    def __init__(self, root, monitor):
+        super().__init__(root)
+        self.monitor = monitor
+        self.title("Latencia de la interfaz")
+        self.attributes("-topmost", True)
+        self.resizable(False, False)
+        self.text_var = tk.StringVar(value="Midiendo...")
+        tk.Label(self, textvariable=self.text_var, justify="left", font=("Courier", 9),
+                 padx=8, pady=6).pack()
+        self.protocol("WM_DELETE_WINDOW", lambda: monitor.toggle_overlay(root))
+
+    def refresh(self, late):
+        lines = [f"Latido: {late * 1000:4.0f} ms de retraso", f"Congelamientos: {self.monitor.stalls}"]
+        for stats in self.monitor.slowest(3):
+            lines.append(f"{stats.worst * 1000:5.0f} ms  {stats.name}")
+        text = "\n".join(lines)
+        if text != self.text_var.get():
+            self.text_var.set(text)
+
+_monitor = None
+
+def get_ui_monitor():
+    """Monitor compartido por todas las ventanas del proceso; se instala la primera vez."""
+    global _monitor
+    if _monitor is None:
+        _monitor = UIMonitor()
+        if UI_MONITOR:
+            _monitor.install()
+    return _monitor
@@ -0,0 +1,123 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+import threading
+from src.controllers.archive_controller import ArchiveController
+from src.models.academic_year import YEAR_OPEN, YEAR_CLOSED
+
+STATUS_LABELS = {"open": "Abierto", "closed": "Cerrado", "archived": "Archivado"}
+
+class AcademicYearsUI:
+    """Años escolares: apertura, cierre y archivo de los años cerrados."""
+    def __init__(self, db):
+        self.db = db
+        self.archive_controller = ArchiveController(db)
+        self.window = tk.Toplevel()
+        self.window.title("Años Escolares")
+        self.window.geometry("560x380")
+        self.worker = None
+        self.result = None
+        self.create_widgets()
+        self.load_years()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        columns = ("year", "start_date", "end_date", "status")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=8)
+        headings = {"year": "Año", "start_date": "Inicio", "end_date": "Fin", "status": "Estado"}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, width=120)
+        self.tree.pack(fill="both", expand=True)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(pady=10)
+        self.btn_open = ttk.Button(buttons, text="Abrir Año", command=self.open_year)
+        self.btn_open.grid(row=0, column=0, padx=5)
+        self.btn_close = ttk.Button(buttons, text="Cerrar Año", command=self.close_year)
+        self.btn_close.grid(row=0, column=1, padx=5)
+        self.btn_archive = ttk.Button(buttons, text="Archivar Año", command=self.archive_year)
+        self.btn_archive.grid(row=0, column=2, padx=5)
+
+        self.result_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.result_var, wraplength=520, justify="left").pack(anchor="w")
+
+    def load_years(self):
+        self.tree.delete(*self.tree.get_children())
+        for academic_year in self.archive_controller.list_years():
+            self.tree.insert("", "end", iid=str(academic_year.year), values=(
+                academic_year.year,
+                academic_year.start_date or "",
+                academic_year.end_date or "",
+                STATUS_LABELS.get(academic_year.status, academic_year.status),
+            ))
+
+    def selected_year(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("Advertencia", "Seleccione un año escolar.")
+            return None
+        return self.archive_controller.get_year(int(selected[0]))
+
+    def open_year(self):
+        year = simpledialog.askinteger("Abrir Año", "Año escolar:", parent=self.window)
+        if not year:
+            return
+        start_date = simpledialog.askstring("Abrir Año", "Fecha de inicio (AAAA-MM-DD):", parent=self.window)
+        end_date = simpledialog.askstring("Abrir Año", "Fecha de fin (AAAA-MM-DD):", parent=self.window)
+        success, msg = self.archive_controller.open_year(year, start_date, end_date)
+        self.show_message(success, msg)
+
+    def close_year(self):
+        academic_year = self.selected_year()
+        if not academic_year:
+            return
+        if academic_year.status != YEAR_OPEN:
+            messagebox.showwarning("Advertencia", "Solo se puede cerrar un año abierto.")
+            return
+        if messagebox.askyesno("Confirmar", f"¿Cerrar el año escolar {academic_year.year}?"):
+            success, msg = self.archive_controller.close_year(academic_year.year)
+            self.show_message(success, msg)
+
+    def archive_year(self):
+        academic_year = self.selected_year()
+        if not academic_year:
+            return
+        if academic_year.status != YEAR_CLOSED:
+            messagebox.showwarning("Advertencia", "Solo se puede archivar un año cerrado.")
+            return
+        confirm = messagebox.askyesno(
+            "Confirmar",
+            f"Los estudiantes y pagos del año {academic_year.year} se trasladarán a la base de archivo. "
+            "Seguirán disponibles en el historial. ¿Desea continuar?"
+        )
+        if not confirm or (self.worker and self.worker.is_alive()):
+            return
+        # El traslado usa su propia conexión: se ejecuta en un hilo y se consulta con 'after'
+        for button in (self.btn_open, self.btn_close, self.btn_archive):
+            button.configure(state="disabled")
+        self.result_var.set("Archivando...")
+        self.result = None
+
+        def target():
+            self.result = self.archive_controller.archive_year(academic_year.year)
+
+        self.worker = threading.Thread(target=target, daemon=True)
+        self.worker.start()
+        self.window.after(100, self.poll_worker)
+
+    def poll_worker(self):
+        if self.worker.is_alive():
+            self.window.after(100, self.poll_worker)
+            return
+        for button in (self.btn_open, self.btn_close, self.btn_archive):
+            button.configure(state="normal")
+        success, msg, _ = self.result
+        self.show_message(success, msg)
+
+    def show_message(self, success, msg):
+        self.result_var.set(msg)
+        if success:
+            self.load_years()
+        else:
+            messagebox.showerror("Error", msg)
@@ -1,21 +1,47 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from tkinter.filedialog import asksaveasfilename
 from PIL import Image, ImageTk
 import os
-from fpdf import FPDF
 import datetime
+import threading
 import traceback
 from src.controllers.student_controller import StudentController
 from src.controllers.course_controller import CourseController
 from src.controllers.config_controller import ConfigController
 from src.controllers.user_controller import UserController
+from src.controllers.tuition_controller import TuitionController
+from src.controllers.duplicate_controller import DuplicateController
 from src.views.config_ui import ConfigUI
 from src.views.user_management_ui import UserManagementUI
 from src.views.payment_ui import PaymentUI
 from src.views.login_ui import LoginUI
 from src.views.student_details_window import StudentDetailsWindow
+from src.views.maintenance_ui import MaintenanceUI
+from src.views.tuition_plan_ui import TuitionPlanUI
+from src.views.debtors_ui import DebtorsUI
+from src.views.academic_years_ui import AcademicYearsUI
+from src.views.promotion_ui import PromotionUI
+from src.views.duplicates_ui import DuplicatesUI
+from src.views.system_status_ui import SystemStatusUI
+from src.views.consolidation_ui import ConsolidationUI
+from src.views.guardians_ui import GuardiansUI
+from src.controllers.maintenance_controller import MaintenanceController
 from src.utils.export_students import export_students_to_excel, export_students_to_pdf
+from src.utils.receipts import ReceiptArchive
+from src.utils.money import format_cents
+from src.utils.report_pdf import ReportPDF, describe_output
+from src.utils.delta_export import DeltaExporter
+from src.utils.ledger_export import export_ledger
+from src.utils.family_statements import export_family_statements
+from src.utils.async_data import AsyncDataFacade, ChangeListener
+from src.utils.tree_diff import upsert_row, delete_row, apply_rows
+from src.utils.ui_monitor import get_ui_monitor
+
+# A partir de cuántos estudiantes cambiados se relee la lista completa en lugar de fila por fila
+BULK_REFRESH_THRESHOLD = 200
+# Botones por fila del panel de administración
+ADMIN_BUTTONS_PER_ROW = 6
 
 class ChangePasswordWindow(tk.Toplevel):
     def __init__(self, master, user_controller, current_user):
@@ -72,24 +98,44 @@ class ChangePasswordWindow(tk.Toplevel):
             messagebox.showerror("Error", "Ocurrió un error al cambiar la clave. Consulte la consola para más detalles.")
 
 class AppUI:
-    def __init__(self, db, user):
+    def __init__(self, db, user, registry=None, campus=None):
         self.db = db
         self.user = user
+        # Registro de sedes (ver TenantRegistry): permite cambiar de sede sin reiniciar
+        self.registry = registry
+        self.campus = campus
         self.student_controller = StudentController(self.db)
         self.course_controller = CourseController(self.db)
         self.config_controller = ConfigController(self.db)
         self.user_controller = UserController(self.db)
+        self.tuition_controller = TuitionController(self.db)
+        self.duplicate_controller = DuplicateController(self.db)
+        # Autor de los cambios que se registran en la bitácora
+        self.db.username = self.user.username
+        self.monitor = get_ui_monitor()
         self.root = tk.Tk()
+        # Queries run on a background thread and report back through the Tk loop
+        self.data = AsyncDataFacade(self.db, self.root)
+        # Las tablas se actualizan fila por fila a partir de los cambios que confirman los controladores
+        self.changes = ChangeListener(self.db, self.root, ("students", "courses"), self.on_data_changed)
+        self.courses_tree = None
         
         # Load configuration for school name and logo.
-        configs = self.config_controller.get_all_configs()
+        if self.registry is not None:
+            configs = self.registry.get_config(self.campus)
+        else:
+            configs = self.config_controller.get_all_configs()
         self.school_name = configs.get("SCHOOL_NAME") or "School Name"
         self.logo_path = configs.get("LOGO_PATH") or ""
         self.abs_logo_path = os.path.abspath(self.logo_path)
         
-        self.root.title(f"{self.school_name} - Sistema de Pagos (Usuario: {self.user.username})")
+        campus_text = ""
+        if self.registry is not None and len(self.registry) > 1:
+            campus_text = f" - {self.registry.get(self.campus).name}"
+        self.root.title(f"{self.school_name}{campus_text} - Sistema de Pagos (Usuario: {self.user.username})")
         self.root.geometry("900x650")
         self.create_widgets()
+        self.monitor.watch(self.root)
 
     def create_widgets(self):
         header_frame = ttk.Frame(self.root)
@@ -139,13 +185,37 @@ class AppUI:
         self.frame_admin = ttk.LabelFrame(self.root, text="Panel de Administración")
         self.frame_admin.pack(padx=10, pady=10, fill="x")
         self.btn_config = ttk.Button(self.frame_admin, text="Editar Configuración", command=self.editar_configuracion)
-        self.btn_config.pack(side="left", padx=5, pady=5)
         self.btn_registrar_pago = ttk.Button(self.frame_admin, text="Registrar Pago", command=self.registrar_pago)
-        self.btn_registrar_pago.pack(side="left", padx=5, pady=5)
         self.btn_cursos = ttk.Button(self.frame_admin, text="Administrar Cursos", command=self.manage_courses)
-        self.btn_cursos.pack(side="left", padx=5, pady=5)
         self.btn_usuarios = ttk.Button(self.frame_admin, text="Administrar Usuarios", command=self.manage_users)
-        self.btn_usuarios.pack(side="left", padx=5, pady=5)
+        self.btn_debtors = ttk.Button(self.frame_admin, text="Deudores", command=self.open_debtors)
+        self.btn_export_receipts = ttk.Button(self.frame_admin, text="Exportar Recibos", command=self.export_receipts_range)
+        self.btn_export_changes = ttk.Button(self.frame_admin, text="Exportar Cambios", command=self.export_changes)
+        self.btn_export_ledger = ttk.Button(self.frame_admin, text="Libro de Pagos", command=self.export_payment_ledger)
+        self.btn_family_statements = ttk.Button(self.frame_admin, text="Estados por Familia",
+                                                command=self.export_family_statements)
+        self.btn_guardians = ttk.Button(self.frame_admin, text="Acudientes", command=self.open_guardians)
+        self.btn_years = ttk.Button(self.frame_admin, text="Años Escolares", command=self.open_academic_years)
+        self.btn_promotion = ttk.Button(self.frame_admin, text="Promoción", command=self.open_promotion)
+        self.btn_duplicates = ttk.Button(self.frame_admin, text="Duplicados", command=self.open_duplicates)
+        self.btn_maintenance = ttk.Button(self.frame_admin, text="Mantenimiento", command=self.open_maintenance)
+        self.btn_status = ttk.Button(self.frame_admin, text="Estado del Sistema", command=self.open_system_status)
+        buttons = [self.btn_config, self.btn_registrar_pago, self.btn_cursos, self.btn_usuarios, self.btn_debtors,
+                   self.btn_export_receipts, self.btn_export_changes, self.btn_export_ledger,
+                   self.btn_family_statements, self.btn_guardians, self.btn_years, self.btn_promotion,
+                   self.btn_duplicates, self.btn_maintenance, self.btn_status]
+        if self.registry is not None:
+            self.btn_consolidated = ttk.Button(self.frame_admin, text="Consolidado", command=self.open_consolidation)
+            buttons.append(self.btn_consolidated)
+        if self.registry is not None and len(self.registry) > 1:
+            self.btn_campus = ttk.Button(self.frame_admin, text="Cambiar Sede", command=self.choose_campus)
+            buttons.append(self.btn_campus)
+        # En filas de ADMIN_BUTTONS_PER_ROW: en una sola fila los últimos quedaban fuera de la ventana
+        for index, button in enumerate(buttons):
+            button.grid(row=index // ADMIN_BUTTONS_PER_ROW, column=index % ADMIN_BUTTONS_PER_ROW,
+                        sticky="ew", padx=5, pady=5)
+        for column in range(ADMIN_BUTTONS_PER_ROW):
+            self.frame_admin.columnconfigure(column, weight=1, uniform="admin")
 
     def create_student_registration_frame(self):
         self.frame_form = ttk.LabelFrame(self.root, text="Registrar Estudiante")
@@ -189,7 +259,7 @@ class AppUI:
         ConfigUI(self.db)
 
     def registrar_pago(self):
-        PaymentUI(self.db)
+        PaymentUI(self.db, self.data)
 
     def manage_courses(self):
         win = tk.Toplevel(self.root)
@@ -213,19 +283,132 @@ class AppUI:
         btn_edit = ttk.Button(frame_form, text="Editar", command=self.edit_course)
         btn_edit.grid(row=1, column=1, padx=5, pady=5)
         btn_deactivate = ttk.Button(frame_form, text="Desactivar", command=self.deactivate_course)
-        btn_deactivate.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        btn_deactivate.grid(row=2, column=0, padx=5, pady=5)
+        btn_plan = ttk.Button(frame_form, text="Plan de Pagos", command=self.edit_tuition_plan)
+        btn_plan.grid(row=2, column=1, padx=5, pady=5)
+
+    def edit_tuition_plan(self):
+        selected = self.courses_tree.selection()
+        if not selected:
+            messagebox.showwarning("Sin selección", "Seleccione un curso para editar su plan de pagos.")
+            return
+        course_id, course_name = self.courses_tree.item(selected[0])["values"][:2]
+        TuitionPlanUI(self.db, course_id, course_name)
+
+    def open_debtors(self):
+        DebtorsUI(self.data)
 
     def manage_users(self):
         UserManagementUI(self.db)
 
+    def open_maintenance(self):
+        MaintenanceUI(self.db)
+
+    def open_academic_years(self):
+        AcademicYearsUI(self.db)
+
+    def open_promotion(self):
+        PromotionUI(self.db)
+
+    def open_duplicates(self):
+        DuplicatesUI(self.db, self.data)
+
+    def open_guardians(self):
+        GuardiansUI(self.db, self.data, self.school_name, self.abs_logo_path)
+
+    def open_system_status(self):
+        SystemStatusUI(self.db, self.data)
+
+    def open_consolidation(self):
+        ConsolidationUI(self.registry.list())
+
+    def choose_campus(self):
+        win = tk.Toplevel(self.root)
+        win.title("Cambiar Sede")
+        win.geometry("320x120")
+        campus_names = {campus.name: campus.key for campus in self.registry.list() if campus.key != self.campus}
+        ttk.Label(win, text="Sede:").pack(pady=5)
+        combo = ttk.Combobox(win, state="readonly", values=list(campus_names))
+        combo.pack(pady=5)
+        combo.current(0)
+        ttk.Button(win, text="Cambiar", command=lambda: self.switch_campus(campus_names[combo.get()])).pack(pady=5)
+
+    def switch_campus(self, campus):
+        """
+        Abre la sede indicada con el mismo usuario, que debe ser administrador también allí.
+        Se pide la contraseña del usuario en esa sede: cada sede tiene sus propias credenciales.
+        La conexión de la sede sale del registro: ya preparada si se usó antes en esta sesión.
+        """
+        campus_name = self.registry.get(campus).name
+        password = simpledialog.askstring("Cambiar Sede", f"Contraseña de {self.user.username} en la sede {campus_name}:",
+                                          show="*", parent=self.root)
+        if password is None:
+            return
+        target_db = self.registry.connect(campus)
+        user = UserController(target_db).login(self.user.username, password)
+        if user is None:
+            messagebox.showerror("Error", f"Usuario o contraseña incorrectos en la sede {campus_name}.")
+            return
+        if user.role != "admin":
+            messagebox.showerror("Error", f"El usuario {self.user.username} no es administrador en la sede "
+                                          f"{campus_name}.")
+            return
+        self.changes.close()
+        self.data.close()
+        self.root.destroy()
+        self.monitor.end_session(self.user.username)
+        AppUI(target_db, user, self.registry, campus).run()
+
+    def run_scheduled_maintenance(self):
+        # Respaldo y optimización pendientes en un hilo aparte; cada tarea usa su propia conexión.
+        controller = MaintenanceController(self.db)
+        threading.Thread(target=controller.run_scheduled, daemon=True).start()
+
+    def course_row(self, course):
+        return (course.id, course.name, "Sí" if course.active == 1 else "No")
+
     def load_courses_into_tree(self):
-        for item in self.courses_tree.get_children():
-            self.courses_tree.delete(item)
         courses = self.course_controller.get_all_courses()
-        for course in courses:
-            self.courses_tree.insert("", "end", values=(course["id"], course["name"], "Sí" if course["active"] == 1 else "No"))
+        apply_rows(self.courses_tree, [(course.id, self.course_row(course)) for course in courses])
         self.load_courses_into_combobox()
 
+    def courses_tree_open(self):
+        return self.courses_tree is not None and self.courses_tree.winfo_exists()
+
+    def on_data_changed(self, events):
+        """
+        Aplica a las tablas solo los cambios confirmados: una fila por estudiante o curso afectado.
+        """
+        student_ids = set()
+        courses_changed = False
+        for event in events:
+            if event.table == "students":
+                if event.action == "delete":
+                    student_ids.discard(event.pk)
+                    delete_row(self.tree, event.pk)
+                else:
+                    student_ids.add(event.pk)
+            elif event.table == "courses":
+                courses_changed = True
+                if self.courses_tree_open():
+                    course = self.course_controller.get_course_by_id(event.pk)
+                    if course:
+                        upsert_row(self.courses_tree, course.id, self.course_row(course))
+        if courses_changed:
+            if self.user.role == "admin":
+                self.load_courses_into_combobox()
+            # Un curso renombrado cambia la columna "curso" de sus estudiantes: se compara la lista
+            # completa pero solo se tocan las filas que cambiaron.
+            self.refrescar_lista(notify_empty=False)
+        elif len(student_ids) > BULK_REFRESH_THRESHOLD:
+            # Operaciones masivas (promoción de fin de año): una sola lectura de la lista completa
+            self.refrescar_lista(notify_empty=False)
+        elif student_ids:
+            self.data.submit(
+                lambda controllers: [controllers["students"].get_student_by_id(student_id) for student_id in student_ids],
+                self.upsert_students
+            )
+
     def add_course(self):
         name = self.entry_course_name.get().strip()
         if not name:
@@ -234,7 +417,6 @@ class AppUI:
         success, msg = self.course_controller.add_course(name)
         if success:
             messagebox.showinfo("Éxito", msg)
-            self.load_courses_into_tree()
             self.entry_course_name.delete(0, tk.END)
         else:
             messagebox.showerror("Error", msg)
@@ -253,7 +435,6 @@ class AppUI:
         success, msg = self.course_controller.edit_course(course_id, new_name)
         if success:
             messagebox.showinfo("Éxito", msg)
-            self.load_courses_into_tree()
             self.entry_course_name.delete(0, tk.END)
         else:
             messagebox.showerror("Error", msg)
@@ -270,7 +451,6 @@ class AppUI:
             success, msg = self.course_controller.deactivate_course(course_id)
             if success:
                 messagebox.showinfo("Éxito", msg)
-                self.load_courses_into_tree()
             else:
                 messagebox.showerror("Error", msg)
 
@@ -279,8 +459,8 @@ class AppUI:
         course_names = []
         course_ids = []
         for course in courses:
-            course_names.append(course["name"])
-            course_ids.append(course["id"])
+            course_names.append(course.name)
+            course_ids.append(course.id)
         self.combo_course["values"] = course_names
         self.course_map = dict(zip(course_names, course_ids))
 
@@ -295,12 +475,19 @@ class AppUI:
             messagebox.showwarning("Campos incompletos", "Por favor, llene todos los campos.")
             return
         course_id = self.course_map.get(course_name)
+        duplicates = self.duplicate_controller.find_duplicates(identificacion, nombre, apellido, limit=3)
+        if duplicates:
+            listing = "\n".join(f"- {d.student.identificacion}: {d.student.nombre} {d.student.apellido} "
+                                f"({', '.join(d.reasons) or 'datos parecidos'})" for d in duplicates)
+            if not messagebox.askyesno("Posible duplicado",
+                                       f"Ya hay estudiantes registrados con datos parecidos:\n{listing}\n\n"
+                                       "¿Desea registrarlo de todos modos?"):
+                return
         success, msg = self.student_controller.register_student(
             identificacion, nombre, apellido, course_id, representante, telefono)
         if success:
             messagebox.showinfo("Éxito", msg)
             self.limpiar_formulario()
-            self.refrescar_lista()
         else:
             messagebox.showerror("Error", msg)
 
@@ -309,30 +496,37 @@ class AppUI:
             entry.delete(0, tk.END)
         self.combo_course.set("")
 
-    def refrescar_lista(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        # Obtain all students from the controller.
-        # We assume that get_all_students returns a list of dictionaries.
-        estudiantes = self.student_controller.get_all_students()
-        if estudiantes:
-            for est in estudiantes:
-                # If the returned row is not a dict, convert it:
-                if not isinstance(est, dict):
-                    keys = ["id", "identificacion", "nombre", "apellido", "course_name", "representante", "telefono", "active"]
-                    est = dict(zip(keys, est))
-                course_name = est["course_name"] if est["course_name"] else "N/A"
-                self.tree.insert("", "end", values=(est["id"], est["identificacion"], est["nombre"], est["apellido"], course_name))
-        else:
+    def refrescar_lista(self, notify_empty=True):
+        # Load the students on the data thread; a newer refresh supersedes a pending one.
+        self.data.submit(
+            lambda controllers: controllers["students"].get_all_students(),
+            lambda estudiantes: self.show_students(estudiantes, notify_empty),
+            key="students_list",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al cargar los estudiantes: {e}")
+        )
+
+    def student_row(self, est):
+        course_name = est.course_name if est.course_name else "N/A"
+        return (est.id, est.identificacion, est.nombre, est.apellido, course_name)
+
+    def show_students(self, estudiantes, notify_empty=True):
+        # Only the rows that differ from what is already shown are touched
+        apply_rows(self.tree, [(est.id, self.student_row(est)) for est in estudiantes])
+        if not estudiantes and notify_empty:
             messagebox.showinfo("Información", "No se han encontrado estudiantes.")
 
+    def upsert_students(self, estudiantes):
+        for est in estudiantes:
+            if est:
+                upsert_row(self.tree, est.id, self.student_row(est))
+
     def on_student_double_click(self, event):
         try:
             selected = self.tree.selection()
             if selected:
                 item = self.tree.item(selected[0])
                 student_identificacion = item["values"][1]
-                StudentDetailsWindow(self.db, student_identificacion)
+                StudentDetailsWindow(self.db, student_identificacion, self.data)
         except Exception as e:
             error_details = traceback.format_exc()
             messagebox.showerror("Error", f"Error al abrir los detalles del estudiante:\n{error_details}")
@@ -344,7 +538,14 @@ class AppUI:
             return
         item = self.tree.item(selected[0])
         estudiante_data = item["values"]
-        pdf = FPDF()
+        # Solo se emite paz y salvo si el estudiante no tiene saldo pendiente según su plan de pagos
+        eligible, balance = self.tuition_controller.check_paz_y_salvo(estudiante_data[0])
+        if not eligible:
+            messagebox.showwarning("Saldo pendiente",
+                                   f"El estudiante tiene un saldo pendiente de $ {format_cents(balance)}. "
+                                   "No se puede generar el paz y salvo.")
+            return
+        pdf = ReportPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
         pdf.cell(200, 10, txt="Paz y Salvo", ln=True, align="C")
@@ -357,8 +558,9 @@ class AppUI:
         pdf.ln(10)
         pdf.cell(50, 10, txt="Fecha de emisión: " + datetime.date.today().strftime("%d/%m/%Y"))
         pdf_file = f"paz_y_salvo_estudiante_{estudiante_data[0]}.pdf"
-        pdf.output(pdf_file)
-        messagebox.showinfo("PDF generado", f"El PDF '{pdf_file}' ha sido generado correctamente.")
+        size, seconds = pdf.save(pdf_file)
+        messagebox.showinfo("PDF generado", f"El PDF '{pdf_file}' ha sido generado correctamente "
+                                            f"({describe_output(size, seconds)}).")
 
     def export_students_excel(self):
         try:
@@ -390,15 +592,173 @@ class AppUI:
         except Exception as e:
             messagebox.showerror("Error", f"Error al exportar a PDF: {str(e)}")
 
+    def run_export(self, button, export, on_done, error_message):
+        """
+        Ejecuta export(db) en el hilo de datos, con su conexión, para que la ventana no se
+        congele mientras se escribe el archivo. El botón queda desactivado hasta que termina.
+        """
+        button.configure(state="disabled")
+
+        def done(summary):
+            button.configure(state="normal")
+            on_done(summary)
+
+        def failed(error):
+            button.configure(state="normal")
+            messagebox.showerror("Error", f"{error_message}: {error}")
+        self.data.submit(lambda controllers: export(controllers["payments"].db), done, error_callback=failed)
+
+    def export_receipts_range(self):
+        try:
+            start_date = simpledialog.askstring("Exportar Recibos", "Fecha inicial (AAAA-MM-DD):", parent=self.root)
+            if not start_date:
+                return
+            end_date = simpledialog.askstring("Exportar Recibos", "Fecha final (AAAA-MM-DD):", parent=self.root)
+            if not end_date:
+                return
+            try:
+                datetime.datetime.strptime(start_date.strip(), "%Y-%m-%d")
+                datetime.datetime.strptime(end_date.strip(), "%Y-%m-%d")
+            except ValueError:
+                messagebox.showwarning("Valor inválido", "Las fechas deben tener el formato AAAA-MM-DD.")
+                return
+            default_filename = f"{self.school_name}_Recibos_{start_date.strip()}_{end_date.strip()}.zip"
+            file_path = asksaveasfilename(defaultextension=".zip",
+                                          filetypes=[("ZIP files", "*.zip")],
+                                          initialfile=default_filename)
+            if not file_path:
+                return
+            start_date, end_date = start_date.strip(), end_date.strip()
+            self.run_export(
+                self.btn_export_receipts,
+                lambda db: ReceiptArchive(db).export_range(start_date, end_date, file_path),
+                lambda count: messagebox.showinfo("Exportación exitosa", f"{count} recibos exportados a: {file_path}"),
+                "Error al exportar los recibos"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar los recibos: {str(e)}")
+
+    def export_payment_ledger(self):
+        try:
+            start_date = simpledialog.askstring("Libro de Pagos", "Fecha inicial (AAAA-MM-DD):", parent=self.root)
+            if not start_date:
+                return
+            end_date = simpledialog.askstring("Libro de Pagos", "Fecha final (AAAA-MM-DD):", parent=self.root)
+            if not end_date:
+                return
+            start_date, end_date = start_date.strip(), end_date.strip()
+            try:
+                datetime.datetime.strptime(start_date, "%Y-%m-%d")
+                datetime.datetime.strptime(end_date, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showwarning("Valor inválido", "Las fechas deben tener el formato AAAA-MM-DD.")
+                return
+            file_path = asksaveasfilename(defaultextension=".csv",
+                                          filetypes=[("CSV files", "*.csv"), ("Libro columnar", "*.ledger")],
+                                          initialfile=f"{self.school_name}_Libro_Pagos_{start_date}_{end_date}.csv")
+            if not file_path:
+                return
+            self.run_export(
+                self.btn_export_ledger,
+                lambda db: export_ledger(db, start_date, end_date, file_path),
+                lambda summary: messagebox.showinfo(
+                    "Exportación exitosa",
+                    f"{summary['rows']} pagos exportados en {summary['seconds']:.1f} s: {file_path}"),
+                "Error al exportar el libro de pagos"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar el libro de pagos: {str(e)}")
+
+    def export_family_statements(self):
+        """Estados de cuenta de todas las familias de un mes, un PDF por acudiente en un ZIP."""
+        try:
+            month = simpledialog.askstring("Estados por Familia", "Mes (AAAA-MM):",
+                                           initialvalue=datetime.date.today().strftime("%Y-%m"), parent=self.root)
+            if not month:
+                return
+            try:
+                first_day = datetime.datetime.strptime(month.strip(), "%Y-%m").date()
+            except ValueError:
+                messagebox.showwarning("Valor inválido", "El mes debe tener el formato AAAA-MM.")
+                return
+            next_month = (first_day + datetime.timedelta(days=32)).replace(day=1)
+            start_date = first_day.isoformat()
+            end_date = (next_month - datetime.timedelta(days=1)).isoformat()
+            file_path = asksaveasfilename(defaultextension=".zip",
+                                          filetypes=[("ZIP files", "*.zip")],
+                                          initialfile=f"{self.school_name}_Familias_{month.strip()}.zip")
+            if not file_path:
+                return
+            school_name, logo_path = self.school_name, self.abs_logo_path
+            self.run_export(
+                self.btn_family_statements,
+                lambda db: export_family_statements(db, start_date, end_date, file_path, school_name, logo_path),
+                lambda summary: messagebox.showinfo(
+                    "Exportación exitosa",
+                    f"{summary['families']} estados de cuenta ({summary['students']} estudiantes) "
+                    f"en {summary['seconds']:.1f} s: {file_path}"),
+                "Error al generar los estados de cuenta"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al generar los estados de cuenta: {str(e)}")
+
+    def export_changes(self):
+        """
+        Exportación incremental: solo los estudiantes o pagos que cambiaron desde la
+        última exportación al mismo destino (la primera vez se exporta todo).
+        """
+        try:
+            target = simpledialog.askstring("Exportar Cambios", "Destino (por ejemplo: ministerio, contabilidad):", parent=self.root)
+            if not target or not target.strip():
+                return
+            dataset_name = simpledialog.askstring("Exportar Cambios", "Datos a exportar (estudiantes o pagos):",
+                                                  initialvalue="estudiantes", parent=self.root)
+            datasets = {"estudiantes": "students", "pagos": "payments"}
+            if not dataset_name:
+                return
+            dataset = datasets.get(dataset_name.strip().lower())
+            if not dataset:
+                messagebox.showwarning("Valor inválido", "Indique 'estudiantes' o 'pagos'.")
+                return
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            file_path = asksaveasfilename(defaultextension=".csv",
+                                          filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx")],
+                                          initialfile=f"{target.strip()}_{dataset_name.strip().lower()}_{timestamp}.csv")
+            if not file_path:
+                return
+            fmt = "xlsx" if file_path.lower().endswith(".xlsx") else "csv"
+            target = target.strip()
+
+            def show_summary(summary):
+                mode = "completa" if summary["full"] else "incremental"
+                messagebox.showinfo("Exportación exitosa",
+                                    f"Exportación {mode}: {summary['rows']} filas nuevas o modificadas, "
+                                    f"{summary['deleted']} eliminadas.\n{file_path}")
+            self.run_export(
+                self.btn_export_changes,
+                lambda db: DeltaExporter(db).export(target, dataset, file_path, fmt),
+                show_summary,
+                "Error al exportar los cambios"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar los cambios: {str(e)}")
+
     def logout(self):
         confirm = messagebox.askyesno("Cerrar Sesión", "¿Está seguro de cerrar la sesión?")
         if confirm:
+            self.changes.close()
+            self.data.close()
             self.root.destroy()
-            LoginUI(self.db).run()
+            self.monitor.end_session(self.user.username)
+            LoginUI(self.db, self.registry, self.campus).run()
 
     def open_change_password_window(self):
         ChangePasswordWindow(self.root, self.user_controller, self.user.username)
 
     def run(self):
         self.refrescar_lista()
+        if self.user.role == "admin":
+            # Empieza a contar las filas insertadas y borradas para el panel "Estado del sistema"
+            self.data.submit(lambda controllers: controllers["status"].get_status(), None)
+        self.root.after(5000, self.run_scheduled_maintenance)
         self.root.mainloop()
\ No newline at end of file
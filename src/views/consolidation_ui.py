@@ -0,0 +1,119 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import threading
+from src.controllers.consolidation_controller import ConsolidationController
+from src.utils.money import format_cents
+
+class ConsolidationUI:
+    """
+    Totales de todas las sedes: recaudo por mes y matrícula por curso, leídos de la base
+    consolidada. "Sincronizar" copia lo nuevo de cada sede antes de consultar.
+    """
+    def __init__(self, campuses):
+        self.campuses = {campus.key: campus for campus in campuses}
+        self.controller = ConsolidationController(campuses)
+        self.window = tk.Toplevel()
+        self.window.title("Consolidado de Sedes")
+        self.window.geometry("720x480")
+        self.worker = None
+        self.result = None
+        self.create_widgets()
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.load_totals()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        self.sync_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.sync_var, wraplength=680, justify="left").pack(anchor="w", pady=5)
+
+        notebook = ttk.Notebook(frame)
+        notebook.pack(fill="both", expand=True)
+        self.trees = {}
+        tabs = [
+            ("revenue", "Recaudo por Mes", {"month": ("Mes", 100), "campus": ("Sede", 200),
+                                            "payments": ("Pagos", 100), "amount": ("Valor", 140)}),
+            ("enrollment", "Matrícula", {"campus": ("Sede", 200), "course": ("Curso", 200),
+                                         "students": ("Estudiantes", 120)}),
+        ]
+        for key, title, columns in tabs:
+            tab = ttk.Frame(notebook)
+            notebook.add(tab, text=title)
+            tree = ttk.Treeview(tab, columns=tuple(columns), show="headings")
+            for col, (heading, width) in columns.items():
+                tree.heading(col, text=heading)
+                tree.column(col, width=width, anchor="w" if col in ("campus", "course") else "center")
+            tree.pack(fill="both", expand=True)
+            self.trees[key] = tree
+        self.btn_sync = ttk.Button(frame, text="Sincronizar", command=self.sync)
+        self.btn_sync.pack(pady=5)
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.controller.close()
+
+    def campus_name(self, key):
+        campus = self.campuses.get(key)
+        return campus.name if campus else key
+
+    def load_totals(self):
+        marks = self.controller.get_sync_marks()
+        if marks:
+            self.sync_var.set("Última sincronización: " + ", ".join(
+                f"{self.campus_name(campus)} {synced_at}" for campus, _, _, _, synced_at in marks))
+        else:
+            self.sync_var.set("La base consolidada está vacía. Presione Sincronizar.")
+        # Cada mes lleva una fila por sede y una fila con el total de todas las sedes
+        totals = {row.month: row for row in self.controller.get_revenue(by_campus=False)}
+        rows = []
+        for row in self.controller.get_revenue():
+            if rows and rows[-1][0] != row.month:
+                rows.append(self.revenue_total_row(totals[rows[-1][0]]))
+            rows.append((row.month, self.campus_name(row.campus), row.payments, format_cents(row.amount_cents)))
+        if rows:
+            rows.append(self.revenue_total_row(totals[rows[-1][0]]))
+        self.fill("revenue", rows)
+        self.fill("enrollment", [(self.campus_name(row.campus), row.course_name or "Sin curso", row.students)
+                                 for row in self.controller.get_enrollment()])
+
+    def revenue_total_row(self, total):
+        return (total.month, "Todas las sedes", total.payments, format_cents(total.amount_cents))
+
+    def fill(self, key, rows):
+        tree = self.trees[key]
+        tree.delete(*tree.get_children())
+        for values in rows:
+            tree.insert("", "end", values=values)
+
+    def sync(self):
+        if self.worker and self.worker.is_alive():
+            return
+        # La sincronización abre su propia conexión: se ejecuta en un hilo y se consulta con 'after'
+        self.btn_sync.configure(state="disabled")
+        self.sync_var.set("Sincronizando...")
+        self.result = None
+        campuses = list(self.campuses.values())
+
+        def target():
+            controller = ConsolidationController(campuses)
+            try:
+                self.result = controller.sync_all()
+            finally:
+                controller.close()
+
+        self.worker = threading.Thread(target=target, daemon=True)
+        self.worker.start()
+        self.window.after(100, self.poll_worker)
+
+    def poll_worker(self):
+        if self.worker.is_alive():
+            self.window.after(100, self.poll_worker)
+            return
+        self.btn_sync.configure(state="normal")
+        if self.result is None:
+            messagebox.showerror("Error", "No se pudo sincronizar la base consolidada.")
+            return
+        success, msg, _ = self.result
+        self.load_totals()
+        if not success:
+            messagebox.showerror("Error", msg)
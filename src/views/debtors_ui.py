@@ -0,0 +1,51 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from src.utils.money import format_cents
+
+class DebtorsUI:
+    """Listado de estudiantes activos con saldo pendiente a la fecha de hoy."""
+    def __init__(self, data):
+        self.data = data
+        self.window = tk.Toplevel()
+        self.window.title("Estudiantes con Saldo Pendiente")
+        self.window.geometry("820x450")
+        self.create_widgets()
+        self.load_debtors()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        self.summary_var = tk.StringVar(value="Calculando saldos...")
+        ttk.Label(frame, textvariable=self.summary_var).pack(anchor="w", pady=5)
+        columns = ("identificacion", "nombre", "curso", "owed", "paid", "balance")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings")
+        headings = {"identificacion": "Identificación", "nombre": "Nombre", "curso": "Curso",
+                    "owed": "A la fecha", "paid": "Pagado", "balance": "Saldo"}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, anchor="e" if col in ("owed", "paid", "balance") else "w", width=120)
+        self.tree.pack(fill="both", expand=True)
+
+    def load_debtors(self):
+        # El nombre del curso sale de la caché id→nombre de CourseController
+        self.data.submit(
+            lambda controllers: (controllers["tuition"].get_debtors(),
+                                 controllers["courses"].get_course_names()),
+            self.show_debtors,
+            key="debtors",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al calcular los saldos: {e}")
+        )
+
+    def show_debtors(self, result):
+        debtors, course_names = result
+        for debtor in debtors:
+            self.tree.insert("", "end", iid=str(debtor.student_id), values=(
+                debtor.identificacion,
+                f"{debtor.nombre or ''} {debtor.apellido or ''}".title(),
+                course_names.get(debtor.course_id, ""),
+                format_cents(debtor.owed),
+                format_cents(debtor.paid),
+                format_cents(debtor.balance),
+            ))
+        total = sum(debtor.balance for debtor in debtors)
+        self.summary_var.set(f"{len(debtors)} estudiantes con saldo pendiente. Total: $ {format_cents(total)}")
@@ -0,0 +1,80 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from src.controllers.duplicate_controller import DuplicateController
+
+class DuplicatesUI:
+    """
+    Revisión de posibles estudiantes duplicados en todo el colegio. Los pares seleccionados
+    se unen en lote: se conserva el registro más antiguo y recibe los pagos del otro.
+    """
+    def __init__(self, db, data):
+        self.db = db
+        self.data = data
+        self.duplicate_controller = DuplicateController(db)
+        self.pairs = {}
+        self.window = tk.Toplevel()
+        self.window.title("Posibles Estudiantes Duplicados")
+        self.window.geometry("820x450")
+        self.create_widgets()
+        self.load_pairs()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        self.summary_var = tk.StringVar(value="Buscando duplicados...")
+        ttk.Label(frame, textvariable=self.summary_var).pack(anchor="w", pady=5)
+        columns = ("keep", "duplicate", "score", "reasons")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings")
+        headings = {"keep": "Se conserva", "duplicate": "Duplicado", "score": "Puntaje", "reasons": "Razones"}
+        widths = {"keep": 230, "duplicate": 230, "score": 70, "reasons": 250}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, width=widths[col], anchor="center" if col == "score" else "w")
+        self.tree.pack(fill="both", expand=True)
+        ttk.Button(frame, text="Unir Seleccionados", command=self.merge_selected).pack(pady=10)
+
+    def load_pairs(self):
+        self.data.submit(
+            lambda controllers: controllers["duplicates"].scan_all(),
+            self.show_pairs,
+            key="duplicates_scan",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al buscar duplicados: {e}")
+        )
+
+    def show_pairs(self, pairs):
+        self.tree.delete(*self.tree.get_children())
+        self.pairs = {}
+        for student, candidate in pairs:
+            # Se conserva el registro más antiguo (id menor)
+            keep, duplicate = sorted((student, candidate.student), key=lambda s: s.id)
+            iid = f"{duplicate.id}-{keep.id}"
+            self.pairs[iid] = (duplicate.id, keep.id)
+            self.tree.insert("", "end", iid=iid, values=(
+                f"{keep.identificacion} - {keep.nombre} {keep.apellido}",
+                f"{duplicate.identificacion} - {duplicate.nombre} {duplicate.apellido}",
+                f"{candidate.score:.2f}",
+                ", ".join(candidate.reasons),
+            ))
+        self.summary_var.set(f"{len(pairs)} posibles duplicados.")
+
+    def merge_selected(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("Sin selección", "Seleccione los pares que desea unir.")
+            return
+        merges = {}
+        for iid in selected:
+            duplicate_id, keep_id = self.pairs[iid]
+            if duplicate_id in merges or duplicate_id in merges.values() or keep_id in merges:
+                messagebox.showwarning("Advertencia", "Un mismo estudiante aparece en varios pares seleccionados. "
+                                                      "Únalos por separado.")
+                return
+            merges[duplicate_id] = keep_id
+        if not messagebox.askyesno("Confirmar", f"Se unirán {len(merges)} estudiantes duplicados. ¿Desea continuar?"):
+            return
+        success, msg = self.duplicate_controller.merge_students(merges)
+        if success:
+            messagebox.showinfo("Éxito", msg)
+            self.load_pairs()
+        else:
+            messagebox.showerror("Error", msg)
@@ -0,0 +1,182 @@
+import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+from src.models.delivery import DELIVERY_STATUS_NAMES, DELIVERY_PENDING, DELIVERY_SENDING, DELIVERY_SENT, DELIVERY_FAILED
+from src.utils.mailer import get_delivery_worker
+
+# Cada cuántos milisegundos se actualiza el resumen de envíos mientras hay correos en cola
+DELIVERY_POLL_MS = 1000
+
+class GuardiansUI:
+    """
+    Acudientes con sus correos y envío de los estados de cuenta del mes. Los estados se
+    generan y encolan en el hilo de datos; el envío lo hace el hilo de correos
+    (src.utils.mailer), y esta ventana solo muestra el avance.
+    """
+    def __init__(self, db, data, school_name, logo_path):
+        self.db = db
+        self.data = data
+        self.school_name = school_name
+        self.logo_path = logo_path
+        self.guardians = {}
+        self._poll_id = None
+        self.window = tk.Toplevel()
+        self.window.title("Acudientes")
+        self.window.geometry("760x480")
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.create_widgets()
+        self.load_guardians()
+        self.load_summary()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        search_frame = ttk.Frame(frame)
+        search_frame.pack(fill="x", pady=5)
+        ttk.Label(search_frame, text="Buscar (nombre o teléfono):").pack(side="left")
+        self.search_var = tk.StringVar()
+        entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        entry.pack(side="left", padx=5)
+        entry.bind("<KeyRelease>", lambda event: self.load_guardians())
+
+        columns = ("nombre", "telefono", "email", "children")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings")
+        headings = {"nombre": "Acudiente", "telefono": "Teléfono", "email": "Correo", "children": "Estudiantes"}
+        widths = {"nombre": 250, "telefono": 130, "email": 250, "children": 90}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, width=widths[col], anchor="center" if col == "children" else "w")
+        self.tree.pack(fill="both", expand=True)
+        self.tree.bind("<Double-1>", lambda event: self.edit_email())
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill="x", pady=5)
+        ttk.Button(buttons, text="Editar Correo", command=self.edit_email).pack(side="left", padx=5)
+        self.btn_send = ttk.Button(buttons, text="Enviar Estados del Mes", command=self.send_statements)
+        self.btn_send.pack(side="left", padx=5)
+        ttk.Button(buttons, text="Reintentar Fallidos", command=self.retry_failed).pack(side="left", padx=5)
+
+        self.summary_var = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=self.summary_var).pack(anchor="w", pady=5)
+
+    def on_destroy(self, event):
+        if event.widget is self.window and self._poll_id is not None:
+            self.window.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def load_guardians(self):
+        search = self.search_var.get().strip()
+        self.data.submit(
+            lambda controllers: controllers["guardians"].get_guardians(search),
+            self.show_guardians,
+            key="guardians_list",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al cargar los acudientes: {e}")
+        )
+
+    def show_guardians(self, guardians):
+        self.tree.delete(*self.tree.get_children())
+        self.guardians = {}
+        for guardian in guardians:
+            self.guardians[str(guardian.id)] = guardian
+            self.tree.insert("", "end", iid=str(guardian.id), values=(
+                guardian.nombre, guardian.telefono or "", guardian.email or "", guardian.children))
+
+    def edit_email(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("Sin selección", "Seleccione un acudiente.")
+            return
+        guardian = self.guardians[selected[0]]
+        email = simpledialog.askstring("Correo del Acudiente", f"Correo de {guardian.nombre}:",
+                                       initialvalue=guardian.email or "", parent=self.window)
+        if email is None:
+            return
+        self.data.submit(
+            lambda controllers: controllers["guardians"].set_email(guardian.id, email),
+            self.on_email_saved,
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al guardar el correo: {e}")
+        )
+
+    def on_email_saved(self, result):
+        success, msg = result
+        if success:
+            self.load_guardians()
+        else:
+            messagebox.showerror("Error", msg, parent=self.window)
+
+    def send_statements(self):
+        """Encola el estado de cuenta del mes de cada familia con correo y arranca el envío."""
+        month = simpledialog.askstring("Enviar Estados del Mes", "Mes (AAAA-MM):",
+                                       initialvalue=datetime.date.today().strftime("%Y-%m"), parent=self.window)
+        if not month:
+            return
+        try:
+            first_day = datetime.datetime.strptime(month.strip(), "%Y-%m").date()
+        except ValueError:
+            messagebox.showwarning("Valor inválido", "El mes debe tener el formato AAAA-MM.", parent=self.window)
+            return
+        next_month = (first_day + datetime.timedelta(days=32)).replace(day=1)
+        start_date = first_day.isoformat()
+        end_date = (next_month - datetime.timedelta(days=1)).isoformat()
+        if not messagebox.askyesno("Confirmar", f"Se enviará el estado de cuenta de {month.strip()} a todos los "
+                                                "acudientes con correo. ¿Desea continuar?", parent=self.window):
+            return
+        self.btn_send.configure(state="disabled")
+        self.summary_var.set("Generando estados de cuenta...")
+        self.data.submit(
+            lambda controllers: controllers["deliveries"].queue_family_statements(
+                start_date, end_date, self.school_name, self.logo_path),
+            self.on_statements_queued,
+            error_callback=self.on_queue_error
+        )
+
+    def on_queue_error(self, error):
+        self.btn_send.configure(state="normal")
+        messagebox.showerror("Error", f"Error al generar los estados de cuenta: {error}", parent=self.window)
+
+    def on_statements_queued(self, result):
+        success, msg, _ = result
+        self.btn_send.configure(state="normal")
+        if not success:
+            messagebox.showerror("Error", msg, parent=self.window)
+            return
+        get_delivery_worker(self.db.db_name).start()
+        messagebox.showinfo("Envío en curso", msg, parent=self.window)
+        self.load_summary()
+
+    def retry_failed(self):
+        self.data.submit(
+            lambda controllers: controllers["deliveries"].retry_failed(),
+            self.on_retry,
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al reintentar los correos: {e}")
+        )
+
+    def on_retry(self, result):
+        success, msg = result
+        if not success:
+            messagebox.showerror("Error", msg, parent=self.window)
+            return
+        get_delivery_worker(self.db.db_name).start()
+        messagebox.showinfo("Reintento", msg, parent=self.window)
+        self.load_summary()
+
+    def load_summary(self):
+        self._poll_id = None
+        self.data.submit(
+            lambda controllers: controllers["deliveries"].get_summary(),
+            self.show_summary,
+            key="deliveries_summary"
+        )
+
+    def show_summary(self, counts):
+        parts = [f"{DELIVERY_STATUS_NAMES[status]}: {counts.get(status, 0)}"
+                 for status in (DELIVERY_PENDING, DELIVERY_SENDING, DELIVERY_SENT, DELIVERY_FAILED)]
+        worker = get_delivery_worker(self.db.db_name)
+        if worker.is_running():
+            parts.append("enviando...")
+        elif worker.last_summary and worker.last_summary["retry"]:
+            parts.append("los correos en espera se reintentarán en el próximo envío")
+        self.summary_var.set("Correos - " + ", ".join(parts))
+        # Mientras el hilo de correos trabaja, el resumen se actualiza solo
+        if worker.is_running() and self._poll_id is None:
+            self._poll_id = self.window.after(DELIVERY_POLL_MS, self.load_summary)
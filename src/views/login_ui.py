@@ -4,50 +4,87 @@ from PIL import Image, ImageTk
 import os
 from src.controllers.user_controller import UserController
 from src.controllers.config_controller import ConfigController
+from src.utils.ui_monitor import get_ui_monitor
 
 class LoginUI:
-    def __init__(self, db):
+    def __init__(self, db, registry=None, campus=None):
         self.db = db
+        # Sedes: si hay más de una se elige aquí; cada sede tiene su propia base de datos
+        self.registry = registry
+        self.campus = campus
         self.user_controller = UserController(self.db)
         self.config_controller = ConfigController(db)
+        # Se instala antes de crear los widgets para medir sus manejadores
+        self.monitor = get_ui_monitor()
         self.root = tk.Tk()
         self.root.title("Login - Sistema Colegio")
         self.root.geometry("400x350")
         self.create_widgets()
+        self.monitor.watch(self.root)
 
     def create_widgets(self):
         # Header with logo and school name
         header_frame = ttk.Frame(self.root)
         header_frame.pack(pady=10)
-        configs = self.config_controller.get_all_configs()
+        self.logo = None
+        self.logo_label = ttk.Label(header_frame)
+        self.logo_label.pack()
+        self.name_label = ttk.Label(header_frame, font=("Arial", 16, "bold"))
+        self.name_label.pack(pady=5)
+        self.show_school_header()
+        
+        # Login form
+        frame = ttk.Frame(self.root, padding=20)
+        frame.pack(expand=True)
+        ttk.Label(frame, text="Usuario:").grid(row=0, column=0, pady=5, sticky="w")
+        self.entry_username = ttk.Entry(frame)
+        self.entry_username.grid(row=0, column=1, pady=5)
+        ttk.Label(frame, text="Contraseña:").grid(row=1, column=0, pady=5, sticky="w")
+        self.entry_password = ttk.Entry(frame, show="*")
+        self.entry_password.grid(row=1, column=1, pady=5)
+        self.btn_login = ttk.Button(frame, text="Iniciar Sesión", command=self.attempt_login)
+        self.btn_login.grid(row=3, column=0, columnspan=2, pady=10)
+        if self.registry is not None and len(self.registry) > 1:
+            ttk.Label(frame, text="Sede:").grid(row=2, column=0, pady=5, sticky="w")
+            self.campus_names = {campus.name: campus.key for campus in self.registry.list()}
+            self.combo_campus = ttk.Combobox(frame, state="readonly", values=list(self.campus_names))
+            self.combo_campus.set(self.registry.get(self.campus).name)
+            self.combo_campus.grid(row=2, column=1, pady=5)
+            self.combo_campus.bind("<<ComboboxSelected>>", self.on_campus_selected)
+
+    def get_configs(self):
+        if self.registry is not None:
+            return self.registry.get_config(self.campus)
+        return self.config_controller.get_all_configs()
+
+    def show_school_header(self):
+        configs = self.get_configs()
         school_name = configs.get("SCHOOL_NAME", "Colegio Ejemplo")
         logo_path = configs.get("LOGO_PATH", "logo.png")
         abs_logo_path = os.path.abspath(logo_path)
+        self.logo = None
         if os.path.exists(abs_logo_path):
             try:
                 image = Image.open(abs_logo_path)
                 image = image.resize((80, 80), Image.LANCZOS)
                 self.logo = ImageTk.PhotoImage(image)
-                logo_label = ttk.Label(header_frame, image=self.logo)
-                logo_label.pack()
             except Exception as e:
                 print(f"Error al cargar el logo: {e}")
         else:
             print(f"No se encontró la imagen en: {abs_logo_path}")
-        name_label = ttk.Label(header_frame, text=school_name, font=("Arial", 16, "bold"))
-        name_label.pack(pady=5)
-        
-        # Login form
-        frame = ttk.Frame(self.root, padding=20)
-        frame.pack(expand=True)
-        ttk.Label(frame, text="Usuario:").grid(row=0, column=0, pady=5, sticky="w")
-        self.entry_username = ttk.Entry(frame)
-        self.entry_username.grid(row=0, column=1, pady=5)
-        ttk.Label(frame, text="Contraseña:").grid(row=1, column=0, pady=5, sticky="w")
-        self.entry_password = ttk.Entry(frame, show="*")
-        self.entry_password.grid(row=1, column=1, pady=5)
-        self.btn_login = ttk.Button(frame, text="Iniciar Sesión", command=self.attempt_login)
-        self.btn_login.grid(row=2, column=0, columnspan=2, pady=10)
+        self.logo_label.configure(image=self.logo or "")
+        self.name_label.configure(text=school_name)
+
+    def on_campus_selected(self, event=None):
+        """Cambia a la base de datos de la sede elegida; su conexión queda abierta en el registro."""
+        campus = self.campus_names[self.combo_campus.get()]
+        if campus == self.campus:
+            return
+        self.campus = campus
+        self.db = self.registry.connect(campus)
+        self.user_controller = UserController(self.db)
+        self.config_controller = ConfigController(self.db)
+        self.show_school_header()
 
     def attempt_login(self):
         username = self.entry_username.get()
@@ -57,7 +94,7 @@ class LoginUI:
             messagebox.showinfo("Éxito", f"Bienvenido, {user.username}!")
             self.root.destroy()
             from src.views.app_ui import AppUI  # Import locally to avoid circular dependency
-            app = AppUI(self.db, user)
+            app = AppUI(self.db, user, self.registry, self.campus)
             app.run()
         else:
             messagebox.showerror("Error", "Usuario o contraseña incorrectos.")
@@ -0,0 +1,89 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import threading
+from src.controllers.maintenance_controller import MaintenanceController
+
+class MaintenanceUI:
+    def __init__(self, db):
+        self.db = db
+        self.maintenance_controller = MaintenanceController(db)
+        self.window = tk.Toplevel()
+        self.window.title("Mantenimiento de la Base de Datos")
+        self.window.geometry("520x300")
+        self.worker = None
+        self.result = None
+        self.create_widgets()
+        self.refresh_status()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+
+        self.status_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.status_var, justify="left").pack(anchor="w", pady=5)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(pady=10)
+        self.btn_backup = ttk.Button(buttons, text="Crear Respaldo", command=self.create_backup)
+        self.btn_backup.grid(row=0, column=0, padx=5)
+        self.btn_optimize = ttk.Button(buttons, text="Optimizar Base de Datos", command=self.optimize)
+        self.btn_optimize.grid(row=0, column=1, padx=5)
+
+        self.result_text = tk.Text(frame, height=8, width=60, state="disabled", wrap="word")
+        self.result_text.pack(fill="both", expand=True)
+
+    def refresh_status(self):
+        last_backup = self.maintenance_controller.get_last_backup_time()
+        snapshots = self.maintenance_controller.list_snapshots()
+        last_text = last_backup.strftime("%d/%m/%Y %H:%M") if last_backup else "Nunca"
+        self.status_var.set(
+            f"Último respaldo: {last_text}\n"
+            f"Copias guardadas: {len(snapshots)} (se conservan {self.maintenance_controller.retention})"
+        )
+
+    def create_backup(self):
+        self.run_in_background(self.maintenance_controller.backup)
+
+    def optimize(self):
+        confirm = messagebox.askyesno(
+            "Confirmar", "La optimización puede tardar unos segundos en bases de datos grandes. ¿Desea continuar?"
+        )
+        if confirm:
+            self.run_in_background(self.maintenance_controller.optimize)
+
+    def run_in_background(self, task):
+        """
+        Ejecuta la tarea en un hilo aparte (la tarea usa su propia conexión) y
+        consulta el resultado con 'after' para no bloquear la interfaz.
+        """
+        if self.worker and self.worker.is_alive():
+            return
+        self.btn_backup.configure(state="disabled")
+        self.btn_optimize.configure(state="disabled")
+        self.show_result("Procesando...")
+        self.result = None
+
+        def target():
+            self.result = task()
+
+        self.worker = threading.Thread(target=target, daemon=True)
+        self.worker.start()
+        self.window.after(100, self.poll_worker)
+
+    def poll_worker(self):
+        if self.worker.is_alive():
+            self.window.after(100, self.poll_worker)
+            return
+        self.btn_backup.configure(state="normal")
+        self.btn_optimize.configure(state="normal")
+        success, msg, _ = self.result
+        self.show_result(msg)
+        self.refresh_status()
+        if not success:
+            messagebox.showerror("Error", msg)
+
+    def show_result(self, text):
+        self.result_text.configure(state="normal")
+        self.result_text.delete("1.0", tk.END)
+        self.result_text.insert(tk.END, text)
+        self.result_text.configure(state="disabled")
@@ -1,25 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from fpdf import FPDF
 from src.controllers.payment_controller import PaymentController
 from src.controllers.student_controller import StudentController
 from src.controllers.config_controller import ConfigController  # To retrieve school settings from the DB
+from src.utils.receipts import ReceiptArchive, render_receipt_pdf
+from src.utils.money import parse_amount
+from src.utils.async_data import AsyncDataFacade
+from src.utils.mailer import get_delivery_worker
 from config import SCHOOL_NAME as DEFAULT_SCHOOL_NAME, LOGO_PATH as DEFAULT_LOGO_PATH
-import datetime
 import traceback
 
+def filter_students(students, query):
+    if not query:
+        return students
+    return [
+        student for student in students
+        if query in str(student.identificacion).lower() or 
+           query in student.nombre.lower() or 
+           query in student.apellido.lower()
+    ]
+
 class PaymentUI:
-    def __init__(self, db):
+    def __init__(self, db, data=None):
         self.db = db
         self.payment_controller = PaymentController(db)
         self.student_controller = StudentController(db)
         # Create a ConfigController to fetch configuration values from the database.
         self.config_controller = ConfigController(db)
+        self.receipt_archive = ReceiptArchive(db)
         
         self.selected_student = None
         self.window = tk.Toplevel()
         self.window.title("Registrar Pago")
         self.window.geometry("600x400")
+        # Background data access; when opened standalone the window owns its own facade.
+        self.owns_data = data is None
+        self.data = data or AsyncDataFacade(db, self.window)
+        if self.owns_data:
+            self.window.bind("<Destroy>", self.on_destroy)
         self.create_widgets()
 
     def create_widgets(self):
@@ -61,33 +79,30 @@ class PaymentUI:
         btn_register = ttk.Button(self.window, text="Registrar Pago", command=self.register_payment)
         btn_register.pack(pady=10)
         
+        self.btn_register = btn_register
+        
         # Initially populate the listbox with all students.
-        self.populate_students_listbox(self.student_controller.get_all_students())
+        self.on_search(None)
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.data.close()
 
     def on_search(self, event):
         query = self.search_var.get().lower().strip()
-        try:
-            # Fetch all students from the database.
-            all_students = self.student_controller.get_all_students()
-            if query:
-                filtered_students = [
-                    student for student in all_students
-                    if query in str(student["identificacion"]).lower() or 
-                       query in student["nombre"].lower() or 
-                       query in student["apellido"].lower()
-                ]
-            else:
-                filtered_students = all_students
-            self.populate_students_listbox(filtered_students)
-        except Exception as e:
-            traceback.print_exc()
-            messagebox.showerror("Error", f"Error al buscar alumnos: {e}")
+        # Search on the data thread; each keystroke cancels the previous, now stale, search.
+        self.data.submit(
+            lambda controllers: filter_students(controllers["students"].get_all_students(), query),
+            self.populate_students_listbox,
+            key="student_search",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al buscar alumnos: {e}")
+        )
 
     def populate_students_listbox(self, students):
         self.results_listbox.delete(0, tk.END)
         self.students_data = []  # Mapping between listbox indices and student data.
         for student in students:
-            full_name = f"{student['identificacion']} - {student['nombre']} {student['apellido']}"
+            full_name = f"{student.identificacion} - {student.nombre} {student.apellido}"
             self.results_listbox.insert(tk.END, full_name.title())
             self.students_data.append(student)
 
@@ -97,7 +112,7 @@ class PaymentUI:
             if selection:
                 index = selection[0]
                 self.selected_student = self.students_data[index]
-                display_text = f"{self.selected_student['identificacion']} - {self.selected_student['nombre']} {self.selected_student['apellido']}"
+                display_text = f"{self.selected_student.identificacion} - {self.selected_student.nombre} {self.selected_student.apellido}"
                 self.selected_student_var.set(display_text.title())
             else:
                 self.selected_student = None
@@ -115,81 +130,56 @@ class PaymentUI:
             messagebox.showwarning("Campos incompletos", "Ingrese el monto.")
             return
         try:
-            amount = float(amount_text)
+            amount_cents = parse_amount(amount_text)
         except ValueError:
             messagebox.showwarning("Valor inválido", "El monto debe ser numérico.")
             return
         description = self.entry_description.get()
-        success, msg, receipt_number, payment_date = self.payment_controller.register_payment(
-            self.selected_student["id"], amount, description
+        student = self.selected_student
+        # Disable the button until the write finishes so the payment cannot be submitted twice.
+        self.btn_register.configure(state="disabled")
+        self.data.submit(
+            lambda controllers: controllers["payments"].register_payment(student.id, amount_cents, description),
+            lambda result: self.on_payment_registered(result, student, amount_cents, description),
+            error_callback=self.on_payment_error
         )
+
+    def on_payment_error(self, error):
+        self.btn_register.configure(state="normal")
+        messagebox.showerror("Error", f"Error al registrar el pago: {error}")
+
+    def on_payment_registered(self, result, student, amount_cents, description):
+        success, msg, receipt_number, payment_date, receipt_code = result
+        self.btn_register.configure(state="normal")
         if success:
-            formatted_student_name = f"{self.selected_student['nombre']} {self.selected_student['apellido']}".title()
-            self.generate_pdf(receipt_number, formatted_student_name, amount, description, payment_date)
-            formatted_receipt = self.format_receipt_number(receipt_number, payment_date)
-            messagebox.showinfo("Éxito", f"Pago registrado exitosamente.\nRecibo Nº: {formatted_receipt}")
+            formatted_student_name = f"{student.nombre} {student.apellido}".title()
+            if self.generate_pdf(receipt_number, receipt_code, formatted_student_name, amount_cents, description,
+                                 payment_date):
+                self.email_receipt(student.id, receipt_number, receipt_code)
+            messagebox.showinfo("Éxito", f"Pago registrado exitosamente.\nRecibo Nº: {receipt_code}")
             self.window.destroy()
         else:
             messagebox.showerror("Error", msg)
 
-    def format_receipt_number(self, receipt_number, payment_date):
-        """
-        Format the receipt number to incorporate the payment date.
-        For example, if payment_date is "2025-02-11 11:51:50" and receipt_number is 12,
-        the formatted number would be "20250211-0012".
-        """
-        try:
-            dt = datetime.datetime.strptime(payment_date, "%Y-%m-%d %H:%M:%S")
-            date_part = dt.strftime("%Y%m%d")
-            formatted_number = f"{date_part}-{int(receipt_number):04d}"
-            return formatted_number
-        except Exception as e:
-            return f"{receipt_number}"
-
-    def format_amount(self, amount):
-        """
-        Format the amount to separate thousands with dots and decimals with comma.
-        E.g., 1234567.89 becomes "1.234.567,89"
-        """
-        formatted = "{:,.2f}".format(amount)
-        # Swap comma and period.
-        formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-        return formatted
-
-    def generate_pdf(self, receipt_number, student_name, amount, description, payment_date):
+    def generate_pdf(self, receipt_number, receipt_code, student_name, amount_cents, description, payment_date):
         # Retrieve configuration from the database.
         configs = self.config_controller.get_all_configs()
         school_name = configs.get("SCHOOL_NAME", DEFAULT_SCHOOL_NAME)
         logo_path = configs.get("LOGO_PATH", DEFAULT_LOGO_PATH)
 
-        pdf = FPDF()
-        pdf.add_page()
-
-        # Insert the logo if available.
-        if logo_path:
-            try:
-                pdf.image(logo_path, x=10, y=8, w=30)
-            except Exception as e:
-                print("Error al cargar el logo en el PDF:", e)
-
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, school_name, ln=True, align="C")
-        pdf.ln(10)
-
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, "Recibo de Pago", ln=True, align="C")
-        pdf.ln(10)
-
-        formatted_receipt = self.format_receipt_number(receipt_number, payment_date)
-        pdf.cell(0, 10, f"Recibo Nº: {formatted_receipt}", ln=True)
-        pdf.cell(0, 10, f"Fecha y Hora: {payment_date}", ln=True)
-        pdf.cell(0, 10, f"Alumno: {student_name}", ln=True)
-
-        formatted_amount = self.format_amount(amount)
-        pdf.cell(0, 10, f"Monto: {formatted_amount}", ln=True)
-        pdf.cell(0, 10, f"Descripción: {description}", ln=True)
+        # Render the receipt once and keep it in the archive, so reprints never re-render it.
+        try:
+            self.receipt_archive.get_or_render(
+                receipt_number, payment_date,
+                lambda: render_receipt_pdf(school_name, logo_path, receipt_code, payment_date,
+                                           student_name, amount_cents, description)
+            )
+        except Exception as e:
+            traceback.print_exc()
+            messagebox.showerror("Error", f"Error al archivar el recibo: {e}")
+            return False
 
-        default_filename = f"recibo_{formatted_receipt}_{student_name.replace(' ', '_')}.pdf"
+        default_filename = f"recibo_{receipt_code}_{student_name.replace(' ', '_')}.pdf"
         file_path = filedialog.asksaveasfilename(
             defaultextension=".pdf",
             initialfile=default_filename,
@@ -197,4 +187,20 @@ class PaymentUI:
             filetypes=[("PDF files", "*.pdf")]
         )
         if file_path:
-            pdf.output(file_path)
\ No newline at end of file
+            self.receipt_archive.reprint_to(receipt_number, file_path)
+        return True
+
+    def email_receipt(self, student_id, receipt_number, receipt_code):
+        # Queue the receipt for the guardian (if they have an e-mail) and send it in the background.
+        # Both happen on the data thread, because this window closes right away.
+        pdf_bytes = self.receipt_archive.read(receipt_number)
+        if pdf_bytes is None:
+            return
+        school_name = self.config_controller.get_all_configs().get("SCHOOL_NAME", DEFAULT_SCHOOL_NAME)
+        db_name = self.db.db_name
+
+        def queue(controllers):
+            queued, _ = controllers["deliveries"].queue_receipt(student_id, receipt_code, pdf_bytes, school_name)
+            if queued:
+                get_delivery_worker(db_name).start()
+        self.data.submit(queue, None)
@@ -0,0 +1,122 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from src.controllers.course_controller import CourseController
+from src.controllers.promotion_controller import PromotionController
+
+NO_CHANGE = "(sin cambio)"
+GRADUATE = "Egresa"
+
+class PromotionUI:
+    """
+    Promoción de fin de año: para cada curso se elige el curso de destino o si egresa.
+    Se puede ver la cantidad de estudiantes afectados antes de aplicar, y deshacer la última promoción.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.course_controller = CourseController(db)
+        self.promotion_controller = PromotionController(db)
+        self.courses = self.course_controller.get_active_courses()
+        self.course_ids = {course.name: course.id for course in self.courses}
+        self.course_names = {course.id: course.name for course in self.courses}
+        self.window = tk.Toplevel()
+        self.window.title("Promoción de Fin de Año")
+        self.window.geometry("520x560")
+        self.create_widgets()
+        self.refresh_last_promotion()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        ttk.Label(frame, text="Curso actual").grid(row=0, column=0, sticky="w", padx=5)
+        ttk.Label(frame, text="Pasa a").grid(row=0, column=1, sticky="w", padx=5)
+        options = [NO_CHANGE, GRADUATE] + [course.name for course in self.courses]
+        self.targets = {}
+        for row, course in enumerate(self.courses, start=1):
+            ttk.Label(frame, text=course.name).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            combo = ttk.Combobox(frame, values=options, state="readonly")
+            combo.set(NO_CHANGE)
+            combo.grid(row=row, column=1, sticky="ew", padx=5, pady=2)
+            self.targets[course.id] = combo
+        frame.columnconfigure(1, weight=1)
+
+        # Año escolar al que pasan los promovidos: debe estar abierto y ser posterior al actual
+        year_row = len(self.courses) + 1
+        ttk.Label(frame, text="Año escolar de destino").grid(row=year_row, column=0, sticky="w", padx=5, pady=(10, 2))
+        open_years = self.promotion_controller.get_open_years()
+        self.combo_year = ttk.Combobox(frame, values=open_years, state="readonly")
+        if open_years:
+            self.combo_year.set(open_years[0])
+        self.combo_year.grid(row=year_row, column=1, sticky="ew", padx=5, pady=(10, 2))
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=len(self.courses) + 2, column=0, columnspan=2, pady=10)
+        ttk.Button(buttons, text="Vista Previa", command=self.preview).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="Aplicar Promoción", command=self.apply).grid(row=0, column=1, padx=5)
+        self.btn_undo = ttk.Button(buttons, text="Deshacer Última", command=self.undo)
+        self.btn_undo.grid(row=0, column=2, padx=5)
+
+        self.result_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.result_var, justify="left", wraplength=480).grid(
+            row=len(self.courses) + 3, column=0, columnspan=2, sticky="w")
+
+    def selected_mapping(self):
+        """Retorna (mapeo {origen: destino}, cursos que egresan) según lo elegido en la ventana."""
+        mapping, graduating = {}, []
+        for course_id, combo in self.targets.items():
+            choice = combo.get()
+            if choice == GRADUATE:
+                graduating.append(course_id)
+            elif choice != NO_CHANGE:
+                mapping[course_id] = self.course_ids[choice]
+        return mapping, graduating
+
+    def selected_year(self):
+        year = self.combo_year.get()
+        return int(year) if year else None
+
+    def preview(self):
+        mapping, graduating = self.selected_mapping()
+        error = (self.promotion_controller.validate(mapping, graduating)
+                 or self.promotion_controller.validate_target_year(mapping, graduating, self.selected_year()))
+        if error:
+            messagebox.showwarning("Advertencia", error)
+            return
+        lines = []
+        for source, target, students in self.promotion_controller.preview(mapping, graduating):
+            destination = self.course_names.get(target, target) if target is not None else GRADUATE.lower()
+            lines.append(f"{self.course_names.get(source, source)} → {destination}: {students} estudiantes")
+        self.result_var.set("\n".join(lines))
+
+    def apply(self):
+        mapping, graduating = self.selected_mapping()
+        academic_year = self.selected_year()
+        error = (self.promotion_controller.validate(mapping, graduating)
+                 or self.promotion_controller.validate_target_year(mapping, graduating, academic_year))
+        if error:
+            messagebox.showwarning("Advertencia", error)
+            return
+        total = sum(students for _, _, students in self.promotion_controller.preview(mapping, graduating))
+        if not messagebox.askyesno("Confirmar", f"Se modificarán {total} estudiantes. ¿Desea aplicar la promoción?"):
+            return
+        success, msg = self.promotion_controller.promote(mapping, graduating, academic_year)
+        self.show_message(success, msg)
+
+    def undo(self):
+        last = self.promotion_controller.get_last_promotion()
+        if not last:
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Deshacer la promoción del {last.created_at}?"):
+            return
+        success, msg = self.promotion_controller.undo_promotion(last.id)
+        self.show_message(success, msg)
+
+    def refresh_last_promotion(self):
+        self.btn_undo.configure(state="normal" if self.promotion_controller.get_last_promotion() else "disabled")
+
+    def show_message(self, success, msg):
+        self.result_var.set(msg)
+        self.refresh_last_promotion()
+        if success:
+            messagebox.showinfo("Éxito", msg)
+        else:
+            messagebox.showerror("Error", msg)
@@ -1,28 +1,58 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from fpdf import FPDF
 import datetime
 import traceback
 import os
 import locale
 from src.controllers.student_controller import StudentController
-from src.controllers.payment_controller import PaymentController
 from src.controllers.config_controller import ConfigController  # To retrieve school settings from the DB
+from src.utils.receipts import ReceiptArchive, render_receipt_pdf, receipt_code_of
+from src.utils.money import format_cents
+from src.utils.async_data import AsyncDataFacade, ChangeListener
+from src.utils.report_pdf import ReportPDF, describe_output
+from src.utils.tree_diff import upsert_row, delete_row
 from config import SCHOOL_NAME as DEFAULT_SCHOOL_NAME, LOGO_PATH as DEFAULT_LOGO_PATH
 
+# Cantidad de pagos que se cargan por página en el historial
+PAYMENTS_PAGE_SIZE = 50
+# iid de la fila que se muestra cuando el estudiante no tiene pagos
+EMPTY_ROW_IID = "sin_registros"
+
 class StudentDetailsWindow(tk.Toplevel):
-    def __init__(self, db, student_identificacion):
+    def __init__(self, db, student_identificacion, data=None):
         super().__init__()
         self.db = db
         self.student_identificacion = student_identificacion
+        # Historial de pagos ya leído (compartido entre la tabla y la exportación a PDF)
+        self.student = None
+        # Hermanos: los demás estudiantes del mismo acudiente
+        self.siblings = []
+        self.payments = []
+        self.payments_cursor = None
+        self.payments_exhausted = False
+        self.payments_loading = False
+        # Consultas en segundo plano; si la ventana se abre sola, usa su propia fachada
+        self.owns_data = data is None
+        self.data = data or AsyncDataFacade(db, self)
+        self.page_key = f"payments_page_{id(self)}"
         self.student_controller = StudentController(db)
-        self.payment_controller = PaymentController(db)
         self.config_controller = ConfigController(db)
+        self.receipt_archive = ReceiptArchive(db)
         self.title("Detalles del Estudiante")
         self.geometry("700x550")
         self.create_widgets()
+        self.bind("<Destroy>", self.on_destroy)
+        self.changes = ChangeListener(db, self, ("students", "payments"), self.on_data_changed)
         self.load_student_details()
 
+    def on_destroy(self, event):
+        if event.widget is not self:
+            return
+        self.changes.close()
+        self.data.cancel_key(self.page_key)
+        if self.owns_data:
+            self.data.close()
+
     def create_widgets(self):
         self.frame_details = ttk.Frame(self, padding=10)
         self.frame_details.pack(fill="both", expand=True)
@@ -46,6 +76,9 @@ class StudentDetailsWindow(tk.Toplevel):
 
         self.btn_export_pdf = ttk.Button(self.buttons_frame, text="Exportar a PDF", command=self.export_pdf)
         self.btn_export_pdf.grid(row=0, column=2, padx=5)
+
+        self.btn_history = ttk.Button(self.buttons_frame, text="Años Anteriores", command=self.show_archived_history)
+        self.btn_history.grid(row=0, column=3, padx=5)
         
         # Etiqueta para el historial de pagos
         self.label_history = ttk.Label(self.frame_details, text="Historial de Pagos", font=("Arial", 14, "bold"))
@@ -53,7 +86,10 @@ class StudentDetailsWindow(tk.Toplevel):
         
         # Creando la tabla para mostrar los pagos
         columns = ("receipt", "amount", "date", "description")
-        self.tree_payments = ttk.Treeview(self.frame_details, columns=columns, show="headings", height=8)
+        # Barra de desplazamiento: al acercarse al final se carga la siguiente página de pagos
+        self.payments_frame = ttk.Frame(self.frame_details)
+        self.payments_frame.pack(pady=5, fill="x")
+        self.tree_payments = ttk.Treeview(self.payments_frame, columns=columns, show="headings", height=8)
         self.tree_payments.heading("receipt", text="Nº Recibo")
         self.tree_payments.heading("amount", text="Monto")
         self.tree_payments.heading("date", text="Fecha de Pago")
@@ -64,98 +100,242 @@ class StudentDetailsWindow(tk.Toplevel):
         self.tree_payments.column("date", width=150, anchor="center")
         self.tree_payments.column("description", width=300, anchor="w")
         
-        self.tree_payments.pack(pady=5, fill="x")
+        self.scroll_payments = ttk.Scrollbar(self.payments_frame, orient="vertical", command=self.tree_payments.yview)
+        self.tree_payments.configure(yscrollcommand=self.on_payments_scroll)
+        self.scroll_payments.pack(side="right", fill="y")
+        self.tree_payments.pack(side="left", fill="x", expand=True)
         self.tree_payments.bind("<Double-1>", self.on_payment_double_click)
         
     def load_student_details(self):
+        """
+        Lee el estudiante y la primera página de su historial en el hilo de datos.
+        """
+        identificacion = self.student_identificacion
+
+        def fetch(controllers):
+            student = controllers["students"].get_student_by_identification(identificacion)
+            if not student:
+                return None, [], None, []
+            rows, next_cursor = controllers["payments"].get_payments_page(student.id, None, PAYMENTS_PAGE_SIZE)
+            return student, rows, next_cursor, controllers["guardians"].get_siblings(student.id)
+
+        self.payments_loading = True
+        self.data.submit(
+            fetch, self.show_student_details, key=f"student_details_{id(self)}",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al cargar los detalles del estudiante: {e}")
+        )
+
+    def show_student_details(self, result):
         try:
-            student_row = self.student_controller.get_student_by_identification(self.student_identificacion)
-            if not student_row:
+            student, rows, next_cursor, siblings = result
+            self.payments_loading = False
+            if not student:
                 messagebox.showerror("Error", "No se encontró el estudiante.")
                 self.destroy()
                 return
 
-            student = dict(student_row)
-            # Formatear primera letra de nombre, apellido y representante en mayúscula
-            nombre = student.get('nombre', '').capitalize()
-            apellido = student.get('apellido', '').capitalize()
-            representante = student.get('representante', '')
-            if representante:
-                representante = representante.capitalize()
+            self.student = student
+            self.siblings = siblings
+            self.show_student_info(student)
 
-            info = (
-                f"ID: {student.get('id', '')}\n"
-                f"Identificación: {student.get('identificacion', '')}\n"
-                f"Nombre: {nombre}\n"
-                f"Apellido: {apellido}\n"
-                f"Curso: {student.get('course_name', '')}\n"
-                f"Representante: {representante}\n"
-                f"Teléfono: {student.get('telefono', '')}\n"
-                f"Estado: {'Activo' if student.get('active', 1) == 1 else 'Desactivado'}\n"
-            )
-            
-            self.details_text.configure(state="normal")
-            self.details_text.delete("1.0", tk.END)
-            self.details_text.insert(tk.END, info)
-            self.details_text.configure(state="disabled")
-            
-            # Cargar y mostrar el historial de pagos en la tabla
+            # Cargar la primera página del historial de pagos; el resto se carga al desplazarse
             for row in self.tree_payments.get_children():
                 self.tree_payments.delete(row)
-            
-            history_rows = self.payment_controller.get_payments_by_student(student.get("id"))
-            if history_rows:
-                for payment_row in history_rows:
-                    payment = dict(payment_row)
-                    self.tree_payments.insert("", tk.END, values=(
-                        payment.get("receipt_number", ""),
-                        payment.get("amount", ""),
-                        payment.get("payment_date", ""),
-                        payment.get("description", "")
-                    ))
+            self.payments = []
+            self.payments_cursor = None
+            self.payments_exhausted = False
+
+            new_payments = self.apply_payments_page(None, rows, next_cursor)
+            if new_payments:
+                self.insert_payments_into_tree(new_payments)
             else:
-                self.tree_payments.insert("", tk.END, values=("No hay registros", "", "", ""))
+                self.tree_payments.insert("", tk.END, iid=EMPTY_ROW_IID, values=("No hay registros", "", "", ""))
         except Exception as e:
             traceback.print_exc()
             messagebox.showerror("Error", f"Error al cargar los detalles del estudiante: {e}")
 
+    def show_student_info(self, student):
+        # Formatear primera letra de nombre, apellido y representante en mayúscula
+        nombre = (student.nombre or '').capitalize()
+        apellido = (student.apellido or '').capitalize()
+        representante = student.representante or ''
+        if representante:
+            representante = representante.capitalize()
+
+        info = (
+            f"ID: {student.id}\n"
+            f"Identificación: {student.identificacion}\n"
+            f"Nombre: {nombre}\n"
+            f"Apellido: {apellido}\n"
+            f"Curso: {student.course_name or ''}\n"
+            f"Representante: {representante}\n"
+            f"Teléfono: {student.telefono or ''}\n"
+            f"Estado: {'Activo' if student.active == 1 else 'Desactivado'}\n"
+        )
+        if self.siblings:
+            names = ", ".join(f"{s.nombre or ''} {s.apellido or ''} ({s.course_name or ''})".title() for s in self.siblings)
+            info += f"Hermanos: {names}\n"
+
+        
+        self.details_text.configure(state="normal")
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.insert(tk.END, info)
+        self.details_text.configure(state="disabled")
+
+    def on_data_changed(self, events):
+        """
+        Aplica los cambios confirmados sin recargar la ventana: actualiza los datos del estudiante
+        si cambió y agrega al inicio del historial los pagos nuevos de este estudiante.
+        """
+        if not self.student:
+            return
+        student_id = self.student.id
+        student_changed = any(e.table == "students" and e.pk == student_id and e.action == "update" for e in events)
+        payment_ids = [e.pk for e in events if e.table == "payments" and e.action == "insert"]
+        if not student_changed and not payment_ids:
+            return
+
+        def fetch(controllers):
+            student = controllers["students"].get_student_by_id(student_id) if student_changed else None
+            siblings = controllers["guardians"].get_siblings(student_id) if student_changed else None
+            payments = [controllers["payments"].get_payment_by_id(payment_id) for payment_id in payment_ids]
+            return student, siblings, [p for p in payments if p and p.student_id == student_id]
+
+        self.data.submit(fetch, self.apply_changes)
+
+    def apply_changes(self, result):
+        student, siblings, new_payments = result
+        if student:
+            self.student = student
+            self.siblings = siblings
+            self.show_student_info(student)
+        if new_payments:
+            delete_row(self.tree_payments, EMPTY_ROW_IID)
+            # El historial se muestra del más reciente al más antiguo
+            for payment in sorted(new_payments, key=lambda p: (p.payment_date, p.id)):
+                if not self.tree_payments.exists(str(payment.id)):
+                    self.payments.insert(0, payment)
+                self.insert_payment_row(payment, 0)
+
+    def apply_payments_page(self, requested_cursor, rows, next_cursor):
+        """
+        Agrega a la caché una página leída a partir de 'requested_cursor'. Si mientras tanto
+        la caché avanzó (por ejemplo, la exportación leyó el resto del historial), la página
+        se descarta. Retorna la lista de pagos nuevos.
+        """
+        if requested_cursor != self.payments_cursor:
+            return []
+        new_payments = list(rows)
+        self.payments.extend(new_payments)
+        self.payments_cursor = next_cursor
+        self.payments_exhausted = next_cursor is None
+        return new_payments
+
+    def load_remaining_payments(self, callback):
+        """
+        Lee en el hilo de datos el resto del historial a partir de lo ya cargado, lo agrega a la
+        caché y a la tabla, y luego llama a callback(pagos) con el historial completo.
+        La tabla y la exportación comparten así una sola lectura.
+        """
+        if self.payments_exhausted:
+            callback(self.payments)
+            return
+        student_id = self.student.id
+        # La página que se estuviera cargando por el desplazamiento queda incluida en esta lectura
+        self.data.cancel_key(self.page_key)
+        self.payments_loading = True
+        requested_cursor = self.payments_cursor
+
+        def fetch(controllers):
+            rows, cursor = [], requested_cursor
+            while True:
+                page, cursor = controllers["payments"].get_payments_page(student_id, cursor, PAYMENTS_PAGE_SIZE)
+                rows.extend(page)
+                if cursor is None:
+                    return rows
+
+        def on_rows(rows):
+            self.payments_loading = False
+            new_payments = self.apply_payments_page(requested_cursor, rows, None)
+            if new_payments:
+                delete_row(self.tree_payments, EMPTY_ROW_IID)
+                self.insert_payments_into_tree(new_payments)
+            callback(self.payments)
+
+        def on_error(error):
+            self.payments_loading = False
+            self.btn_export_pdf.configure(state="normal")
+            messagebox.showerror("Error", f"Error al leer el historial de pagos: {error}")
+
+        self.data.submit(fetch, on_rows, key=f"all_payments_{id(self)}", error_callback=on_error)
+
+    def insert_payments_into_tree(self, payments):
+        for payment in payments:
+            self.insert_payment_row(payment)
+
+    def insert_payment_row(self, payment, index=tk.END):
+        upsert_row(self.tree_payments, payment.id, (
+            receipt_code_of(payment),
+            format_cents(payment.amount_cents),
+            payment.payment_date,
+            payment.description or ""
+        ), index)
+
+    def on_payments_scroll(self, first, last):
+        """
+        Actualiza la barra de desplazamiento y, cuando la vista llega cerca del final,
+        carga la siguiente página de pagos.
+        """
+        self.scroll_payments.set(first, last)
+        if self.payments_exhausted or self.payments_loading or not self.student or float(last) < 0.95:
+            return
+        student_id = self.student.id
+        requested_cursor = self.payments_cursor
+        self.payments_loading = True
+
+        def on_page(result):
+            self.payments_loading = False
+            rows, next_cursor = result
+            new_payments = self.apply_payments_page(requested_cursor, rows, next_cursor)
+            if new_payments:
+                self.insert_payments_into_tree(new_payments)
+
+        def on_error(error):
+            self.payments_loading = False
+
+        self.data.submit(
+            lambda controllers: controllers["payments"].get_payments_page(student_id, requested_cursor, PAYMENTS_PAGE_SIZE),
+            on_page, key=self.page_key, error_callback=on_error
+        )
+
     def on_payment_double_click(self, event):
         try:
             selected_item = self.tree_payments.selection()
             if not selected_item:
                 return
-            values = self.tree_payments.item(selected_item, "values")
             # Verificar si hay un registro válido (evitar el mensaje "No hay registros")
-            if values[0] == "No hay registros":
+            if selected_item[0] == EMPTY_ROW_IID:
                 return
-            
-            # Extraer datos del pago seleccionado
-            receipt_number, amount, payment_date, description = values
-
-            # Obtener datos del colegio desde la configuración
-            configs = self.config_controller.get_all_configs()
-            school_name = configs.get("SCHOOL_NAME", DEFAULT_SCHOOL_NAME).title()
-            logo_path = configs.get("LOGO_PATH", DEFAULT_LOGO_PATH)
-            
-            # Formatear el monto con coma como separador de miles y punto decimal
-            try:
-                formatted_amount = f"{float(amount):,.2f}"
-            except Exception:
-                formatted_amount = amount
+            # Extraer datos del pago seleccionado (la fila se identifica con el id del pago)
+            payment = next((p for p in self.payments if str(p.id) == selected_item[0]), None)
+            if payment is None:
+                return
+            receipt_number, payment_date = payment.receipt_number, payment.payment_date
+            receipt_code = receipt_code_of(payment)
+            amount_cents, description = payment.amount_cents, payment.description or ""
 
-            # Generar PDF del recibo de pago
-            pdf = FPDF()
-            pdf.add_page()
-            
-            add_pdf_header(pdf, logo_path, school_name, f"Recibo de Pago Nº {receipt_number}")
+            # Si el recibo ya está archivado se reimprime tal cual; si no, se genera una sola vez.
+            def render():
+                configs = self.config_controller.get_all_configs()
+                school_name = configs.get("SCHOOL_NAME", DEFAULT_SCHOOL_NAME)
+                logo_path = configs.get("LOGO_PATH", DEFAULT_LOGO_PATH)
+                student_name = f"{self.student.nombre} {self.student.apellido}".title()
+                return render_receipt_pdf(school_name, logo_path, receipt_code, payment_date,
+                                          student_name, amount_cents, description)
+            self.receipt_archive.get_or_render(receipt_number, payment_date, render)
 
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(0, 10, f"Monto: {formatted_amount}", ln=True)
-            pdf.cell(0, 10, f"Fecha de Pago: {payment_date}", ln=True)
-            pdf.multi_cell(0, 10, f"Descripción: {description}")
-            
             # Permitir guardar el PDF
-            default_filename = f"recibo_{receipt_number}.pdf"
+            default_filename = f"recibo_{receipt_code}.pdf"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".pdf",
                 initialfile=default_filename,
@@ -163,12 +343,39 @@ class StudentDetailsWindow(tk.Toplevel):
                 filetypes=[("PDF files", "*.pdf")]
             )
             if file_path:
-                pdf.output(file_path)
+                self.receipt_archive.reprint_to(receipt_number, file_path)
                 messagebox.showinfo("Éxito", f"Recibo guardado exitosamente: {file_path}")
         except Exception as e:
             traceback.print_exc()
             messagebox.showerror("Error", f"Error al generar el recibo de pago: {e}")
 
+    def show_archived_history(self):
+        """Pagos del estudiante de todos los años, incluidos los archivados, en una ventana aparte."""
+        identificacion = self.student_identificacion
+        self.data.submit(
+            lambda controllers: controllers["archive"].get_payment_history(identificacion),
+            self.show_history_window,
+            key=f"history_{id(self)}",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al consultar el historial: {e}")
+        )
+
+    def show_history_window(self, payments):
+        window = tk.Toplevel(self)
+        window.title("Historial de Años Anteriores")
+        window.geometry("600x350")
+        columns = ("receipt", "amount", "date", "description")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        headings = {"receipt": "Nº Recibo", "amount": "Monto", "date": "Fecha de Pago", "description": "Descripción"}
+        for col in columns:
+            tree.heading(col, text=headings[col])
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+        if not payments:
+            tree.insert("", tk.END, values=("", "", "Sin registros", ""))
+        for payment in payments:
+            tree.insert("", tk.END, values=(
+                receipt_code_of(payment), format_cents(payment.amount_cents), payment.payment_date, payment.description or ""
+            ))
+
     def deactivate_student(self):
         try:
             confirm = messagebox.askyesno("Confirmar", "¿Está seguro de desactivar este estudiante?")
@@ -177,7 +384,6 @@ class StudentDetailsWindow(tk.Toplevel):
             success, msg = self.student_controller.deactivate_student(self.student_identificacion)
             if success:
                 messagebox.showinfo("Éxito", "Estudiante desactivado correctamente.")
-                self.load_student_details()
             else:
                 messagebox.showerror("Error", msg)
         except Exception as e:
@@ -200,6 +406,14 @@ class StudentDetailsWindow(tk.Toplevel):
             messagebox.showerror("Error", f"Error al eliminar el estudiante: {e}")
 
     def export_pdf(self):
+        if not self.student:
+            messagebox.showerror("Error", "No se encontró el estudiante.")
+            return
+        self.btn_export_pdf.configure(state="disabled")
+        self.load_remaining_payments(self.write_pdf)
+
+    def write_pdf(self, history):
+        self.btn_export_pdf.configure(state="normal")
         try:
             # Establecer la configuración regional a español para las fechas
             try:
@@ -212,20 +426,19 @@ class StudentDetailsWindow(tk.Toplevel):
             school_name = configs.get("SCHOOL_NAME", DEFAULT_SCHOOL_NAME).title()
             logo_path = configs.get("LOGO_PATH", DEFAULT_LOGO_PATH)
             
-            pdf = FPDF()
+            pdf = ReportPDF()
             pdf.add_page()
             
             add_pdf_header(pdf, logo_path, school_name)
 
-            student_row = self.student_controller.get_student_by_identification(self.student_identificacion)
-            if not student_row:
+            student = self.student
+            if not student:
                 messagebox.showerror("Error", "No se encontró el estudiante.")
                 return
-            
-            student = dict(student_row)
-            nombre = student.get('nombre', '').capitalize()
-            apellido = student.get('apellido', '').capitalize()
-            representante = student.get('representante', '')
+
+            nombre = (student.nombre or '').capitalize()
+            apellido = (student.apellido or '').capitalize()
+            representante = student.representante or ''
             if representante:
                 representante = representante.capitalize()
             
@@ -237,13 +450,13 @@ class StudentDetailsWindow(tk.Toplevel):
             
             pdf.set_font("Arial", "", 12)
             datos = [
-                ("Identificación", student.get('identificacion', '')),
+                ("Identificación", student.identificacion),
                 ("Nombre", nombre),
                 ("Apellido", apellido),
-                ("Curso", student.get('course_name', '')),
+                ("Curso", student.course_name or ''),
                 ("Representante", representante),
-                ("Teléfono", student.get('telefono', '')),
-                ("Estado", "Activo" if student.get('active', 1) == 1 else "Desactivado")
+                ("Teléfono", student.telefono or ''),
+                ("Estado", "Activo" if student.active == 1 else "Desactivado")
             ]
             for campo, valor in datos:
                 pdf.cell(cell_width1, 10, campo, border=1)
@@ -264,15 +477,13 @@ class StudentDetailsWindow(tk.Toplevel):
             pdf.ln()
             
             pdf.set_font("Arial", "", 12)
-            history_rows = self.payment_controller.get_payments_by_student(student.get("id"))
-            if history_rows:
-                for payment_row in history_rows:
-                    payment = dict(payment_row)
+            if history:
+                for payment in history:
                     row_data = [
-                        str(payment.get("receipt_number", "")),
-                        str(payment.get("amount", "")),
-                        str(payment.get("payment_date", "")),
-                        str(payment.get("description", ""))
+                        receipt_code_of(payment),
+                        format_cents(payment.amount_cents),
+                        str(payment.payment_date),
+                        str(payment.description or "")
                     ]
                     for i, data in enumerate(row_data):
                         pdf.cell(col_widths[i], 10, data, border=1)
@@ -285,7 +496,7 @@ class StudentDetailsWindow(tk.Toplevel):
             emission_date = datetime.datetime.now().strftime("%d de %B de %Y")
             pdf.cell(0, 10, f"Generado el {emission_date}", ln=True, align="R")
             
-            default_filename = f"{student.get('identificacion','')}_{student.get('nombre','')}_{student.get('apellido','')}.pdf"
+            default_filename = f"{student.identificacion}_{student.nombre}_{student.apellido}.pdf"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".pdf",
                 initialfile=default_filename,
@@ -293,8 +504,8 @@ class StudentDetailsWindow(tk.Toplevel):
                 filetypes=[("PDF files", "*.pdf")]
             )
             if file_path:
-                pdf.output(file_path)
-                messagebox.showinfo("Éxito", f"PDF exportado exitosamente: {file_path}")
+                size, seconds = pdf.save(file_path)
+                messagebox.showinfo("Éxito", f"PDF exportado exitosamente: {file_path}\n({describe_output(size, seconds)})")
         except Exception as e:
             traceback.print_exc()
             messagebox.showerror("Error", f"Error al exportar a PDF: {e}")
@@ -0,0 +1,118 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import datetime
+from src.controllers.system_status_controller import ROWS_FROM_STATS, ROWS_FROM_ROWID
+
+# Cada cuántos milisegundos se actualiza el panel mientras está abierto
+STATUS_REFRESH_MS = 5000
+
+ROW_SOURCES = {ROWS_FROM_STATS: "estadística", ROWS_FROM_ROWID: "máx. rowid", None: "sin estadística"}
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def format_date(value):
+    return value.strftime("%d/%m/%Y %H:%M") if value else "Nunca"
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+
+class SystemStatusUI:
+    """
+    Estado del sistema para administradores: tamaños de la base y del WAL, filas por tabla,
+    caché, consultas lentas, duración de las exportaciones y último respaldo. Los datos se
+    acumulan mientras la aplicación trabaja, así que el panel abre al instante.
+    """
+    def __init__(self, db, data):
+        self.db = db
+        self.data = data
+        self.window = tk.Toplevel()
+        self.window.title("Estado del Sistema")
+        self.window.geometry("860x520")
+        self.after_id = None
+        self.create_widgets()
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.load_status()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        self.summary_var = tk.StringVar(value="Cargando...")
+        ttk.Label(frame, textvariable=self.summary_var, justify="left").pack(anchor="w", pady=5)
+
+        notebook = ttk.Notebook(frame)
+        notebook.pack(fill="both", expand=True)
+        self.trees = {}
+        tabs = [
+            ("tables", "Tablas", {"table": ("Tabla", 220), "rows": ("Filas", 120), "source": ("Origen", 140)}),
+            ("slow", "Consultas Lentas", {"time": ("Hora", 80), "ms": ("ms", 70), "sql": ("Consulta", 640)}),
+            ("expensive", "Más Costosas", {"sql": ("Consulta", 520), "calls": ("Llamadas", 80),
+                                           "total": ("Total ms", 90), "worst": ("Peor ms", 80)}),
+            ("jobs", "Exportaciones", {"time": ("Hora", 80), "name": ("Tarea", 260), "seconds": ("Segundos", 90),
+                                       "status": ("Estado", 90)}),
+            ("caches", "Cachés", {"name": ("Caché", 260), "hits": ("Aciertos", 100), "misses": ("Fallos", 100),
+                                  "ratio": ("% aciertos", 100)}),
+        ]
+        for key, title, columns in tabs:
+            tab = ttk.Frame(notebook)
+            notebook.add(tab, text=title)
+            tree = ttk.Treeview(tab, columns=tuple(columns), show="headings")
+            for col, (heading, width) in columns.items():
+                tree.heading(col, text=heading)
+                tree.column(col, width=width, anchor="w" if col in ("table", "sql", "name") else "center")
+            tree.pack(fill="both", expand=True)
+            self.trees[key] = tree
+        ttk.Button(frame, text="Actualizar", command=self.load_status).pack(pady=5)
+
+    def on_destroy(self, event):
+        if event.widget is not self.window:
+            return
+        self.data.cancel_key("system_status")
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+
+    def load_status(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+        self.data.submit(
+            lambda controllers: controllers["status"].get_status(),
+            self.show_status,
+            key="system_status",
+            error_callback=lambda e: messagebox.showerror("Error", f"Error al leer el estado del sistema: {e}")
+        )
+
+    def show_status(self, status):
+        cache_share = status["cache_bytes"] / status["db_size"] * 100 if status["db_size"] else 100
+        self.summary_var.set(
+            f"Base de datos: {status['db_path']}\n"
+            f"Tamaño: {format_size(status['db_size'])}   WAL: {format_size(status['wal_size'])}   "
+            f"Páginas: {status['page_count']} de {format_size(status['page_size'])} "
+            f"({status['free_pages']} libres)\n"
+            f"Caché de páginas de SQLite: {format_size(status['cache_bytes'])} "
+            f"({min(cache_share, 100):.0f}% de la base)   Consultas medidas: {status['queries']}\n"
+            f"Último respaldo: {format_date(status['last_backup'])}   "
+            f"Última optimización (ANALYZE): {format_date(status['last_optimize'])}"
+        )
+        self.fill("tables", [(table, "" if rows is None else f"{rows:,}".replace(",", "."), ROW_SOURCES[source])
+                             for table, rows, source in status["tables"]])
+        self.fill("slow", [(format_time(when), f"{seconds * 1000:.0f}", " ".join(sql.split()))
+                           for when, seconds, sql in status["slow_queries"]])
+        self.fill("expensive", [(" ".join(sql.split()), calls, f"{total * 1000:.0f}", f"{worst * 1000:.0f}")
+                                for sql, calls, total, worst in status["expensive_queries"]])
+        self.fill("jobs", [(format_time(job.finished), job.name, f"{job.seconds:.2f}", "OK" if job.ok else "Error")
+                           for job in status["jobs"]])
+        self.fill("caches", [(name, hits, misses, "" if ratio is None else f"{ratio * 100:.0f}%")
+                             for name, hits, misses, ratio in status["caches"]])
+        self.after_id = self.window.after(STATUS_REFRESH_MS, self.load_status)
+
+    def fill(self, key, rows):
+        tree = self.trees[key]
+        tree.delete(*tree.get_children())
+        for values in rows:
+            tree.insert("", "end", values=values)
@@ -0,0 +1,56 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import date
+from src.controllers.tuition_controller import TuitionController
+from src.utils.money import format_cents, parse_amount
+
+class TuitionPlanUI:
+    """Formulario del plan de pagos de un curso: matrícula, cuota mensual y vencimientos."""
+    def __init__(self, db, course_id, course_name):
+        self.db = db
+        self.course_id = course_id
+        self.tuition_controller = TuitionController(db)
+        self.window = tk.Toplevel()
+        self.window.title(f"Plan de Pagos - {course_name}")
+        self.window.geometry("380x300")
+        self.create_widgets()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(expand=True, fill="both")
+        plan = self.tuition_controller.get_plan(self.course_id)
+        fields = [
+            ("Matrícula", "enrollment_fee", format_cents(plan.enrollment_fee_cents if plan else 0)),
+            ("Cuota mensual", "monthly_fee", format_cents(plan.monthly_fee_cents if plan else 0)),
+            ("Fecha de inicio (AAAA-MM-DD)", "start_date", plan.start_date if plan else date.today().isoformat()),
+            ("Cantidad de cuotas", "installments", plan.installments if plan else 10),
+            ("Día de vencimiento", "due_day", plan.due_day if plan else 5),
+        ]
+        self.entries = {}
+        for row, (label, key, value) in enumerate(fields):
+            ttk.Label(frame, text=f"{label}:").grid(row=row, column=0, sticky="w", padx=5, pady=5)
+            entry = ttk.Entry(frame)
+            entry.insert(0, str(value))
+            entry.grid(row=row, column=1, padx=5, pady=5, sticky="ew")
+            self.entries[key] = entry
+        frame.columnconfigure(1, weight=1)
+        ttk.Button(frame, text="Guardar", command=self.save_plan).grid(row=len(fields), column=0, columnspan=2, pady=15)
+
+    def save_plan(self):
+        try:
+            monthly_fee_cents = parse_amount(self.entries["monthly_fee"].get())
+            enrollment_fee_cents = parse_amount(self.entries["enrollment_fee"].get())
+            installments = int(self.entries["installments"].get())
+            due_day = int(self.entries["due_day"].get())
+        except ValueError:
+            messagebox.showwarning("Valor inválido", "Los montos, la cantidad de cuotas y el día deben ser numéricos.")
+            return
+        success, msg = self.tuition_controller.set_plan(
+            self.course_id, monthly_fee_cents, enrollment_fee_cents, self.entries["start_date"].get().strip(),
+            installments, due_day
+        )
+        if success:
+            messagebox.showinfo("Éxito", msg)
+            self.window.destroy()
+        else:
+            messagebox.showerror("Error", msg)